@@ -0,0 +1,182 @@
+"""
+Database-side duration statistics
+
+duration_stats() summarises the time between two datetime fields of a
+queryset (average, percentiles and a histogram) without loading model
+instances:
+
+- average and histogram: one aggregate query over an F(end) - F(start)
+  expression with conditional counts per bucket
+- percentiles: PERCENTILE_CONT on PostgreSQL; elsewhere each percentile is
+  read from the ordered durations with an OFFSET query and interpolated the
+  same way PERCENTILE_CONT does
+- backends without interval arithmetic: a single streamed values_list pass
+"""
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, DurationField, ExpressionWrapper, F, Q
+
+
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.99)
+
+# Upper bounds of the default histogram buckets; a final open bucket catches the rest
+DEFAULT_BUCKETS = (
+    timedelta(hours=1),
+    timedelta(hours=6),
+    timedelta(days=1),
+    timedelta(days=3),
+    timedelta(days=7),
+    timedelta(days=14),
+    timedelta(days=30),
+)
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY expression)"""
+
+    function = 'PERCENTILE_CONT'
+    name = 'PercentileCont'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), output_field=DurationField(), **extra)
+
+
+def duration_expression(end_field, start_field):
+    """F(end) - F(start) as a DurationField expression"""
+    return ExpressionWrapper(F(end_field) - F(start_field), output_field=DurationField())
+
+
+def duration_stats(queryset, end_field, start_field, percentiles=DEFAULT_PERCENTILES, buckets=DEFAULT_BUCKETS):
+    """
+    Summarise end_field - start_field over a queryset
+
+    Rows where either field is NULL are ignored.
+
+    Args:
+        queryset: Source queryset
+        end_field: Name of the later datetime field
+        start_field: Name of the earlier datetime field
+        percentiles: Fractions between 0 and 1
+        buckets: Ascending histogram upper bounds (timedelta)
+
+    Returns:
+        dict: {'count', 'average', 'percentiles': {p: timedelta}, 'histogram': [(upper_bound, count)]}
+              Durations are timedeltas (None when there are no rows); the last
+              histogram bucket has an upper bound of None.
+    """
+    queryset = queryset.filter(**{
+        f'{end_field}__isnull': False,
+        f'{start_field}__isnull': False,
+    }).order_by()
+    connection = connections[queryset.db]
+    if not connection.features.supports_temporal_subtraction:
+        return _streamed_stats(queryset, end_field, start_field, percentiles, buckets)
+
+    durations = queryset.annotate(_duration=duration_expression(end_field, start_field))
+
+    aggregates = {'count': Count('pk'), 'average': Avg('_duration')}
+    lower = None
+    for index, upper in enumerate(list(buckets) + [None]):
+        bucket = Q()
+        if lower is not None:
+            bucket &= Q(_duration__gt=lower)
+        if upper is not None:
+            bucket &= Q(_duration__lte=upper)
+        aggregates[f'bucket_{index}'] = Count('pk', filter=bucket)
+        lower = upper
+
+    use_percentile_cont = connection.vendor == 'postgresql'
+    if use_percentile_cont:
+        for index, p in enumerate(percentiles):
+            aggregates[f'p_{index}'] = PercentileCont('_duration', p)
+
+    row = durations.aggregate(**aggregates)
+    count = row['count']
+
+    if use_percentile_cont:
+        values = {p: row[f'p_{index}'] for index, p in enumerate(percentiles)}
+    else:
+        values = {p: _offset_percentile(durations, count, p) for p in percentiles}
+
+    return {
+        'count': count,
+        'average': row['average'] if count else None,
+        'percentiles': values,
+        'histogram': [
+            (upper, row[f'bucket_{index}'])
+            for index, upper in enumerate(list(buckets) + [None])
+        ],
+    }
+
+
+def _offset_percentile(durations, count, p):
+    """PERCENTILE_CONT(p) from the ordered durations, reading at most two rows"""
+    if not count:
+        return None
+    position = p * (count - 1)
+    index = int(position)
+    pair = list(durations.order_by('_duration').values_list('_duration', flat=True)[index:index + 2])
+    if len(pair) == 1 or position == index:
+        return pair[0]
+    return pair[0] + (pair[1] - pair[0]) * (position - index)
+
+
+def _streamed_stats(queryset, end_field, start_field, percentiles, buckets):
+    """Pure-Python fallback for backends that cannot subtract datetimes"""
+    bounds = list(buckets)
+    counts = [0] * (len(bounds) + 1)
+    durations = []
+    for end, start in queryset.values_list(end_field, start_field).iterator(chunk_size=2000):
+        duration = end - start
+        durations.append(duration)
+        index = next((i for i, upper in enumerate(bounds) if duration <= upper), len(bounds))
+        counts[index] += 1
+
+    durations.sort()
+    count = len(durations)
+    values = {}
+    for p in percentiles:
+        if not count:
+            values[p] = None
+            continue
+        position = p * (count - 1)
+        index = int(position)
+        value = durations[index]
+        if index + 1 < count and position != index:
+            value += (durations[index + 1] - value) * (position - index)
+        values[p] = value
+
+    return {
+        'count': count,
+        'average': sum(durations, timedelta(0)) / count if count else None,
+        'percentiles': values,
+        'histogram': list(zip(bounds + [None], counts)),
+    }
+
+
+def summarise(stats, unit=timedelta(hours=1), digits=2):
+    """
+    API-friendly view of duration_stats() output in a given unit
+
+    Returns:
+        dict: count, average, median, p90, p99 and histogram in `unit`s
+    """
+    def scale(value):
+        if value is None:
+            return None
+        return round(value / unit, digits)
+
+    percentiles = stats['percentiles']
+    return {
+        'count': stats['count'],
+        'average': scale(stats['average']),
+        'median': scale(percentiles.get(0.5)),
+        'p90': scale(percentiles.get(0.9)),
+        'p99': scale(percentiles.get(0.99)),
+        'histogram': [
+            {'upper_bound': scale(upper), 'count': count}
+            for upper, count in stats['histogram']
+        ],
+    }
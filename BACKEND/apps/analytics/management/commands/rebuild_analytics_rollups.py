@@ -0,0 +1,45 @@
+"""
+Django management command to rebuild the analytics rollup tables.
+Run once after migrating, and whenever rollups may have drifted (for example
+after raw SQL edits or restores).
+Usage: python manage.py rebuild_analytics_rollups [--only clearances approvals payments students] [--days 30]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the analytics rollup tables from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=sorted(rollups.SPECS),
+            help='Rollups to rebuild (default: all)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only recompute the last N days instead of everything',
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild each requested rollup."""
+        names = options['only'] or list(rollups.SPECS)
+        days = None
+        if options['days'] is not None:
+            today = timezone.localdate()
+            days = [today - timedelta(days=n) for n in range(max(options['days'], 1))]
+
+        for name in names:
+            if days is None:
+                written = rollups.rebuild([name])[name]
+            else:
+                written = rollups.refresh_days(name, days)
+            self.stdout.write(self.style.SUCCESS(f'✓ {name}: {written} rollup rows written'))
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:19
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('departments', '0001_initial'),
+        ('academics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField(help_text='Day the student records were created (local time)')),
+                ('graduation_year', models.IntegerField(blank=True, help_text='Graduation year', null=True)),
+                ('admission_year', models.IntegerField(blank=True, help_text='Admission year', null=True)),
+                ('eligibility_status', models.CharField(help_text='Academic eligibility status', max_length=20)),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of students')),
+                ('school', models.ForeignKey(blank=True, db_constraint=False, help_text="Student's school", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='academics.school')),
+            ],
+            options={
+                'db_table': 'analytics_student_daily',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='analytics_s_day_aefc42_idx'), models.Index(fields=['graduation_year'], name='analytics_s_graduat_0770e9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField(help_text='Day the payments were recorded (local time)')),
+                ('graduation_year', models.IntegerField(blank=True, help_text="Student's graduation year", null=True)),
+                ('admission_year', models.IntegerField(blank=True, help_text="Student's admission year", null=True)),
+                ('payment_method', models.CharField(help_text='Payment method', max_length=20)),
+                ('is_verified', models.BooleanField(default=False, help_text='Whether the payments are verified')),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of payments (one per student)')),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, help_text='Sum of amounts paid', max_digits=14)),
+                ('graduation_fee_total', models.DecimalField(decimal_places=2, default=0, help_text='Sum of graduation fees due', max_digits=14)),
+                ('school', models.ForeignKey(blank=True, db_constraint=False, help_text="Student's school", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='academics.school')),
+            ],
+            options={
+                'db_table': 'analytics_payment_daily',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='analytics_p_day_872acf_idx'), models.Index(fields=['graduation_year'], name='analytics_p_graduat_987ac7_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ClearanceDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField(help_text='Day the clearance requests were created (local time)')),
+                ('graduation_year', models.IntegerField(blank=True, help_text="Student's graduation year", null=True)),
+                ('admission_year', models.IntegerField(blank=True, help_text="Student's admission year", null=True)),
+                ('status', models.CharField(help_text='Clearance request status', max_length=20)),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of clearance requests')),
+                ('completion_time_total', models.DurationField(default=datetime.timedelta(0), help_text='Sum of submission-to-completion times of completed requests')),
+                ('completion_time_count', models.PositiveIntegerField(default=0, help_text='Number of completed requests with a completion date')),
+                ('school', models.ForeignKey(blank=True, db_constraint=False, help_text="Student's school", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='academics.school')),
+            ],
+            options={
+                'db_table': 'analytics_clearance_daily',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='analytics_c_day_e764ee_idx'), models.Index(fields=['graduation_year', 'status'], name='analytics_c_graduat_80a74a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ApprovalDailyRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField(help_text='Day the approval records were created (local time)')),
+                ('status', models.CharField(help_text='Approval status', max_length=20)),
+                ('count', models.PositiveIntegerField(default=0, help_text='Number of approvals')),
+                ('processing_time_total', models.DurationField(default=datetime.timedelta(0), help_text='Sum of creation-to-decision times of processed approvals')),
+                ('processing_time_count', models.PositiveIntegerField(default=0, help_text='Number of processed approvals with a decision date')),
+                ('department', models.ForeignKey(db_constraint=False, help_text='Approving department', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='departments.department')),
+            ],
+            options={
+                'db_table': 'analytics_approval_daily',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day'], name='analytics_a_day_aa9ab8_idx'), models.Index(fields=['department', 'status'], name='analytics_a_departm_650731_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0001_initial'),
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='approvaldailyrollup',
+            name='department',
+            field=models.ForeignKey(db_constraint=False, help_text='Approving department', on_delete=django.db.models.deletion.CASCADE, related_name='approval_rollups', to='departments.department'),
+        ),
+    ]
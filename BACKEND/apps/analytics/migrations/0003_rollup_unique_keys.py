@@ -0,0 +1,74 @@
+# Unique keys on the rollup tables and per-day refresh locks
+
+from django.db import migrations, models
+
+
+ROLLUP_KEYS = {
+    'ClearanceDailyRollup': ('day', 'school_id', 'graduation_year', 'admission_year', 'status'),
+    'ApprovalDailyRollup': ('day', 'department_id', 'status'),
+    'PaymentDailyRollup': ('day', 'school_id', 'graduation_year', 'admission_year', 'payment_method', 'is_verified'),
+    'StudentDailyRollup': ('day', 'school_id', 'graduation_year', 'admission_year', 'eligibility_status'),
+}
+
+
+def drop_duplicate_rollup_rows(apps, schema_editor):
+    """
+    Keep one row per key; concurrent refreshes could insert the same day twice
+
+    Both copies hold the figures of a complete recomputation of that day.
+    """
+    db = schema_editor.connection.alias
+    for model_name, key in ROLLUP_KEYS.items():
+        model = apps.get_model('analytics', model_name)
+        seen = set()
+        duplicates = []
+        for row in model.objects.using(db).order_by('day', 'pk').values('pk', *key).iterator():
+            row_key = tuple(row[field] for field in key)
+            if row_key in seen:
+                duplicates.append(row['pk'])
+            else:
+                seen.add(row_key)
+        if duplicates:
+            model.objects.using(db).filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_approval_rollup_related_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_rollup_rows, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='RollupRefreshLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rollup', models.CharField(help_text='Rollup name (apps.analytics.rollups.SPECS)', max_length=20)),
+                ('day', models.DateField(help_text='Day being recomputed')),
+            ],
+            options={
+                'db_table': 'analytics_rollup_refresh_lock',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='approvaldailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'department', 'status'), name='analytics_approval_daily_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='clearancedailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'school', 'graduation_year', 'admission_year', 'status'), name='analytics_clearance_daily_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='paymentdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'school', 'graduation_year', 'admission_year', 'payment_method', 'is_verified'), name='analytics_payment_daily_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'school', 'graduation_year', 'admission_year', 'eligibility_status'), name='analytics_student_daily_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='rolluprefreshlock',
+            constraint=models.UniqueConstraint(fields=('rollup', 'day'), name='analytics_rollup_refresh_lock_key'),
+        ),
+    ]
@@ -0,0 +1,271 @@
+"""
+Precomputed analytics rollups
+
+One row per day and dimension combination. Rows are recomputed per day by
+apps.analytics.rollups whenever the source rows for that day change, and the
+dashboard views only ever read these tables. Databases treat NULL dimensions
+as distinct in the unique keys; RollupRefreshLock keeps those rows unique by
+serializing the refreshes of each day.
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import models
+
+
+class ClearanceDailyRollup(models.Model):
+    """Clearance requests per creation day, school, cohort and status"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.DateField(
+        help_text="Day the clearance requests were created (local time)"
+    )
+    school = models.ForeignKey(
+        'academics.School',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='+',
+        help_text="Student's school"
+    )
+    graduation_year = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Student's graduation year"
+    )
+    admission_year = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Student's admission year"
+    )
+    status = models.CharField(
+        max_length=20,
+        help_text="Clearance request status"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of clearance requests"
+    )
+    completion_time_total = models.DurationField(
+        default=timedelta(0),
+        help_text="Sum of submission-to-completion times of completed requests"
+    )
+    completion_time_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of completed requests with a completion date"
+    )
+
+    class Meta:
+        db_table = 'analytics_clearance_daily'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['graduation_year', 'status']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'school', 'graduation_year', 'admission_year', 'status'],
+                name='analytics_clearance_daily_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.count}"
+
+
+class ApprovalDailyRollup(models.Model):
+    """Department approvals per creation day, department and status"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.DateField(
+        help_text="Day the approval records were created (local time)"
+    )
+    department = models.ForeignKey(
+        'departments.Department',
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='approval_rollups',
+        help_text="Approving department"
+    )
+    status = models.CharField(
+        max_length=20,
+        help_text="Approval status"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of approvals"
+    )
+    processing_time_total = models.DurationField(
+        default=timedelta(0),
+        help_text="Sum of creation-to-decision times of processed approvals"
+    )
+    processing_time_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of processed approvals with a decision date"
+    )
+
+    class Meta:
+        db_table = 'analytics_approval_daily'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['department', 'status']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'department', 'status'],
+                name='analytics_approval_daily_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.department_id} {self.status}: {self.count}"
+
+
+class PaymentDailyRollup(models.Model):
+    """Payments per creation day, school, cohort, method and verification state"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.DateField(
+        help_text="Day the payments were recorded (local time)"
+    )
+    school = models.ForeignKey(
+        'academics.School',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='+',
+        help_text="Student's school"
+    )
+    graduation_year = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Student's graduation year"
+    )
+    admission_year = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Student's admission year"
+    )
+    payment_method = models.CharField(
+        max_length=20,
+        help_text="Payment method"
+    )
+    is_verified = models.BooleanField(
+        default=False,
+        help_text="Whether the payments are verified"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of payments (one per student)"
+    )
+    amount_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of amounts paid"
+    )
+    graduation_fee_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of graduation fees due"
+    )
+
+    class Meta:
+        db_table = 'analytics_payment_daily'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['graduation_year']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'school', 'graduation_year', 'admission_year', 'payment_method', 'is_verified'],
+                name='analytics_payment_daily_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_method}: {self.count}"
+
+
+class StudentDailyRollup(models.Model):
+    """Students per creation day, school, cohort and eligibility"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.DateField(
+        help_text="Day the student records were created (local time)"
+    )
+    school = models.ForeignKey(
+        'academics.School',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='+',
+        help_text="Student's school"
+    )
+    graduation_year = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Graduation year"
+    )
+    admission_year = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Admission year"
+    )
+    eligibility_status = models.CharField(
+        max_length=20,
+        help_text="Academic eligibility status"
+    )
+    count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of students"
+    )
+
+    class Meta:
+        db_table = 'analytics_student_daily'
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['graduation_year']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'school', 'graduation_year', 'admission_year', 'eligibility_status'],
+                name='analytics_student_daily_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.eligibility_status}: {self.count}"
+
+
+class RollupRefreshLock(models.Model):
+    """
+    One row per rollup and day, locked while that day is recomputed
+
+    Concurrent refreshes of the same day would otherwise both delete the old
+    rows and both insert the new ones.
+    """
+
+    rollup = models.CharField(
+        max_length=20,
+        help_text="Rollup name (apps.analytics.rollups.SPECS)"
+    )
+    day = models.DateField(
+        help_text="Day being recomputed"
+    )
+
+    class Meta:
+        db_table = 'analytics_rollup_refresh_lock'
+        constraints = [
+            models.UniqueConstraint(fields=['rollup', 'day'], name='analytics_rollup_refresh_lock_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.rollup} {self.day}"
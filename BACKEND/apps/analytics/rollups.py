@@ -0,0 +1,330 @@
+"""
+Maintenance of the analytics rollup tables
+
+Each rollup is keyed by day (local date of the source row's created_at) plus a
+few dimensions.
+
+Single-row saves and deletes are applied as deltas by the signal handlers in
+signals.py, in the writer's transaction: the row's contribution before the
+change (one grouped SELECT of that row) is subtracted from its old bucket and
+its contribution after the change added to the new one with F() updates. The
+cost does not depend on how many rows share the day.
+
+Bulk writes (QuerySet.update(), bulk_create()) call schedule_refresh_for(),
+and their days are recomputed after the transaction commits: one DELETE, one
+grouped SELECT over the source rows of those days and one bulk INSERT per
+rollup, however many rows changed. Refreshes of the same rollup and day take
+turns on the day's RollupRefreshLock row, so concurrent commits cannot both
+insert a day. A refresh that fails after commit is logged; the next refresh
+of that day, or manage.py rebuild_analytics_rollups, recomputes it.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.analytics.durations import duration_expression
+from apps.analytics.models import (
+    ApprovalDailyRollup,
+    ClearanceDailyRollup,
+    PaymentDailyRollup,
+    RollupRefreshLock,
+    StudentDailyRollup,
+)
+
+
+logger = logging.getLogger(__name__)
+
+INSERT_BATCH_SIZE = 1000
+
+
+class RollupSpec:
+    """How one rollup table is computed from its source model"""
+
+    def __init__(self, name, rollup_model, source, dimensions, measures, fields, defaults=None):
+        self.name = name
+        self.rollup_model = rollup_model
+        self.source = source
+        self.dimensions = dimensions
+        self.measures = measures
+        # Source model fields the dimensions and measures are computed from
+        self.fields = frozenset(fields)
+        self.defaults = defaults or {}
+
+    def source_model(self):
+        return self.source().model
+
+    def compute(self, days=None):
+        """Grouped rollup rows for the given days (all days when None)"""
+        rows = self.source()
+        if days is not None:
+            rows = rows.filter(reduce(or_, (_day_q(day) for day in days)))
+        return [self.rollup_model(**values) for values in self._grouped(rows)]
+
+    def _grouped(self, rows):
+        """Rollup field values of the given source rows, one dict per bucket"""
+        aliases = {f'dim_{name}': F(path) for name, path in self.dimensions.items()}
+        grouped = rows.order_by().values(
+            dim_day=TruncDate('created_at'),
+            **aliases,
+        ).annotate(**{f'm_{name}': aggregate for name, aggregate in self.measures.items()})
+
+        for row in grouped:
+            values = {'day': row['dim_day']}
+            for name in self.dimensions:
+                values[name] = row[f'dim_{name}']
+            for name in self.measures:
+                value = row[f'm_{name}']
+                values[name] = self.defaults.get(name, 0) if value is None else value
+            yield values
+
+    def contribution(self, pk):
+        """Rollup values one source row adds to its bucket (None when it does not exist)"""
+        return next(self._grouped(self.source().filter(pk=pk)), None)
+
+    def apply_change(self, before, after):
+        """Move one source row's contribution from its old bucket to its new one"""
+        if before == after:
+            return
+        if before is not None:
+            self._add(before, -1)
+        if after is not None:
+            self._add(after, 1)
+
+    def _add(self, values, sign):
+        key = {name: values[name] for name in ('day', *self.dimensions)}
+        changes = {name: F(name) + values[name] * sign for name in self.measures}
+        buckets = self.rollup_model.objects.filter(**key)
+        if sign < 0:
+            if not buckets.update(**changes):
+                raise DatabaseError(f'{self.name} rollup has no bucket for {key}')
+            buckets.filter(count=0).delete()
+        elif not buckets.update(**changes):
+            try:
+                with transaction.atomic():
+                    self.rollup_model.objects.create(**values)
+            except IntegrityError:
+                # A concurrent writer created the bucket first
+                buckets.update(**changes)
+
+    def refresh(self, days=None):
+        """Replace the rollup rows of the given days (everything when None)"""
+        days = None if days is None else sorted(set(days))
+        if days == []:
+            return 0
+        with transaction.atomic():
+            self._lock(days)
+            existing = self.rollup_model.objects.all()
+            if days is not None:
+                existing = existing.filter(day__in=days)
+            existing.delete()
+            objects = self.compute(days)
+            self.rollup_model.objects.bulk_create(objects, batch_size=INSERT_BATCH_SIZE)
+        return len(objects)
+
+    def _lock(self, days):
+        """Wait for other refreshes of these days (of every known day when None)"""
+        locks = RollupRefreshLock.objects.filter(rollup=self.name)
+        if days is not None:
+            RollupRefreshLock.objects.bulk_create(
+                [RollupRefreshLock(rollup=self.name, day=day) for day in days],
+                ignore_conflicts=True,
+            )
+            locks = locks.filter(day__in=days)
+        # Always lock in day order so overlapping refreshes cannot deadlock
+        list(locks.select_for_update().order_by('day').values_list('pk', flat=True))
+
+
+def _day_q(day):
+    """created_at range covering one local calendar day"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return Q(created_at__gte=start, created_at__lt=end)
+
+
+def _clearances():
+    from apps.clearances.models import ClearanceRequest
+    return ClearanceRequest.objects.all()
+
+
+def _approvals():
+    from apps.approvals.models import ClearanceApproval
+    return ClearanceApproval.objects.all()
+
+
+def _payments():
+    from apps.finance.models import Payment
+    return Payment.objects.all()
+
+
+def _students():
+    from apps.students.models import Student
+    return Student.objects.all()
+
+
+_completed = Q(status='completed', completion_date__isnull=False)
+_processed = Q(status__in=['approved', 'rejected'], approval_date__isnull=False)
+
+SPECS = {
+    'clearances': RollupSpec(
+        'clearances',
+        ClearanceDailyRollup,
+        _clearances,
+        dimensions={
+            'school_id': 'student__school_id',
+            'graduation_year': 'student__graduation_year',
+            'admission_year': 'student__admission_year',
+            'status': 'status',
+        },
+        measures={
+            'count': Count('id'),
+            'completion_time_total': Sum(duration_expression('completion_date', 'submission_date'), filter=_completed),
+            'completion_time_count': Count('id', filter=_completed),
+        },
+        fields=['created_at', 'student', 'status', 'completion_date', 'submission_date'],
+        defaults={'completion_time_total': timedelta(0)},
+    ),
+    'approvals': RollupSpec(
+        'approvals',
+        ApprovalDailyRollup,
+        _approvals,
+        dimensions={
+            'department_id': 'department_id',
+            'status': 'status',
+        },
+        measures={
+            'count': Count('id'),
+            'processing_time_total': Sum(duration_expression('approval_date', 'created_at'), filter=_processed),
+            'processing_time_count': Count('id', filter=_processed),
+        },
+        fields=['created_at', 'department', 'status', 'approval_date'],
+        defaults={'processing_time_total': timedelta(0)},
+    ),
+    'payments': RollupSpec(
+        'payments',
+        PaymentDailyRollup,
+        _payments,
+        dimensions={
+            'school_id': 'student__school_id',
+            'graduation_year': 'student__graduation_year',
+            'admission_year': 'student__admission_year',
+            'payment_method': 'payment_method',
+            'is_verified': 'is_verified',
+        },
+        measures={
+            'count': Count('id'),
+            'amount_total': Sum('amount'),
+            'graduation_fee_total': Sum('graduation_fee_amount'),
+        },
+        fields=['created_at', 'student', 'payment_method', 'is_verified', 'amount', 'graduation_fee_amount'],
+    ),
+    'students': RollupSpec(
+        'students',
+        StudentDailyRollup,
+        _students,
+        dimensions={
+            'school_id': 'school_id',
+            'graduation_year': 'graduation_year',
+            'admission_year': 'admission_year',
+            'eligibility_status': 'eligibility_status',
+        },
+        measures={
+            'count': Count('id'),
+        },
+        fields=['created_at', 'school', 'graduation_year', 'admission_year', 'eligibility_status'],
+    ),
+}
+
+
+def rebuild(names=None):
+    """
+    Recompute rollup tables from scratch
+
+    Returns:
+        dict: Rollup name -> number of rows written
+    """
+    return {name: SPECS[name].refresh() for name in (names or SPECS)}
+
+
+def refresh_days(name, days):
+    """Recompute one rollup for the given days right away"""
+    return SPECS[name].refresh(days)
+
+
+_state = threading.local()
+
+
+def _pending():
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        pending = _state.pending = defaultdict(set)
+    return pending
+
+
+def row_changed(name, before, after):
+    """
+    Apply one source row's change to a rollup within the current transaction
+
+    before/after are RollupSpec.contribution() results. If the delta cannot be
+    applied (a bucket is missing because the rollup is out of date), the days
+    involved are recomputed after commit instead.
+    """
+    try:
+        with transaction.atomic():
+            SPECS[name].apply_change(before, after)
+    except DatabaseError:
+        logger.warning('Could not apply a %s rollup delta; recomputing its days', name, exc_info=True)
+        schedule_refresh(name, {values['day'] for values in (before, after) if values is not None})
+
+
+def schedule_refresh(name, days):
+    """
+    Recompute the given days of a rollup once the current transaction commits
+
+    Days scheduled several times within a transaction are recomputed once.
+    """
+    days = {day for day in days if day is not None}
+    if not days:
+        return
+    _pending()[name].update(days)
+    transaction.on_commit(flush_pending)
+
+
+def schedule_refresh_for(name, ids):
+    """Schedule a refresh of the days holding the given source rows"""
+    ids = list(ids)
+    if not ids:
+        return
+    model = SPECS[name].source_model()
+    days = model.objects.filter(pk__in=ids).dates('created_at', 'day')
+    schedule_refresh(name, days)
+
+
+def flush_pending():
+    """
+    Recompute every dirty day; later callbacks find nothing left to do
+
+    Runs after the commit, so a failure is logged instead of failing the
+    request whose changes are already saved.
+    """
+    pending = _pending()
+    while pending:
+        name, days = pending.popitem()
+        try:
+            SPECS[name].refresh(days)
+        except Exception:
+            logger.exception('Could not refresh the %s rollup for %s day(s)', name, len(days))
+
+
+def day_of(instance):
+    """Rollup day of a source row"""
+    if instance.created_at is None:
+        return None
+    return timezone.localdate(instance.created_at)
@@ -0,0 +1,70 @@
+"""
+Signal handlers that keep the analytics rollups current
+
+A saved or deleted row moves its own contribution between rollup buckets
+(rollups.row_changed); the state before a save is read in pre_save. Saves
+whose update_fields touch nothing a rollup is computed from are skipped.
+"""
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.analytics.rollups import SPECS, row_changed, schedule_refresh
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.finance.models import Payment
+from apps.students.models import Student
+
+
+SOURCES = {
+    ClearanceRequest: 'clearances',
+    ClearanceApproval: 'approvals',
+    Payment: 'payments',
+    Student: 'students',
+}
+
+# Student fields that are also dimensions of the clearance and payment rollups
+STUDENT_COHORT_FIELDS = ('school_id', 'graduation_year', 'admission_year')
+
+
+def _tracked(spec, update_fields):
+    return update_fields is None or not spec.fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save)
+def remember_rollup_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    name = SOURCES.get(sender)
+    if name is None or raw:
+        return
+    spec = SPECS[name]
+    if instance._state.adding or not _tracked(spec, update_fields):
+        instance._rollup_before = None
+    else:
+        instance._rollup_before = spec.contribution(instance.pk)
+
+
+@receiver(post_save)
+def apply_rollup_change(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    name = SOURCES.get(sender)
+    if name is None or raw:
+        return
+    spec = SPECS[name]
+    if not created and not _tracked(spec, update_fields):
+        return
+    before = getattr(instance, '_rollup_before', None)
+    instance._rollup_before = None
+    after = spec.contribution(instance.pk)
+    row_changed(name, before, after)
+
+    if sender is Student and before is not None and after is not None and any(
+        before[field] != after[field] for field in STUDENT_COHORT_FIELDS
+    ):
+        # A student's school and cohort are dimensions of the clearance and payment rollups
+        schedule_refresh('clearances', instance.clearance_requests.dates('created_at', 'day'))
+        schedule_refresh('payments', Payment.objects.filter(student=instance).dates('created_at', 'day'))
+
+
+@receiver(pre_delete)
+def remove_rollup_contribution(sender, instance, **kwargs):
+    name = SOURCES.get(sender)
+    if name is not None:
+        row_changed(name, SPECS[name].contribution(instance.pk), None)
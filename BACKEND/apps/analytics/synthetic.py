@@ -0,0 +1,666 @@
+"""
+Deterministic synthetic dataset for scale testing
+
+SyntheticDataset builds a multi-year history on top of the existing clearance
+departments:
+
+- schools, academic departments and courses (CATALOGUE; existing codes are reused)
+- department staff, finance and gown staff, and a few admins
+- students spread over the last `years` graduation cohorts
+- clearance requests in every status, with one approval per department;
+  approval delays follow a log-normal distribution per department type
+- payments, gown issuances and notifications that follow each clearance
+- audit log rows shaped like those of AuditLogMiddleware and AuditLog.log_action
+
+Everything, primary keys included, comes from one random.Random(seed), so the
+same seed, sizes and end date always give the same rows.
+
+Rows are written with bulk_create, one transaction per batch_size students
+(audit logs: per batch_size rows). created_at/updated_at are back-dated, so
+auto_now/auto_now_add are switched off on these models while generating.
+bulk_create skips the signal handlers, so the analytics rollups are rebuilt
+once at the end.
+
+Synthetic accounts use SYNTHETIC_EMAIL_DOMAIN; flush_synthetic_data() finds
+them by it and deletes them with everything that hangs off them.
+"""
+import math
+import random
+import string
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.academics.models import AcademicDepartment, Course, School
+from apps.approvals.models import ClearanceApproval
+from apps.audit_logs.models import AuditLog
+from apps.clearances.models import ClearanceRequest
+from apps.departments.registry import active_departments
+from apps.finance.models import Payment
+from apps.gown_issuance.models import GownIssuance
+from apps.notifications.models import Notification
+from apps.students.models import Student
+from apps.users.models import User
+
+
+SYNTHETIC_EMAIL_DOMAIN = 'synthetic.mksu.ac.ke'
+
+# (school code, name, [(department code, name, [(course code, name), ...]), ...])
+CATALOGUE = [
+    ('SCE', 'School of Computing and Engineering', [
+        ('CS', 'Computer Science', [('BSC-CS', 'BSc Computer Science'), ('BSC-IT', 'BSc Information Technology')]),
+        ('EE', 'Electrical Engineering', [('BSC-EEE', 'BSc Electrical and Electronic Engineering')]),
+        ('ME', 'Mechanical Engineering', [('BSC-ME', 'BSc Mechanical Engineering')]),
+    ]),
+    ('SBE', 'School of Business and Economics', [
+        ('BA', 'Business Administration', [('BCOM', 'Bachelor of Commerce'), ('BBM', 'Bachelor of Business Management')]),
+        ('EC', 'Economics', [('BA-ECON', 'BA Economics')]),
+    ]),
+    ('SED', 'School of Education', [
+        ('ED', 'Educational Studies', [('BED-ARTS', 'BEd Arts'), ('BED-SCI', 'BEd Science')]),
+    ]),
+    ('SPAS', 'School of Pure and Applied Sciences', [
+        ('MA', 'Mathematics', [('BSC-MATH', 'BSc Mathematics')]),
+        ('BIO', 'Biological Sciences', [('BSC-BIO', 'BSc Biology')]),
+    ]),
+    ('SHS', 'School of Health Sciences', [
+        ('NUR', 'Nursing', [('BSC-NUR', 'BSc Nursing')]),
+        ('PH', 'Public Health', [('BSC-PH', 'BSc Public Health')]),
+    ]),
+]
+
+FIRST_NAMES = [
+    'Brian', 'Faith', 'Kevin', 'Mercy', 'Dennis', 'Joy', 'Collins', 'Sharon', 'Victor', 'Esther',
+    'Emmanuel', 'Grace', 'Ian', 'Winnie', 'Felix', 'Caroline', 'Samuel', 'Purity', 'Allan', 'Diana',
+    'Peter', 'Mary', 'John', 'Ann', 'David', 'Lucy', 'James', 'Ruth', 'Daniel', 'Naomi',
+]
+LAST_NAMES = [
+    'Mutua', 'Wambua', 'Musyoka', 'Kioko', 'Ndunda', 'Mwende', 'Nzioka', 'Kyalo', 'Muthoka', 'Kilonzo',
+    'Otieno', 'Odhiambo', 'Wanjiku', 'Kamau', 'Njoroge', 'Kiprono', 'Cheruiyot', 'Achieng', 'Mwangi', 'Wafula',
+]
+
+# Median hours from request to decision by department type; delays are log-normal around these
+APPROVAL_MEDIAN_HOURS = {
+    'finance': 30, 'faculty': 48, 'library': 12, 'mess': 8,
+    'hostel': 18, 'workshop': 20, 'sports': 6, 'other': 10,
+}
+APPROVAL_DELAY_SIGMA = 0.9
+
+# Graduation day of a cohort and how long before it clearance requests come in
+GRADUATION_MONTH_DAY = (12, 1)
+CLEARANCE_WINDOW = timedelta(days=120)
+
+# Status mix of cohorts that have graduated and of the cohort still clearing
+GRADUATED_STATUSES = [('completed', 90), ('rejected', 6), ('in_progress', 4)]
+CLEARING_STATUSES = [('pending', 25), ('in_progress', 45), ('completed', 20), ('rejected', 10)]
+
+REJECTION_REASONS = [
+    'Outstanding library books',
+    'Unpaid hostel balance',
+    'Lab equipment not returned',
+    'Outstanding tuition balance',
+    'Missing sports kit',
+]
+
+AUDIT_ENDPOINTS = [
+    ('GET', '/api/clearances/', 20),
+    ('GET', '/api/notifications/', 18),
+    ('GET', '/api/notifications/unread_count/', 15),
+    ('GET', '/api/approvals/pending/', 10),
+    ('GET', '/api/students/me/', 8),
+    ('POST', '/api/clearances/', 3),
+    ('POST', '/api/finance/payments/mpesa_stk_push/', 3),
+    ('PATCH', '/api/students/me/', 1),
+    ('GET', '/api/analytics/dashboard/', 2),
+]
+AUDIT_EVENTS = [('request', 80), ('login', 8), ('logout', 3), ('approve', 7), ('reject', 1), ('update', 1)]
+APPROVAL_EVENT_STATUS = {'approve': 'approved', 'reject': 'rejected'}
+
+GOWN_SIZES = [('XS', 3), ('S', 15), ('M', 35), ('L', 30), ('XL', 12), ('XXL', 5)]
+PAYMENT_METHODS = [('mpesa', 80), ('bank', 15), ('cash', 5)]
+
+GRADUATION_FEE = Decimal('10000.00')
+GOWN_DEPOSIT = Decimal('2000.00')
+
+GENERATED_MODELS = (
+    User, Student, ClearanceRequest, ClearanceApproval, Payment, GownIssuance, Notification, AuditLog,
+    School, AcademicDepartment, Course,
+)
+
+
+@contextmanager
+def historical_timestamps(models=GENERATED_MODELS):
+    """Let created_at/updated_at be set explicitly on these models"""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _weighted(choices):
+    values = [value for value, _ in choices]
+    weights = [weight for _, weight in choices]
+    return values, weights
+
+
+class SyntheticDataset:
+    """
+    Generate a synthetic clearance history
+
+    Args:
+        students: Number of students
+        years: Number of graduation cohorts, the last one still clearing at end
+        audit_logs: Number of audit log rows
+        notifications_per_student: Average notifications per student with a request
+        staff_per_department: Staff accounts per clearance department
+        seed: Random seed
+        end: Aware datetime the history stops at (default: today, midnight)
+        batch_size: Students (or audit rows) per transaction
+        password: Password of every synthetic account
+        progress: Optional callable(stage, done, total)
+    """
+
+    def __init__(self, students=1000, years=3, audit_logs=10000, notifications_per_student=4,
+                 staff_per_department=3, seed=42, end=None, batch_size=1000, password='synthetic123',
+                 progress=None):
+        self.student_count = students
+        self.years = max(1, years)
+        self.audit_log_count = audit_logs
+        self.notifications_per_student = notifications_per_student
+        self.staff_per_department = max(1, staff_per_department)
+        self.seed = seed
+        self.end = end or timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        self.batch_size = max(1, batch_size)
+        self.password = password
+        self.progress = progress or (lambda stage, done, total: None)
+        self.rng = random.Random(seed)
+        self.counts = {}
+
+    # Helpers
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _pick(self, choices):
+        values, weights = _weighted(choices)
+        return self.rng.choices(values, weights)[0]
+
+    def _code(self, length, alphabet=string.ascii_uppercase + string.digits):
+        return ''.join(self.rng.choices(alphabet, k=length))
+
+    def _between(self, start, end):
+        if end <= start:
+            return start
+        return start + timedelta(seconds=self.rng.uniform(0, (end - start).total_seconds()))
+
+    def _delay(self, median_hours):
+        return timedelta(hours=self.rng.lognormvariate(math.log(median_hours), APPROVAL_DELAY_SIGMA))
+
+    def _name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def _count(self, key, amount):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def _graduation_day(self, year):
+        month, day = GRADUATION_MONTH_DAY
+        return timezone.make_aware(datetime(year, month, day, 10))
+
+    # Generation
+
+    def generate(self):
+        """Write the dataset; returns {model label: rows created}"""
+        self.departments = active_departments()
+        if not self.departments:
+            raise ValueError('There are no active clearance departments; run seed_departments first')
+
+        self.password_hash = make_password(self.password, salt=f'synthetic{self.seed}')
+        with historical_timestamps():
+            self.courses = self._catalogue()
+            self._staff()
+            self._students()
+            self._audit_logs()
+
+        from apps.analytics import rollups
+        rollups.rebuild()
+        return self.counts
+
+    def _catalogue(self):
+        """[(school, department, course)] for every course in CATALOGUE"""
+        courses = []
+        created_at = self.end - timedelta(days=365 * (self.years + 5))
+        for school_code, school_name, departments in CATALOGUE:
+            school, _ = School.objects.get_or_create(
+                code=school_code,
+                defaults={'name': school_name, 'created_at': created_at, 'updated_at': created_at},
+            )
+            for department_code, department_name, department_courses in departments:
+                department, _ = AcademicDepartment.objects.get_or_create(
+                    school=school, code=department_code,
+                    defaults={'name': department_name, 'created_at': created_at, 'updated_at': created_at},
+                )
+                for course_code, course_name in department_courses:
+                    course, _ = Course.objects.get_or_create(
+                        department=department, code=course_code,
+                        defaults={'name': course_name, 'created_at': created_at, 'updated_at': created_at},
+                    )
+                    courses.append((school, department, course))
+        return courses
+
+    def _user(self, email, full_name, role, created_at, **fields):
+        return User(
+            id=self._uuid(),
+            username=email,
+            email=email,
+            full_name=full_name,
+            role=role,
+            password=self.password_hash,
+            date_joined=created_at,
+            created_at=created_at,
+            updated_at=created_at,
+            **fields
+        )
+
+    def _staff(self):
+        joined = self.end - timedelta(days=365 * (self.years + 1))
+        users = []
+        self.staff = {}
+        for department in self.departments:
+            members = [
+                self._user(
+                    f'{department.code.lower()}.staff{n}@{SYNTHETIC_EMAIL_DOMAIN}',
+                    self._name(), 'department_staff', joined, department_id=department.id,
+                )
+                for n in range(1, self.staff_per_department + 1)
+            ]
+            self.staff[department.id] = [member.id for member in members]
+            users.extend(members)
+        admins = [
+            self._user(f'admin{n}@{SYNTHETIC_EMAIL_DOMAIN}', self._name(), 'admin', joined)
+            for n in range(1, 3)
+        ]
+        finance = [
+            self._user(f'finance{n}@{SYNTHETIC_EMAIL_DOMAIN}', self._name(), 'finance_staff', joined)
+            for n in range(1, 4)
+        ]
+        gowns = [
+            self._user(f'gowns{n}@{SYNTHETIC_EMAIL_DOMAIN}', self._name(), 'gown_issuance_staff', joined)
+            for n in range(1, 3)
+        ]
+        users.extend(admins + finance + gowns)
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.finance_staff = [user.id for user in finance]
+        self.gown_staff = [user.id for user in gowns]
+        self.actors = [user.id for user in users]
+        self._count('users', len(users))
+
+    def _students(self):
+        end_year = self.end.year if self.end < self._graduation_day(self.end.year) else self.end.year + 1
+        cohorts = list(range(end_year - self.years + 1, end_year + 1))
+        taken = set(Student.objects.values_list('registration_number', flat=True))
+        self.taken_gowns = set(GownIssuance.objects.values_list('gown_number', flat=True))
+        self.sequences = {}
+        self.gown_sequences = {}
+
+        done = 0
+        while done < self.student_count:
+            size = min(self.batch_size, self.student_count - done)
+            with transaction.atomic():
+                self._student_batch(size, done, cohorts, taken)
+            done += size
+            self.progress('students', done, self.student_count)
+
+    def _registration_number(self, school, department, admission_year, taken):
+        key = (school.code, department.code, admission_year)
+        sequence = self.sequences.get(key, 0)
+        while True:
+            sequence += 1
+            number = f'{school.code}/{department.code}/{sequence:04d}/{admission_year}'
+            if number not in taken:
+                break
+        self.sequences[key] = sequence
+        taken.add(number)
+        return number
+
+    def _student_batch(self, size, offset, cohorts, taken):
+        users, students, requests, approvals = [], [], [], []
+        payments, gowns, notifications = [], [], []
+
+        for n in range(offset + 1, offset + size + 1):
+            graduation_year = self.rng.choice(cohorts)
+            school, department, course = self.rng.choice(self.courses)
+            admission_year = graduation_year - course.duration_years
+            registration_number = self._registration_number(school, department, admission_year, taken)
+            joined = self._between(
+                timezone.make_aware(datetime(admission_year, 8, 20)),
+                timezone.make_aware(datetime(admission_year, 9, 30)),
+            )
+            full_name = self._name()
+            email = f'student{n}@{SYNTHETIC_EMAIL_DOMAIN}'
+            user = self._user(email, full_name, 'student', joined, admission_number=registration_number)
+            graduated = self._graduation_day(graduation_year) <= self.end
+            student = Student(
+                id=self._uuid(),
+                user_id=user.id,
+                registration_number=registration_number,
+                admission_year=admission_year,
+                school_id=school.id,
+                department_id=department.id,
+                course_id=course.id,
+                faculty=school.name,
+                program=course.name,
+                graduation_year=graduation_year,
+                eligibility_status=self._pick(
+                    [('eligible', 97), ('ineligible', 3)] if graduated
+                    else [('eligible', 75), ('pending', 20), ('ineligible', 5)]
+                ),
+                created_at=joined,
+                updated_at=joined,
+            )
+            users.append(user)
+            students.append(student)
+
+            if student.eligibility_status == 'ineligible':
+                continue
+            if self.rng.random() >= (0.95 if graduated else 0.75):
+                continue
+            clearance, clearance_approvals = self._clearance(student, graduated)
+            requests.append(clearance)
+            approvals.extend(clearance_approvals)
+            payment = self._payment(student, clearance, graduated)
+            if payment is not None:
+                payments.append(payment)
+            gown = self._gown(student, clearance, graduated)
+            if gown is not None:
+                gowns.append(gown)
+            notifications.extend(self._notifications(user, clearance, clearance_approvals, payment))
+
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        Student.objects.bulk_create(students, batch_size=self.batch_size)
+        ClearanceRequest.objects.bulk_create(requests, batch_size=self.batch_size)
+        ClearanceApproval.objects.bulk_create(approvals, batch_size=self.batch_size)
+        Payment.objects.bulk_create(payments, batch_size=self.batch_size)
+        GownIssuance.objects.bulk_create(gowns, batch_size=self.batch_size)
+        Notification.objects.bulk_create(notifications, batch_size=self.batch_size)
+        self.actors.extend(user.id for user in users)
+        for key, rows in (
+            ('users', users), ('students', students), ('clearance_requests', requests),
+            ('approvals', approvals), ('payments', payments), ('gown_issuances', gowns),
+            ('notifications', notifications),
+        ):
+            self._count(key, len(rows))
+
+    def _clearance(self, student, graduated):
+        """Unsaved request and its approvals, consistent with a random status"""
+        graduation_day = self._graduation_day(student.graduation_year)
+        window_end = min(graduation_day - timedelta(days=7), self.end)
+        created_at = self._between(window_end - CLEARANCE_WINDOW, window_end)
+        status = self._pick(GRADUATED_STATUSES if graduated else CLEARING_STATUSES)
+
+        decisions = []
+        for department in self.departments:
+            median = APPROVAL_MEDIAN_HOURS.get(department.department_type.lower(), 24)
+            decided_at = created_at + self._delay(median)
+            if status == 'completed':
+                decided_at = min(decided_at, self.end)
+            decisions.append([department, decided_at, 'pending'])
+
+        if status == 'completed':
+            for decision in decisions:
+                decision[2] = 'approved'
+        elif status == 'rejected':
+            rejected = self.rng.choice(decisions)
+            rejected[1] = min(rejected[1], self.end)
+            rejected[2] = 'rejected'
+            for decision in decisions:
+                if decision is not rejected and decision[1] <= self.end and self.rng.random() < 0.6:
+                    decision[2] = 'approved'
+        elif status == 'in_progress':
+            for decision in decisions:
+                if decision[1] <= self.end and self.rng.random() < 0.5:
+                    decision[2] = 'approved'
+            if all(decision[2] == 'pending' for decision in decisions):
+                decisions[0][1] = self._between(created_at, self.end)
+                decisions[0][2] = 'approved'
+            if len(decisions) > 1 and all(decision[2] == 'approved' for decision in decisions):
+                decisions[-1][2] = 'pending'
+
+        decided = [decided_at for _, decided_at, result in decisions if result != 'pending']
+        last_change = max(decided, default=created_at)
+        reason = self.rng.choice(REJECTION_REASONS) if status == 'rejected' else ''
+        clearance = ClearanceRequest(
+            id=self._uuid(),
+            student_id=student.id,
+            status=status,
+            submission_date=created_at,
+            completion_date=last_change if status == 'completed' else None,
+            rejection_reason=reason,
+            total_approvals=len(decisions),
+            approved_count=sum(1 for _, _, result in decisions if result == 'approved'),
+            rejected_count=sum(1 for _, _, result in decisions if result == 'rejected'),
+            pending_count=sum(1 for _, _, result in decisions if result == 'pending'),
+            created_at=created_at,
+            updated_at=last_change,
+        )
+        approvals = []
+        for department, decided_at, result in decisions:
+            pending = result == 'pending'
+            approvals.append(ClearanceApproval(
+                id=self._uuid(),
+                clearance_request_id=clearance.id,
+                department_id=department.id,
+                status=result,
+                approved_by_id=None if pending else self.rng.choice(self.staff[department.id]),
+                approval_date=None if pending else decided_at,
+                rejection_reason=reason if result == 'rejected' else '',
+                notes=f'Awaiting approval from {department.name}' if pending else '',
+                created_at=created_at,
+                updated_at=created_at if pending else decided_at,
+            ))
+        return clearance, approvals
+
+    def _payment(self, student, clearance, graduated):
+        if self.rng.random() >= 0.92:
+            return None
+        paid_at = max(clearance.created_at - timedelta(hours=self.rng.uniform(1, 720)), student.created_at)
+        method = self._pick(PAYMENT_METHODS)
+        verified = self.rng.random() < (0.97 if graduated else 0.7)
+        verified_at = min(paid_at + self._delay(24), self.end) if verified else None
+        phone = '2547' + self._code(8, string.digits)
+        mpesa = method == 'mpesa'
+        return Payment(
+            id=self._uuid(),
+            student_id=student.id,
+            amount=GRADUATION_FEE,
+            payment_method=method,
+            transaction_id=self._code(10),
+            phone_number=phone if mpesa else '',
+            phone_e164='+' + phone if mpesa else '',
+            checkout_request_id=f'ws_CO_{paid_at:%d%m%Y%H%M%S}{self._code(12, string.digits)}' if mpesa else None,
+            merchant_request_id=f'{self._code(5, string.digits)}-{self._code(8, string.digits)}-1' if mpesa else '',
+            payment_date=paid_at,
+            is_verified=verified,
+            verified_by_id=self.rng.choice(self.finance_staff) if verified else None,
+            verification_date=verified_at,
+            graduation_fee_amount=GRADUATION_FEE,
+            created_at=paid_at,
+            updated_at=verified_at or paid_at,
+        )
+
+    def _gown_number(self, year):
+        sequence = self.gown_sequences.get(year, 0)
+        while True:
+            sequence += 1
+            number = f'GWN/{year}/{sequence:05d}'
+            if number not in self.taken_gowns:
+                break
+        self.gown_sequences[year] = sequence
+        self.taken_gowns.add(number)
+        return number
+
+    def _gown(self, student, clearance, graduated):
+        if clearance.status != 'completed' or self.rng.random() >= 0.85:
+            return None
+        issued_at = clearance.completion_date + timedelta(days=self.rng.uniform(0.5, 10))
+        if issued_at > self.end:
+            return None
+        graduation_day = self._graduation_day(student.graduation_year)
+        gown = GownIssuance(
+            id=self._uuid(),
+            student_id=student.id,
+            gown_number=self._gown_number(student.graduation_year),
+            gown_size=self._pick(GOWN_SIZES),
+            deposit_amount=GOWN_DEPOSIT,
+            deposit_paid=True,
+            deposit_receipt=self._code(10),
+            issued_date=issued_at,
+            issued_by_id=self.rng.choice(self.gown_staff),
+            expected_return_date=(graduation_day + timedelta(days=7)).date(),
+            status='issued',
+            created_at=issued_at,
+            updated_at=issued_at,
+        )
+        if graduated:
+            gown.status = self._pick([('returned', 92), ('damaged', 5), ('lost', 3)])
+            if gown.status != 'lost':
+                returned_at = min(graduation_day + timedelta(days=self.rng.uniform(0, 21)), self.end)
+                gown.actual_return_date = returned_at
+                gown.returned_to_id = self.rng.choice(self.gown_staff)
+                gown.updated_at = returned_at
+                if gown.status == 'returned':
+                    gown.deposit_refunded = True
+                    gown.refund_amount = GOWN_DEPOSIT
+                    gown.refund_date = returned_at
+                else:
+                    gown.condition_notes = 'Torn hem'
+        return gown
+
+    def _notifications(self, user, clearance, approvals, payment):
+        events = [('clearance_submitted', 'Clearance Submitted', clearance.created_at, {})]
+        if payment is not None:
+            events.append(('payment_received', 'Payment Received', payment.payment_date, {'payment_id': payment.id}))
+            if payment.is_verified:
+                events.append(('payment_verified', 'Payment Verified', payment.verification_date, {'payment_id': payment.id}))
+        for approval in approvals:
+            if approval.status == 'approved':
+                events.append(('clearance_approved', 'Clearance Approved', approval.approval_date, {'approval_id': approval.id}))
+            elif approval.status == 'rejected':
+                events.append(('clearance_rejected', 'Clearance Rejected', approval.approval_date, {'approval_id': approval.id}))
+
+        wanted = self.rng.randint(0, 2 * self.notifications_per_student)
+        notifications = []
+        for notification_type, title, created_at, links in self.rng.sample(events, min(wanted, len(events))):
+            old = self.end - created_at > timedelta(days=14)
+            read = self.rng.random() < (0.9 if old else 0.4)
+            emailed = self.rng.random() < 0.8
+            read_at = min(created_at + self._delay(6), self.end) if read else None
+            notifications.append(Notification(
+                id=self._uuid(),
+                recipient_id=user.id,
+                notification_type=notification_type,
+                title=title,
+                message=f'{title}: clearance request for {user.admission_number}',
+                clearance_id=clearance.id,
+                is_read=read,
+                read_at=read_at,
+                sent_via_email=emailed,
+                email_sent_at=created_at + timedelta(minutes=self.rng.uniform(0, 5)) if emailed else None,
+                created_at=created_at,
+                updated_at=read_at or created_at,
+                **links
+            ))
+        return notifications
+
+    def _audit_log(self, start):
+        created_at = self._between(start, self.end)
+        actor_id = self.rng.choice(self.actors)
+        ip_address = f'10.{self.rng.randint(0, 255)}.{self.rng.randint(0, 255)}.{self.rng.randint(1, 254)}'
+        event = self._pick(AUDIT_EVENTS)
+        if event == 'request':
+            values, weights = self._audit_endpoints
+            method, path = self.rng.choices(values, weights)[0]
+            status_code = self._pick([(200, 90), (201, 4), (400, 3), (403, 2), (404, 1)])
+            action = {'POST': 'create', 'PUT': 'update', 'PATCH': 'update', 'DELETE': 'delete'}.get(method, 'other')
+            return AuditLog(
+                id=self._uuid(), actor_id=actor_id, action=action, entity=path, entity_id=str(status_code),
+                description=f'{method} {path}', ip_address=ip_address, created_at=created_at,
+                changes={
+                    'request': {'method': method, 'path': path, 'body': None, 'headers': None},
+                    'response': {'status_code': status_code, 'body': None},
+                    'meta': {
+                        'ip': ip_address, 'user_agent': 'Mozilla/5.0',
+                        'duration_ms': int(self.rng.lognormvariate(math.log(60), 0.7)),
+                        'audit_mode': 'metadata', 'sample_rate': 1.0,
+                    },
+                },
+            )
+        if event in APPROVAL_EVENT_STATUS:
+            entity_id = self._uuid()
+            new_status = APPROVAL_EVENT_STATUS[event]
+            return AuditLog(
+                id=self._uuid(), actor_id=actor_id, action=event, entity='ClearanceApproval',
+                entity_id=str(entity_id), ip_address=ip_address, created_at=created_at,
+                description=f'Approval #{entity_id} {new_status}',
+                changes={'status': {'old': 'pending', 'new': new_status}},
+            )
+        if event == 'update':
+            return AuditLog(
+                id=self._uuid(), actor_id=actor_id, action='update', entity='Student',
+                entity_id=str(self._uuid()), ip_address=ip_address, created_at=created_at,
+                description='Student profile updated', changes={'phone': {'old': None, 'new': 'updated'}},
+            )
+        return AuditLog(
+            id=self._uuid(), actor_id=actor_id, action=event, entity='User', entity_id=str(actor_id),
+            ip_address=ip_address, created_at=created_at, description=f'User {event}', changes={},
+        )
+
+    def _audit_logs(self):
+        start = self.end - timedelta(days=365 * self.years)
+        self._audit_endpoints = _weighted([((method, path), weight) for method, path, weight in AUDIT_ENDPOINTS])
+        done = 0
+        while done < self.audit_log_count:
+            size = min(self.batch_size, self.audit_log_count - done)
+            with transaction.atomic():
+                AuditLog.objects.bulk_create([self._audit_log(start) for _ in range(size)], batch_size=size)
+            done += size
+            self.progress('audit_logs', done, self.audit_log_count)
+        self._count('audit_logs', done)
+
+
+def synthetic_users():
+    return User.objects.filter(email__endswith=f'@{SYNTHETIC_EMAIL_DOMAIN}')
+
+
+def flush_synthetic_data(batch_size=1000):
+    """
+    Delete synthetic accounts and everything that belongs to them
+
+    Returns:
+        int: Number of synthetic users deleted
+    """
+    users = synthetic_users()
+    AuditLog.objects.filter(actor__in=users).delete()
+    Notification.objects.filter(recipient__in=users).delete()
+    ids = list(users.values_list('pk', flat=True))
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        with transaction.atomic():
+            ClearanceApproval.objects.filter(clearance_request__student__user__in=batch).delete()
+            User.objects.filter(pk__in=batch).delete()
+
+    from apps.analytics import rollups
+    rollups.rebuild()
+    return len(ids)
@@ -1,21 +1,78 @@
 """
 Analytics Views for Dashboard and Reporting
+
+All four views read the precomputed rollup tables (see rollups.py), so their
+cost depends on the number of days and cohorts, not on the size of the
+clearance, approval and payment tables.
 """
+from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Avg, Q, F
+from django.db.models import Avg, Count, Sum, Q
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
 
-from apps.clearances.models import ClearanceRequest
+from apps.analytics.durations import duration_expression, duration_stats, summarise
+from apps.analytics.models import (
+    ApprovalDailyRollup,
+    ClearanceDailyRollup,
+    PaymentDailyRollup,
+    StudentDailyRollup,
+)
 from apps.approvals.models import ClearanceApproval
-from apps.students.models import Student
-from apps.finance.models import Payment, FinanceRecord
-from apps.departments.models import Department
+from apps.clearances.models import ClearanceRequest
+from apps.departments.registry import active_departments
 from apps.users.permissions import IsAdminOrDepartmentStaff
 
 
+def _cohort_filters(request, prefix=''):
+    """
+    Filters for the graduation_year/school_id/admission_year query params
+
+    Rollup rows carry the fields themselves; pass prefix='student__' to filter
+    source rows through their student.
+    """
+    filters = {}
+    for param in ('graduation_year', 'school_id', 'admission_year'):
+        value = request.query_params.get(param)
+        if value:
+            filters[prefix + param] = value
+    return filters
+
+
+def _rename(rows, **names):
+    """Rename keys of grouped rows to the field names the API has always returned"""
+    renamed = []
+    for row in rows:
+        renamed.append({names.get(key, key): value for key, value in row.items()})
+    return renamed
+
+
+def _parse_as_of(value):
+    """Parse an as_of query param; a bare date means the end of that day"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            parsed = datetime.combine(day, time.max)
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _average_days(total, count):
+    """Average duration in days from a summed timedelta and a row count"""
+    if not count or total is None:
+        return None
+    return total.total_seconds() / count / 86400
+
+
 class ClearanceCompletionRateView(APIView):
     """
     Analytics for clearance completion rates
@@ -24,59 +81,53 @@ class ClearanceCompletionRateView(APIView):
     permission_classes = [IsAuthenticated, IsAdminOrDepartmentStaff]
     
     def get(self, request):
-        # Query parameters for filtering
-        graduation_year = request.query_params.get('graduation_year')
-        school_id = request.query_params.get('school_id')
-        admission_year = request.query_params.get('admission_year')
-        
-        # Base queryset
-        clearances = ClearanceRequest.objects.all()
-        
-        # Apply filters
-        if graduation_year:
-            clearances = clearances.filter(student__graduation_year=graduation_year)
-        if school_id:
-            clearances = clearances.filter(student__school_id=school_id)
-        if admission_year:
-            clearances = clearances.filter(student__admission_year=admission_year)
+        rollups = ClearanceDailyRollup.objects.filter(**_cohort_filters(request))
         
         # Overall statistics
-        total_clearances = clearances.count()
-        completed = clearances.filter(status='completed').count()
-        in_progress = clearances.filter(status='in_progress').count()
-        rejected = clearances.filter(status='rejected').count()
-        pending = clearances.filter(status='pending').count()
+        by_status = {
+            row['status']: row['total']
+            for row in rollups.order_by().values('status').annotate(total=Sum('count'))
+        }
+        total_clearances = sum(by_status.values())
+        completed = by_status.get('completed', 0)
+        in_progress = by_status.get('in_progress', 0)
+        rejected = by_status.get('rejected', 0)
+        pending = by_status.get('pending', 0)
         
         completion_rate = (completed / total_clearances * 100) if total_clearances > 0 else 0
         
+        status_totals = dict(
+            total=Sum('count'),
+            completed=Sum('count', filter=Q(status='completed'), default=0),
+            in_progress=Sum('count', filter=Q(status='in_progress'), default=0),
+            rejected=Sum('count', filter=Q(status='rejected'), default=0),
+        )
+        
         # By graduation year
-        by_graduation_year = clearances.values('student__graduation_year').annotate(
-            total=Count('id'),
-            completed=Count('id', filter=Q(status='completed')),
-            in_progress=Count('id', filter=Q(status='in_progress')),
-            rejected=Count('id', filter=Q(status='rejected'))
-        ).order_by('-student__graduation_year')
+        by_graduation_year = _rename(
+            rollups.order_by().values('graduation_year').annotate(**status_totals).order_by('-graduation_year'),
+            graduation_year='student__graduation_year',
+        )
         
         # By school
-        by_school = clearances.values(
-            'student__school__name',
-            'student__school__code'
-        ).annotate(
-            total=Count('id'),
-            completed=Count('id', filter=Q(status='completed')),
-            in_progress=Count('id', filter=Q(status='in_progress')),
-            rejected=Count('id', filter=Q(status='rejected'))
-        ).order_by('-total')
+        by_school = _rename(
+            rollups.order_by().values('school__name', 'school__code').annotate(**status_totals).order_by('-total'),
+            school__name='student__school__name',
+            school__code='student__school__code',
+        )
         
         # Average completion time (for completed clearances)
-        completed_clearances = clearances.filter(status='completed', completion_date__isnull=False)
-        avg_completion_days = None
-        if completed_clearances.exists():
-            completion_times = []
-            for clearance in completed_clearances:
-                days = (clearance.completion_date - clearance.submission_date).days
-                completion_times.append(days)
-            avg_completion_days = sum(completion_times) / len(completion_times) if completion_times else 0
+        times = rollups.aggregate(total=Sum('completion_time_total'), count=Sum('completion_time_count'))
+        avg_completion_days = _average_days(times['total'], times['count'])
+        
+        # Completion time distribution, computed in the database
+        completed_clearances = ClearanceRequest.objects.filter(
+            status='completed', **_cohort_filters(request, prefix='student__')
+        )
+        completion_time = summarise(
+            duration_stats(completed_clearances, 'completion_date', 'submission_date'),
+            unit=timedelta(days=1),
+        )
         
         return Response({
             'summary': {
@@ -88,8 +139,14 @@ class ClearanceCompletionRateView(APIView):
                 'completion_rate': round(completion_rate, 2),
                 'average_completion_days': round(avg_completion_days, 1) if avg_completion_days else None
             },
-            'by_graduation_year': list(by_graduation_year),
-            'by_school': list(by_school)
+            'completion_time_days': {
+                'median': completion_time['median'],
+                'p90': completion_time['p90'],
+                'p99': completion_time['p99'],
+                'histogram': completion_time['histogram'],
+            },
+            'by_graduation_year': by_graduation_year,
+            'by_school': by_school
         })
 
 
@@ -97,54 +154,47 @@ class DepartmentBottlenecksView(APIView):
     """
     Analytics for department approval bottlenecks
     GET /api/analytics/department-bottlenecks/
+    
+    The report is one query grouped by department; names and ordering come
+    from the department registry. By default it reads the approval rollups;
+    with ?as_of=<date or datetime> it is computed from the live approvals as
+    they stood at that moment.
     """
     permission_classes = [IsAuthenticated, IsAdminOrDepartmentStaff]
     
     def get(self, request):
-        # Get all departments
-        departments = Department.objects.filter(is_active=True)
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            as_of = _parse_as_of(as_of)
+            if as_of is None:
+                return Response(
+                    {'error': 'as_of must be an ISO date or datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rows = self._live_report(as_of)
+        else:
+            rows = self._rollup_report()
         
         bottleneck_data = []
-        
-        for dept in departments:
-            # Approvals for this department
-            approvals = ClearanceApproval.objects.filter(department=dept)
-            
-            total_approvals = approvals.count()
-            pending = approvals.filter(status='pending').count()
-            approved = approvals.filter(status='approved').count()
-            rejected = approvals.filter(status='rejected').count()
-            
-            # Average approval time (for approved/rejected)
-            processed = approvals.filter(status__in=['approved', 'rejected'], approval_date__isnull=False)
-            avg_processing_days = None
-            if processed.exists():
-                processing_times = []
-                for approval in processed:
-                    days = (approval.approval_date - approval.created_at).days
-                    processing_times.append(days)
-                avg_processing_days = sum(processing_times) / len(processing_times) if processing_times else 0
-            
-            # Pending for more than 7 days
-            seven_days_ago = timezone.now() - timedelta(days=7)
-            overdue_pending = approvals.filter(
-                status='pending',
-                created_at__lt=seven_days_ago
-            ).count()
+        for row in rows:
+            total_approvals = row['total']
+            approved = row['approved']
+            rejected = row['rejected']
+            avg_processing_days = row['average_processing_days']
             
             approval_rate = (approved / total_approvals * 100) if total_approvals > 0 else 0
             rejection_rate = (rejected / total_approvals * 100) if total_approvals > 0 else 0
             
             bottleneck_data.append({
-                'department_name': dept.name,
-                'department_code': dept.code,
-                'department_type': dept.department_type,
-                'approval_order': dept.approval_order,
+                'department_name': row['name'],
+                'department_code': row['code'],
+                'department_type': row['department_type'],
+                'approval_order': row['approval_order'],
                 'total_approvals': total_approvals,
-                'pending': pending,
+                'pending': row['pending'],
                 'approved': approved,
                 'rejected': rejected,
-                'overdue_pending': overdue_pending,
+                'overdue_pending': row['overdue_pending'],
                 'approval_rate': round(approval_rate, 2),
                 'rejection_rate': round(rejection_rate, 2),
                 'average_processing_days': round(avg_processing_days, 1) if avg_processing_days else None
@@ -155,8 +205,76 @@ class DepartmentBottlenecksView(APIView):
         
         return Response({
             'departments': bottleneck_data,
-            'total_departments': len(bottleneck_data)
+            'total_departments': len(bottleneck_data),
+            'as_of': as_of.isoformat() if as_of else None
         })
+    
+    def _report(self, figures):
+        """One row per active department (registry order), zeros when it has no approvals"""
+        empty = {
+            'total': 0, 'pending': 0, 'approved': 0, 'rejected': 0,
+            'overdue_pending': 0, 'average_processing_days': None,
+        }
+        for department in active_departments():
+            row = {
+                'name': department.name,
+                'code': department.code,
+                'department_type': department.department_type,
+                'approval_order': department.approval_order,
+            }
+            row.update(figures.get(department.id, empty))
+            yield row
+    
+    def _rollup_report(self):
+        """Current figures from the approval rollups"""
+        overdue_before = timezone.localdate() - timedelta(days=7)
+        department_ids = [department.id for department in active_departments()]
+        if not department_ids:
+            return []
+        rows = ApprovalDailyRollup.objects.filter(department_id__in=department_ids).order_by().values(
+            'department_id'
+        ).annotate(
+            total=Sum('count', default=0),
+            pending=Sum('count', filter=Q(status='pending'), default=0),
+            approved=Sum('count', filter=Q(status='approved'), default=0),
+            rejected=Sum('count', filter=Q(status='rejected'), default=0),
+            # Pending for more than 7 days (to the day)
+            overdue_pending=Sum('count', filter=Q(status='pending', day__lt=overdue_before), default=0),
+            processing_total=Sum('processing_time_total'),
+            processing_count=Sum('processing_time_count'),
+        )
+        figures = {}
+        for row in rows:
+            row['average_processing_days'] = _average_days(row.pop('processing_total'), row.pop('processing_count'))
+            figures[row.pop('department_id')] = row
+        return self._report(figures)
+    
+    def _live_report(self, as_of):
+        """Figures from the live approvals as they stood at as_of"""
+        department_ids = [department.id for department in active_departments()]
+        if not department_ids:
+            return []
+        existed = Q(created_at__lte=as_of)
+        decided = Q(approval_date__lte=as_of)
+        undecided = Q(status='pending') | Q(approval_date__isnull=True) | Q(approval_date__gt=as_of)
+        pending = existed & undecided
+        processed = existed & decided & Q(status__in=['approved', 'rejected'])
+        rows = ClearanceApproval.objects.filter(department_id__in=department_ids).order_by().values(
+            'department_id'
+        ).annotate(
+            total=Count('id', filter=existed),
+            pending=Count('id', filter=pending),
+            approved=Count('id', filter=existed & decided & Q(status='approved')),
+            rejected=Count('id', filter=existed & decided & Q(status='rejected')),
+            overdue_pending=Count('id', filter=pending & Q(created_at__lt=as_of - timedelta(days=7))),
+            average_processing=Avg(duration_expression('approval_date', 'created_at'), filter=processed),
+        )
+        figures = {}
+        for row in rows:
+            average = row.pop('average_processing')
+            row['average_processing_days'] = average.total_seconds() / 86400 if average else None
+            figures[row.pop('department_id')] = row
+        return self._report(figures)
 
 
 class FinancialSummaryView(APIView):
@@ -167,70 +285,59 @@ class FinancialSummaryView(APIView):
     permission_classes = [IsAuthenticated, IsAdminOrDepartmentStaff]
     
     def get(self, request):
-        # Query parameters
-        graduation_year = request.query_params.get('graduation_year')
-        school_id = request.query_params.get('school_id')
-        admission_year = request.query_params.get('admission_year')
-        
-        # Base queryset for payments
-        payments = Payment.objects.all()
-        students = Student.objects.all()
-        
-        # Apply filters
-        if graduation_year:
-            payments = payments.filter(student__graduation_year=graduation_year)
-            students = students.filter(graduation_year=graduation_year)
-        if school_id:
-            payments = payments.filter(student__school_id=school_id)
-            students = students.filter(school_id=school_id)
-        if admission_year:
-            payments = payments.filter(student__admission_year=admission_year)
-            students = students.filter(admission_year=admission_year)
+        filters = _cohort_filters(request)
+        payments = PaymentDailyRollup.objects.filter(**filters)
+        students = StudentDailyRollup.objects.filter(**filters)
         
         # Overall payment statistics
-        total_payments = payments.count()
-        verified_payments = payments.filter(is_verified=True).count()
-        pending_payments = payments.filter(is_verified=False).count()
+        totals = payments.aggregate(
+            total_payments=Sum('count', default=0),
+            verified_payments=Sum('count', filter=Q(is_verified=True), default=0),
+            total_amount_paid=Sum('amount_total', default=0),
+            total_graduation_fees=Sum('graduation_fee_total', default=0),
+        )
+        total_payments = totals['total_payments']
+        verified_payments = totals['verified_payments']
+        pending_payments = total_payments - verified_payments
+        total_amount_paid = totals['total_amount_paid']
+        total_graduation_fees = totals['total_graduation_fees']
         
-        total_amount_paid = payments.aggregate(total=Sum('amount'))['total'] or 0
-        total_graduation_fees = payments.aggregate(total=Sum('graduation_fee_amount'))['total'] or 0
+        # Payment is one-to-one with Student, so payment counts are student counts
+        cohort_totals = dict(
+            total_students=Sum('count'),
+            total_paid=Sum('amount_total'),
+            verified_count=Sum('count', filter=Q(is_verified=True), default=0),
+            pending_count=Sum('count', filter=Q(is_verified=False), default=0),
+        )
         
         # By graduation year
-        by_graduation_year = payments.values('student__graduation_year').annotate(
-            total_students=Count('student__id', distinct=True),
-            total_paid=Sum('amount'),
-            verified_count=Count('id', filter=Q(is_verified=True)),
-            pending_count=Count('id', filter=Q(is_verified=False))
-        ).order_by('-student__graduation_year')
+        by_graduation_year = _rename(
+            payments.order_by().values('graduation_year').annotate(**cohort_totals).order_by('-graduation_year'),
+            graduation_year='student__graduation_year',
+        )
         
         # By school
-        by_school = payments.values(
-            'student__school__name',
-            'student__school__code'
-        ).annotate(
-            total_students=Count('student__id', distinct=True),
-            total_paid=Sum('amount'),
-            verified_count=Count('id', filter=Q(is_verified=True)),
-            pending_count=Count('id', filter=Q(is_verified=False))
-        ).order_by('-total_paid')
+        by_school = _rename(
+            payments.order_by().values('school__name', 'school__code').annotate(**cohort_totals).order_by('-total_paid'),
+            school__name='student__school__name',
+            school__code='student__school__code',
+        )
         
         # By admission year
-        by_admission_year = payments.values('student__admission_year').annotate(
-            total_students=Count('student__id', distinct=True),
-            total_paid=Sum('amount'),
-            verified_count=Count('id', filter=Q(is_verified=True)),
-            pending_count=Count('id', filter=Q(is_verified=False))
-        ).order_by('-student__admission_year')
+        by_admission_year = _rename(
+            payments.order_by().values('admission_year').annotate(**cohort_totals).order_by('-admission_year'),
+            admission_year='student__admission_year',
+        )
         
         # Payment methods breakdown
-        by_payment_method = payments.values('payment_method').annotate(
-            count=Count('id'),
-            total_amount=Sum('amount')
+        by_payment_method = payments.order_by().values('payment_method').annotate(
+            count=Sum('count'),
+            total_amount=Sum('amount_total')
         ).order_by('-count')
         
         # Students without payments
-        total_students = students.count()
-        students_with_payments = payments.values('student').distinct().count()
+        total_students = students.aggregate(total=Sum('count', default=0))['total']
+        students_with_payments = total_payments
         students_without_payments = total_students - students_with_payments
         
         return Response({
@@ -245,9 +352,9 @@ class FinancialSummaryView(APIView):
                 'students_without_payments': students_without_payments,
                 'payment_compliance_rate': round((students_with_payments / total_students * 100), 2) if total_students > 0 else 0
             },
-            'by_graduation_year': list(by_graduation_year),
-            'by_school': list(by_school),
-            'by_admission_year': list(by_admission_year),
+            'by_graduation_year': by_graduation_year,
+            'by_school': by_school,
+            'by_admission_year': by_admission_year,
             'by_payment_method': list(by_payment_method)
         })
 
@@ -260,39 +367,61 @@ class OverallDashboardView(APIView):
     permission_classes = [IsAuthenticated, IsAdminOrDepartmentStaff]
     
     def get(self, request):
+        seven_days_ago = timezone.localdate() - timedelta(days=7)
+        
         # Students
-        total_students = Student.objects.count()
-        eligible_students = Student.objects.filter(eligibility_status='eligible').count()
+        students = StudentDailyRollup.objects.aggregate(
+            total=Sum('count', default=0),
+            eligible=Sum('count', filter=Q(eligibility_status='eligible'), default=0),
+        )
+        total_students = students['total']
+        eligible_students = students['eligible']
         
-        # Clearances
-        total_clearances = ClearanceRequest.objects.count()
-        completed_clearances = ClearanceRequest.objects.filter(status='completed').count()
-        pending_clearances = ClearanceRequest.objects.filter(status='pending').count()
-        in_progress_clearances = ClearanceRequest.objects.filter(status='in_progress').count()
+        # Clearances, including recent activity (last 7 days)
+        clearances = ClearanceDailyRollup.objects.aggregate(
+            total=Sum('count', default=0),
+            completed=Sum('count', filter=Q(status='completed'), default=0),
+            pending=Sum('count', filter=Q(status='pending'), default=0),
+            in_progress=Sum('count', filter=Q(status='in_progress'), default=0),
+            recent=Sum('count', filter=Q(day__gt=seven_days_ago), default=0),
+        )
+        total_clearances = clearances['total']
+        completed_clearances = clearances['completed']
+        pending_clearances = clearances['pending']
+        in_progress_clearances = clearances['in_progress']
+        recent_clearances = clearances['recent']
         
         # Approvals
-        total_approvals = ClearanceApproval.objects.count()
-        pending_approvals = ClearanceApproval.objects.filter(status='pending').count()
+        approvals = ApprovalDailyRollup.objects.aggregate(
+            total=Sum('count', default=0),
+            pending=Sum('count', filter=Q(status='pending'), default=0),
+        )
+        total_approvals = approvals['total']
+        pending_approvals = approvals['pending']
         
         # Finance
-        total_payments = Payment.objects.count()
-        verified_payments = Payment.objects.filter(is_verified=True).count()
-        total_revenue = Payment.objects.aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Recent activity (last 7 days)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        recent_clearances = ClearanceRequest.objects.filter(created_at__gte=seven_days_ago).count()
-        recent_payments = Payment.objects.filter(created_at__gte=seven_days_ago).count()
+        payments = PaymentDailyRollup.objects.aggregate(
+            total=Sum('count', default=0),
+            verified=Sum('count', filter=Q(is_verified=True), default=0),
+            revenue=Sum('amount_total', default=0),
+            recent=Sum('count', filter=Q(day__gt=seven_days_ago), default=0),
+        )
+        total_payments = payments['total']
+        verified_payments = payments['verified']
+        total_revenue = payments['revenue']
+        recent_payments = payments['recent']
         
         # Gown issuance (if available)
         try:
             from apps.gown_issuance.models import GownIssuance
-            total_gowns_issued = GownIssuance.objects.count()
-            gowns_returned = GownIssuance.objects.filter(status='returned').count()
-            gowns_overdue = GownIssuance.objects.filter(
-                status='issued',
-                expected_return_date__lt=timezone.now().date()
-            ).count()
+            gowns = GownIssuance.objects.aggregate(
+                total=Count('id'),
+                returned=Count('id', filter=Q(status='returned')),
+                overdue=Count('id', filter=Q(status='issued', expected_return_date__lt=timezone.now().date())),
+            )
+            total_gowns_issued = gowns['total']
+            gowns_returned = gowns['returned']
+            gowns_overdue = gowns['overdue']
         except:
             total_gowns_issued = 0
             gowns_returned = 0
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ClearanceApproval
+from .models import ApprovalLease, ClearanceApproval
 
 
 @admin.register(ClearanceApproval)
@@ -16,3 +16,12 @@ class ClearanceApprovalAdmin(admin.ModelAdmin):
         ('Details', {'fields': ('rejection_reason', 'notes', 'evidence_file')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at'), 'classes': ('collapse',)}),
     )
+
+
+@admin.register(ApprovalLease)
+class ApprovalLeaseAdmin(admin.ModelAdmin):
+    """Admin interface for ApprovalLease model"""
+    list_display = ('approval', 'holder', 'department', 'leased_at', 'expires_at')
+    list_filter = ('department',)
+    search_fields = ('holder__email', 'approval__clearance_request__student__registration_number')
+    readonly_fields = ('id', 'claim_token', 'leased_at')
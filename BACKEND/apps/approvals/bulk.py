@@ -0,0 +1,189 @@
+"""
+Set-based engine for bulk approve/reject of clearance approvals
+
+Each chunk of approval ids is processed in one transaction with a constant
+number of queries: lock the rows, read their work-queue leases, one UPDATE for
+the approvals, one aggregate pass over the parent clearance requests, and bulk
+inserts for audit logs and notifications.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.approvals.models import ApprovalLease, ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.audit_logs.models import AuditLog
+
+
+BULK_APPROVAL_CHUNK_SIZE = getattr(settings, 'BULK_APPROVAL_CHUNK_SIZE', 500)
+
+
+def bulk_process_approvals(
+    approval_ids,
+    action,
+    user,
+    notes='',
+    rejection_reason='',
+    department=None,
+    ip_address=None,
+    chunk_size=None
+):
+    """
+    Approve or reject many clearance approvals at once
+
+    Args:
+        approval_ids: Iterable of ClearanceApproval ids
+        action: 'approve' or 'reject'
+        user: User performing the action
+        notes: Notes stored on every processed approval
+        rejection_reason: Reason stored on every rejected approval
+        department: Optional Department; approvals outside it are reported as not found
+        ip_address: Requester IP recorded in the audit log
+        chunk_size: Approvals per transaction (default BULK_APPROVAL_CHUNK_SIZE)
+
+    Returns:
+        list: One result dict per requested id, in request order
+    """
+    chunk_size = chunk_size or BULK_APPROVAL_CHUNK_SIZE
+    ids = list(dict.fromkeys(str(approval_id) for approval_id in approval_ids))
+
+    results = {}
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        results.update(_process_chunk(
+            chunk, action, user, notes, rejection_reason, department, ip_address
+        ))
+
+    return [results[approval_id] for approval_id in ids]
+
+
+def _process_chunk(chunk, action, user, notes, rejection_reason, department, ip_address):
+    """Process one chunk of approval ids inside a single transaction"""
+    from apps.analytics.rollups import schedule_refresh_for
+    from apps.notifications.events import publish_for_clearances
+    from apps.notifications.utils import notify_approval_actions_bulk
+
+    now = timezone.now()
+    new_status = 'approved' if action == 'approve' else 'rejected'
+    results = {}
+
+    with transaction.atomic():
+        # Lock the affected rows in a stable order so concurrent batches cannot deadlock
+        locked = ClearanceApproval.objects.select_for_update().filter(id__in=chunk)
+        if department is not None:
+            locked = locked.filter(department=department)
+        rows = list(locked.order_by('pk').values_list('id', 'status', 'clearance_request_id'))
+
+        # Work-queue leases (apps/approvals/queue.py): rows another approver holds are skipped
+        leases = {
+            approval_id: (holder_id, expires_at)
+            for approval_id, holder_id, expires_at in ApprovalLease.objects.filter(
+                approval_id__in=[row[0] for row in rows]
+            ).values_list('approval_id', 'holder_id', 'expires_at')
+        }
+
+        pending_ids = []
+        clearance_ids = set()
+        for approval_id, current_status, clearance_id in rows:
+            holder_id, expires_at = leases.get(approval_id, (None, None))
+            if current_status == 'pending' and holder_id not in (None, user.pk) and expires_at > now:
+                results[str(approval_id)] = {
+                    'approval_id': str(approval_id),
+                    'success': False,
+                    'error': 'Claimed by another approver',
+                }
+            elif current_status == 'pending':
+                pending_ids.append(approval_id)
+                clearance_ids.add(clearance_id)
+                results[str(approval_id)] = {
+                    'approval_id': str(approval_id),
+                    'success': True,
+                    'status': new_status,
+                }
+            else:
+                results[str(approval_id)] = {
+                    'approval_id': str(approval_id),
+                    'success': False,
+                    'error': f'This approval is already {current_status}',
+                }
+
+        for approval_id in chunk:
+            results.setdefault(approval_id, {
+                'approval_id': approval_id,
+                'success': False,
+                'error': 'Approval not found',
+            })
+
+        if not pending_ids:
+            return results
+
+        # One UPDATE for every approval moving to the new status
+        changes = {
+            'status': new_status,
+            'approved_by': user,
+            'approval_date': now,
+            'updated_at': now,
+        }
+        if action == 'approve':
+            changes['notes'] = notes or 'Bulk approved'
+        else:
+            changes['notes'] = notes
+            changes['rejection_reason'] = rejection_reason
+        ClearanceApproval.objects.filter(id__in=pending_ids).update(**changes)
+        if any(approval_id in leases for approval_id in pending_ids):
+            # Processed approvals leave the work queue
+            ApprovalLease.objects.filter(approval_id__in=pending_ids).delete()
+
+        # Recompute counters and status for every touched request in one pass
+        ClearanceRequest.refresh_approval_counters(clearance_ids)
+        touched = ClearanceRequest.objects.filter(id__in=clearance_ids)
+        completed_ids = []
+        if action == 'approve':
+            completed_ids = list(
+                touched.filter(pending_count=0).exclude(
+                    status__in=['completed', 'rejected']
+                ).values_list('id', flat=True)
+            )
+            touched.filter(id__in=completed_ids).update(
+                status='completed', completion_date=now, updated_at=now
+            )
+            touched.filter(pending_count__gt=0).exclude(status='rejected').update(
+                status='in_progress', updated_at=now
+            )
+        else:
+            touched.update(status='rejected', updated_at=now)
+
+        # Details needed for audit logs and notifications, in one query
+        processed = list(
+            ClearanceApproval.objects.filter(id__in=pending_ids).values_list(
+                'id',
+                'clearance_request_id',
+                'clearance_request__student__user_id',
+                'department__name',
+            )
+        )
+
+        audit_changes = {'notes': notes, 'bulk': True}
+        if action == 'reject':
+            audit_changes['rejection_reason'] = rejection_reason
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                actor=user,
+                action=action,
+                entity='ClearanceApproval',
+                entity_id=str(approval_id),
+                description=f'Approval #{approval_id} {new_status} for clearance #{clearance_id} (bulk)',
+                changes=audit_changes,
+                ip_address=ip_address,
+            )
+            for approval_id, clearance_id, _, _ in processed
+        ], batch_size=len(processed))
+
+        notify_approval_actions_bulk(processed, new_status, completed_ids)
+
+        # QuerySet.update() bypasses the rollup and live event signal handlers
+        schedule_refresh_for('approvals', pending_ids)
+        schedule_refresh_for('clearances', clearance_ids)
+        publish_for_clearances(clearance_ids)
+
+    return results
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('approvals', '0003_clearanceapproval_evidence_file'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clearanceapproval',
+            index=models.Index(fields=['department', 'created_at', 'id'], name='clearance_a_departm_46c09a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clearanceapproval',
+            index=models.Index(fields=['created_at', 'id'], name='clearance_a_created_737d0d_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('approvals', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalLease',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('claim_token', models.UUIDField(db_index=True, help_text='Token of the claim that took the lease')),
+                ('leased_at', models.DateTimeField(help_text='When the lease was taken')),
+                ('expires_at', models.DateTimeField(help_text='When the lease lapses unless renewed')),
+                ('approval', models.OneToOneField(help_text='Approval being worked on', on_delete=django.db.models.deletion.CASCADE, related_name='lease', to='approvals.clearanceapproval')),
+                ('department', models.ForeignKey(help_text='Department of the leased approval', on_delete=django.db.models.deletion.CASCADE, related_name='approval_leases', to='departments.department')),
+                ('holder', models.ForeignKey(help_text='Staff member holding the lease', on_delete=django.db.models.deletion.CASCADE, related_name='approval_leases', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'approval_leases',
+                'indexes': [models.Index(fields=['holder', 'expires_at'], name='approval_le_holder__624b3d_idx'), models.Index(fields=['department', 'expires_at'], name='approval_le_departm_bce4e8_idx')],
+            },
+        ),
+    ]
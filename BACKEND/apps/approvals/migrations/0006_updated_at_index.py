@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('approvals', '0005_approval_leases'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clearanceapproval',
+            index=models.Index(fields=['updated_at'], name='clearance_a_updated_6ecf40_idx'),
+        ),
+    ]
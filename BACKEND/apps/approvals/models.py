@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.clearances.models import ClearanceRequest
@@ -91,11 +91,37 @@ class ClearanceApproval(models.Model):
             models.Index(fields=['department']),
             models.Index(fields=['status']),
             models.Index(fields=['approval_date']),
+            models.Index(fields=['department', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            # Read by the notification stream's shared poller (apps/notifications/events.py)
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
         return f"{self.department.code} - {self.clearance_request.student} ({self.status})"
     
+    def save(self, *args, **kwargs) -> None:
+        """Save and keep the parent request's approval counters in the same transaction"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._refresh_parent_counters()
+    
+    def delete(self, *args, **kwargs):
+        """Delete and keep the parent request's approval counters in the same transaction"""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self._refresh_parent_counters()
+        return result
+    
+    def _refresh_parent_counters(self) -> None:
+        """Recalculate counters on the parent clearance request"""
+        ClearanceRequest.refresh_approval_counters([self.clearance_request_id])
+        # Keep an already-loaded parent in step so callers see fresh counters
+        if ClearanceApproval.clearance_request.is_cached(self):
+            self.clearance_request.refresh_from_db(
+                fields=ClearanceRequest.COUNTER_FIELDS + ['updated_at']
+            )
+    
     def approve(self, user: User, notes: str = "") -> None:
         """Approve clearance"""
         self.status = 'approved'
@@ -112,3 +138,52 @@ class ClearanceApproval(models.Model):
         self.rejection_reason = rejection_reason
         self.notes = notes
         self.save()
+
+
+class ApprovalLease(models.Model):
+    """
+    Temporary claim of a pending approval by one staff member (see apps/approvals/queue.py)
+
+    At most one lease per approval; a lease past expires_at no longer blocks
+    anyone and is taken over by the next claim.
+    """
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    approval = models.OneToOneField(
+        ClearanceApproval,
+        on_delete=models.CASCADE,
+        related_name='lease',
+        help_text="Approval being worked on"
+    )
+    holder = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='approval_leases',
+        help_text="Staff member holding the lease"
+    )
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.CASCADE,
+        related_name='approval_leases',
+        help_text="Department of the leased approval"
+    )
+    claim_token = models.UUIDField(
+        db_index=True,
+        help_text="Token of the claim that took the lease"
+    )
+    leased_at = models.DateTimeField(help_text="When the lease was taken")
+    expires_at = models.DateTimeField(help_text="When the lease lapses unless renewed")
+    
+    class Meta:
+        db_table = 'approval_leases'
+        indexes = [
+            models.Index(fields=['holder', 'expires_at']),
+            models.Index(fields=['department', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.approval_id} leased by {self.holder_id} until {self.expires_at}"
+    
+    @property
+    def is_active(self) -> bool:
+        return self.expires_at > timezone.now()
@@ -0,0 +1,193 @@
+"""
+Department work queue: pending approvals leased to one staff member at a time
+
+claim_approvals() hands a staff member the department's oldest pending
+approvals that nobody else holds, each under an ApprovalLease that lapses
+after APPROVAL_LEASE_SECONDS unless renewed. Leases held by others block
+approve/reject (approve_reject answers 409, bulk approvals report the row as
+failed), so colleagues working the same queue never duplicate work.
+
+Where the database supports SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL,
+MySQL 8) concurrent claims lock disjoint candidate rows and do not wait on each
+other. Elsewhere (SQLite) candidates may overlap; the unique lease per
+approval decides the winner and the loser claims again from what is left.
+"""
+import uuid
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.approvals.models import ApprovalLease, ClearanceApproval
+
+
+APPROVAL_LEASE_SECONDS = getattr(settings, 'APPROVAL_LEASE_SECONDS', 600)
+APPROVAL_CLAIM_MAX = getattr(settings, 'APPROVAL_CLAIM_MAX', 50)
+
+# Claim rounds when concurrent claimers took some of the candidates first
+CLAIM_ATTEMPTS = 3
+
+# Clearance request statuses whose approvals can be worked on
+WORKABLE_STATUSES = ['submitted', 'in_progress']
+
+
+class LeaseConflict(Exception):
+    """The caller does not hold an active lease on these approvals"""
+
+    def __init__(self, approval_ids):
+        self.approval_ids = [str(approval_id) for approval_id in approval_ids]
+        super().__init__(f'Not leased to you: {", ".join(self.approval_ids)}')
+
+
+def _unclaimed(department, now):
+    """Pending approvals of the department without an active lease, oldest first"""
+    return ClearanceApproval.objects.filter(
+        department=department,
+        status='pending',
+        clearance_request__status__in=WORKABLE_STATUSES,
+    ).exclude(lease__expires_at__gt=now).order_by('created_at', 'pk')
+
+
+def _can_skip_locked():
+    return connection.features.has_select_for_update_skip_locked
+
+
+def _lock_candidates(queryset):
+    """Skip rows other claimers have locked, where the database can"""
+    if not _can_skip_locked():
+        return queryset
+    # Lock only the approvals, not the joined clearance request and lease rows
+    of = ('self',) if connection.features.has_select_for_update_of else ()
+    return queryset.select_for_update(skip_locked=True, of=of)
+
+
+def held_leases(user, department=None):
+    """Active leases of a staff member, oldest approval first"""
+    leases = ApprovalLease.objects.filter(holder=user, expires_at__gt=timezone.now())
+    if department is not None:
+        leases = leases.filter(department=department)
+    return leases.select_related(
+        'approval__clearance_request__student__user', 'approval__department'
+    ).order_by('approval__created_at', 'approval_id')
+
+
+def claim_approvals(user, department, count):
+    """
+    Top a staff member's leases in a department up to `count` approvals
+
+    Leases the user already holds count towards `count` and are kept as they
+    are; use renew_leases() to extend them.
+
+    Returns:
+        list: The user's active ApprovalLeases in the department
+    """
+    count = max(0, min(count, APPROVAL_CLAIM_MAX))
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=APPROVAL_LEASE_SECONDS)
+    wanted = count - ApprovalLease.objects.filter(holder=user, department=department, expires_at__gt=now).count()
+
+    for _ in range(CLAIM_ATTEMPTS):
+        if wanted <= 0:
+            break
+        asked = wanted
+        token = uuid.uuid4()
+        # The row locks need a transaction. Without them the unique lease decides on its
+        # own, and SQLite would fail a read transaction that later has to write while
+        # another claim is writing ("database is locked").
+        with transaction.atomic() if _can_skip_locked() else nullcontext():
+            candidate_ids = list(
+                _lock_candidates(_unclaimed(department, now)).values_list('id', flat=True)[:wanted]
+            )
+            if not candidate_ids:
+                break
+            # Take over lapsed leases, then lease the rows nobody has leased yet.
+            # A concurrent claim that got there first keeps its lease.
+            ApprovalLease.objects.filter(approval_id__in=candidate_ids, expires_at__lte=now).update(
+                holder=user, claim_token=token, leased_at=now, expires_at=expires_at
+            )
+            ApprovalLease.objects.bulk_create([
+                ApprovalLease(
+                    approval_id=approval_id,
+                    holder=user,
+                    department=department,
+                    claim_token=token,
+                    leased_at=now,
+                    expires_at=expires_at,
+                )
+                for approval_id in candidate_ids
+            ], ignore_conflicts=True)
+            claimed = ApprovalLease.objects.filter(claim_token=token).count()
+        wanted -= claimed
+        if len(candidate_ids) < asked:
+            # Nothing unclaimed is left to retry with
+            break
+
+    return list(held_leases(user, department))
+
+
+def renew_leases(user, approval_ids=None):
+    """
+    Extend a staff member's active leases by APPROVAL_LEASE_SECONDS
+
+    Args:
+        user: Lease holder
+        approval_ids: Approvals to renew (default: every active lease of the user)
+
+    Returns:
+        tuple: (expires_at, number of leases renewed)
+
+    Raises:
+        LeaseConflict: Some approval_ids are not (or no longer) leased to the user;
+                       the others are still renewed
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=APPROVAL_LEASE_SECONDS)
+    leases = ApprovalLease.objects.filter(holder=user, expires_at__gt=now)
+    if approval_ids is None:
+        return expires_at, leases.update(expires_at=expires_at)
+
+    ids = {str(approval_id) for approval_id in approval_ids}
+    renewed = leases.filter(approval_id__in=ids).update(expires_at=expires_at)
+    if renewed != len(ids):
+        held = {
+            str(approval_id) for approval_id in ApprovalLease.objects.filter(
+                holder=user, approval_id__in=ids, expires_at=expires_at
+            ).values_list('approval_id', flat=True)
+        }
+        raise LeaseConflict(sorted(ids - held))
+    return expires_at, renewed
+
+
+def release_leases(user, approval_ids=None):
+    """
+    Give approvals back to the queue
+
+    Args:
+        user: Lease holder; leases of other staff are left alone
+        approval_ids: Approvals to release (default: every lease of the user)
+
+    Returns:
+        int: Number of leases released
+    """
+    leases = ApprovalLease.objects.filter(holder=user)
+    if approval_ids is not None:
+        leases = leases.filter(approval_id__in=list(approval_ids))
+    deleted, _ = leases.delete()
+    return deleted
+
+
+def leases_held_by_others(approval_ids, user):
+    """
+    Active leases of other staff on the given approvals
+
+    Returns:
+        dict: approval id (str) -> (holder_id, expires_at)
+    """
+    return {
+        str(approval_id): (holder_id, expires_at)
+        for approval_id, holder_id, expires_at in ApprovalLease.objects.filter(
+            approval_id__in=list(approval_ids), expires_at__gt=timezone.now()
+        ).exclude(holder=user).values_list('approval_id', 'holder_id', 'expires_at')
+    }
@@ -1,8 +1,9 @@
 """
 Serializers for Clearance Approval management
 """
+from django.conf import settings
 from rest_framework import serializers
-from apps.approvals.models import ClearanceApproval
+from apps.approvals.models import ApprovalLease, ClearanceApproval
 from apps.clearances.models import ClearanceRequest
 from apps.departments.models import Department
 
@@ -107,9 +108,10 @@ class BulkApprovalSerializer(serializers.Serializer):
     Serializer for bulk approval actions
     """
     approval_ids = serializers.ListField(
-        child=serializers.IntegerField(),
+        child=serializers.UUIDField(),
         required=True,
-        min_length=1
+        min_length=1,
+        max_length=getattr(settings, 'BULK_APPROVAL_MAX_IDS', 5000)
     )
     action = serializers.ChoiceField(choices=['approve', 'reject'], required=True)
     notes = serializers.CharField(required=False, allow_blank=True)
@@ -133,7 +135,7 @@ class BulkApprovalSerializer(serializers.Serializer):
         # Check if approvals exist
         approvals = ClearanceApproval.objects.filter(id__in=approval_ids)
         
-        if approvals.count() != len(approval_ids):
+        if approvals.count() != len(set(approval_ids)):
             raise serializers.ValidationError({
                 'approval_ids': 'Some approval IDs are invalid'
             })
@@ -151,16 +153,45 @@ class BulkApprovalSerializer(serializers.Serializer):
                     'approval_ids': 'You can only approve clearances for your department'
                 })
         
-        # Check if any approvals are already processed
-        processed = approvals.exclude(status='pending')
-        if processed.exists():
-            raise serializers.ValidationError({
-                'approval_ids': f'{processed.count()} approval(s) are already processed'
-            })
-        
+        # Already-processed approvals are reported per id by the bulk engine
         return attrs
 
 
+class ApprovalClaimSerializer(serializers.Serializer):
+    """
+    Serializer for claiming approvals from the department work queue
+    """
+    count = serializers.IntegerField(
+        required=False,
+        default=10,
+        min_value=1,
+        max_value=getattr(settings, 'APPROVAL_CLAIM_MAX', 50)
+    )
+
+
+class ApprovalLeaseActionSerializer(serializers.Serializer):
+    """
+    Serializer for renewing or releasing work-queue leases (all of the caller's when no ids are given)
+    """
+    approval_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        min_length=1,
+        max_length=getattr(settings, 'APPROVAL_CLAIM_MAX', 50)
+    )
+
+
+class ApprovalLeaseSerializer(serializers.ModelSerializer):
+    """
+    A leased approval in the caller's work queue
+    """
+    approval = ClearanceApprovalListSerializer(read_only=True)
+    
+    class Meta:
+        model = ApprovalLease
+        fields = ['approval', 'leased_at', 'expires_at']
+
+
 class ApprovalStatisticsSerializer(serializers.Serializer):
     """
     Serializer for approval statistics
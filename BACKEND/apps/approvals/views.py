@@ -7,16 +7,31 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Avg, Count, Q, F
 from django.db.models.functions import Extract
 from datetime import timedelta
 
+from config.pagination import KeysetOrPageNumberPagination
+from apps.analytics.durations import duration_stats, summarise
 from apps.approvals.models import ClearanceApproval
+from apps.approvals.bulk import bulk_process_approvals
+from apps.approvals.models import ApprovalLease
+from apps.approvals.queue import (
+    LeaseConflict,
+    claim_approvals,
+    leases_held_by_others,
+    release_leases,
+    renew_leases,
+)
 from apps.approvals.serializers import (
     ClearanceApprovalSerializer,
     ClearanceApprovalListSerializer,
     ApprovalActionSerializer,
     BulkApprovalSerializer,
+    ApprovalClaimSerializer,
+    ApprovalLeaseActionSerializer,
+    ApprovalLeaseSerializer,
     ApprovalStatisticsSerializer
 )
 from apps.users.permissions import CanApproveClearance, IsAdmin, IsAdminOrDepartmentStaff
@@ -66,6 +81,7 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
     ]
     ordering_fields = ['created_at', 'approval_date', 'department__approval_order']
     ordering = ['-created_at']
+    pagination_class = KeysetOrPageNumberPagination
     
     def get_serializer_class(self):
         """Use different serializers for different actions"""
@@ -75,6 +91,10 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
             return ApprovalActionSerializer
         elif self.action == 'bulk_approve':
             return BulkApprovalSerializer
+        elif self.action == 'claim':
+            return ApprovalClaimSerializer
+        elif self.action in ['renew', 'release']:
+            return ApprovalLeaseActionSerializer
         return ClearanceApprovalSerializer
     
     def get_queryset(self):
@@ -155,79 +175,81 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Another approver is working on it (department work queue)
+        conflict = leases_held_by_others([approval.id], user).get(str(approval.id))
+        if conflict:
+            return Response(
+                {'error': 'This approval is claimed by another approver', 'lease_expires_at': conflict[1]},
+                status=status.HTTP_409_CONFLICT
+            )
+        
         # Get related clearance request (no enforced department order)
         clearance_request = approval.clearance_request
         
-        # Process approval
-        if action_type == 'approve':
-            approval.status = 'approved'
-            approval.approved_by = user
-            approval.approval_date = timezone.now()
-            approval.notes = notes or 'Approved'
-            approval.save()
-            
-            # Update clearance request status
-            clearance_request.status = 'in_progress'
-            clearance_request.save()
-            
-            # Check if all approvals are complete
-            pending_count = clearance_request.approvals.filter(status='pending').count()
-            if pending_count == 0:
-                # All approved
-                clearance_request.status = 'completed'
-                clearance_request.completion_date = timezone.now()
+        # Approval, counters and request status change commit together
+        with transaction.atomic():
+            if action_type == 'approve':
+                approval.status = 'approved'
+                approval.approved_by = user
+                approval.approval_date = timezone.now()
+                approval.notes = notes or 'Approved'
+                approval.save()
+                
+                # Update clearance request status (counters were refreshed by save)
+                pending_count = clearance_request.pending_count
+                if pending_count == 0:
+                    # All approved
+                    clearance_request.status = 'completed'
+                    clearance_request.completion_date = timezone.now()
+                    message = 'Approved! All departments have cleared this student.'
+                else:
+                    clearance_request.status = 'in_progress'
+                    message = f'Approved! {pending_count} department(s) remaining.'
                 clearance_request.save()
                 
-                message = 'Approved! All departments have cleared this student.'
-                # Notify student of approval action and completion
-                notify_approval_action(approval)
-                notify_clearance_approved(clearance_request)
-            # Audit log for approve
-            try:
-                AuditLog.log_action(
-                    actor=user,
-                    action='approve',
-                    entity='ClearanceApproval',
-                    entity_id=approval.id,
-                    description=f'Approval #{approval.id} approved for clearance #{clearance_request.id}',
-                    changes={'notes': notes},
-                    ip_address=request.META.get('REMOTE_ADDR'),
-                )
-            except Exception:
-                pass
-            else:
-                message = f'Approved! {pending_count} department(s) remaining.'
-                # Notify student about approval action
-                notify_approval_action(approval)
-            
-        else:  # reject
-            approval.status = 'rejected'
-            approval.approved_by = user
-            approval.approval_date = timezone.now()
-            approval.rejection_reason = rejection_reason
-            approval.notes = notes
-            approval.save()
-            
-            # Reject entire clearance request
-            clearance_request.status = 'rejected'
-            clearance_request.save()
+                audit_action = 'approve'
+                audit_changes = {'notes': notes}
+                
+            else:  # reject
+                approval.status = 'rejected'
+                approval.approved_by = user
+                approval.approval_date = timezone.now()
+                approval.rejection_reason = rejection_reason
+                approval.notes = notes
+                approval.save()
+                
+                # Reject entire clearance request
+                clearance_request.status = 'rejected'
+                clearance_request.save()
+                
+                message = 'Rejected. Clearance request has been rejected.'
+                audit_action = 'reject'
+                audit_changes = {'notes': notes, 'rejection_reason': rejection_reason}
             
-            message = 'Rejected. Clearance request has been rejected.'
-            # Notify student of rejection
+            # Processed approvals leave the work queue
+            ApprovalLease.objects.filter(approval=approval).delete()
+        
+        # Notify student
+        if action_type == 'approve':
+            notify_approval_action(approval)
+            if clearance_request.status == 'completed':
+                notify_clearance_approved(clearance_request)
+        else:
             notify_clearance_rejected(clearance_request)
-            # Audit log for reject
-            try:
-                AuditLog.log_action(
-                    actor=user,
-                    action='reject',
-                    entity='ClearanceApproval',
-                    entity_id=approval.id,
-                    description=f'Approval #{approval.id} rejected for clearance #{clearance_request.id}',
-                    changes={'notes': notes, 'rejection_reason': rejection_reason},
-                    ip_address=request.META.get('REMOTE_ADDR'),
-                )
-            except Exception:
-                pass
+        
+        # Audit log for approve/reject
+        try:
+            AuditLog.log_action(
+                actor=user,
+                action=audit_action,
+                entity='ClearanceApproval',
+                entity_id=approval.id,
+                description=f'Approval #{approval.id} {approval.status} for clearance #{clearance_request.id}',
+                changes=audit_changes,
+                ip_address=request.META.get('REMOTE_ADDR'),
+            )
+        except Exception:
+            pass
         
         return Response({
             'message': message,
@@ -258,7 +280,7 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
         Bulk approve multiple clearances
         POST /api/approvals/bulk_approve/
         Body: {
-            "approval_ids": [1, 2, 3],
+            "approval_ids": ["<uuid>", "<uuid>"],
             "action": "approve|reject",
             "notes": "...",
             "rejection_reason": "..."
@@ -273,58 +295,36 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
         rejection_reason = serializer.validated_data.get('rejection_reason', '')
         user = request.user
         
-        # Get approvals
-        approvals = ClearanceApproval.objects.filter(id__in=approval_ids, status='pending')
-        
-        success_count = 0
-        failed_count = 0
-        errors = []
+        # Non-admin staff can only act on their own department's approvals
+        department = None if user.role == 'admin' else user.department
+        if user.role != 'admin' and department is None:
+            return Response(
+                {'error': 'No department assigned to your account'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = bulk_process_approvals(
+            approval_ids,
+            action_type,
+            user,
+            notes=notes,
+            rejection_reason=rejection_reason,
+            department=department,
+            ip_address=request.META.get('REMOTE_ADDR'),
+        )
         
-        for approval in approvals:
-            try:
-                clearance_request = approval.clearance_request
-                
-                # Process
-                if action_type == 'approve':
-                    approval.status = 'approved'
-                    approval.approved_by = user
-                    approval.approval_date = timezone.now()
-                    approval.notes = notes or 'Bulk approved'
-                    approval.save()
-                    
-                    clearance_request.status = 'in_progress'
-                    
-                    # Check completion
-                    if clearance_request.approvals.filter(status='pending').count() == 0:
-                        clearance_request.status = 'completed'
-                        clearance_request.completion_date = timezone.now()
-                    
-                    clearance_request.save()
-                else:  # reject
-                    approval.status = 'rejected'
-                    approval.approved_by = user
-                    approval.approval_date = timezone.now()
-                    approval.rejection_reason = rejection_reason
-                    approval.notes = notes
-                    approval.save()
-                    
-                    clearance_request.status = 'rejected'
-                    clearance_request.save()
-                
-                success_count += 1
-                
-            except Exception as e:
-                errors.append({
-                    'approval_id': approval.id,
-                    'error': str(e)
-                })
-                failed_count += 1
+        success_count = sum(1 for result in results if result['success'])
+        errors = [
+            {'approval_id': result['approval_id'], 'error': result['error']}
+            for result in results if not result['success']
+        ]
         
         return Response({
             'message': f'Bulk {action_type} completed',
             'success_count': success_count,
-            'failed_count': failed_count,
-            'errors': errors
+            'failed_count': len(errors),
+            'errors': errors,
+            'results': results
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
@@ -366,6 +366,83 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
             'approvals': serializer.data
         })
     
+    def _queue_department(self, request):
+        """Department whose work queue the caller draws from, or an error Response"""
+        user = request.user
+        if user.role != 'department_staff':
+            return None, Response(
+                {'error': 'Only department staff can work the approval queue'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if not user.department:
+            return None, Response(
+                {'error': 'No department assigned'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return user.department, None
+    
+    @action(detail=False, methods=['post'])
+    def claim(self, request):
+        """
+        Claim pending approvals from the department work queue
+        POST /api/approvals/claim/
+        Body: {"count": 10}
+        Tops the caller's leases up to `count`; each lease lapses after
+        APPROVAL_LEASE_SECONDS unless renewed. Approvals leased to someone
+        else cannot be approved or rejected by anyone but the holder.
+        """
+        department, error = self._queue_department(request)
+        if error:
+            return error
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        leases = claim_approvals(request.user, department, serializer.validated_data['count'])
+        return Response({
+            'department': department.name,
+            'count': len(leases),
+            'leases': ApprovalLeaseSerializer(leases, many=True).data
+        })
+    
+    @action(detail=False, methods=['post'])
+    def renew(self, request):
+        """
+        Extend the caller's leases
+        POST /api/approvals/renew/
+        Body: {"approval_ids": ["<uuid>", ...]} (optional, default: all of them)
+        Returns 409 with the ids no longer leased to the caller
+        """
+        _, error = self._queue_department(request)
+        if error:
+            return error
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            expires_at, renewed = renew_leases(request.user, serializer.validated_data.get('approval_ids'))
+        except LeaseConflict as e:
+            return Response(
+                {'error': 'Some approvals are no longer leased to you', 'approval_ids': e.approval_ids},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({'renewed_count': renewed, 'expires_at': expires_at})
+    
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """
+        Return the caller's leased approvals to the queue
+        POST /api/approvals/release/
+        Body: {"approval_ids": ["<uuid>", ...]} (optional, default: all of them)
+        """
+        _, error = self._queue_department(request)
+        if error:
+            return error
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        released = release_leases(request.user, serializer.validated_data.get('approval_ids'))
+        return Response({'released_count': released})
+    
     @action(detail=False, methods=['get'])
     def my_approvals(self, request):
         """
@@ -412,23 +489,20 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
             department = None
             approvals = ClearanceApproval.objects.all()
         
-        # Calculate statistics
-        total = approvals.count()
-        pending = approvals.filter(status='pending').count()
-        approved = approvals.filter(status='approved').count()
-        rejected = approvals.filter(status='rejected').count()
+        # Calculate statistics in one grouped query
+        counts = {'pending': 0, 'approved': 0, 'rejected': 0}
+        for row in approvals.order_by().values('status').annotate(count=Count('id')):
+            counts[row['status']] = row['count']
+        total = sum(counts.values())
+        pending = counts['pending']
+        approved = counts['approved']
+        rejected = counts['rejected']
         
-        # Average approval time (in hours)
-        approved_approvals = approvals.filter(status='approved', approval_date__isnull=False)
-        if approved_approvals.exists():
-            time_diffs = []
-            for approval in approved_approvals:
-                if approval.approval_date and approval.created_at:
-                    diff = (approval.approval_date - approval.created_at).total_seconds() / 3600
-                    time_diffs.append(diff)
-            avg_time = sum(time_diffs) / len(time_diffs) if time_diffs else None
-        else:
-            avg_time = None
+        # Approval time (in hours), computed in the database
+        approval_time = summarise(duration_stats(
+            approvals.filter(status='approved'), 'approval_date', 'created_at'
+        ))
+        avg_time = approval_time['average']
         
         return Response({
             'department': department.name if department else 'All Departments',
@@ -437,5 +511,11 @@ class ClearanceApprovalViewSet(viewsets.ModelViewSet):
             'approved_count': approved,
             'rejected_count': rejected,
             'approval_rate': round((approved / total * 100), 2) if total > 0 else 0,
-            'average_approval_time_hours': round(avg_time, 2) if avg_time else None
+            'average_approval_time_hours': round(avg_time, 2) if avg_time else None,
+            'approval_time_hours': {
+                'median': approval_time['median'],
+                'p90': approval_time['p90'],
+                'p99': approval_time['p99'],
+                'histogram': approval_time['histogram'],
+            }
         })
@@ -0,0 +1,199 @@
+"""
+Buffered audit log writer
+
+AuditLogMiddleware hands unsaved AuditLog rows to an in-process queue. A
+background thread writes them with bulk_create whenever AUDIT_LOG_BUFFER_BATCH_SIZE
+rows are waiting or AUDIT_LOG_BUFFER_FLUSH_INTERVAL seconds have passed.
+
+The queue is bounded by AUDIT_LOG_BUFFER_MAX_SIZE. What happens when it fills
+up is set by AUDIT_LOG_BUFFER_OVERFLOW:
+
+    'drop_reads' (default)  read-only requests (GET/HEAD/OPTIONS) are dropped once
+                            the queue is 90% full; mutations wait up to
+                            AUDIT_LOG_BUFFER_BLOCK_TIMEOUT seconds for space and
+                            are then written synchronously
+    'block'                 every entry waits for space, then is written synchronously
+    'drop'                  every entry is dropped when the queue is full
+
+Rows still queued are flushed when the process exits.
+
+Note: created_at is set when a batch is written, so buffered rows can be up to
+one flush interval later than the request.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from apps.audit_logs.models import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+OVERFLOW_POLICIES = ('drop_reads', 'block', 'drop')
+
+# Fraction of the queue that read-only requests may fill under 'drop_reads'
+READ_HIGH_WATER = 0.9
+
+
+class AuditLogBuffer:
+    """Bounded queue of AuditLog rows written in batches by a daemon thread"""
+
+    def __init__(
+        self,
+        max_size=None,
+        batch_size=None,
+        flush_interval=None,
+        block_timeout=None,
+        overflow=None,
+        background=True
+    ):
+        self.max_size = max_size or getattr(settings, 'AUDIT_LOG_BUFFER_MAX_SIZE', 10000)
+        self.batch_size = batch_size or getattr(settings, 'AUDIT_LOG_BUFFER_BATCH_SIZE', 200)
+        self.flush_interval = flush_interval or getattr(settings, 'AUDIT_LOG_BUFFER_FLUSH_INTERVAL', 1.0)
+        self.block_timeout = block_timeout if block_timeout is not None else getattr(
+            settings, 'AUDIT_LOG_BUFFER_BLOCK_TIMEOUT', 0.5
+        )
+        self.overflow = overflow or getattr(settings, 'AUDIT_LOG_BUFFER_OVERFLOW', 'drop_reads')
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown audit log overflow policy: {self.overflow}')
+        self.background = background
+
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, entry, method='GET'):
+        """
+        Queue an unsaved AuditLog for writing
+
+        Args:
+            entry: Unsaved AuditLog object
+            method: HTTP method of the request, used by the overflow policy
+
+        Returns:
+            bool: False if the entry was dropped
+        """
+        if self.background:
+            self._ensure_started()
+
+        is_read = method.upper() in READ_METHODS
+        if (
+            self.overflow == 'drop_reads'
+            and is_read
+            and self._queue.qsize() >= self.max_size * READ_HIGH_WATER
+        ):
+            self.dropped += 1
+            return False
+
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow == 'drop' or (self.overflow == 'drop_reads' and is_read):
+            self.dropped += 1
+            return False
+
+        try:
+            self._queue.put(entry, timeout=self.block_timeout)
+        except queue.Full:
+            # Never lose a mutation: write it on the request thread instead
+            self._write([entry])
+        return True
+
+    def flush(self):
+        """Write every queued entry now, on the calling thread"""
+        with self._write_lock:
+            while True:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    break
+                self._write(batch)
+
+    def close(self, timeout=5.0):
+        """Stop the writer thread and flush whatever is left"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def pending(self):
+        """Number of entries waiting to be written"""
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        """Collect batches and write them until stopped"""
+        try:
+            while not self._stop.is_set():
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+
+                batch = [first]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                with self._write_lock:
+                    self._write(batch)
+                close_old_connections()
+        finally:
+            close_old_connections()
+
+    def _take(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            # Audit problems must never break the request flow
+            logger.exception('Failed to write %s audit log entries', len(batch))
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_audit_buffer():
+    """Process-wide AuditLogBuffer, created on first use"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditLogBuffer()
+    return _buffer
@@ -0,0 +1,176 @@
+"""
+Django management command to archive old audit logs.
+Every whole month older than the retention window is written to a gzip JSONL
+file, recorded in manifest.json with its row count and SHA-256, then removed
+from the database (DROP PARTITION on partitioned MySQL, batched DELETE elsewhere).
+Usage: python manage.py archive_audit_logs [--older-than-days 365] [--output-dir DIR] [--dry-run]
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from apps.audit_logs import partitions
+from apps.audit_logs.models import AuditLog
+
+
+ARCHIVE_FIELDS = [
+    'id', 'actor_id', 'action', 'entity', 'entity_id',
+    'description', 'changes', 'ip_address', 'created_at',
+]
+MANIFEST_NAME = 'manifest.json'
+
+
+class Command(BaseCommand):
+    help = 'Move audit logs older than N days into compressed JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=getattr(settings, 'AUDIT_LOG_RETENTION_DAYS', 365),
+            help='Archive whole months that ended more than this many days ago',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=str(getattr(settings, 'AUDIT_LOG_ARCHIVE_DIR', 'archives/audit_logs')),
+            help='Directory for archive files and manifest.json',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows read and deleted per batch (default: 5000)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Future monthly partitions to keep ready on MySQL (default: 3)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the months that would be archived without writing or deleting anything',
+        )
+
+    def handle(self, *args, **options):
+        """Archive and remove every eligible month, oldest first."""
+        if options['older_than_days'] < 0:
+            raise CommandError('--older-than-days must not be negative')
+        batch_size = max(1, options['batch_size'])
+        output_dir = options['output_dir']
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        partitioned = partitions.is_partitioned()
+
+        months = self._eligible_months(cutoff, partitioned)
+        if not months:
+            self.stdout.write(self.style.WARNING('⊘ Nothing to archive'))
+        elif options['dry_run']:
+            for month in months:
+                self.stdout.write(f'Would archive {month:%Y-%m}')
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+            for index, month in enumerate(months):
+                # The oldest partition also holds anything older than its month
+                unbounded = partitioned and index == 0
+                self._archive_month(month, unbounded, partitioned, output_dir, batch_size)
+
+        if partitioned and not options['dry_run']:
+            created = partitions.ensure_future_partitions(options['months_ahead'])
+            if created:
+                self.stdout.write(self.style.SUCCESS(f"✓ Created partitions {', '.join(created)}"))
+
+    def _eligible_months(self, cutoff, partitioned):
+        """Months whose whole window ends before the cutoff"""
+        if partitioned:
+            candidates = [month for _, month, _ in partitions.list_partitions()]
+        else:
+            oldest = AuditLog.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if oldest is None:
+                return []
+            candidates = []
+            month = partitions.month_start(oldest.astimezone(dt_timezone.utc).date())
+            while partitions.month_window(month)[1] <= cutoff:
+                candidates.append(month)
+                month = partitions.add_months(month, 1)
+        return [month for month in candidates if partitions.month_window(month)[1] <= cutoff]
+
+    def _archive_month(self, month, unbounded, partitioned, output_dir, batch_size):
+        start, end = partitions.month_window(month)
+        rows = AuditLog.objects.filter(created_at__lt=end)
+        if not unbounded:
+            rows = rows.filter(created_at__gte=start)
+
+        file_name = f'audit_logs_{month:%Y_%m}.jsonl.gz'
+        path = os.path.join(output_dir, file_name)
+        partial = path + '.partial'
+
+        written = 0
+        with gzip.open(partial, 'wt', encoding='utf-8') as archive:
+            for row in rows.order_by('created_at', 'id').values(*ARCHIVE_FIELDS).iterator(chunk_size=batch_size):
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder))
+                archive.write('\n')
+                written += 1
+
+        remaining = rows.count()
+        if remaining != written:
+            os.remove(partial)
+            raise CommandError(
+                f'{month:%Y-%m}: wrote {written} rows but {remaining} are in the database; nothing deleted'
+            )
+
+        os.replace(partial, path)
+        self._record(output_dir, {
+            'file': file_name,
+            'month': f'{month:%Y-%m}',
+            'start': None if unbounded else start.isoformat(),
+            'end': end.isoformat(),
+            'rows': written,
+            'sha256': _sha256(path),
+            'archived_at': timezone.now().isoformat(),
+        })
+
+        if partitioned:
+            partitions.drop_partition(month)
+        else:
+            self._delete_in_batches(rows, batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Archived {written} rows from {month:%Y-%m} to {file_name}'))
+
+    def _delete_in_batches(self, rows, batch_size):
+        while True:
+            ids = list(rows.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            AuditLog.objects.filter(id__in=ids).delete()
+
+    def _record(self, output_dir, entry):
+        """Add or replace an archive entry in manifest.json"""
+        manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        manifest = {'archives': []}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as fh:
+                manifest = json.load(fh)
+        manifest['archives'] = [a for a in manifest.get('archives', []) if a['file'] != entry['file']]
+        manifest['archives'].append(entry)
+        manifest['archives'].sort(key=lambda a: a['month'])
+
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
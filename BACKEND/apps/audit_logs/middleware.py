@@ -2,6 +2,7 @@
 Audit Log Middleware: logs requests and responses as 'other' actions
 """
 import json
+import random
 import re
 import time
 from django.utils.deprecation import MiddlewareMixin
@@ -9,7 +10,9 @@ from django.conf import settings
 from django.utils.timezone import now
 from django.http import HttpRequest, HttpResponse
 
+from apps.audit_logs.buffer import get_audit_buffer
 from apps.audit_logs.models import AuditLog
+from apps.audit_logs.policy import METADATA, SAMPLE, SKIP, get_audit_policy
 
 
 SENSITIVE_KEYS = getattr(settings, 'AUDIT_LOG_SENSITIVE_KEYS', [
@@ -46,7 +49,26 @@ def _redact(data):
         return None
 
 
+def _headers(request):
+    """Request headers with credentials and cookies masked"""
+    headers = {}
+    for k, v in request.META.items():
+        if not k.startswith('HTTP_'):
+            continue
+        lowered = k.lower()
+        if 'cookie' in lowered or any(sk.lower() in lowered for sk in SENSITIVE_KEYS):
+            headers[k] = '***'
+        else:
+            headers[k] = v
+    return headers
+
+
 class AuditLogMiddleware(MiddlewareMixin):
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        # Compile the audit policy at startup so bad rules fail fast
+        get_audit_policy()
+
     def process_request(self, request: HttpRequest):
         request._audit_start = time.perf_counter()
         return None
@@ -57,15 +79,22 @@ class AuditLogMiddleware(MiddlewareMixin):
             if hasattr(request, '_audit_start'):
                 duration_ms = int((time.perf_counter() - request._audit_start) * 1000)
 
-            user = getattr(request, 'user', None)
-            actor = user if getattr(user, 'is_authenticated', False) else None
-
             # Only log API endpoints under /api/
             path = request.path
             if not path.startswith('/api/'):
                 return response
 
             method = request.method
+            decision = get_audit_policy().resolve(method, path)
+            if decision.mode == SKIP:
+                return response
+            if decision.mode == SAMPLE and random.random() >= decision.rate:
+                return response
+            capture_bodies = decision.mode != METADATA
+
+            user = getattr(request, 'user', None)
+            actor = user if getattr(user, 'is_authenticated', False) else None
+
             status_code = getattr(response, 'status_code', None)
             ip = request.META.get('REMOTE_ADDR') or request.META.get('HTTP_X_FORWARDED_FOR')
             user_agent = request.META.get('HTTP_USER_AGENT')
@@ -73,7 +102,7 @@ class AuditLogMiddleware(MiddlewareMixin):
             # Request body
             req_body = None
             try:
-                if method in ['POST', 'PUT', 'PATCH']:
+                if capture_bodies and method in ['POST', 'PUT', 'PATCH']:
                     req_body = _redact(getattr(request, 'body', None))
             except Exception:
                 req_body = None
@@ -81,7 +110,9 @@ class AuditLogMiddleware(MiddlewareMixin):
             # Response body (may be streaming)
             resp_body = None
             try:
-                if hasattr(response, 'data'):
+                if not capture_bodies:
+                    pass
+                elif hasattr(response, 'data'):
                     resp_body = _redact(response.data)
                 elif hasattr(response, 'content'):
                     resp_body = _redact(response.content)
@@ -93,7 +124,7 @@ class AuditLogMiddleware(MiddlewareMixin):
                     'method': method,
                     'path': path,
                     'body': req_body,
-                    'headers': {k: v for k, v in request.META.items() if k.startswith('HTTP_')}
+                    'headers': _headers(request) if capture_bodies else None,
                 },
                 'response': {
                     'status_code': status_code,
@@ -103,6 +134,8 @@ class AuditLogMiddleware(MiddlewareMixin):
                     'ip': ip,
                     'user_agent': user_agent,
                     'duration_ms': duration_ms,
+                    'audit_mode': decision.mode,
+                    'sample_rate': decision.rate,
                 }
             }
 
@@ -124,15 +157,19 @@ class AuditLogMiddleware(MiddlewareMixin):
             except Exception:
                 pass
 
-            AuditLog.log_action(
+            entry = AuditLog(
                 actor=actor,
                 action=action_type,
                 entity=path,
-                entity_id=entity_id,
+                entity_id=str(entity_id),
                 description=f'{method} {path}',
                 changes=changes,
                 ip_address=ip,
             )
+            if getattr(settings, 'AUDIT_LOG_BUFFERED', False):
+                get_audit_buffer().submit(entry, method)
+            else:
+                entry.save()
         except Exception:
             # Avoid breaking request flow due to audit issues
             pass
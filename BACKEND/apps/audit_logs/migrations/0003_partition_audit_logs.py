@@ -0,0 +1,44 @@
+# Monthly RANGE partitioning of audit_logs on MySQL
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def partition_audit_logs(apps, schema_editor):
+    from apps.audit_logs import partitions
+
+    if not partitions.supports_partitioning(schema_editor.connection):
+        return
+    AuditLog = apps.get_model('audit_logs', 'AuditLog')
+    oldest = AuditLog.objects.using(schema_editor.connection.alias).order_by('created_at').values_list(
+        'created_at', flat=True
+    ).first()
+    first_month = oldest.date() if oldest else partitions.current_month()
+    partitions.partition_table(first_month, using=schema_editor.connection)
+
+
+def unpartition_audit_logs(apps, schema_editor):
+    from apps.audit_logs import partitions
+
+    partitions.unpartition_table(using=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('audit_logs', '0002_initial'),
+    ]
+
+    operations = [
+        # MySQL partitioned tables cannot have foreign key constraints
+        migrations.AlterField(
+            model_name='auditlog',
+            name='actor',
+            field=models.ForeignKey(db_constraint=False, help_text='User performing the action', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(partition_audit_logs, unpartition_audit_logs),
+    ]
@@ -22,6 +22,7 @@ class AuditLog(models.Model):
         User,
         on_delete=models.SET_NULL,
         null=True,
+        db_constraint=False,  # audit_logs is partitioned on MySQL (see partitions.py)
         related_name='audit_logs_created',
         help_text="User performing the action"
     )
@@ -62,6 +63,7 @@ class AuditLog(models.Model):
             models.Index(fields=['action']),
             models.Index(fields=['entity']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -0,0 +1,172 @@
+"""
+Monthly partition management for the audit_logs table
+
+On MySQL the table is RANGE partitioned on TO_DAYS(created_at), one partition
+per calendar month (pYYYYMM) plus a catch-all pmax. Filters on created_at
+ranges are pruned to the partitions they cover, and old months are removed
+with DROP PARTITION instead of large DELETEs.
+
+Partition boundaries are UTC midnights, matching how created_at is stored
+with USE_TZ. The oldest partition also holds anything older than its month.
+
+Other backends keep a single table; the helpers here report no partitions
+and archive_audit_logs falls back to batched deletes.
+"""
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+
+
+TABLE = 'audit_logs'
+CATCH_ALL = 'pmax'
+
+
+def month_start(value):
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """First day of the month `months` after the month containing value"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_window(month):
+    """Aware UTC [start, end) datetimes covering a month"""
+    start = datetime.combine(month_start(month), time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def current_month():
+    """First day of the current UTC month"""
+    return month_start(timezone.now().date())
+
+
+def partition_name(month):
+    return f'p{month.year:04d}{month.month:02d}'
+
+
+def supports_partitioning(using=None):
+    return (using or connection).vendor == 'mysql'
+
+
+def list_partitions(using=None):
+    """
+    Monthly partitions of the audit_logs table, oldest first
+
+    Returns:
+        list: (name, month, approximate_rows) tuples; empty when not partitioned
+    """
+    conn = using or connection
+    if not supports_partitioning(conn):
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT PARTITION_NAME, TABLE_ROWS
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, table_rows in rows:
+        if name == CATCH_ALL:
+            continue
+        month = date(int(name[1:5]), int(name[5:7]), 1)
+        partitions.append((name, month, table_rows or 0))
+    return partitions
+
+
+def is_partitioned(using=None):
+    conn = using or connection
+    if not supports_partitioning(conn):
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            """,
+            [TABLE],
+        )
+        return cursor.fetchone()[0] > 0
+
+
+def _partition_clause(month):
+    upper = add_months(month, 1).isoformat()
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper}'))"
+
+
+def partition_table(first_month, months_ahead=3, using=None):
+    """
+    Convert audit_logs into a monthly partitioned table (MySQL only)
+
+    The primary key must include the partitioning column, so it becomes
+    (id, created_at). Partitions are created from first_month until
+    months_ahead months past the current month.
+    """
+    conn = using or connection
+    if not supports_partitioning(conn):
+        return
+    last = add_months(current_month(), months_ahead)
+    months = []
+    month = month_start(first_month)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    clauses = [_partition_clause(m) for m in months]
+    clauses.append(f'PARTITION {CATCH_ALL} VALUES LESS THAN MAXVALUE')
+    with conn.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)')
+        cursor.execute(
+            f'ALTER TABLE {TABLE} PARTITION BY RANGE (TO_DAYS(created_at)) ({", ".join(clauses)})'
+        )
+
+
+def unpartition_table(using=None):
+    """Undo partition_table() (MySQL only)"""
+    conn = using or connection
+    if not supports_partitioning(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} REMOVE PARTITIONING')
+        cursor.execute(f'ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id)')
+
+
+def ensure_future_partitions(months_ahead=3, using=None):
+    """
+    Split pmax so that partitions exist up to months_ahead months from now
+
+    Returns:
+        list: Names of the partitions created
+    """
+    conn = using or connection
+    if not is_partitioned(conn):
+        return []
+    existing = list_partitions(conn)
+    month = add_months(existing[-1][1], 1) if existing else current_month()
+    last = add_months(current_month(), months_ahead)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return []
+    clauses = [_partition_clause(m) for m in months]
+    clauses.append(f'PARTITION {CATCH_ALL} VALUES LESS THAN MAXVALUE')
+    with conn.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} REORGANIZE PARTITION {CATCH_ALL} INTO ({", ".join(clauses)})')
+    return [partition_name(m) for m in months]
+
+
+def drop_partition(month, using=None):
+    """Drop the partition holding a month (MySQL only)"""
+    conn = using or connection
+    with conn.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} DROP PARTITION {partition_name(month)}')
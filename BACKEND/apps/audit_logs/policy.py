@@ -0,0 +1,114 @@
+"""
+Route policy for API audit logging
+
+AUDIT_LOG_POLICY is a list of rules checked in order; the first rule whose
+pattern matches the request path (and whose methods include the request
+method) decides how the request is logged:
+
+    {'pattern': r'^/api/notifications/unread_count/$', 'methods': ['GET'], 'mode': 'sample', 'rate': 0.01}
+
+Modes:
+    full      request/response bodies and headers (the default)
+    metadata  method, path, status, IP, user agent and timing only
+    sample    full capture for a random fraction ('rate') of requests
+    skip      not logged
+
+Mutating requests and paths matching AUDIT_LOG_ALWAYS_FULL (approvals by
+default) are always captured in full, whatever the rules say.
+
+Rules are compiled once into one regex per HTTP method; the matching rule is
+found from the regex's lastgroup instead of trying every pattern in turn.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+FULL = 'full'
+METADATA = 'metadata'
+SAMPLE = 'sample'
+SKIP = 'skip'
+MODES = (FULL, METADATA, SAMPLE, SKIP)
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ALL_METHODS = ('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+AuditDecision = namedtuple('AuditDecision', ['mode', 'rate'])
+
+FULL_CAPTURE = AuditDecision(FULL, 1.0)
+
+
+class AuditPolicy:
+    """Compiled audit policy: maps (method, path) to an AuditDecision"""
+
+    def __init__(self, rules=(), default_mode=FULL, always_full=(r'^/api/approvals/',)):
+        if default_mode not in (FULL, METADATA, SKIP):
+            raise ValueError(f'Invalid default audit mode: {default_mode}')
+        self.default = AuditDecision(default_mode, 1.0)
+        self.always_full = re.compile('|'.join(f'(?:{p})' for p in always_full)) if always_full else None
+
+        self.decisions = {}
+        alternatives = {method: [] for method in ALL_METHODS}
+        for index, rule in enumerate(rules):
+            decision = self._decision(rule)
+            group = f'rule{index}'
+            self.decisions[group] = decision
+            methods = [m.upper() for m in rule.get('methods') or ALL_METHODS]
+            for method in methods:
+                alternatives.setdefault(method, []).append(f'(?P<{group}>{rule["pattern"]})')
+
+        self.matchers = {
+            method: re.compile('|'.join(patterns))
+            for method, patterns in alternatives.items()
+            if patterns
+        }
+
+    @staticmethod
+    def _decision(rule):
+        mode = rule.get('mode', FULL)
+        if mode not in MODES:
+            raise ValueError(f'Invalid audit mode {mode!r} for pattern {rule.get("pattern")!r}')
+        if 'pattern' not in rule:
+            raise ValueError('Audit policy rules need a pattern')
+        rate = float(rule.get('rate', 1.0)) if mode == SAMPLE else 1.0
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f'Sample rate must be between 0 and 1, got {rate}')
+        return AuditDecision(mode, rate)
+
+    def resolve(self, method, path):
+        """Decide how a request should be logged"""
+        method = method.upper()
+        if method not in READ_METHODS:
+            return FULL_CAPTURE
+        if self.always_full is not None and self.always_full.match(path):
+            return FULL_CAPTURE
+
+        matcher = self.matchers.get(method)
+        match = matcher.match(path) if matcher is not None else None
+        if match is None:
+            return self.default
+        return self.decisions[match.lastgroup]
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            rules=getattr(settings, 'AUDIT_LOG_POLICY', []),
+            default_mode=getattr(settings, 'AUDIT_LOG_DEFAULT_MODE', FULL),
+            always_full=getattr(settings, 'AUDIT_LOG_ALWAYS_FULL', [r'^/api/approvals/']),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_audit_policy():
+    """Process-wide compiled policy"""
+    return AuditPolicy.from_settings()
+
+
+@receiver(setting_changed)
+def _reset_audit_policy(sender, setting, **kwargs):
+    if setting.startswith('AUDIT_LOG_'):
+        get_audit_policy.cache_clear()
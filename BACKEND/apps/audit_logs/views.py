@@ -6,9 +6,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from datetime import datetime, time, timedelta
+
 from django.db.models import Count
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
+from config.pagination import KeysetOrPageNumberPagination
 from apps.audit_logs.models import AuditLog
 from apps.audit_logs.serializers import (
     AuditLogSerializer,
@@ -18,6 +22,21 @@ from apps.audit_logs.serializers import (
 from apps.users.permissions import IsAdmin
 
 
+def _parse_day(value):
+    """Parse a YYYY-MM-DD query param, ignoring invalid values"""
+    if not value:
+        return None
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def _day_start(day):
+    """Aware start of a local calendar day"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Admin-only viewset for reading audit logs
@@ -30,6 +49,7 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['entity', 'entity_id', 'description', 'actor__email', 'actor__full_name', 'ip_address']
     ordering_fields = ['created_at', 'action', 'actor']
     ordering = ['-created_at']
+    pagination_class = KeysetOrPageNumberPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -45,13 +65,14 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(created_at__gte=start)
         if end:
             qs = qs.filter(created_at__lte=end)
-        # Date-only window filtering: created_at__date
-        date_start = self.request.query_params.get('date_start')
-        date_end = self.request.query_params.get('date_end')
+        # Date-only window filtering, as plain created_at ranges so that
+        # partitioned tables only scan the months inside the window
+        date_start = _parse_day(self.request.query_params.get('date_start'))
+        date_end = _parse_day(self.request.query_params.get('date_end'))
         if date_start:
-            qs = qs.filter(created_at__date__gte=date_start)
+            qs = qs.filter(created_at__gte=_day_start(date_start))
         if date_end:
-            qs = qs.filter(created_at__date__lte=date_end)
+            qs = qs.filter(created_at__lt=_day_start(date_end + timedelta(days=1)))
         # Path/entity contains filter
         contains = self.request.query_params.get('contains')
         if contains:
@@ -64,8 +85,10 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         Audit log statistics for admins
         """
         qs = self.get_queryset()
-        total = qs.count()
-        by_action = {a: qs.filter(action=a).count() for a, _ in AuditLog.ACTION_CHOICES}
+        by_action = {a: 0 for a, _ in AuditLog.ACTION_CHOICES}
+        for row in qs.order_by().values('action').annotate(count=Count('id')):
+            by_action[row['action']] = row['count']
+        total = sum(by_action.values())
         # Top entities
         top_entities_qs = qs.values('entity').annotate(count=Count('id')).order_by('-count')[:5]
         top_entities = [{'entity': e['entity'], 'count': e['count']}] if False else [
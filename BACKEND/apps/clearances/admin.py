@@ -8,11 +8,15 @@ class ClearanceRequestAdmin(admin.ModelAdmin):
     list_display = ('student', 'status', 'submission_date', 'completion_date', 'get_completion_percentage')
     list_filter = ('status', 'submission_date', 'completion_date')
     search_fields = ('student__registration_number', 'student__user__full_name')
-    readonly_fields = ('id', 'submission_date', 'created_at', 'updated_at', 'get_completion_percentage')
+    readonly_fields = (
+        'id', 'submission_date', 'created_at', 'updated_at', 'get_completion_percentage',
+        'total_approvals', 'approved_count', 'rejected_count', 'pending_count',
+    )
     
     fieldsets = (
         ('Request Info', {'fields': ('id', 'student')}),
         ('Status', {'fields': ('status', 'completion_date', 'get_completion_percentage')}),
+        ('Approvals', {'fields': ('total_approvals', 'approved_count', 'rejected_count', 'pending_count')}),
         ('Rejection', {'fields': ('rejection_reason',)}),
         ('Timestamps', {'fields': ('submission_date', 'created_at', 'updated_at'), 'classes': ('collapse',)}),
     )
@@ -0,0 +1,142 @@
+"""
+Opening clearance requests with all their approval rows in bulk
+
+A new clearance request gets one pending approval per active department. The
+request row is inserted with its approval counters already filled in, and
+the approvals go in with a single bulk_create, so opening one request costs
+two INSERTs whatever the number of departments.
+
+open_cohort_clearances() does the same for a whole graduating cohort in
+batches of CLEARANCE_OPEN_BATCH_SIZE students. Each batch is one transaction:
+lock the batch's students, skip those who already have an open request, then
+one bulk INSERT for the requests and one for their approvals.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.departments.registry import active_departments
+
+
+CLEARANCE_OPEN_BATCH_SIZE = getattr(settings, 'CLEARANCE_OPEN_BATCH_SIZE', 500)
+
+# A student with a request in any other state already has clearance under way
+CLOSED_STATUSES = ['rejected']
+
+
+def _new_request(departments, **fields):
+    """Unsaved request whose counters already match its pending approvals"""
+    return ClearanceRequest(
+        status='pending',
+        total_approvals=len(departments),
+        pending_count=len(departments),
+        approved_count=0,
+        rejected_count=0,
+        **fields
+    )
+
+
+def _approvals_for(clearance_requests, departments):
+    return [
+        ClearanceApproval(
+            clearance_request=clearance_request,
+            department_id=department.id,
+            status='pending',
+            notes=f'Awaiting approval from {department.name}',
+        )
+        for clearance_request in clearance_requests
+        for department in departments
+    ]
+
+
+def _schedule_rollups(clearance_requests, approvals):
+    from apps.analytics.rollups import schedule_refresh_for
+
+    # bulk_create bypasses the rollup signal handlers
+    schedule_refresh_for('clearances', [clearance.pk for clearance in clearance_requests])
+    schedule_refresh_for('approvals', [approval.pk for approval in approvals])
+
+
+def open_clearance_request(student, **fields):
+    """
+    Create a clearance request and its approvals atomically
+
+    Args:
+        student: Student the request is for
+        **fields: Extra ClearanceRequest field values
+
+    Returns:
+        ClearanceRequest
+    """
+    departments = active_departments()
+    with transaction.atomic():
+        clearance_request = _new_request(departments, student=student, **fields)
+        clearance_request.save()
+        approvals = ClearanceApproval.objects.bulk_create(
+            _approvals_for([clearance_request], departments)
+        )
+        _schedule_rollups([], approvals)
+    return clearance_request
+
+
+def eligible_cohort(graduation_year, school_code=None, include_pending=False):
+    """Students of a graduating cohort who may have clearance opened"""
+    from apps.students.models import Student
+
+    statuses = ['eligible', 'pending'] if include_pending else ['eligible']
+    students = Student.objects.filter(graduation_year=graduation_year, eligibility_status__in=statuses)
+    if school_code:
+        students = students.filter(school__code__iexact=school_code)
+    return students
+
+
+def open_cohort_clearances(students, batch_size=None, dry_run=False, progress=None):
+    """
+    Open clearance requests for many students in batches
+
+    Args:
+        students: Student queryset (see eligible_cohort())
+        batch_size: Students per transaction (default CLEARANCE_OPEN_BATCH_SIZE)
+        dry_run: Count what would be opened without writing anything
+        progress: Optional callable(processed, total, opened) called after each batch
+
+    Returns:
+        dict: {'students', 'opened', 'skipped', 'approvals'}
+    """
+    from apps.students.models import Student
+
+    batch_size = max(1, batch_size or CLEARANCE_OPEN_BATCH_SIZE)
+    departments = active_departments()
+    student_ids = list(students.order_by('pk').values_list('pk', flat=True))
+    stats = {'students': len(student_ids), 'opened': 0, 'skipped': 0, 'approvals': 0}
+
+    for start in range(0, len(student_ids), batch_size):
+        batch = student_ids[start:start + batch_size]
+        with transaction.atomic():
+            locked = list(
+                Student.objects.select_for_update().filter(pk__in=batch).order_by('pk').values_list('pk', flat=True)
+            )
+            already_open = set(
+                ClearanceRequest.objects.filter(student_id__in=locked)
+                .exclude(status__in=CLOSED_STATUSES)
+                .values_list('student_id', flat=True)
+            )
+            to_open = [pk for pk in locked if pk not in already_open]
+            stats['skipped'] += len(batch) - len(to_open)
+            if to_open and not dry_run:
+                clearance_requests = ClearanceRequest.objects.bulk_create(
+                    [_new_request(departments, student_id=pk) for pk in to_open],
+                    batch_size=batch_size,
+                )
+                approvals = ClearanceApproval.objects.bulk_create(
+                    _approvals_for(clearance_requests, departments),
+                    batch_size=batch_size,
+                )
+                _schedule_rollups(clearance_requests, approvals)
+            stats['opened'] += len(to_open)
+            stats['approvals'] += len(to_open) * len(departments)
+        if progress is not None:
+            progress(start + len(batch), len(student_ids), stats['opened'])
+
+    return stats
@@ -0,0 +1,81 @@
+"""
+Django management command to open clearance requests for a graduating cohort.
+Usage: python manage.py open_cohort_clearances --graduation-year 2025 [--school SCE]
+       [--include-pending] [--batch-size 500] [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.clearances.bulk import eligible_cohort, open_cohort_clearances
+from apps.departments.registry import active_departments
+
+
+class Command(BaseCommand):
+    help = 'Open clearance requests (with one approval per active department) for every eligible student of a cohort'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--graduation-year',
+            type=int,
+            required=True,
+            help='Graduation year of the cohort',
+        )
+        parser.add_argument(
+            '--school',
+            default=None,
+            help='Only students of this school code',
+        )
+        parser.add_argument(
+            '--include-pending',
+            action='store_true',
+            help='Also open requests for students whose eligibility is still pending review',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Students per transaction (default: CLEARANCE_OPEN_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many requests would be opened',
+        )
+
+    def handle(self, *args, **options):
+        """Open the cohort's requests batch by batch, reporting progress."""
+        if not active_departments():
+            raise CommandError('There are no active departments to approve clearance requests')
+
+        students = eligible_cohort(
+            options['graduation_year'],
+            school_code=options['school'],
+            include_pending=options['include_pending'],
+        )
+        started = time.monotonic()
+
+        def progress(processed, total, opened):
+            self.stdout.write(f'  {processed}/{total} student(s) processed, {opened} request(s) opened')
+
+        stats = open_cohort_clearances(
+            students,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"⊘ Dry run: {stats['opened']} of {stats['students']} student(s) would get a clearance request"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Opened {stats['opened']} clearance request(s) with {stats['approvals']} approval(s) "
+                f"in {elapsed:.1f}s"
+            ))
+        if stats['skipped']:
+            self.stdout.write(self.style.WARNING(
+                f"⊘ Skipped {stats['skipped']} student(s) who already have an open request"
+            ))
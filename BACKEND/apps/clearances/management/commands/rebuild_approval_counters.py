@@ -0,0 +1,86 @@
+"""
+Django management command to rebuild the denormalized approval counters.
+Usage: python manage.py rebuild_approval_counters [--dry-run] [--chunk-size 1000]
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.clearances.models import ClearanceRequest
+
+
+class Command(BaseCommand):
+    help = 'Recalculate approval counters on clearance requests and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift, do not fix it',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of clearance requests checked per batch (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        """Compare stored counters with the approvals table and fix drifted rows."""
+        dry_run = options['dry_run']
+        chunk_size = max(1, options['chunk_size'])
+        fields = ClearanceRequest.COUNTER_FIELDS
+
+        checked = 0
+        drifted = 0
+        rows = ClearanceRequest.objects.order_by('pk').values_list('pk', *fields)
+
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                drifted += self._process_chunk(chunk, fields, dry_run)
+                checked += len(chunk)
+                chunk = []
+        if chunk:
+            drifted += self._process_chunk(chunk, fields, dry_run)
+            checked += len(chunk)
+
+        if drifted == 0:
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ Checked {checked} clearance request(s): no drift found')
+            )
+        elif dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'⊘ Checked {checked} clearance request(s): {drifted} drifted (dry run, nothing changed)'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'✓ Checked {checked} clearance request(s): {drifted} drifted and rebuilt'
+                )
+            )
+
+    def _process_chunk(self, chunk, fields, dry_run):
+        """Report and optionally fix drifted requests in one chunk; returns drift count"""
+        actual = ClearanceRequest.count_approvals(row[0] for row in chunk)
+        empty = {field: 0 for field in fields}
+
+        drifted_ids = []
+        for row in chunk:
+            pk, stored = row[0], dict(zip(fields, row[1:]))
+            expected = actual.get(pk, empty)
+            if stored != expected:
+                drifted_ids.append(pk)
+                diff = ', '.join(
+                    f'{field} {stored[field]} → {expected[field]}'
+                    for field in fields if stored[field] != expected[field]
+                )
+                self.stdout.write(self.style.WARNING(f'  Drift on {pk}: {diff}'))
+
+        if drifted_ids and not dry_run:
+            with transaction.atomic():
+                ClearanceRequest.refresh_approval_counters(drifted_ids)
+
+        return len(drifted_ids)
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_approval_counters(apps, schema_editor):
+    """Populate the new counters from existing approval rows"""
+    ClearanceRequest = apps.get_model('clearances', 'ClearanceRequest')
+    ClearanceApproval = apps.get_model('approvals', 'ClearanceApproval')
+
+    def _count(status=None):
+        approvals = ClearanceApproval.objects.filter(clearance_request=OuterRef('pk'))
+        if status:
+            approvals = approvals.filter(status=status)
+        approvals = approvals.order_by().values('clearance_request').annotate(
+            total=Count('id')
+        ).values('total')
+        return Coalesce(Subquery(approvals, output_field=models.IntegerField()), 0)
+
+    ClearanceRequest.objects.update(
+        total_approvals=_count(),
+        approved_count=_count('approved'),
+        rejected_count=_count('rejected'),
+        pending_count=_count('pending'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clearances', '0002_initial'),
+        ('approvals', '0003_clearanceapproval_evidence_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clearancerequest',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of approved department approvals'),
+        ),
+        migrations.AddField(
+            model_name='clearancerequest',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of pending department approvals'),
+        ),
+        migrations.AddField(
+            model_name='clearancerequest',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of rejected department approvals'),
+        ),
+        migrations.AddField(
+            model_name='clearancerequest',
+            name='total_approvals',
+            field=models.PositiveIntegerField(default=0, help_text='Number of department approval records'),
+        ),
+        migrations.RunPython(backfill_approval_counters, migrations.RunPython.noop),
+    ]
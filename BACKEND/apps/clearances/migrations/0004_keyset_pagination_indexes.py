@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clearances', '0003_clearancerequest_approval_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clearancerequest',
+            index=models.Index(fields=['created_at', 'id'], name='clearance_r_created_b6a04d_idx'),
+        ),
+    ]
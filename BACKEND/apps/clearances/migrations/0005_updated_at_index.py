@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clearances', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clearancerequest',
+            index=models.Index(fields=['updated_at'], name='clearance_r_updated_eaeb06_idx'),
+        ),
+    ]
@@ -1,11 +1,17 @@
 import uuid
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from apps.students.models import Student
 
 
 class ClearanceRequest(models.Model):
     """Student clearance request"""
     
+    # Denormalized approval counters, maintained by refresh_approval_counters()
+    COUNTER_FIELDS = ['total_approvals', 'approved_count', 'rejected_count', 'pending_count']
+    
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('in_progress', 'In Progress'),
@@ -39,6 +45,22 @@ class ClearanceRequest(models.Model):
         blank=True,
         help_text="Reason if clearance was rejected"
     )
+    total_approvals = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of department approval records"
+    )
+    approved_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of approved department approvals"
+    )
+    rejected_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of rejected department approvals"
+    )
+    pending_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of pending department approvals"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -49,20 +71,94 @@ class ClearanceRequest(models.Model):
             models.Index(fields=['student']),
             models.Index(fields=['status']),
             models.Index(fields=['submission_date']),
+            models.Index(fields=['created_at', 'id']),
+            # Read by the notification stream's shared poller (apps/notifications/events.py)
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
         return f"Clearance Request - {self.student} ({self.status})"
     
+    def save(self, *args, **kwargs):
+        """Never write approval counters back from a possibly stale in-memory copy"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def get_completion_percentage(self):
-        """Calculate percentage of approvals completed"""
-        from apps.departments.models import Department
-        total_depts = Department.objects.filter(is_active=True).count()
-        if total_depts == 0:
+        """Calculate percentage of approvals completed (reads the stored counters)"""
+        if not self.total_approvals:
+            return 0
+        processed = self.approved_count + self.rejected_count
+        return int((processed / self.total_approvals) * 100)
+    
+    def get_approval_summary(self):
+        """Approval counts by status"""
+        return {
+            'total': self.total_approvals,
+            'approved': self.approved_count,
+            'rejected': self.rejected_count,
+            'pending': self.pending_count,
+        }
+    
+    def refresh_counters(self):
+        """Recalculate this request's counters and reload them onto the instance"""
+        ClearanceRequest.refresh_approval_counters([self.pk])
+        self.refresh_from_db(fields=self.COUNTER_FIELDS + ['updated_at'])
+    
+    @classmethod
+    def refresh_approval_counters(cls, clearance_ids):
+        """
+        Recalculate approval counters for the given clearance requests
+        
+        Runs as a single UPDATE with correlated COUNT subqueries, so the cost
+        does not depend on how many requests are refreshed at once.
+        
+        Returns:
+            int: Number of clearance requests updated
+        """
+        from apps.approvals.models import ClearanceApproval
+        
+        clearance_ids = list(clearance_ids)
+        if not clearance_ids:
             return 0
         
+        def _count(status=None):
+            approvals = ClearanceApproval.objects.filter(clearance_request=OuterRef('pk'))
+            if status:
+                approvals = approvals.filter(status=status)
+            approvals = approvals.order_by().values('clearance_request').annotate(
+                total=Count('id')
+            ).values('total')
+            return Coalesce(Subquery(approvals, output_field=models.IntegerField()), 0)
+        
+        return cls.objects.filter(id__in=clearance_ids).update(
+            total_approvals=_count(),
+            approved_count=_count('approved'),
+            rejected_count=_count('rejected'),
+            pending_count=_count('pending'),
+            updated_at=timezone.now(),
+        )
+    
+    @classmethod
+    def count_approvals(cls, clearance_ids):
+        """
+        Count approvals per clearance request straight from the approvals table
+        
+        Returns:
+            dict: {clearance_id: {'total_approvals': .., 'approved_count': .., ...}}
+        """
         from apps.approvals.models import ClearanceApproval
-        approved = self.approvals.filter(
-            status__in=['approved', 'rejected']
-        ).count()
-        return int((approved / total_depts) * 100)
+        
+        rows = ClearanceApproval.objects.filter(
+            clearance_request_id__in=list(clearance_ids)
+        ).order_by().values('clearance_request_id').annotate(
+            total_approvals=Count('id'),
+            approved_count=Count('id', filter=Q(status='approved')),
+            rejected_count=Count('id', filter=Q(status='rejected')),
+            pending_count=Count('id', filter=Q(status='pending')),
+        )
+        return {row.pop('clearance_request_id'): row for row in rows}
@@ -1,14 +1,24 @@
 """
 Serializers for Clearance Request management
 """
+from django.db.models import Prefetch
 from rest_framework import serializers
 from apps.clearances.models import ClearanceRequest
 from apps.students.serializers import StudentSerializer
 from apps.approvals.models import ClearanceApproval
-from apps.departments.models import Department
+from apps.clearances.bulk import open_clearance_request
+from apps.departments.registry import active_departments
 from apps.finance.models import Payment
 
 
+def _student_payment(student):
+    """The student's payment, read from the select_related cache when loaded"""
+    try:
+        return student.payment
+    except Payment.DoesNotExist:
+        return None
+
+
 class ClearanceRequestListSerializer(serializers.ModelSerializer):
     """
     Lightweight serializer for listing clearance requests
@@ -31,6 +41,11 @@ class ClearanceRequestListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything the serializer reads, in one query for any page size"""
+        return queryset.select_related('student__user')
+    
     def get_completion_percentage(self, obj):
         """Calculate approval completion percentage"""
         return obj.get_completion_percentage()
@@ -64,37 +79,46 @@ class ClearanceRequestSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'status', 'submission_date', 'completion_date', 'created_at', 'updated_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load everything the full and detail serializers read
+        
+        Student, user, payment and verifier come in the main query and every
+        approval with its department and approver in one prefetch, so the
+        query count does not depend on the number of requests serialized.
+        """
+        return queryset.select_related(
+            'student__user__department',
+            'student__payment__verified_by',
+        ).prefetch_related(
+            Prefetch('approvals', queryset=ClearanceApproval.objects.select_related('department', 'approved_by'))
+        )
+    
     def get_completion_percentage(self, obj):
         """Calculate approval completion percentage"""
         return obj.get_completion_percentage()
     
     def get_approval_summary(self, obj):
         """Get summary of approvals by status"""
-        approvals = obj.approvals.all()
-        return {
-            'total': approvals.count(),
-            'approved': approvals.filter(status='approved').count(),
-            'rejected': approvals.filter(status='rejected').count(),
-            'pending': approvals.filter(status='pending').count(),
-        }
+        return obj.get_approval_summary()
     
     def get_payment_status(self, obj):
         """Get student's payment status"""
-        try:
-            payment = Payment.objects.get(student=obj.student)
-            return {
-                'has_paid': payment.is_verified,
-                'amount': str(payment.amount),
-                'payment_method': payment.payment_method,
-                'verified': payment.is_verified
-            }
-        except Payment.DoesNotExist:
+        payment = _student_payment(obj.student)
+        if payment is None:
             return {
                 'has_paid': False,
                 'amount': '0',
                 'payment_method': None,
                 'verified': False
             }
+        return {
+            'has_paid': payment.is_verified,
+            'amount': str(payment.amount),
+            'payment_method': payment.payment_method,
+            'verified': payment.is_verified
+        }
     
     def validate_student_id(self, value):
         """Validate student exists and is eligible"""
@@ -197,25 +221,8 @@ class ClearanceRequestCreateSerializer(serializers.ModelSerializer):
         student_id = validated_data.pop('student_id')
         student = Student.objects.get(id=student_id)
         
-        # Create clearance request with initial pending status
-        clearance_request = ClearanceRequest.objects.create(
-            student=student,
-            status='pending',
-            **validated_data
-        )
-        
-        # Create approval records for all active departments
-        departments = Department.objects.filter(is_active=True).order_by('approval_order')
-        
-        for department in departments:
-            ClearanceApproval.objects.create(
-                clearance_request=clearance_request,
-                department=department,
-                status='pending',
-                notes=f'Awaiting approval from {department.name}'
-            )
-        
-        return clearance_request
+        # Request and one pending approval per active department, atomically
+        return open_clearance_request(student, **validated_data)
 
 
 class ClearanceRequestSubmitSerializer(serializers.Serializer):
@@ -256,7 +263,7 @@ class ClearanceRequestSubmitSerializer(serializers.Serializer):
         
         # Check all required departments have approval records
         approval_count = clearance_request.approvals.count()
-        department_count = Department.objects.filter(is_active=True).count()
+        department_count = len(active_departments())
         
         if approval_count != department_count:
             raise serializers.ValidationError(
@@ -266,6 +273,16 @@ class ClearanceRequestSubmitSerializer(serializers.Serializer):
         return attrs
 
 
+class CohortOpenSerializer(serializers.Serializer):
+    """
+    Serializer for opening clearance requests for a whole cohort
+    """
+    graduation_year = serializers.IntegerField(min_value=1900, max_value=2100)
+    school = serializers.CharField(required=False, allow_blank=True, max_length=20)
+    include_pending = serializers.BooleanField(required=False, default=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
 class ClearanceApprovalDetailSerializer(serializers.Serializer):
     """
     Serializer for displaying approval details within clearance request
@@ -310,36 +327,36 @@ class ClearanceRequestDetailSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
     
+    setup_eager_loading = staticmethod(ClearanceRequestSerializer.setup_eager_loading)
+    
     def get_completion_percentage(self, obj):
         """Calculate approval completion percentage"""
         return obj.get_completion_percentage()
     
     def get_payment_info(self, obj):
         """Get detailed payment information"""
-        try:
-            payment = Payment.objects.get(student=obj.student)
-            return {
-                'id': payment.id,
-                'amount': str(payment.amount),
-                'payment_method': payment.payment_method,
-                'transaction_id': payment.transaction_id,
-                'payment_date': payment.payment_date,
-                'is_verified': payment.is_verified,
-                'verified_by': payment.verified_by.full_name if payment.verified_by else None,
-                'verification_date': payment.verification_date
-            }
-        except Payment.DoesNotExist:
+        payment = _student_payment(obj.student)
+        if payment is None:
             return None
+        return {
+            'id': payment.id,
+            'amount': str(payment.amount),
+            'payment_method': payment.payment_method,
+            'transaction_id': payment.transaction_id,
+            'payment_date': payment.payment_date,
+            'is_verified': payment.is_verified,
+            'verified_by': payment.verified_by.full_name if payment.verified_by else None,
+            'verification_date': payment.verification_date
+        }
     
     def get_current_department(self, obj):
         """Get the next pending department in approval workflow"""
         if obj.status == 'completed':
             return None
         
-        # Get first pending approval ordered by department approval_order
-        pending_approval = obj.approvals.filter(
-            status='pending'
-        ).order_by('department__approval_order').first()
+        # First pending approval by department approval_order, from the prefetched approvals
+        pending = [approval for approval in obj.approvals.all() if approval.status == 'pending']
+        pending_approval = min(pending, key=lambda approval: approval.department.approval_order, default=None)
         
         if pending_approval:
             return {
@@ -8,17 +8,21 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 
+from config.pagination import KeysetOrPageNumberPagination
 from apps.clearances.models import ClearanceRequest
 from apps.clearances.serializers import (
     ClearanceRequestSerializer,
     ClearanceRequestListSerializer,
     ClearanceRequestCreateSerializer,
     ClearanceRequestDetailSerializer,
-    ClearanceRequestSubmitSerializer
+    ClearanceRequestSubmitSerializer,
+    CohortOpenSerializer
 )
+from apps.clearances.bulk import eligible_cohort, open_cohort_clearances
 from apps.users.permissions import IsStudentOwnerOrAdmin, IsAdmin
 from apps.students.models import Student
 from apps.approvals.models import ClearanceApproval
+from apps.audit_logs.models import AuditLog
 from apps.notifications.utils import notify_clearance_submitted
 from apps.audit_logs.mixins import AuditViewSetMixin
 
@@ -33,7 +37,7 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
     - Update: Students can update draft, Admins can update any
     - Delete: Admins only
     """
-    queryset = ClearanceRequest.objects.select_related('student__user').prefetch_related('approvals__department').all()
+    queryset = ClearanceRequest.objects.all()
     serializer_class = ClearanceRequestSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -46,6 +50,7 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
     ]
     ordering_fields = ['created_at', 'submission_date', 'completion_date', 'status']
     ordering = ['-created_at']
+    pagination_class = KeysetOrPageNumberPagination
     
     def get_serializer_class(self):
         """Use different serializers for different actions"""
@@ -57,6 +62,8 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
             return ClearanceRequestDetailSerializer
         elif self.action == 'submit':
             return ClearanceRequestSubmitSerializer
+        elif self.action == 'open_cohort':
+            return CohortOpenSerializer
         return ClearanceRequestSerializer
     
     def get_queryset(self):
@@ -66,28 +73,26 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         """
         user = self.request.user
         
-        if user.role == 'admin':
-            # Admins see all clearance requests
-            return ClearanceRequest.objects.select_related('student__user').prefetch_related('approvals__department').all()
-        elif user.role == 'department_staff':
-            # Department staff see all clearance requests
-            return ClearanceRequest.objects.select_related('student__user').prefetch_related('approvals__department').all()
+        if user.role in ('admin', 'department_staff'):
+            # Admins and department staff see all clearance requests
+            queryset = ClearanceRequest.objects.all()
         elif user.role == 'student':
             # Students see only their own clearance requests
-            try:
-                student = Student.objects.get(user=user)
-                return ClearanceRequest.objects.filter(student=student).select_related('student__user').prefetch_related('approvals__department')
-            except Student.DoesNotExist:
-                return ClearanceRequest.objects.none()
+            queryset = ClearanceRequest.objects.filter(student__user=user)
+        else:
+            return ClearanceRequest.objects.none()
         
-        return ClearanceRequest.objects.none()
+        # Actions that respond with the detail serializer (submit) load its relations too
+        if self.action == 'list':
+            return ClearanceRequestListSerializer.setup_eager_loading(queryset)
+        return ClearanceRequestDetailSerializer.setup_eager_loading(queryset)
     
     def get_permissions(self):
         """
         Set different permissions based on action
         """
-        if self.action == 'destroy':
-            # Only admins can delete clearance requests
+        if self.action in ['destroy', 'open_cohort']:
+            # Only admins can delete or bulk-open clearance requests
             return [IsAuthenticated(), IsAdmin()]
         elif self.action in ['update', 'partial_update']:
             # Students can update own draft, admins can update any
@@ -202,6 +207,53 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
             'clearance_request': ClearanceRequestDetailSerializer(clearance_request).data
         }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'])
+    def open_cohort(self, request):
+        """
+        Open clearance requests for every eligible student of a cohort
+        POST /api/clearances/open_cohort/
+        Body: {
+            "graduation_year": 2025,
+            "school": "SCE",
+            "include_pending": false,
+            "dry_run": false
+        }
+        Students who already have an open request are skipped.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        students = eligible_cohort(
+            data['graduation_year'],
+            school_code=data.get('school') or None,
+            include_pending=data['include_pending'],
+        )
+        batches = []
+        stats = open_cohort_clearances(
+            students,
+            dry_run=data['dry_run'],
+            progress=lambda processed, total, opened: batches.append(
+                {'processed': processed, 'total': total, 'opened': opened}
+            ),
+        )
+        
+        if stats['opened'] and not data['dry_run']:
+            AuditLog.log_action(
+                actor=request.user,
+                action='create',
+                entity='ClearanceRequest',
+                entity_id='-',
+                description=f"Opened {stats['opened']} clearance request(s) for the {data['graduation_year']} cohort",
+                changes={**stats, 'school': data.get('school') or None},
+                ip_address=request.META.get('REMOTE_ADDR'),
+            )
+        
+        return Response(
+            {**stats, 'dry_run': data['dry_run'], 'batches': batches},
+            status=status.HTTP_201_CREATED if stats['opened'] and not data['dry_run'] else status.HTTP_200_OK
+        )
+    
     @action(detail=False, methods=['get'])
     def my_clearances(self, request):
         """
@@ -223,9 +275,9 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        clearances = ClearanceRequest.objects.filter(
-            student=student
-        ).select_related('student__user').prefetch_related('approvals__department').order_by('-created_at')
+        clearances = ClearanceRequestListSerializer.setup_eager_loading(
+            ClearanceRequest.objects.filter(student=student)
+        ).order_by('-created_at')
         
         serializer = ClearanceRequestListSerializer(clearances, many=True)
         return Response(serializer.data)
@@ -260,9 +312,9 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         
         # Get unique clearance requests
         clearance_ids = pending_approvals.values_list('clearance_request_id', flat=True)
-        clearances = ClearanceRequest.objects.filter(
-            id__in=clearance_ids
-        ).select_related('student__user').prefetch_related('approvals__department')
+        clearances = ClearanceRequestListSerializer.setup_eager_loading(
+            ClearanceRequest.objects.filter(id__in=clearance_ids)
+        )
         
         serializer = ClearanceRequestListSerializer(clearances, many=True)
         return Response({
@@ -325,9 +377,8 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         """
         clearance_request = self.get_object()
         
-        approvals = clearance_request.approvals.select_related(
-            'department', 'approved_by'
-        ).order_by('department__approval_order')
+        # Prefetched by get_queryset() with department and approver
+        approvals = sorted(clearance_request.approvals.all(), key=lambda approval: approval.department.approval_order)
         
         progress_data = []
         for approval in approvals:
@@ -346,9 +397,9 @@ class ClearanceRequestViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
             'clearance_request_id': clearance_request.id,
             'overall_status': clearance_request.status,
             'completion_percentage': clearance_request.get_completion_percentage(),
-            'total_departments': approvals.count(),
-            'approved_count': approvals.filter(status='approved').count(),
-            'pending_count': approvals.filter(status='pending').count(),
-            'rejected_count': approvals.filter(status='rejected').count(),
+            'total_departments': clearance_request.total_approvals,
+            'approved_count': clearance_request.approved_count,
+            'pending_count': clearance_request.pending_count,
+            'rejected_count': clearance_request.rejected_count,
             'progress': progress_data
         })
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class DepartmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.departments'
+
+    def ready(self):
+        from apps.departments import signals  # noqa: F401
+        # The registry relies on a shared cache; warn when it is process-local
+        from config import cache  # noqa: F401
@@ -0,0 +1,135 @@
+"""
+Process-wide registry of the active clearance departments
+
+Departments change a few times a year but are read on every clearance
+create/submit, in the approval workflow and in the analytics reports.
+active_departments() serves them from an in-memory snapshot: an ordered
+tuple of DepartmentRecord plus lookups by id and code.
+
+Each snapshot is tagged with a version number kept in the cache backend.
+Department saves and deletes (signals.py) drop the local snapshot right away.
+Once the transaction commits they also bump the shared version, so every
+other worker reloads on its next read. Workers compare their version with
+the cache at most every DEPARTMENT_REGISTRY_CHECK_SECONDS. In between, a read
+costs no query and no cache round trip.
+
+The version only reaches other workers through a shared cache (REDIS_URL; see
+config/cache.py). As a backstop, a snapshot older than
+DEPARTMENT_REGISTRY_MAX_AGE_SECONDS is reloaded regardless of the version, so a
+change can never stay invisible to a worker for longer than that.
+
+Department.objects.update() and bulk_create() bypass the signals; call
+invalidate_departments() after using them.
+"""
+import threading
+import time
+from collections import namedtuple
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+CHECK_SECONDS = getattr(settings, 'DEPARTMENT_REGISTRY_CHECK_SECONDS', 2)
+MAX_AGE_SECONDS = getattr(settings, 'DEPARTMENT_REGISTRY_MAX_AGE_SECONDS', 60)
+VERSION_KEY = 'departments:registry:version'
+
+DepartmentRecord = namedtuple(
+    'DepartmentRecord',
+    ['id', 'name', 'code', 'department_type', 'head_email', 'approval_order'],
+)
+
+
+class Snapshot:
+    """Active departments in approval order, with lookups by id and code"""
+
+    def __init__(self, version, records, loaded_at=None):
+        self.version = version
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+        self.records = tuple(records)
+        self.by_id = {record.id: record for record in self.records}
+        self.by_code = {record.code: record for record in self.records}
+
+
+class DepartmentRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        now = time.monotonic()
+        fresh = snapshot is not None and now - snapshot.loaded_at < MAX_AGE_SECONDS
+        if fresh and now - self._checked_at < CHECK_SECONDS:
+            return snapshot
+        version = _shared_version()
+        if fresh and snapshot.version == version:
+            self._checked_at = now
+            return snapshot
+        with self._lock:
+            if self._snapshot is snapshot:
+                self._snapshot = Snapshot(version, _load(), now)
+                self._checked_at = now
+            return self._snapshot
+
+    def clear(self):
+        """Forget the local snapshot; the next read reloads it"""
+        with self._lock:
+            self._snapshot = None
+
+
+registry = DepartmentRegistry()
+
+
+def _load():
+    from apps.departments.models import Department
+
+    return [
+        DepartmentRecord(*row)
+        for row in Department.objects.filter(is_active=True)
+        .order_by('approval_order', 'name')
+        .values_list(*DepartmentRecord._fields)
+    ]
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+    registry.clear()
+
+
+def active_departments():
+    """Active departments in approval order, as DepartmentRecord tuples"""
+    return registry.snapshot().records
+
+
+def get_department(key):
+    """Active department by id (UUID or str) or code, or None"""
+    snapshot = registry.snapshot()
+    if isinstance(key, UUID):
+        return snapshot.by_id.get(key)
+    record = snapshot.by_code.get(key)
+    if record is None:
+        try:
+            record = snapshot.by_id.get(UUID(str(key)))
+        except ValueError:
+            return None
+    return record
+
+
+def invalidate_departments():
+    """Reload the registry here now and in every worker after commit"""
+    registry.clear()
+    transaction.on_commit(_bump_version)
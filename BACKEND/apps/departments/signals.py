@@ -0,0 +1,13 @@
+"""
+Signal handlers that keep the department registry current
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.departments.models import Department
+from apps.departments.registry import invalidate_departments
+
+
+@receiver([post_save, post_delete], sender=Department)
+def department_changed(sender, instance, **kwargs):
+    invalidate_departments()
@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
 from apps.departments.models import Department
+from apps.departments.registry import active_departments
 from apps.departments.serializers import (
     DepartmentSerializer,
     DepartmentListSerializer,
@@ -130,18 +131,14 @@ class DepartmentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         GET /api/departments/approval_workflow/
         Shows the clearance approval sequence
         """
-        departments = Department.objects.filter(
-            is_active=True
-        ).order_by('approval_order')
-        
         workflow = []
-        for dept in departments:
+        for dept in active_departments():
             workflow.append({
                 'order': dept.approval_order,
                 'department': dept.name,
                 'code': dept.code,
                 'type': dept.department_type,
-                'contact': dept.contact_email
+                'contact': dept.head_email
             })
         
         return Response({
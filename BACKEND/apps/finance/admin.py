@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import FinanceRecord, Payment
+from .models import FinanceRecord, MpesaCallback, Payment
 
 
 @admin.register(FinanceRecord)
@@ -25,14 +25,40 @@ class PaymentAdmin(admin.ModelAdmin):
     """Admin interface for Payment model"""
     list_display = ('student', 'amount', 'graduation_fee_amount', 'payment_method', 'transaction_id', 'is_verified', 'payment_date')
     list_filter = ('is_verified', 'payment_method', 'payment_date', 'verification_date')
-    search_fields = ('student__registration_number', 'student__user__full_name', 'transaction_id', 'phone_number')
-    readonly_fields = ('id', 'graduation_fee_amount', 'verification_date', 'created_at', 'updated_at')
+    search_fields = (
+        'student__registration_number', 'student__user__full_name', 'transaction_id', 'phone_number',
+        '=checkout_request_id', '=merchant_request_id',
+    )
+    readonly_fields = (
+        'id', 'graduation_fee_amount', 'verification_date', 'phone_e164',
+        'checkout_request_id', 'merchant_request_id', 'created_at', 'updated_at',
+    )
     
     fieldsets = (
         ('Student Info', {'fields': ('id', 'student')}),
         ('Payment Details', {'fields': ('amount', 'graduation_fee_amount', 'payment_method', 'transaction_id', 'phone_number', 'payment_date')}),
+        ('M-PESA', {'fields': ('phone_e164', 'checkout_request_id', 'merchant_request_id')}),
         ('Verification', {'fields': ('is_verified', 'verified_by', 'verification_date')}),
         ('Documents', {'fields': ('receipt', 'fee_statement')}),
         ('Notes', {'fields': ('notes',)}),
         ('Timestamps', {'fields': ('created_at', 'updated_at'), 'classes': ('collapse',)}),
     )
+
+
+@admin.register(MpesaCallback)
+class MpesaCallbackAdmin(admin.ModelAdmin):
+    """Admin interface for the M-PESA callback inbox"""
+    list_display = ('checkout_request_id', 'result_code', 'status', 'attempts', 'payment', 'received_at', 'processed_at')
+    list_filter = ('status', 'result_code', 'received_at')
+    search_fields = ('=checkout_request_id', '=merchant_request_id', 'last_error')
+    readonly_fields = (
+        'id', 'checkout_request_id', 'merchant_request_id', 'result_code', 'payload', 'payment',
+        'claim_token', 'claimed_at', 'processed_at', 'received_at', 'updated_at',
+    )
+    actions = ['replay_selected']
+
+    @admin.action(description='Replay selected failed callbacks')
+    def replay_selected(self, request, queryset):
+        from .inbox import replay_callbacks
+        count = replay_callbacks(queryset)
+        self.message_user(request, f'{count} callback(s) requeued.')
@@ -0,0 +1,163 @@
+"""
+Local stand-in for the Safaricom Daraja API
+
+Serves the two endpoints the payment flow uses (OAuth token and STK push)
+from a threaded HTTP server on localhost, counts the calls it receives and
+can add latency or fail on demand. Point MPESA_API_URL at it for tests,
+benchmarks and offline development:
+
+    python -m apps.finance.fake_daraja --port 8089 --latency 0.2
+    MPESA_API_URL=http://127.0.0.1:8089 python manage.py runserver
+"""
+import argparse
+import base64
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out and hang up are expected; stay quiet about them
+        pass
+
+
+class FakeDaraja:
+    """Threaded fake Daraja server; usable as a context manager"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, token_ttl=3599,
+                 consumer_key=None, consumer_secret=None):
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.fail_stk_push = False
+        self.lock = threading.Lock()
+        self.token_requests = 0
+        self.stk_requests = []
+        self.connections = 0
+        self.tokens = set()
+        self.server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-daraja', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def revoke_tokens(self):
+        """Make every issued token invalid, as Daraja does when one expires"""
+        with self.lock:
+            self.tokens.clear()
+
+    def _issue_token(self, authorization):
+        if self.consumer_key is not None:
+            expected = base64.b64encode(f'{self.consumer_key}:{self.consumer_secret}'.encode()).decode()
+            if authorization != f'Basic {expected}':
+                return 400, {'errorMessage': 'Invalid credentials'}
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.token_requests += 1
+            self.tokens.add(token)
+        return 200, {'access_token': token, 'expires_in': str(self.token_ttl)}
+
+    def _stk_push(self, authorization, payload):
+        with self.lock:
+            valid = authorization.removeprefix('Bearer ') in self.tokens
+            if valid:
+                self.stk_requests.append(payload)
+        if not valid:
+            return 401, {'errorCode': '404.001.03', 'errorMessage': 'Invalid Access Token'}
+        if self.fail_stk_push:
+            return 500, {'errorCode': '500.001.1001', 'errorMessage': 'Unable to lock subscriber'}
+        return 200, {
+            'MerchantRequestID': f'{uuid.uuid4().int % 10 ** 5}-{uuid.uuid4().int % 10 ** 8}-1',
+            'CheckoutRequestID': f'ws_CO_{time.strftime("%d%m%Y%H%M%S")}{uuid.uuid4().hex[:10]}',
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing',
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                if urlsplit(self.path).path != '/oauth/v1/generate':
+                    return self._reply(404, {'errorMessage': 'Not found'})
+                self._reply(*fake._issue_token(self.headers.get('Authorization', '')))
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if urlsplit(self.path).path != '/mpesa/stkpush/v1/processrequest':
+                    return self._reply(404, {'errorMessage': 'Not found'})
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    return self._reply(400, {'errorMessage': 'Invalid JSON'})
+                self._reply(*fake._stk_push(self.headers.get('Authorization', ''), payload))
+
+            def _reply(self, code, data):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                body = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake Daraja API on localhost')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--token-ttl', type=int, default=3599, help='expires_in of issued tokens')
+    args = parser.parse_args()
+
+    server = FakeDaraja(args.host, args.port, latency=args.latency, token_ttl=args.token_ttl)
+    print(f'Fake Daraja listening on {server.url}')
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+M-PESA callback inbox
+
+mpesa_callback stores each STK callback raw with record_callback() and
+acknowledges straight away. A worker (the Celery task in tasks.py or the
+process_mpesa_callbacks management command) applies them to payments with
+retries and backoff. Callbacks that still fail are marked 'failed' and can be
+replayed with replay_callbacks().
+
+Callbacks can arrive before the STK push request that created them has saved
+its CheckoutRequestID, so an unmatched callback is retried rather than dropped.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.finance.models import MpesaCallback, Payment
+from apps.finance.mpesa import normalize_msisdn
+
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_BATCH_SIZE = getattr(settings, 'MPESA_CALLBACK_BATCH_SIZE', 50)
+CALLBACK_MAX_ATTEMPTS = getattr(settings, 'MPESA_CALLBACK_MAX_ATTEMPTS', 8)
+CALLBACK_BACKOFF_SECONDS = getattr(settings, 'MPESA_CALLBACK_BACKOFF_SECONDS', 15)
+CALLBACK_MAX_BACKOFF_SECONDS = getattr(settings, 'MPESA_CALLBACK_MAX_BACKOFF_SECONDS', 1800)
+CALLBACK_CLAIM_TIMEOUT_SECONDS = getattr(settings, 'MPESA_CALLBACK_CLAIM_TIMEOUT_SECONDS', 300)
+
+
+class UnmatchedCallback(Exception):
+    """No payment (yet) for the callback's CheckoutRequestID or phone number"""
+
+
+def record_callback(payload):
+    """
+    Store a callback in the inbox
+
+    Returns:
+        tuple: (MpesaCallback, created); created is False for a duplicate
+               delivery of a CheckoutRequestID already in the inbox
+    """
+    body = _stk_callback(payload)
+    checkout_request_id = body.get('CheckoutRequestID') or None
+    result_code = body.get('ResultCode')
+    try:
+        result_code = int(result_code) if result_code is not None else None
+    except (TypeError, ValueError):
+        result_code = None
+
+    try:
+        with transaction.atomic():
+            entry = MpesaCallback.objects.create(
+                checkout_request_id=checkout_request_id,
+                merchant_request_id=body.get('MerchantRequestID') or '',
+                result_code=result_code,
+                payload=payload,
+            )
+    except IntegrityError:
+        entry = MpesaCallback.objects.filter(checkout_request_id=checkout_request_id).first()
+        if entry is None:
+            raise
+        return entry, False
+
+    transaction.on_commit(_wake_worker)
+    return entry, True
+
+
+def _wake_worker():
+    """Ask Celery to process the inbox right away when it is in use"""
+    if not getattr(settings, 'MPESA_CALLBACK_USE_CELERY', False):
+        return
+    try:
+        from apps.finance.tasks import process_mpesa_callbacks
+        process_mpesa_callbacks.delay()
+    except Exception as e:
+        # The periodic run will pick the callback up; never fail the callback
+        logger.warning('Could not enqueue M-PESA callback task: %s', e)
+
+
+def _stk_callback(payload):
+    if not isinstance(payload, dict):
+        return {}
+    return (payload.get('Body') or {}).get('stkCallback') or {}
+
+
+def backoff_delay(attempts):
+    """Exponential backoff for the given number of failed attempts"""
+    seconds = CALLBACK_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, CALLBACK_MAX_BACKOFF_SECONDS))
+
+
+def claim_batch(batch_size=None):
+    """
+    Claim due callbacks for this worker (conditional UPDATE with a claim token)
+
+    Callbacks claimed by a worker that died are reclaimed after
+    CALLBACK_CLAIM_TIMEOUT_SECONDS.
+    """
+    batch_size = batch_size or CALLBACK_BATCH_SIZE
+    now = timezone.now()
+    stale = now - timedelta(seconds=CALLBACK_CLAIM_TIMEOUT_SECONDS)
+    claimable = Q(status='pending', next_attempt_at__lte=now) | Q(status='processing', claimed_at__lt=stale)
+
+    candidate_ids = list(
+        MpesaCallback.objects.filter(claimable).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return []
+
+    token = uuid.uuid4()
+    MpesaCallback.objects.filter(claimable, id__in=candidate_ids).update(
+        status='processing', claim_token=token, claimed_at=now, updated_at=now
+    )
+    return list(MpesaCallback.objects.filter(claim_token=token, status='processing').order_by('received_at'))
+
+
+def find_callback_payment(checkout_request_id, phone_number=None, lock=False):
+    """
+    Unverified M-PESA payment an STK callback refers to
+
+    Matched on the unique CheckoutRequestID saved at STK push time. Payments
+    created before those IDs were stored are matched on the exact normalized
+    phone number instead; both lookups use an index.
+    """
+    pending = Payment.objects.filter(payment_method='mpesa', is_verified=False)
+    if lock:
+        pending = pending.select_for_update()
+    if checkout_request_id:
+        payment = pending.filter(checkout_request_id=checkout_request_id).first()
+        if payment:
+            return payment
+    phone = normalize_msisdn(phone_number)
+    if not phone:
+        return None
+    return pending.filter(phone_e164=phone, checkout_request_id__isnull=True).first()
+
+
+def apply_callback(entry):
+    """
+    Apply one callback to its payment; must run inside a transaction
+
+    Returns:
+        Payment or None: The payment updated, or None when it was already verified
+
+    Raises:
+        UnmatchedCallback: No pending payment matches the callback
+    """
+    from apps.notifications.utils import notify_payment_failed, notify_payment_verified
+
+    body = _stk_callback(entry.payload)
+    items = {
+        item.get('Name'): item.get('Value')
+        for item in (body.get('CallbackMetadata') or {}).get('Item', [])
+    }
+
+    payment = find_callback_payment(entry.checkout_request_id, items.get('PhoneNumber'), lock=True)
+    if payment is None:
+        if entry.checkout_request_id and Payment.objects.filter(
+            checkout_request_id=entry.checkout_request_id, is_verified=True
+        ).exists():
+            return None
+        raise UnmatchedCallback(f'No pending M-PESA payment for {entry.checkout_request_id or "callback"}')
+
+    if entry.result_code == 0:
+        mpesa_receipt = items.get('MpesaReceiptNumber')
+        payment.transaction_id = mpesa_receipt
+        payment.payment_date = timezone.now()
+        payment.is_verified = True
+        payment.notes = f'{payment.notes}\nM-PESA Payment successful. Receipt: {mpesa_receipt}'
+        payment.save()
+        notify_payment_verified(payment)
+    else:
+        logger.info(
+            'M-PESA payment %s failed: %s', entry.checkout_request_id, body.get('ResultDesc')
+        )
+        notify_payment_failed(payment)
+    return payment
+
+
+def process(entry):
+    """
+    Process one claimed callback
+
+    Returns:
+        str: Resulting status ('processed', 'pending' for a scheduled retry, or 'failed')
+    """
+    now = timezone.now()
+    entry.attempts += 1
+    entry.claim_token = None
+    try:
+        with transaction.atomic():
+            payment = apply_callback(entry)
+            entry.status = 'processed'
+            entry.processed_at = now
+            entry.last_error = ''
+            if payment is not None:
+                entry.payment = payment
+            entry.save(update_fields=[
+                'attempts', 'claim_token', 'status', 'processed_at', 'last_error', 'payment', 'updated_at'
+            ])
+        return entry.status
+    except Exception as e:
+        entry.last_error = str(e)[:2000]
+        if entry.attempts >= CALLBACK_MAX_ATTEMPTS:
+            entry.status = 'failed'
+            logger.error('M-PESA callback %s failed after %s attempts: %s', entry.id, entry.attempts, e)
+        else:
+            entry.status = 'pending'
+            entry.next_attempt_at = now + backoff_delay(entry.attempts)
+            logger.warning('M-PESA callback %s not applied (attempt %s): %s', entry.id, entry.attempts, e)
+        entry.save(update_fields=['attempts', 'claim_token', 'status', 'next_attempt_at', 'last_error', 'updated_at'])
+        return entry.status
+
+
+def drain_inbox(batch_size=None, max_batches=None):
+    """
+    Process due callbacks until none are left (or max_batches is reached)
+
+    Returns:
+        dict: Counts of callbacks processed, scheduled for retry and failed
+    """
+    stats = {'processed': 0, 'retried': 0, 'failed': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        entries = claim_batch(batch_size)
+        if not entries:
+            break
+        batches += 1
+        for entry in entries:
+            result = process(entry)
+            if result == 'processed':
+                stats['processed'] += 1
+            elif result == 'failed':
+                stats['failed'] += 1
+            else:
+                stats['retried'] += 1
+    return stats
+
+
+def replay_callbacks(queryset=None):
+    """
+    Queue failed callbacks for another round of attempts
+
+    Returns:
+        int: Number of callbacks requeued
+    """
+    queryset = queryset if queryset is not None else MpesaCallback.objects.all()
+    return queryset.filter(status='failed').update(
+        status='pending',
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        claim_token=None,
+        updated_at=timezone.now(),
+    )
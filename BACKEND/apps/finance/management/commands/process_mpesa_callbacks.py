@@ -0,0 +1,73 @@
+"""
+Django management command to apply stored M-PESA callbacks to payments.
+Pure-database worker for installs without Redis/Celery.
+Usage: python manage.py process_mpesa_callbacks [--once] [--interval 2] [--batch-size 50]
+       [--replay-failed] [--replay CHECKOUT_REQUEST_ID ...]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.inbox import drain_inbox, replay_callbacks
+from apps.finance.models import MpesaCallback
+
+
+class Command(BaseCommand):
+    help = 'Apply M-PESA callbacks from the inbox with retries and backoff; replay failed ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the inbox once and exit instead of polling',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep between polls when the inbox is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Callbacks claimed per batch (default: MPESA_CALLBACK_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--replay-failed',
+            action='store_true',
+            help='Queue every failed callback again before processing',
+        )
+        parser.add_argument(
+            '--replay',
+            nargs='+',
+            metavar='CHECKOUT_REQUEST_ID',
+            help='Queue the failed callbacks with these CheckoutRequestIDs again before processing',
+        )
+
+    def handle(self, *args, **options):
+        """Poll the inbox and apply due callbacks."""
+        if options['replay_failed'] or options['replay']:
+            queryset = MpesaCallback.objects.all()
+            if options['replay']:
+                queryset = queryset.filter(checkout_request_id__in=options['replay'])
+            replayed = replay_callbacks(queryset)
+            self.stdout.write(self.style.WARNING(f'⊘ Requeued {replayed} failed callback(s)'))
+
+        try:
+            while True:
+                stats = drain_inbox(batch_size=options['batch_size'])
+                if any(stats.values()) or options['once']:
+                    self._report(stats)
+                if options['once']:
+                    break
+                time.sleep(max(options['interval'], 0.1))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping M-PESA callback worker')
+
+    def _report(self, stats):
+        self.stdout.write(self.style.SUCCESS(f"✓ Processed {stats['processed']} callback(s)"))
+        if stats['retried']:
+            self.stdout.write(self.style.WARNING(f"⊘ {stats['retried']} callback(s) scheduled for retry"))
+        if stats['failed']:
+            self.stdout.write(self.style.ERROR(f"✗ {stats['failed']} callback(s) failed"))
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:24
+
+from django.db import migrations, models
+
+from apps.finance.mpesa import normalize_msisdn
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_phone_e164(apps, schema_editor):
+    """Normalize the phone number of existing payments in batches"""
+    Payment = apps.get_model('finance', 'Payment')
+    rows = Payment.objects.exclude(phone_number='').order_by('pk').values_list('pk', 'phone_number')
+    last_pk = None
+    while True:
+        batch = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+        updates = [
+            Payment(pk=pk, phone_e164=normalize_msisdn(phone))
+            for pk, phone in batch
+        ]
+        Payment.objects.bulk_update(updates, ['phone_e164'])
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_payment_fee_statement_payment_graduation_fee_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='checkout_request_id',
+            field=models.CharField(blank=True, help_text='M-PESA CheckoutRequestID of the latest STK push', max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='merchant_request_id',
+            field=models.CharField(blank=True, help_text='M-PESA MerchantRequestID of the latest STK push', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='phone_e164',
+            field=models.CharField(blank=True, help_text='Payer phone number normalized to E.164 (+254...), set on save', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['phone_e164', 'is_verified'], name='payments_phone_e_cbc42c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['merchant_request_id'], name='payments_merchan_a31b84_idx'),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_payment_mpesa_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MpesaCallback',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('checkout_request_id', models.CharField(blank=True, help_text='CheckoutRequestID of the STK push (idempotency key)', max_length=100, null=True, unique=True)),
+                ('merchant_request_id', models.CharField(blank=True, help_text='MerchantRequestID of the STK push', max_length=100)),
+                ('result_code', models.IntegerField(blank=True, help_text='ResultCode reported by M-PESA (0 means success)', null=True)),
+                ('payload', models.JSONField(help_text='Callback body exactly as received')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('failed', 'Failed')], default='pending', help_text='Processing status', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Number of processing attempts made')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time of the next processing attempt')),
+                ('claim_token', models.UUIDField(blank=True, help_text='Token of the worker currently processing this callback', null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, help_text='When a worker claimed this callback', null=True)),
+                ('last_error', models.TextField(blank=True, help_text='Error from the last failed attempt')),
+                ('processed_at', models.DateTimeField(blank=True, help_text='When the callback was applied', null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('payment', models.ForeignKey(blank=True, help_text='Payment the callback was applied to', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mpesa_callbacks', to='finance.payment')),
+            ],
+            options={
+                'db_table': 'mpesa_callbacks',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='mpesa_callb_status_122489_idx'), models.Index(fields=['claim_token'], name='mpesa_callb_claim_t_328cab_idx'), models.Index(fields=['received_at'], name='mpesa_callb_receive_df2a04_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from apps.students.models import Student
 from apps.users.models import User
 
@@ -121,6 +122,23 @@ class Payment(models.Model):
         blank=True,
         help_text='Payer phone number (for M-PESA)',
     )
+    phone_e164 = models.CharField(
+        max_length=16,
+        blank=True,
+        help_text='Payer phone number normalized to E.164 (+254...), set on save',
+    )
+    checkout_request_id = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text='M-PESA CheckoutRequestID of the latest STK push',
+    )
+    merchant_request_id = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text='M-PESA MerchantRequestID of the latest STK push',
+    )
     payment_date = models.DateTimeField(
         null=True,
         blank=True,
@@ -176,6 +194,8 @@ class Payment(models.Model):
             models.Index(fields=['payment_method']),
             models.Index(fields=['is_verified']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['phone_e164', 'is_verified']),
+            models.Index(fields=['merchant_request_id']),
         ]
 
     def __str__(self):
@@ -190,7 +210,106 @@ class Payment(models.Model):
             })
     
     def save(self, *args, **kwargs):
-        """Ensure graduation fee is always KES 10,000"""
+        """Ensure graduation fee is always KES 10,000 and keep phone_e164 in sync"""
+        from apps.finance.mpesa import normalize_msisdn
         self.graduation_fee_amount = 10000.00
+        self.phone_e164 = normalize_msisdn(self.phone_number)
+        if not self.checkout_request_id:
+            self.checkout_request_id = None
         self.full_clean()
         super().save(*args, **kwargs)
+
+
+class MpesaCallback(models.Model):
+    """
+    Inbox of raw M-PESA STK callbacks
+    
+    The callback endpoint only inserts a row here and acknowledges; the
+    payload is never modified afterwards. A worker applies the callbacks to
+    payments. CheckoutRequestID is unique, so Daraja's retries of the same
+    callback are stored (and processed) once.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    checkout_request_id = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text='CheckoutRequestID of the STK push (idempotency key)',
+    )
+    merchant_request_id = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text='MerchantRequestID of the STK push',
+    )
+    result_code = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text='ResultCode reported by M-PESA (0 means success)',
+    )
+    payload = models.JSONField(
+        help_text='Callback body exactly as received',
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        help_text='Processing status',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Number of processing attempts made',
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Earliest time of the next processing attempt',
+    )
+    claim_token = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text='Token of the worker currently processing this callback',
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When a worker claimed this callback',
+    )
+    last_error = models.TextField(
+        blank=True,
+        help_text='Error from the last failed attempt',
+    )
+    payment = models.ForeignKey(
+        Payment,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='mpesa_callbacks',
+        help_text='Payment the callback was applied to',
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the callback was applied',
+    )
+    received_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'mpesa_callbacks'
+        ordering = ['-received_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['claim_token']),
+            models.Index(fields=['received_at']),
+        ]
+
+    def __str__(self):
+        return f"M-PESA callback {self.checkout_request_id or self.id} ({self.status})"
@@ -0,0 +1,256 @@
+"""
+M-PESA Daraja API client
+
+One client per process holds a pooled requests.Session so STK pushes reuse
+open TLS connections, and every call has connect/read timeouts. The OAuth
+access token is cached until shortly before it expires:
+
+- in memory, shared by the threads of a process (guarded by a lock)
+- in the Django cache, shared by every worker process; a short cache lock
+  makes sure only one process fetches a new token at a time
+
+A 401 from Daraja drops the cached token and retries the request once.
+"""
+import base64
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATH = '/oauth/v1/generate?grant_type=client_credentials'
+STK_PUSH_PATH = '/mpesa/stkpush/v1/processrequest'
+
+
+def normalize_msisdn(value, country_code='254'):
+    """
+    Kenyan phone number in E.164 form (+2547XXXXXXXX)
+
+    Accepts the shapes Daraja and users send (254..., +254..., 07..., 7...,
+    with spaces or dashes). Returns '' when the value is not a valid number.
+    """
+    digits = ''.join(ch for ch in str(value or '') if ch.isdigit())
+    if len(digits) == 10 and digits.startswith('0'):
+        digits = country_code + digits[1:]
+    elif len(digits) == 9:
+        digits = country_code + digits
+    if len(digits) != 12 or not digits.startswith(country_code):
+        return ''
+    return f'+{digits}'
+
+
+class MpesaError(Exception):
+    """Daraja could not be reached or rejected the request"""
+
+
+class MpesaClient:
+    """Thread-safe Daraja client with a pooled session and cached access token"""
+
+    def __init__(
+        self,
+        api_url,
+        consumer_key,
+        consumer_secret,
+        shortcode,
+        passkey,
+        callback_url,
+        connect_timeout=3.05,
+        read_timeout=15,
+        pool_size=10,
+        token_margin=60,
+    ):
+        self.api_url = api_url.rstrip('/')
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.shortcode = shortcode
+        self.passkey = passkey
+        self.callback_url = callback_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.token_margin = token_margin
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._token_expires = 0.0
+        fingerprint = hashlib.sha256(f'{self.api_url}|{consumer_key}'.encode()).hexdigest()[:16]
+        self._cache_key = f'mpesa:token:{fingerprint}'
+        self._cache_lock_key = f'{self._cache_key}:lock'
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            api_url=getattr(settings, 'MPESA_API_URL', 'https://sandbox.safaricom.co.ke'),
+            consumer_key=getattr(settings, 'MPESA_CONSUMER_KEY', ''),
+            consumer_secret=getattr(settings, 'MPESA_CONSUMER_SECRET', ''),
+            shortcode=getattr(settings, 'MPESA_SHORTCODE', '174379'),
+            passkey=getattr(settings, 'MPESA_PASSKEY', ''),
+            callback_url=getattr(
+                settings, 'MPESA_CALLBACK_URL', 'https://yourdomain.com/api/finance/mpesa_callback/'
+            ),
+            connect_timeout=getattr(settings, 'MPESA_CONNECT_TIMEOUT', 3.05),
+            read_timeout=getattr(settings, 'MPESA_READ_TIMEOUT', 15),
+            pool_size=getattr(settings, 'MPESA_POOL_SIZE', 10),
+            token_margin=getattr(settings, 'MPESA_TOKEN_EXPIRY_MARGIN', 60),
+        )
+
+    @property
+    def configured(self):
+        return bool(self.consumer_key and self.consumer_secret)
+
+    def access_token(self):
+        """A valid access token, fetched from Daraja only when none is cached"""
+        with self._lock:
+            if self._token and time.monotonic() < self._token_expires:
+                return self._token
+
+            cached = cache.get(self._cache_key)
+            if cached is None:
+                cached = self._fetch_shared_token()
+            token, ttl = cached['token'], cached['expires_at'] - time.time()
+            self._token = token
+            self._token_expires = time.monotonic() + max(0, ttl)
+            return token
+
+    def invalidate_token(self, token=None):
+        """Forget the cached token (only if it is still `token`, when given)"""
+        with self._lock:
+            if token is not None and token != self._token:
+                return
+            self._token = None
+            self._token_expires = 0.0
+        cached = cache.get(self._cache_key)
+        if cached and (token is None or cached['token'] == token):
+            cache.delete(self._cache_key)
+
+    def _fetch_shared_token(self):
+        """Fetch a token, letting one process do it while the others wait for the cache"""
+        lock_timeout = int(sum(self.timeout)) + 1
+        if not cache.add(self._cache_lock_key, 1, lock_timeout):
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                cached = cache.get(self._cache_key)
+                if cached is not None:
+                    return cached
+            logger.warning('Timed out waiting for another process to fetch an M-PESA token')
+        try:
+            return self._fetch_token()
+        finally:
+            cache.delete(self._cache_lock_key)
+
+    def _fetch_token(self):
+        try:
+            response = self.session.get(
+                f'{self.api_url}{TOKEN_PATH}',
+                auth=(self.consumer_key, self.consumer_secret),
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise MpesaError(f'M-PESA token request failed: {e}') from e
+        if response.status_code != 200:
+            raise MpesaError('Failed to get M-PESA access token')
+        data = response.json()
+        token = data.get('access_token')
+        if not token:
+            raise MpesaError('Failed to get M-PESA access token')
+
+        ttl = max(0, int(data.get('expires_in', 3599)) - self.token_margin)
+        cached = {'token': token, 'expires_at': time.time() + ttl}
+        if ttl:
+            cache.set(self._cache_key, cached, ttl)
+        return cached
+
+    def _post(self, path, payload):
+        """POST with the bearer token, retrying once with a fresh token on 401"""
+        for attempt in range(2):
+            token = self.access_token()
+            try:
+                response = self.session.post(
+                    f'{self.api_url}{path}',
+                    json=payload,
+                    headers={'Authorization': f'Bearer {token}'},
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                raise MpesaError(f'M-PESA request failed: {e}') from e
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token(token)
+                continue
+            return response
+
+    def password(self, timestamp):
+        return base64.b64encode(f'{self.shortcode}{self.passkey}{timestamp}'.encode()).decode('utf-8')
+
+    def stk_push(self, phone_number, amount, account_reference, transaction_desc):
+        """
+        Send a Lipa Na M-PESA Online (STK push) request
+
+        Returns:
+            dict: Daraja response (CheckoutRequestID, MerchantRequestID, ...)
+
+        Raises:
+            MpesaError: On transport failure or when Daraja does not accept the request
+        """
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        payload = {
+            'BusinessShortCode': self.shortcode,
+            'Password': self.password(timestamp),
+            'Timestamp': timestamp,
+            'TransactionType': 'CustomerPayBillOnline',
+            'Amount': int(amount),
+            'PartyA': phone_number,
+            'PartyB': self.shortcode,
+            'PhoneNumber': phone_number,
+            'CallBackURL': self.callback_url,
+            'AccountReference': account_reference,
+            'TransactionDesc': transaction_desc,
+        }
+        response = self._post(STK_PUSH_PATH, payload)
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code != 200 or data.get('ResponseCode') != '0':
+            raise MpesaError(data.get('errorMessage') or data.get('ResponseDescription') or 'Unknown error')
+        return data
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_mpesa_client():
+    """Process-wide client built from settings"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MpesaClient.from_settings()
+    return _client
+
+
+@receiver(setting_changed)
+def _reset_client(sender, setting, **kwargs):
+    global _client
+    if setting.startswith('MPESA_'):
+        with _client_lock:
+            if _client is not None:
+                _client.close()
+            _client = None
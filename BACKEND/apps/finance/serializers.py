@@ -53,6 +53,9 @@ class PaymentSerializer(serializers.ModelSerializer):
             'payment_method',
             'transaction_id',
             'phone_number',
+            'phone_e164',
+            'checkout_request_id',
+            'merchant_request_id',
             'payment_date',
             'is_verified',
             'verified_by',
@@ -67,6 +70,9 @@ class PaymentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             'id',
+            'phone_e164',
+            'checkout_request_id',
+            'merchant_request_id',
             'is_verified',
             'verified_by',
             'verification_date',
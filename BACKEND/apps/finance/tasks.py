@@ -0,0 +1,12 @@
+"""
+Celery tasks for finance
+"""
+from celery import shared_task
+
+from apps.finance.inbox import drain_inbox
+
+
+@shared_task(ignore_result=True)
+def process_mpesa_callbacks(batch_size=None):
+    """Apply stored M-PESA callbacks; queued on receipt and run periodically by beat"""
+    return drain_inbox(batch_size=batch_size)
@@ -8,13 +8,11 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from django.db.models import Sum, Count, Q
-from django.conf import settings
-import requests
-import base64
-import json
-from datetime import datetime
+import logging
 
 from apps.finance.models import Payment
+from apps.finance.inbox import record_callback
+from apps.finance.mpesa import MpesaError, get_mpesa_client
 from apps.finance.serializers import (
     PaymentSerializer,
     PaymentListSerializer,
@@ -26,13 +24,13 @@ from apps.finance.serializers import (
 )
 from apps.users.permissions import IsAdmin, IsStudentOwnerOrAdmin
 from apps.students.models import Student
-from apps.notifications.utils import (
-    notify_payment_verified,
-    notify_payment_failed,
-)
+from apps.notifications.utils import notify_payment_verified
 from apps.audit_logs.mixins import AuditViewSetMixin
 
 
+logger = logging.getLogger(__name__)
+
+
 class PaymentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Payment CRUD operations
@@ -200,6 +198,8 @@ class PaymentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
                     'amount': amount,
                     'payment_method': 'mpesa',
                     'phone_number': phone_number,
+                    'checkout_request_id': result.get('checkout_request_id'),
+                    'merchant_request_id': result.get('merchant_request_id') or '',
                     'notes': 'M-PESA STK Push initiated'
                 }
             )
@@ -208,6 +208,8 @@ class PaymentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
                 payment.amount = amount
                 payment.phone_number = phone_number
                 payment.payment_method = 'mpesa'
+                payment.checkout_request_id = result.get('checkout_request_id')
+                payment.merchant_request_id = result.get('merchant_request_id') or ''
                 payment.notes = f'M-PESA STK Push initiated at {timezone.now()}'
                 payment.save()
             
@@ -227,88 +229,34 @@ class PaymentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         """
         Internal method to initiate M-PESA STK Push
         """
-        # M-PESA Credentials (should be in environment variables)
-        business_short_code = getattr(settings, 'MPESA_SHORTCODE', '174379')
-        passkey = getattr(settings, 'MPESA_PASSKEY', 'your_passkey_here')
-        consumer_key = getattr(settings, 'MPESA_CONSUMER_KEY', '')
-        consumer_secret = getattr(settings, 'MPESA_CONSUMER_SECRET', '')
-        api_url = getattr(settings, 'MPESA_API_URL', 'https://sandbox.safaricom.co.ke')
+        client = get_mpesa_client()
         
         # Check if credentials are configured
-        if not consumer_key or not consumer_secret:
+        if not client.configured:
             return {
                 'success': False,
                 'error': 'M-PESA credentials not configured. Please contact administrator.'
             }
         
         try:
-            # Get access token
-            auth_url = f'{api_url}/oauth/v1/generate?grant_type=client_credentials'
-            auth_response = requests.get(
-                auth_url,
-                auth=(consumer_key, consumer_secret)
-            )
-            
-            if auth_response.status_code != 200:
-                return {
-                    'success': False,
-                    'error': 'Failed to get M-PESA access token'
-                }
-            
-            access_token = auth_response.json().get('access_token')
-            
-            # Prepare STK Push request
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            password = base64.b64encode(
-                f'{business_short_code}{passkey}{timestamp}'.encode()
-            ).decode('utf-8')
-            
-            callback_url = getattr(
-                settings,
-                'MPESA_CALLBACK_URL',
-                'https://yourdomain.com/api/finance/mpesa_callback/'
+            response_data = client.stk_push(
+                phone_number=phone_number,
+                amount=amount,
+                account_reference=f'{student.registration_number}',
+                transaction_desc=transaction_desc
             )
-            
-            stk_push_url = f'{api_url}/mpesa/stkpush/v1/processrequest'
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
-            payload = {
-                'BusinessShortCode': business_short_code,
-                'Password': password,
-                'Timestamp': timestamp,
-                'TransactionType': 'CustomerPayBillOnline',
-                'Amount': int(amount),
-                'PartyA': phone_number,
-                'PartyB': business_short_code,
-                'PhoneNumber': phone_number,
-                'CallBackURL': callback_url,
-                'AccountReference': f'{student.registration_number}',
-                'TransactionDesc': transaction_desc
-            }
-            
-            response = requests.post(stk_push_url, json=payload, headers=headers)
-            response_data = response.json()
-            
-            if response.status_code == 200 and response_data.get('ResponseCode') == '0':
-                return {
-                    'success': True,
-                    'checkout_request_id': response_data.get('CheckoutRequestID'),
-                    'merchant_request_id': response_data.get('MerchantRequestID')
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': response_data.get('errorMessage', 'Unknown error')
-                }
-        
-        except Exception as e:
+        except MpesaError as e:
+            logger.warning('M-PESA STK push for %s failed: %s', student.registration_number, e)
             return {
                 'success': False,
                 'error': str(e)
             }
+        
+        return {
+            'success': True,
+            'checkout_request_id': response_data.get('CheckoutRequestID'),
+            'merchant_request_id': response_data.get('MerchantRequestID')
+        }
     
     @action(detail=True, methods=['post'])
     def verify(self, request, pk=None):
@@ -457,86 +405,27 @@ def mpesa_callback(request):
     M-PESA callback endpoint
     POST /api/finance/mpesa_callback/
     Receives payment confirmation from M-PESA
+    
+    The callback is stored in the MpesaCallback inbox and acknowledged at
+    once; the inbox worker applies it to the payment (see apps.finance.inbox).
     """
     try:
-        data = request.data
-        
-        # Extract callback data
-        body = data.get('Body', {}).get('stkCallback', {})
-        
-        merchant_request_id = body.get('MerchantRequestID')
-        checkout_request_id = body.get('CheckoutRequestID')
-        result_code = body.get('ResultCode')
-        result_desc = body.get('ResultDesc')
-        
-        # Log callback for debugging
-        print(f'M-PESA Callback: {json.dumps(data, indent=2)}')
-        
-        if result_code == 0:
-            # Payment successful
-            callback_metadata = body.get('CallbackMetadata', {}).get('Item', [])
-            
-            # Extract transaction details
-            transaction_details = {}
-            for item in callback_metadata:
-                name = item.get('Name')
-                value = item.get('Value')
-                transaction_details[name] = value
-            
-            amount = transaction_details.get('Amount')
-            mpesa_receipt = transaction_details.get('MpesaReceiptNumber')
-            transaction_date = transaction_details.get('TransactionDate')
-            phone_number = transaction_details.get('PhoneNumber')
-            
-            # Find payment record by phone number
-            if phone_number:
-                # Normalize phone number
-                phone_str = str(phone_number)
-                
-                payment = Payment.objects.filter(
-                    phone_number__contains=phone_str[-9:],  # Match last 9 digits
-                    payment_method='mpesa',
-                    is_verified=False
-                ).first()
-                
-                if payment:
-                    # Update payment record
-                    payment.transaction_id = mpesa_receipt
-                    payment.payment_date = timezone.now()
-                    payment.is_verified = True
-                    payment.notes = f'{payment.notes}\nM-PESA Payment successful. Receipt: {mpesa_receipt}'
-                    payment.save()
-                    
-                    # Notify student payment verified
-                    notify_payment_verified(payment)
-        
-        else:
-            # Payment failed
-            print(f'M-PESA Payment Failed: {result_desc}')
-            # Try to notify failure if a pending payment exists for phone
-            try:
-                phone_items = body.get('CallbackMetadata', {}).get('Item', [])
-                phone_vals = [i.get('Value') for i in phone_items if i.get('Name') == 'PhoneNumber']
-                if phone_vals:
-                    phone = str(phone_vals[0])
-                    payment = Payment.objects.filter(
-                        phone_number__contains=phone[-9:],
-                        payment_method='mpesa',
-                        is_verified=False
-                    ).first()
-                    if payment:
-                        notify_payment_failed(payment)
-            except Exception:
-                pass
-        
-        return Response({
-            'ResultCode': 0,
-            'ResultDesc': 'Success'
-        }, status=status.HTTP_200_OK)
-    
+        entry, created = record_callback(request.data)
     except Exception as e:
-        print(f'M-PESA Callback Error: {str(e)}')
+        logger.exception('Could not store M-PESA callback')
         return Response({
             'ResultCode': 1,
             'ResultDesc': str(e)
         }, status=status.HTTP_200_OK)
+    
+    if created:
+        logger.info(
+            'M-PESA callback %s stored (ResultCode %s)', entry.checkout_request_id, entry.result_code
+        )
+    else:
+        logger.info('Duplicate M-PESA callback %s ignored', entry.checkout_request_id)
+    
+    return Response({
+        'ResultCode': 0,
+        'ResultDesc': 'Success'
+    }, status=status.HTTP_200_OK)
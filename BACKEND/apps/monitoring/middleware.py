@@ -0,0 +1,40 @@
+"""
+Profiling Middleware: query count, DB, render and wall time per resolved view
+
+Only a PROFILING_SAMPLE_RATE fraction of requests is measured; the others
+cost one random() call. With PROFILING_BUDGET_ACTION = 'raise' every request
+is measured so that tests hit the budgets deterministically. See profiler.py.
+"""
+import random
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from apps.monitoring import profiler
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiler.BUDGET_ACTION != 'raise' and random.random() >= profiler.SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = profiler.RequestProfile()
+        request._profile = profile
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        profiler.record_profile(request, profile, time.perf_counter() - start)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, '_profile', None)
+        if profile is not None:
+            profile.start_render()
+            response.add_post_render_callback(lambda rendered: profile.end_render())
+        return response
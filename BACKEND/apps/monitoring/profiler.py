@@ -0,0 +1,257 @@
+"""
+Per-request profiles and their rolling statistics
+
+A sampled request is measured by ProfilingMiddleware (middleware.py):
+
+- queries and DB time: a connection.execute_wrapper() around every database
+  alias for the duration of the request
+- render time: from process_template_response() until the response's
+  post-render callback, which covers DRF renderers and TemplateResponses
+- wall time: the whole middleware call
+
+Profiles are kept per resolved view (HTTP method + URL name) in a bounded
+window of the last PROFILING_WINDOW_SIZE samples, and samples older than
+PROFILING_WINDOW_SECONDS are ignored when reporting. Each worker publishes
+its windows to the cache at most every PROFILING_PUBLISH_SECONDS, so
+route_stats() can report percentiles across all workers. That needs a cache
+shared by the workers (REDIS_URL, see config/cache.py); with a process-local
+cache each worker only ever sees its own samples, and the profiles endpoint
+reports its scope as 'local'.
+
+Budgets (PROFILING_BUDGETS) cap queries, db_ms, render_ms or wall_ms per
+view. They are looked up as '<METHOD> <url name>', then '<url name>', then
+'*'. An exceeded budget is logged, or raised as BudgetExceeded when
+PROFILING_BUDGET_ACTION is 'raise' (the default under manage.py test, where
+every request is profiled).
+"""
+import logging
+import math
+import os
+import re
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+WINDOW_SIZE = getattr(settings, 'PROFILING_WINDOW_SIZE', 200)
+WINDOW_SECONDS = getattr(settings, 'PROFILING_WINDOW_SECONDS', 900)
+PUBLISH_SECONDS = getattr(settings, 'PROFILING_PUBLISH_SECONDS', 30)
+BUDGETS = getattr(settings, 'PROFILING_BUDGETS', {})
+BUDGET_ACTION = getattr(settings, 'PROFILING_BUDGET_ACTION', 'log')
+
+WORKERS_KEY = 'monitoring:profiles:workers'
+WORKER_KEY_PREFIX = 'monitoring:profiles:'
+
+METRICS = ('wall_ms', 'db_ms', 'render_ms', 'queries')
+PERCENTILES = (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+
+Sample = namedtuple('Sample', ['at', 'wall_ms', 'db_ms', 'render_ms', 'queries', 'over_budget'])
+
+_REGEX_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+class BudgetExceeded(Exception):
+    """A profiled request went over its view's budget"""
+
+
+class RequestProfile:
+    """Counters for one request; installed as an execute_wrapper on each connection"""
+
+    __slots__ = ('queries', 'db_seconds', 'render_seconds', 'render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def end_render(self):
+        if self.render_started is not None:
+            self.render_seconds += time.perf_counter() - self.render_started
+            self.render_started = None
+
+
+def display_route(resolver_match):
+    """'/api/clearances/<pk>/' from a resolved path or regex route"""
+    route = _REGEX_GROUP.sub(r'<\1>', resolver_match.route or '')
+    return '/' + route.replace('^', '').replace('$', '')
+
+
+def budget_for(method, view_name):
+    for key in (f'{method} {view_name}', view_name, '*'):
+        if key in BUDGETS:
+            return BUDGETS[key]
+    return None
+
+
+def over_budget(budget, sample):
+    """Names of the budgeted metrics the sample exceeded"""
+    if not budget:
+        return []
+    return [metric for metric, limit in budget.items() if getattr(sample, metric, 0) > limit]
+
+
+class ProfileStore:
+    """Per-view sample windows for this process"""
+
+    def __init__(self, size=None):
+        self.size = size or WINDOW_SIZE
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._routes = {}
+        self._published_at = time.monotonic()
+
+    def record(self, method, view_name, route, sample):
+        key = f'{method} {view_name}'
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = deque(maxlen=self.size)
+                self._routes[key] = route
+            window.append(tuple(sample))
+            publish = time.monotonic() - self._published_at >= PUBLISH_SECONDS
+            if publish:
+                self._published_at = time.monotonic()
+        if publish:
+            self.publish()
+
+    def export(self):
+        """{key: {'route', 'samples'}} for this process"""
+        with self._lock:
+            return {
+                key: {'route': self._routes[key], 'samples': list(window)}
+                for key, window in self._windows.items()
+            }
+
+    def publish(self):
+        """Share this worker's windows with the other workers through the cache"""
+        worker = worker_id()
+        try:
+            cache.set(WORKER_KEY_PREFIX + worker, self.export(), WINDOW_SECONDS)
+            workers = cache.get(WORKERS_KEY) or []
+            if worker not in workers:
+                # Racing workers may drop each other here; they re-register on their next publish
+                cache.set(WORKERS_KEY, [w for w in workers if w != worker][-99:] + [worker], None)
+        except Exception:
+            logger.exception('Could not publish request profiles')
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+            self._routes.clear()
+
+
+store = ProfileStore()
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def record_profile(request, profile, wall_seconds):
+    """Store a finished request's profile and enforce its view's budget"""
+    match = request.resolver_match
+    if match is None or not match.view_name:
+        return
+    method = request.method
+    sample = Sample(
+        at=time.time(),
+        wall_ms=round(wall_seconds * 1000, 2),
+        db_ms=round(profile.db_seconds * 1000, 2),
+        render_ms=round(profile.render_seconds * 1000, 2),
+        queries=profile.queries,
+        over_budget=False,
+    )
+    exceeded = over_budget(budget_for(method, match.view_name), sample)
+    if exceeded:
+        sample = sample._replace(over_budget=True)
+    store.record(method, match.view_name, display_route(match), sample)
+
+    if exceeded:
+        details = ', '.join(f'{metric}={getattr(sample, metric)}' for metric in exceeded)
+        message = f'{method} {match.view_name} ({request.path}) exceeded its budget: {details}'
+        if BUDGET_ACTION == 'raise':
+            raise BudgetExceeded(message)
+        logger.warning(message)
+
+
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def _summary(values):
+    ordered = sorted(values)
+    summary = {name: _percentile(ordered, fraction) for name, fraction in PERCENTILES}
+    summary['max'] = ordered[-1]
+    return summary
+
+
+def route_stats(all_workers=True):
+    """
+    Rolling percentiles per view
+
+    Args:
+        all_workers: Merge the windows other workers published to the cache
+
+    Returns:
+        list: One dict per view ('view', 'method', 'route', 'count', 'over_budget',
+              'budget' and a p50/p95/p99/max summary per metric), slowest p95 first
+    """
+    windows = {}
+    if all_workers:
+        workers = [w for w in cache.get(WORKERS_KEY) or [] if w != worker_id()]
+        published = cache.get_many([WORKER_KEY_PREFIX + w for w in workers])
+        for exported in published.values():
+            for key, window in exported.items():
+                merged = windows.setdefault(key, {'route': window['route'], 'samples': []})
+                merged['samples'].extend(window['samples'])
+    for key, window in store.export().items():
+        merged = windows.setdefault(key, {'route': window['route'], 'samples': []})
+        merged['samples'].extend(window['samples'])
+
+    since = time.time() - WINDOW_SECONDS
+    stats = []
+    for key, window in windows.items():
+        samples = [Sample(*sample) for sample in window['samples'] if sample[0] >= since]
+        if not samples:
+            continue
+        method, view_name = key.split(' ', 1)
+        row = {
+            'view': view_name,
+            'method': method,
+            'route': window['route'],
+            'count': len(samples),
+            'over_budget': sum(1 for sample in samples if sample.over_budget),
+            'budget': budget_for(method, view_name),
+        }
+        for metric in METRICS:
+            row[metric] = _summary([getattr(sample, metric) for sample in samples])
+        stats.append(row)
+    stats.sort(key=lambda row: row['wall_ms']['p95'], reverse=True)
+    return stats
+
+
+def reset_profiles():
+    """Forget the samples of this worker and everything published to the cache"""
+    store.clear()
+    workers = cache.get(WORKERS_KEY) or []
+    cache.delete_many([WORKER_KEY_PREFIX + w for w in workers] + [WORKERS_KEY])
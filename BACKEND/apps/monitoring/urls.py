@@ -0,0 +1,9 @@
+"""
+URL Configuration for Monitoring
+"""
+from django.urls import path
+from apps.monitoring.views import RequestProfilesView
+
+urlpatterns = [
+    path('profiles/', RequestProfilesView.as_view(), name='request-profiles'),
+]
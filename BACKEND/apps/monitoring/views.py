@@ -0,0 +1,51 @@
+"""
+Monitoring Views: rolling request profiles per route
+"""
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.monitoring import profiler
+from apps.users.permissions import IsAdmin
+from config.cache import cache_is_shared
+
+
+class RequestProfilesView(APIView):
+    """
+    Rolling p50/p95/p99 of wall time, DB time, render time and queries per route
+    GET /api/monitoring/profiles/?sort=queries&view=clearance-list&local=true
+    DELETE /api/monitoring/profiles/ forgets the collected samples
+
+    'scope' is 'all_workers' only when the workers publish to a shared cache;
+    otherwise the figures cover the answering worker alone ('local').
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        sort = request.query_params.get('sort', 'wall_ms')
+        if sort not in profiler.METRICS:
+            return Response(
+                {'error': f'sort must be one of: {", ".join(profiler.METRICS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        local = request.query_params.get('local', '').lower() in ('1', 'true', 'yes')
+        scope = 'local' if local or not cache_is_shared() else 'all_workers'
+
+        routes = profiler.route_stats(all_workers=not local)
+        view_name = request.query_params.get('view')
+        if view_name:
+            routes = [row for row in routes if row['view'] == view_name]
+        routes.sort(key=lambda row: row[sort]['p95'], reverse=True)
+
+        return Response({
+            'sample_rate': profiler.SAMPLE_RATE,
+            'window_seconds': profiler.WINDOW_SECONDS,
+            'window_size': profiler.WINDOW_SIZE,
+            'scope': scope,
+            'routes': routes,
+        })
+
+    def delete(self, request):
+        profiler.reset_profiles()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import EmailOutbox, Notification
 
 
 @admin.register(Notification)
@@ -50,3 +50,42 @@ class NotificationAdmin(admin.ModelAdmin):
             {'fields': ('created_at', 'updated_at'), 'classes': ('collapse',)},
         ),
     )
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Admin interface for the notification email outbox"""
+
+    list_display = (
+        'notification',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+        'created_at',
+    )
+    list_filter = (
+        'status',
+        'created_at',
+    )
+    search_fields = (
+        'notification__recipient__email',
+        'notification__title',
+        'last_error',
+    )
+    readonly_fields = (
+        'id',
+        'notification',
+        'claim_token',
+        'claimed_at',
+        'sent_at',
+        'created_at',
+        'updated_at',
+    )
+    actions = ['requeue_selected']
+
+    @admin.action(description='Requeue selected dead-lettered emails')
+    def requeue_selected(self, request, queryset):
+        from .outbox import requeue_dead
+        count = requeue_dead(queryset)
+        self.message_user(request, f'{count} email(s) requeued.')
@@ -0,0 +1,88 @@
+"""
+Cached per-user unread notification counters
+
+unread_count() serves the counter from the cache backend and rebuilds it from
+the database on a miss. Code that creates notifications or changes their read
+state calls adjust_unread() (or invalidate_unread() for bulk changes); the
+cache is only touched after the surrounding transaction commits, so rolled
+back writes never skew the counter.
+
+Adjusting a counter that is not cached is a no-op: the next read rebuilds it.
+Counters also expire after NOTIFICATION_UNREAD_CACHE_TIMEOUT seconds, which
+bounds how long a counter can stay off after a race between a rebuild and a
+concurrent adjustment.
+
+The counters are only kept exact across workers by a shared cache (REDIS_URL;
+see config/cache.py). With a process-local cache a change made in one worker
+does not reach the others, so counters there expire after
+NOTIFICATION_UNREAD_LOCAL_CACHE_TIMEOUT seconds instead: a badge served by
+another worker is at most that stale.
+"""
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.notifications.models import Notification
+from config.cache import cache_is_shared
+
+
+UNREAD_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300)
+UNREAD_LOCAL_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_UNREAD_LOCAL_CACHE_TIMEOUT', 5)
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def cache_timeout():
+    """Counter lifetime: long with a shared cache, short when each worker has its own"""
+    if cache_is_shared():
+        return UNREAD_CACHE_TIMEOUT
+    return min(UNREAD_CACHE_TIMEOUT, UNREAD_LOCAL_CACHE_TIMEOUT)
+
+
+def unread_count(user_id):
+    """Unread notifications of a user, from the cache when possible"""
+    key = _key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.add(key, count, cache_timeout())
+    return count
+
+
+def unread_etag(user_id, count):
+    """Strong ETag for an unread_count response"""
+    digest = hashlib.sha1(f'{user_id}:{count}'.encode()).hexdigest()[:16]
+    return f'"unread-{digest}"'
+
+
+def adjust_unread(user_id, delta):
+    """Add delta to a user's cached counter once the transaction commits"""
+    if delta:
+        transaction.on_commit(lambda: _apply(user_id, delta))
+
+
+def adjust_unread_many(recipient_ids):
+    """Increment the counters of every recipient (one per occurrence)"""
+    for user_id, delta in Counter(recipient_ids).items():
+        adjust_unread(user_id, delta)
+
+
+def invalidate_unread(user_id):
+    """Drop a user's counter once the transaction commits; the next read rebuilds it"""
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
+
+
+def _apply(user_id, delta):
+    key = _key(user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        # Not cached: nothing to adjust
+        return
+    if value < 0:
+        cache.delete(key)
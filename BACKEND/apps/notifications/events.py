@@ -0,0 +1,435 @@
+"""
+Live events for the notification stream (GET /api/notifications/stream/)
+
+The stream pushes three kinds of events to the signed-in user:
+
+- notification: a notification addressed to the user was created
+- clearance:    one of the student's clearance requests changed status
+- approval:     a department acted on one of the student's approvals
+
+Events are always read from the database by EventFeed, keyed on created_at /
+updated_at, so nothing is lost when a client reconnects with Last-Event-ID or
+when the change happened in another worker process. The in-process broker
+only decides *when* a stream looks: code that writes notifications,
+clearances or approvals calls publish() with the affected user ids, and once
+the transaction commits every stream of those users in this process wakes up
+and reads the new rows immediately.
+
+Changes committed by other processes are found by one ChangePoller thread per
+process: every NOTIFICATION_STREAM_POLL_SECONDS it runs three indexed queries
+for the users with new rows, however many streams are open, and wakes their
+streams. An idle stream does not touch the database between wake-ups; it only
+sends heartbeats. With NOTIFICATION_STREAM_SHARED_POLLER off (the default
+under manage.py test) every stream polls its own feed instead.
+
+Every open stream still holds a worker thread, so a process serves at most
+NOTIFICATION_STREAM_MAX_CONNECTIONS streams at once and answers further
+streams 503 with Retry-After. Serve the stream from its own gunicorn process
+with many threads (see the deployment notes in README.md) so ordinary API
+requests never wait behind it.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+POLL_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_POLL_SECONDS', 5)
+HEARTBEAT_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_SECONDS', 15)
+MAX_STREAM_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_MAX_SECONDS', 300)
+RETRY_MS = getattr(settings, 'NOTIFICATION_STREAM_RETRY_MS', 3000)
+MAX_CONNECTIONS = getattr(settings, 'NOTIFICATION_STREAM_MAX_CONNECTIONS', 6)
+RETRY_AFTER_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_RETRY_AFTER_SECONDS', 30)
+SHARED_POLLER = getattr(settings, 'NOTIFICATION_STREAM_SHARED_POLLER', True)
+
+# Rows committed slightly out of updated_at order are caught by re-reading
+# this much history on every poll; the feed drops events it already sent.
+POLL_OVERLAP = timedelta(seconds=getattr(settings, 'NOTIFICATION_STREAM_POLL_OVERLAP_SECONDS', 2))
+MAX_EVENTS_PER_POLL = getattr(settings, 'NOTIFICATION_STREAM_MAX_EVENTS_PER_POLL', 100)
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One stream's wake-up flag"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._event = threading.Event()
+
+    def wake(self):
+        self._event.set()
+
+    def wait(self, timeout):
+        """Block until woken or timeout; returns True when woken"""
+        woken = self._event.wait(timeout)
+        self._event.clear()
+        return woken
+
+
+class EventBroker:
+    """In-process registry of open streams, keyed by user id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+        self._open_streams = 0
+
+    def open_stream(self):
+        """Take one of the process's stream slots; False when all are in use"""
+        with self._lock:
+            if self._open_streams >= MAX_CONNECTIONS:
+                return False
+            self._open_streams += 1
+            return True
+
+    def close_stream(self):
+        with self._lock:
+            self._open_streams = max(0, self._open_streams - 1)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(str(user_id))
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self):
+        return bool(self._subscriptions)
+
+    def wake(self, user_ids):
+        with self._lock:
+            subscriptions = [
+                subscription
+                for user_id in {str(user_id) for user_id in user_ids}
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in subscriptions:
+            subscription.wake()
+
+
+broker = EventBroker()
+
+
+class ChangePoller:
+    """
+    Finds the users with new events for every stream of the process
+
+    One daemon thread, started by the first stream, calls poll() every
+    POLL_SECONDS while any stream is open.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.since = None
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self):
+        if self.is_running():
+            return
+        with self._start_lock:
+            if self.is_running():
+                return
+            self.since = timezone.now()
+            self._thread = threading.Thread(target=self._run, name='notification-stream-poller', daemon=True)
+            self._thread.start()
+
+    def poll(self):
+        """Wake the streams of users with rows changed since the previous poll; returns their ids"""
+        from apps.approvals.models import ClearanceApproval
+        from apps.clearances.models import ClearanceRequest
+        from apps.notifications.models import Notification
+
+        started = timezone.now()
+        window = (self.since or started) - POLL_OVERLAP
+        user_ids = set(
+            Notification.objects.filter(created_at__gt=window)
+            .values_list('recipient_id', flat=True).distinct()
+        )
+        user_ids.update(
+            ClearanceRequest.objects.filter(updated_at__gt=window)
+            .values_list('student__user_id', flat=True).distinct()
+        )
+        user_ids.update(
+            ClearanceApproval.objects.filter(updated_at__gt=window)
+            .values_list('clearance_request__student__user_id', flat=True).distinct()
+        )
+        self.since = started
+        self.broker.wake(user_ids)
+        return user_ids
+
+    def _run(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            if not self.broker.has_subscribers():
+                # New streams read their own backlog, so there is nothing to catch up on
+                self.since = timezone.now()
+                continue
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Could not poll for notification stream changes')
+            finally:
+                close_old_connections()
+
+
+poller = ChangePoller(broker)
+
+
+def publish(user_ids):
+    """Wake the local streams of these users once the transaction commits"""
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if user_ids and broker.has_subscribers():
+        transaction.on_commit(lambda: broker.wake(user_ids))
+
+
+def publish_for_clearances(clearance_ids):
+    """publish() for the students owning these clearance requests"""
+    from apps.clearances.models import ClearanceRequest
+
+    clearance_ids = list(clearance_ids)
+    if not clearance_ids or not broker.has_subscribers():
+        return
+    publish(
+        ClearanceRequest.objects.filter(id__in=clearance_ids)
+        .values_list('student__user_id', flat=True).distinct()
+    )
+
+
+def format_event_id(moment):
+    return moment.isoformat()
+
+
+def parse_event_id(value):
+    """Cursor from a Last-Event-ID header, or None when missing or malformed"""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        return None
+    if moment is None or timezone.is_naive(moment):
+        return None
+    return moment
+
+
+class EventFeed:
+    """
+    Reads the events of one user from the database
+
+    poll() returns the events changed since the previous poll, oldest first,
+    as (event_type, event_id, data) tuples. event_id is the timestamp cursor to
+    resume from (sent as the SSE id, echoed back as Last-Event-ID).
+    """
+
+    def __init__(self, user, since=None):
+        self.user = user
+        self.since = since or timezone.now()
+        # Never send rows from before the cursor the feed started at
+        self._floor = self.since
+        self.is_student = user.role == 'student'
+        self._sent = OrderedDict()
+
+    def poll(self):
+        from apps.notifications.counters import unread_count
+
+        window = max(self.since - POLL_OVERLAP, self._floor)
+        sources = [('notification', 'created_at', self._notifications(window))]
+        if self.is_student:
+            sources.append(('clearance', 'updated_at', self._clearances(window)))
+            sources.append(('approval', 'updated_at', self._approvals(window)))
+
+        events = []
+        # A truncated source may have more rows after its last one; stop
+        # there so the cursor never skips past rows that were not read.
+        cutoff = None
+        for event_type, field, rows in sources:
+            if len(rows) >= MAX_EVENTS_PER_POLL:
+                last = rows[-1][field]
+                cutoff = last if cutoff is None else min(cutoff, last)
+            events.extend((event_type, row[field], row) for row in rows)
+        if any(event_type == 'notification' for event_type, _, _ in events):
+            count = unread_count(self.user.id)
+            for event_type, _, row in events:
+                if event_type == 'notification':
+                    row['unread_count'] = count
+
+        fresh = []
+        for event_type, moment, data in sorted(events, key=lambda event: event[1]):
+            if cutoff is not None and moment > cutoff:
+                break
+            key = (event_type, data['id'], moment)
+            if key in self._sent:
+                continue
+            self._remember(key)
+            self.since = max(self.since, moment)
+            fresh.append((event_type, format_event_id(self.since), data))
+        return fresh
+
+    def _remember(self, key):
+        self._sent[key] = True
+        while len(self._sent) > MAX_EVENTS_PER_POLL * 4:
+            self._sent.popitem(last=False)
+
+    def _notifications(self, window):
+        from apps.notifications.models import Notification
+
+        return list(
+            Notification.objects.filter(recipient=self.user, created_at__gt=window)
+            .order_by('created_at', 'id')
+            .values(
+                'id', 'notification_type', 'title', 'message', 'is_read',
+                'clearance_id', 'approval_id', 'payment_id', 'created_at',
+            )[:MAX_EVENTS_PER_POLL]
+        )
+
+    def _clearances(self, window):
+        from apps.clearances.models import ClearanceRequest
+
+        rows = list(
+            ClearanceRequest.objects.filter(student__user=self.user, updated_at__gt=window)
+            .order_by('updated_at', 'id')
+            .values(
+                'id', 'status', 'completion_date', 'rejection_reason', 'updated_at',
+                *ClearanceRequest.COUNTER_FIELDS,
+            )[:MAX_EVENTS_PER_POLL]
+        )
+        for row in rows:
+            row.update(_progress(row))
+        return rows
+
+    def _approvals(self, window):
+        from apps.approvals.models import ClearanceApproval
+
+        rows = list(
+            ClearanceApproval.objects.filter(
+                clearance_request__student__user=self.user,
+                updated_at__gt=window,
+            )
+            .order_by('updated_at', 'id')
+            .values(
+                'id', 'clearance_request_id', 'status', 'approval_date',
+                'rejection_reason', 'notes', 'updated_at',
+                department_name=F('department__name'),
+                department_code=F('department__code'),
+                clearance_status=F('clearance_request__status'),
+                total_approvals=F('clearance_request__total_approvals'),
+                approved_count=F('clearance_request__approved_count'),
+                rejected_count=F('clearance_request__rejected_count'),
+                pending_count=F('clearance_request__pending_count'),
+            )[:MAX_EVENTS_PER_POLL]
+        )
+        for row in rows:
+            row.update(_progress(row))
+        return rows
+
+
+def _progress(row):
+    """Same figures as ClearanceRequest.get_completion_percentage / get_approval_summary"""
+    total = row.pop('total_approvals')
+    approved = row.pop('approved_count')
+    rejected = row.pop('rejected_count')
+    pending = row.pop('pending_count')
+    return {
+        'completion_percentage': int((approved + rejected) / total * 100) if total else 0,
+        'approval_summary': {
+            'total': total,
+            'approved': approved,
+            'rejected': rejected,
+            'pending': pending,
+        },
+    }
+
+
+def format_sse(event_type, event_id, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'
+
+
+def stream_events(user, since=None, max_seconds=None):
+    """
+    Server-Sent Events body for one user
+
+    Sleeps on the user's subscription and reads the feed when woken, by a
+    local publish() or by the shared poller. Without the shared poller it
+    reads the feed every NOTIFICATION_STREAM_POLL_SECONDS instead. The stream
+    ends after NOTIFICATION_STREAM_MAX_SECONDS and the client reconnects with
+    Last-Event-ID, which keeps a worker from being held forever by one client.
+    """
+    feed = EventFeed(user, since)
+    subscription = broker.subscribe(user.id)
+    max_seconds = MAX_STREAM_SECONDS if max_seconds is None else max_seconds
+    if SHARED_POLLER:
+        poller.ensure_started()
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        started = last_write = time.monotonic()
+        woken = True
+        while True:
+            events = []
+            if woken or not SHARED_POLLER:
+                events = feed.poll()
+                # Do not hold a database connection while sleeping
+                if not connection.in_atomic_block:
+                    close_old_connections()
+            for event_type, event_id, data in events:
+                yield format_sse(event_type, event_id, data)
+            now = time.monotonic()
+            if events:
+                last_write = now
+            elif now - last_write >= HEARTBEAT_SECONDS:
+                yield ': keep-alive\n\n'
+                last_write = now
+            remaining = max_seconds - (now - started)
+            if remaining <= 0:
+                return
+            timeout = min(HEARTBEAT_SECONDS - (now - last_write), remaining)
+            if not SHARED_POLLER:
+                timeout = min(timeout, POLL_SECONDS)
+            woken = subscription.wait(max(timeout, 0))
+    finally:
+        broker.unsubscribe(subscription)
+
+
+class EventStream:
+    """
+    Response body of one stream, holding a slot taken with broker.open_stream()
+
+    The server closes the response when the client goes away, which frees the
+    slot even if the stream never started.
+    """
+
+    def __init__(self, user, since=None, max_seconds=None):
+        self._events = stream_events(user, since, max_seconds)
+        self._closed = False
+
+    def __iter__(self):
+        return self._events
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._events.close()
+        broker.close_stream()
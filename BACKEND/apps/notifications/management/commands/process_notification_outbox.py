@@ -0,0 +1,64 @@
+"""
+Django management command to deliver queued notification emails.
+Pure-database worker for installs without Redis/Celery.
+Usage: python manage.py process_notification_outbox [--once] [--interval 5] [--batch-size 50] [--requeue-dead]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.outbox import drain_outbox, requeue_dead
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notification emails with retries, backoff and dead-lettering'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox once and exit instead of polling',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between polls when the outbox is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Entries claimed per batch (default: NOTIFICATION_OUTBOX_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--requeue-dead',
+            action='store_true',
+            help='Move dead-lettered entries back to the queue before processing',
+        )
+
+    def handle(self, *args, **options):
+        """Poll the outbox and deliver due emails."""
+        if options['requeue_dead']:
+            requeued = requeue_dead()
+            self.stdout.write(self.style.WARNING(f'⊘ Requeued {requeued} dead-lettered email(s)'))
+
+        try:
+            while True:
+                stats = drain_outbox(batch_size=options['batch_size'])
+                if any(stats.values()) or options['once']:
+                    self._report(stats)
+                if options['once']:
+                    break
+                time.sleep(max(options['interval'], 0.1))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping outbox worker')
+
+    def _report(self, stats):
+        self.stdout.write(self.style.SUCCESS(f"✓ Sent {stats['sent']} email(s)"))
+        if stats['retried']:
+            self.stdout.write(self.style.WARNING(f"⊘ {stats['retried']} email(s) scheduled for retry"))
+        if stats['dead']:
+            self.stdout.write(self.style.ERROR(f"✗ {stats['dead']} email(s) dead-lettered"))
+        if stats['lost']:
+            self.stdout.write(self.style.WARNING(f"⊘ {stats['lost']} email(s) reclaimed by another worker"))
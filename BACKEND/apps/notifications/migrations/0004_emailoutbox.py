@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_remove_notification_notificatio_user_id_e78525_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead Letter')], default='pending', help_text='Delivery status', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0, help_text='Number of delivery attempts made')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time of the next delivery attempt')),
+                ('claim_token', models.UUIDField(blank=True, help_text='Token of the worker currently delivering this entry', null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, help_text='When a worker claimed this entry', null=True)),
+                ('last_error', models.TextField(blank=True, help_text='Error from the last failed attempt')),
+                ('sent_at', models.DateTimeField(blank=True, help_text='When the email was delivered', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notification', models.ForeignKey(help_text='Notification to deliver by email', on_delete=django.db.models.deletion.CASCADE, related_name='outbox_entries', to='notifications.notification')),
+            ],
+            options={
+                'db_table': 'notification_outbox',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notificatio_status_7f28bd_idx'), models.Index(fields=['claim_token'], name='notificatio_claim_t_a4140b_idx')],
+            },
+        ),
+    ]
@@ -91,6 +91,8 @@ class Notification(models.Model):
             models.Index(fields=['is_read']),
             models.Index(fields=['notification_type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['recipient', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
@@ -98,12 +100,86 @@ class Notification(models.Model):
 
     def mark_as_read(self):
         """Mark notification as read"""
+        from apps.notifications.counters import adjust_unread
+        was_unread = not self.is_read
         self.is_read = True
         self.read_at = timezone.now()
         self.save(update_fields=['is_read', 'read_at'])
+        if was_unread:
+            adjust_unread(self.recipient_id, -1)
 
     def mark_email_sent(self):
         """Mark notification email as sent"""
         self.sent_via_email = True
         self.email_sent_at = timezone.now()
         self.save(update_fields=['sent_via_email', 'email_sent_at'])
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for notification emails
+    
+    Rows are written in the same transaction as the notification and
+    delivered later by the outbox worker, so API requests never wait on SMTP.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='outbox_entries',
+        help_text="Notification to deliver by email",
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        help_text="Delivery status",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of delivery attempts made",
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time of the next delivery attempt",
+    )
+    claim_token = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text="Token of the worker currently delivering this entry",
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a worker claimed this entry",
+    )
+    last_error = models.TextField(
+        blank=True,
+        help_text="Error from the last failed attempt",
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the email was delivered",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notification_outbox'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['claim_token']),
+        ]
+
+    def __str__(self):
+        return f"Outbox {self.notification_id} ({self.status})"
@@ -0,0 +1,205 @@
+"""
+Notification email outbox
+
+create_notification() writes an EmailOutbox row in the same transaction as the
+notification. A worker (the Celery task in tasks.py or the
+process_notification_outbox management command) drains the outbox with
+retries, exponential backoff and dead-lettering.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.notifications.models import EmailOutbox
+
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 50)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_OUTBOX_MAX_ATTEMPTS', 6)
+OUTBOX_BACKOFF_SECONDS = getattr(settings, 'NOTIFICATION_OUTBOX_BACKOFF_SECONDS', 30)
+OUTBOX_MAX_BACKOFF_SECONDS = getattr(settings, 'NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+OUTBOX_CLAIM_TIMEOUT_SECONDS = getattr(settings, 'NOTIFICATION_OUTBOX_CLAIM_TIMEOUT_SECONDS', 300)
+
+
+def enqueue_emails(notifications, batch_size=None):
+    """
+    Queue notification emails for background delivery
+
+    Must be called inside the transaction that created the notifications so
+    that both commit (or roll back) together.
+
+    Args:
+        notifications: Iterable of saved Notification objects
+        batch_size: Optional rows per INSERT
+
+    Returns:
+        list: Created EmailOutbox entries
+    """
+    entries = EmailOutbox.objects.bulk_create(
+        [EmailOutbox(notification=notification) for notification in notifications],
+        batch_size=batch_size,
+    )
+    if entries:
+        transaction.on_commit(_wake_worker)
+    return entries
+
+
+def _wake_worker():
+    """Ask Celery to drain the outbox right away when it is in use"""
+    if not getattr(settings, 'NOTIFICATION_OUTBOX_USE_CELERY', False):
+        return
+    try:
+        from apps.notifications.tasks import drain_notification_outbox
+        drain_notification_outbox.delay()
+    except Exception as e:
+        # The periodic drain will pick the entries up; never fail the request
+        logger.warning('Could not enqueue outbox drain task: %s', e)
+
+
+def backoff_delay(attempts):
+    """Exponential backoff for the given number of failed attempts"""
+    seconds = OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def claim_batch(batch_size=None):
+    """
+    Claim due outbox entries for this worker
+
+    Claiming is a conditional UPDATE stamped with a fresh token, which is safe
+    with several workers on any database backend. Entries claimed by a worker
+    that died are reclaimed after OUTBOX_CLAIM_TIMEOUT_SECONDS.
+
+    Returns:
+        list: Claimed EmailOutbox entries with their notification and recipient loaded
+    """
+    batch_size = batch_size or OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    stale = now - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT_SECONDS)
+    claimable = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=stale)
+
+    candidate_ids = list(
+        EmailOutbox.objects.filter(claimable).order_by('next_attempt_at').values_list('id', flat=True)[:batch_size]
+    )
+    if not candidate_ids:
+        return []
+
+    token = uuid.uuid4()
+    EmailOutbox.objects.filter(claimable, id__in=candidate_ids).update(
+        status='sending', claim_token=token, claimed_at=now, updated_at=now
+    )
+    return list(
+        EmailOutbox.objects.filter(claim_token=token, status='sending')
+        .select_related('notification__recipient')
+    )
+
+
+def _finish(entry, token, **fields):
+    """
+    Record the outcome of a delivery if this worker still holds the claim
+
+    A send that outlives OUTBOX_CLAIM_TIMEOUT_SECONDS can be reclaimed by
+    another worker; its outcome must not overwrite the new claimant's.
+    """
+    finished = EmailOutbox.objects.filter(pk=entry.pk, claim_token=token).update(
+        claim_token=None, updated_at=timezone.now(), **fields
+    )
+    if not finished:
+        logger.warning('Notification email %s was reclaimed by another worker during delivery', entry.id)
+        return False
+    for name, value in fields.items():
+        setattr(entry, name, value)
+    entry.claim_token = None
+    return True
+
+
+def deliver(entry):
+    """
+    Deliver one claimed outbox entry
+
+    Returns:
+        str: Resulting status ('sent', 'pending' for a scheduled retry, 'dead',
+             or 'lost' when another worker reclaimed the entry meanwhile)
+    """
+    from apps.notifications.utils import send_email_notification
+
+    token = entry.claim_token
+    now = timezone.now()
+    try:
+        sent = send_email_notification(entry.notification, raise_errors=True)
+    except Exception as e:
+        attempts = entry.attempts + 1
+        fields = {'attempts': attempts, 'last_error': str(e)[:2000]}
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            fields['status'] = 'dead'
+        else:
+            fields['status'] = 'pending'
+            fields['next_attempt_at'] = now + backoff_delay(attempts)
+        if not _finish(entry, token, **fields):
+            return 'lost'
+        if entry.status == 'dead':
+            logger.error('Notification email %s dead-lettered after %s attempts: %s', entry.id, attempts, e)
+        else:
+            logger.warning('Notification email %s failed (attempt %s): %s', entry.id, attempts, e)
+        return entry.status
+
+    fields = {'attempts': entry.attempts + 1, 'status': 'sent', 'sent_at': now}
+    if not sent:
+        # Nothing to deliver (e.g. recipient has no email address)
+        fields['last_error'] = 'Recipient has no email address'
+    if not _finish(entry, token, **fields):
+        return 'lost'
+    if sent:
+        entry.notification.mark_email_sent()
+    return entry.status
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Deliver due outbox entries until none are left (or max_batches is reached)
+
+    Returns:
+        dict: Counts of entries sent, scheduled for retry, dead-lettered and
+              lost to another worker's claim
+    """
+    stats = {'sent': 0, 'retried': 0, 'dead': 0, 'lost': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        entries = claim_batch(batch_size)
+        if not entries:
+            break
+        batches += 1
+        for entry in entries:
+            result = deliver(entry)
+            if result == 'sent':
+                stats['sent'] += 1
+            elif result == 'dead':
+                stats['dead'] += 1
+            elif result == 'lost':
+                stats['lost'] += 1
+            else:
+                stats['retried'] += 1
+    return stats
+
+
+def requeue_dead(queryset=None):
+    """
+    Move dead-lettered entries back to the queue for another round of attempts
+
+    Returns:
+        int: Number of entries requeued
+    """
+    queryset = queryset if queryset is not None else EmailOutbox.objects.all()
+    return queryset.filter(status='dead').update(
+        status='pending',
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        claim_token=None,
+        updated_at=timezone.now(),
+    )
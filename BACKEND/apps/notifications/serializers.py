@@ -93,6 +93,7 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         """Create notification"""
+        from apps.notifications.counters import adjust_unread
         from apps.users.models import User
         
         recipient_id = validated_data.pop('recipient_id')
@@ -102,6 +103,7 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
             recipient=recipient,
             **validated_data
         )
+        adjust_unread(recipient.id, 1)
         
         return notification
 
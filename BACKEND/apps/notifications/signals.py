@@ -0,0 +1,19 @@
+"""
+Signal handlers that wake the live event streams (see events.py)
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.notifications.events import publish_for_clearances
+
+
+@receiver(post_save, sender=ClearanceRequest)
+def clearance_saved(sender, instance, **kwargs):
+    publish_for_clearances([instance.pk])
+
+
+@receiver(post_save, sender=ClearanceApproval)
+def approval_saved(sender, instance, **kwargs):
+    publish_for_clearances([instance.clearance_request_id])
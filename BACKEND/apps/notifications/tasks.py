@@ -0,0 +1,12 @@
+"""
+Celery tasks for notifications
+"""
+from celery import shared_task
+
+from apps.notifications.outbox import drain_outbox
+
+
+@shared_task(ignore_result=True)
+def drain_notification_outbox(batch_size=None):
+    """Deliver due outbox emails; queued on commit and run periodically by beat"""
+    return drain_outbox(batch_size=batch_size)
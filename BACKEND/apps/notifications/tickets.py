@@ -0,0 +1,75 @@
+"""
+Stream tickets for GET /api/notifications/stream/
+
+EventSource cannot send an Authorization header, and an access token in the
+query string ends up in proxy logs and browser history. Clients instead POST
+to /api/notifications/stream_ticket/ with their normal credentials and open
+the stream with ?ticket=<ticket>.
+
+A ticket is signed for the stream only (it is not a JWT and no other view
+accepts it), expires after NOTIFICATION_STREAM_TICKET_SECONDS and is accepted
+once. The single-use check lives in the cache, so it only holds across
+workers with a shared cache (REDIS_URL; see config/cache.py).
+
+Because a ticket cannot be reused, EventSource's automatic reconnect fails
+with 401: on error the client closes the EventSource, fetches a new ticket
+and reconnects with ?last_event_id= set to the last id it received.
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+
+from apps.users.models import User
+
+
+TICKET_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_TICKET_SECONDS', 60)
+TICKET_SALT = 'notifications.stream-ticket'
+
+
+def _used_key(nonce):
+    return f'notifications:stream-ticket:{nonce}'
+
+
+def issue_ticket(user):
+    """Signed single-use ticket that opens one stream for this user"""
+    return signing.dumps({'user': str(user.id), 'nonce': secrets.token_urlsafe(16)}, salt=TICKET_SALT)
+
+
+def redeem_ticket(ticket):
+    """
+    The active user a ticket was issued to
+
+    Raises:
+        AuthenticationFailed: the ticket is malformed, expired, already used,
+            or its user is gone or inactive
+    """
+    try:
+        payload = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_SECONDS)
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed('Stream ticket expired')
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid stream ticket')
+
+    # Kept a little longer than the ticket so it cannot be replayed at the edge
+    if not cache.add(_used_key(payload['nonce']), 1, TICKET_SECONDS + 5):
+        raise exceptions.AuthenticationFailed('Stream ticket already used')
+
+    user = User.objects.filter(pk=payload['user'], is_active=True).first()
+    if user is None:
+        raise exceptions.AuthenticationFailed('Invalid stream ticket')
+    return user
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """Ticket from the ?ticket= query parameter; only the stream action accepts it"""
+    query_param = 'ticket'
+
+    def authenticate(self, request):
+        ticket = request.query_params.get(self.query_param)
+        if not ticket:
+            return None
+        return redeem_ticket(ticket), None
@@ -1,7 +1,10 @@
 """
 Notification helper functions
 """
+import logging
+
 from django.core.mail import send_mail
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
@@ -9,6 +12,11 @@ from django.utils.html import strip_tags
 from apps.notifications.models import Notification
 
 
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_BULK_BATCH_SIZE = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
+
+
 def create_notification(
     recipient,
     notification_type,
@@ -20,7 +28,10 @@ def create_notification(
     send_email=True
 ):
     """
-    Create a notification and optionally send email
+    Create a notification and optionally queue an email
+    
+    Emails are written to the outbox in the same transaction as the
+    notification and delivered by the outbox worker (see outbox.py).
     
     Args:
         recipient: User object who will receive the notification
@@ -30,37 +41,125 @@ def create_notification(
         clearance: Optional related ClearanceRequest object
         approval: Optional related ClearanceApproval object
         payment: Optional related Payment object
-        send_email: Whether to send email notification (default True)
+        send_email: Whether to queue an email notification (default True)
     
     Returns:
         Notification object
     """
-    # Create notification
-    notification = Notification.objects.create(
-        recipient=recipient,
-        notification_type=notification_type,
-        title=title,
-        message=message,
-        clearance=clearance,
-        approval=approval,
-        payment=payment
-    )
-    
-    # Send email if requested
-    if send_email:
-        email_sent = send_email_notification(notification)
-        if email_sent:
-            notification.mark_email_sent()
+    from apps.notifications.counters import adjust_unread
+    from apps.notifications.events import publish
+    from apps.notifications.outbox import enqueue_emails
+
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            recipient=recipient,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            clearance=clearance,
+            approval=approval,
+            payment=payment
+        )
+        adjust_unread(notification.recipient_id, 1)
+        publish([notification.recipient_id])
+        
+        # Queue email if requested
+        if send_email:
+            enqueue_emails([notification])
     
     return notification
 
 
-def send_email_notification(notification):
+def fan_out_notifications(notifications, email_recipient_ids=(), batch_size=None):
+    """
+    Insert many in-memory notifications with batched bulk inserts
+    
+    Args:
+        notifications: Iterable of unsaved Notification objects
+        email_recipient_ids: Recipient ids whose notifications also get an email
+        batch_size: Rows per INSERT (default NOTIFICATION_BULK_BATCH_SIZE)
+    
+    Returns:
+        list: Created Notification objects
+    """
+    from apps.notifications.counters import adjust_unread_many
+    from apps.notifications.events import publish
+    from apps.notifications.outbox import enqueue_emails
+
+    notifications = list(notifications)
+    if not notifications:
+        return []
+    batch_size = batch_size or NOTIFICATION_BULK_BATCH_SIZE
+    email_recipient_ids = set(email_recipient_ids)
+
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        adjust_unread_many(n.recipient_id for n in created if not n.is_read)
+        publish({n.recipient_id for n in created})
+        if email_recipient_ids:
+            enqueue_emails(
+                [n for n in created if n.recipient_id in email_recipient_ids],
+                batch_size=batch_size,
+            )
+    return created
+
+
+def _active_user_ids(role, **filters):
+    """Ids of active users with the given role, in one query"""
+    from apps.users.models import User
+    return list(
+        User.objects.filter(role=role, is_active=True, **filters).values_list('id', flat=True)
+    )
+
+
+def _department_staff_by_department(department_ids):
+    """Map department id -> active staff ids for all departments in one query"""
+    from apps.users.models import User
+    staff = {}
+    rows = User.objects.filter(
+        role='department_staff',
+        is_active=True,
+        department_id__in=set(department_ids),
+    ).values_list('department_id', 'id')
+    for department_id, user_id in rows:
+        staff.setdefault(department_id, []).append(user_id)
+    return staff
+
+
+def _approval_pending_notifications(approvals, student_name, clearance_id):
+    """
+    Build approval_pending notifications for department staff
+    
+    Args:
+        approvals: Iterable of (approval_id, department_id)
+        student_name: Display name of the student
+        clearance_id: Related ClearanceRequest id
+    """
+    approvals = list(approvals)
+    staff = _department_staff_by_department(department_id for _, department_id in approvals)
+    return [
+        Notification(
+            recipient_id=staff_id,
+            notification_type='approval_pending',
+            title='Clearance Awaiting Approval',
+            message=f'Student {student_name} has a clearance request awaiting your department\'s approval.',
+            approval_id=approval_id,
+            clearance_id=clearance_id,
+        )
+        for approval_id, department_id in approvals
+        for staff_id in staff.get(department_id, [])
+    ]
+
+
+def send_email_notification(notification, raise_errors=False):
     """
     Send email notification using template
     
+    Called by the outbox worker; API code should go through create_notification.
+    
     Args:
         notification: Notification object
+        raise_errors: Re-raise delivery errors instead of returning False
     
     Returns:
         bool: True if email sent successfully, False otherwise
@@ -111,8 +210,9 @@ def send_email_notification(notification):
         return True
         
     except Exception as e:
-        # Log the error (you can add proper logging here)
-        print(f"Error sending email notification: {str(e)}")
+        if raise_errors:
+            raise
+        logger.error('Error sending email notification: %s', e)
         return False
 
 
@@ -121,42 +221,49 @@ def notify_clearance_submitted(clearance_request):
     Notify student and admin when clearance is submitted
     Also notify department staff about pending approvals
     
+    Recipients are resolved with one query per role and all rows are
+    inserted with bulk_create, so the cost does not grow with staff headcount.
+    
     Args:
         clearance_request: ClearanceRequest object
     """
+    from apps.approvals.models import ClearanceApproval
+
+    student = clearance_request.student
+    student_user = student.user
+    student_name = student_user.get_full_name()
+
     # Notify student
-    create_notification(
-        recipient=clearance_request.student.user,
+    notifications = [Notification(
+        recipient_id=student_user.id,
         notification_type='clearance_submitted',
         title='Clearance Request Submitted',
-        message=f'Your clearance request for {clearance_request.academic_year} {clearance_request.semester} has been submitted successfully. It is now pending approval.',
-        clearance=clearance_request,
-        send_email=True
-    )
+        message=f'Your {student.graduation_year} graduation clearance request has been submitted successfully. It is now pending approval.',
+        clearance_id=clearance_request.id,
+    )]
 
-    # Notify admins
-    from apps.users.models import User
-    admins = User.objects.filter(role='admin', is_active=True)
-
-    for admin in admins:
-        create_notification(
-            recipient=admin,
+    # Notify admins (no email, don't spam admins)
+    notifications.extend(
+        Notification(
+            recipient_id=admin_id,
             notification_type='clearance_submitted',
             title='New Clearance Request',
-            message=f'Student {clearance_request.student.user.get_full_name()} ({clearance_request.student.registration_number}) has submitted a clearance request.',
-            clearance=clearance_request,
-            send_email=False  # Don't spam admins with emails
+            message=f'Student {student_name} ({student.registration_number}) has submitted a clearance request.',
+            clearance_id=clearance_request.id,
         )
+        for admin_id in _active_user_ids('admin')
+    )
 
-    # Notify department staff about pending approvals
-    from apps.approvals.models import ClearanceApproval
+    # Notify department staff about pending approvals (no email)
     pending_approvals = ClearanceApproval.objects.filter(
         clearance_request=clearance_request,
         status='pending'
+    ).values_list('id', 'department_id')
+    notifications.extend(
+        _approval_pending_notifications(pending_approvals, student_name, clearance_request.id)
     )
 
-    for approval in pending_approvals:
-        notify_approval_pending(approval)
+    return fan_out_notifications(notifications, email_recipient_ids=[student_user.id])
 
 
 def notify_clearance_approved(clearance_request):
@@ -170,7 +277,7 @@ def notify_clearance_approved(clearance_request):
         recipient=clearance_request.student.user,
         notification_type='clearance_approved',
         title='Clearance Request Approved',
-        message=f'Congratulations! Your clearance request for {clearance_request.academic_year} {clearance_request.semester} has been fully approved.',
+        message=f'Congratulations! Your {clearance_request.student.graduation_year} graduation clearance request has been fully approved.',
         clearance=clearance_request,
         send_email=True
     )
@@ -187,7 +294,7 @@ def notify_clearance_rejected(clearance_request):
         recipient=clearance_request.student.user,
         notification_type='clearance_rejected',
         title='Clearance Request Rejected',
-        message=f'Your clearance request for {clearance_request.academic_year} {clearance_request.semester} has been rejected. Please check the approval details for more information.',
+        message=f'Your {clearance_request.student.graduation_year} graduation clearance request has been rejected. Please check the approval details for more information.',
         clearance=clearance_request,
         send_email=True
     )
@@ -213,6 +320,57 @@ def notify_approval_action(approval):
     )
 
 
+def notify_approval_actions_bulk(approvals, status, completed_clearance_ids=()):
+    """
+    Notify students about a batch of approval actions with bulk inserts
+    
+    Student emails are queued in the outbox, as create_notification does.
+    
+    Args:
+        approvals: Iterable of (approval_id, clearance_id, student_user_id, department_name)
+        status: 'approved' or 'rejected'
+        completed_clearance_ids: Clearance requests fully approved by this batch
+    
+    Returns:
+        list: Created Notification objects
+    """
+    approvals = list(approvals)
+    student_by_clearance = {
+        clearance_id: user_id for _, clearance_id, user_id, _ in approvals
+    }
+    notifications = []
+    
+    if status == 'approved':
+        for approval_id, clearance_id, user_id, department_name in approvals:
+            notifications.append(Notification(
+                recipient_id=user_id,
+                notification_type='approval_pending',  # Generic approval notification
+                title='Department Approval: Approved',
+                message=f'The {department_name} has approved your clearance request.',
+                approval_id=approval_id,
+                clearance_id=clearance_id,
+            ))
+        for clearance_id in completed_clearance_ids:
+            notifications.append(Notification(
+                recipient_id=student_by_clearance[clearance_id],
+                notification_type='clearance_approved',
+                title='Clearance Request Approved',
+                message='Congratulations! Your clearance request has been fully approved.',
+                clearance_id=clearance_id,
+            ))
+    else:
+        for clearance_id, user_id in student_by_clearance.items():
+            notifications.append(Notification(
+                recipient_id=user_id,
+                notification_type='clearance_rejected',
+                title='Clearance Request Rejected',
+                message='Your clearance request has been rejected. Please check the approval details for more information.',
+                clearance_id=clearance_id,
+            ))
+    
+    return fan_out_notifications(notifications, email_recipient_ids=student_by_clearance.values())
+
+
 def notify_approval_pending(approval):
     """
     Notify department staff about pending approval
@@ -220,24 +378,11 @@ def notify_approval_pending(approval):
     Args:
         approval: ClearanceApproval object
     """
-    # Get department staff
-    from apps.users.models import User
-    staff = User.objects.filter(
-        role='department_staff',
-        department=approval.department,
-        is_active=True
-    )
-    
-    for staff_member in staff:
-        create_notification(
-            recipient=staff_member,
-            notification_type='approval_pending',
-            title='Clearance Awaiting Approval',
-            message=f'Student {approval.clearance_request.student.user.get_full_name()} has a clearance request awaiting your department\'s approval.',
-            approval=approval,
-            clearance=approval.clearance_request,
-            send_email=False  # Don't spam staff with emails
-        )
+    return fan_out_notifications(_approval_pending_notifications(
+        [(approval.id, approval.department_id)],
+        approval.clearance_request.student.user.get_full_name(),
+        approval.clearance_request_id,
+    ))
 
 
 def notify_payment_received(payment):
@@ -247,32 +392,30 @@ def notify_payment_received(payment):
     Args:
         payment: Payment object
     """
+    student_user = payment.student.user
+
     # Notify student
-    create_notification(
-        recipient=payment.student.user,
+    notifications = [Notification(
+        recipient_id=student_user.id,
         notification_type='payment_received',
         title='Payment Received',
-        message=f'Your payment of {payment.amount} {payment.currency} has been received. Transaction ID: {payment.transaction_id}. Awaiting verification.',
-        payment=payment,
-        send_email=True
-    )
-    
-    # Notify finance staff
-    from apps.users.models import User
-    finance_staff = User.objects.filter(
-        role='finance_staff',
-        is_active=True
-    )
-    
-    for staff in finance_staff:
-        create_notification(
-            recipient=staff,
+        message=f'Your payment of KES {payment.amount} has been received. Transaction ID: {payment.transaction_id}. Awaiting verification.',
+        payment_id=payment.id,
+    )]
+
+    # Notify finance staff (no email)
+    notifications.extend(
+        Notification(
+            recipient_id=staff_id,
             notification_type='payment_received',
             title='New Payment Received',
-            message=f'Payment of {payment.amount} {payment.currency} received from {payment.student.user.get_full_name()}. Awaiting verification.',
-            payment=payment,
-            send_email=False
+            message=f'Payment of KES {payment.amount} received from {student_user.get_full_name()}. Awaiting verification.',
+            payment_id=payment.id,
         )
+        for staff_id in _active_user_ids('finance_staff')
+    )
+
+    return fan_out_notifications(notifications, email_recipient_ids=[student_user.id])
 
 
 def notify_payment_verified(payment):
@@ -286,7 +429,7 @@ def notify_payment_verified(payment):
         recipient=payment.student.user,
         notification_type='payment_verified',
         title='Payment Verified',
-        message=f'Your payment of {payment.amount} {payment.currency} has been verified. You can now submit your clearance request.',
+        message=f'Your payment of KES {payment.amount} has been verified. You can now submit your clearance request.',
         payment=payment,
         send_email=True
     )
@@ -303,7 +446,7 @@ def notify_payment_failed(payment):
         recipient=payment.student.user,
         notification_type='payment_received',  # Using payment_received as generic payment notification
         title='Payment Failed',
-        message=f'Your payment of {payment.amount} {payment.currency} has failed. Please try again or contact finance office.',
+        message=f'Your payment of KES {payment.amount} has failed. Please try again or contact finance office.',
         payment=payment,
         send_email=True
     )
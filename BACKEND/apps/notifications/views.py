@@ -2,14 +2,25 @@
 Views for Notification management
 """
 from rest_framework import viewsets, filters, status
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.db import transaction
 from django.db.models import Count, Q
 
+from config.pagination import KeysetOrPageNumberPagination
+from apps.notifications.counters import adjust_unread, unread_count, unread_etag
+from apps.notifications.events import RETRY_AFTER_SECONDS, EventStream, broker, parse_event_id
 from apps.notifications.models import Notification
+from apps.notifications.tickets import TICKET_SECONDS, StreamTicketAuthentication, issue_ticket
 from apps.notifications.serializers import (
     NotificationSerializer,
     NotificationListSerializer,
@@ -21,6 +32,16 @@ from apps.users.permissions import IsAdmin
 from apps.audit_logs.mixins import AuditViewSetMixin
 
 
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients negotiate text/event-stream; errors are still sent as JSON"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
 class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Notification CRUD operations
@@ -39,6 +60,7 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
     search_fields = ['title', 'message']
     ordering_fields = ['created_at', 'read_at']
     ordering = ['-created_at']
+    pagination_class = KeysetOrPageNumberPagination
     
     def get_serializer_class(self):
         """Use different serializers for different actions"""
@@ -89,7 +111,12 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        return super().destroy(request, *args, **kwargs)
+        # The counter only moves once the delete has committed
+        with transaction.atomic():
+            response = super().destroy(request, *args, **kwargs)
+            if not notification.is_read:
+                adjust_unread(notification.recipient_id, -1)
+        return response
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -111,6 +138,7 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
             notification.is_read = True
             notification.read_at = timezone.now()
             notification.save()
+            adjust_unread(notification.recipient_id, -1)
         
         return Response({
             'message': 'Notification marked as read',
@@ -137,6 +165,7 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
             notification.is_read = False
             notification.read_at = None
             notification.save()
+            adjust_unread(notification.recipient_id, 1)
         
         return Response({
             'message': 'Notification marked as unread',
@@ -156,12 +185,11 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
             is_read=False
         )
         
-        count = unread_notifications.count()
-        
-        unread_notifications.update(
+        count = unread_notifications.update(
             is_read=True,
             read_at=timezone.now()
         )
+        adjust_unread(user.id, -count)
         
         return Response({
             'message': f'{count} notification(s) marked as read'
@@ -192,16 +220,73 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         """
         Get count of user's unread notifications
         GET /api/notifications/unread_count/
+        
+        Served from the cached counter. Supports If-None-Match: an unchanged
+        count is answered with 304 Not Modified and no body.
         """
         user = request.user
         
-        count = Notification.objects.filter(
-            recipient=user,
-            is_read=False
-        ).count()
+        count = unread_count(user.id)
+        etag = unread_etag(user.id, count)
+        
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'unread_count': count
+            })
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+        authentication_classes=[JWTAuthentication, StreamTicketAuthentication, SessionAuthentication],
+    )
+    def stream(self, request):
+        """
+        Live events for the current user (Server-Sent Events)
+        GET /api/notifications/stream/
         
+        Pushes `notification`, `clearance` and `approval` events (see
+        events.py) instead of polling my_clearances / clearance_status /
+        unread_count. Browsers authenticate with ?ticket= from stream_ticket.
+        Reconnects resume from the Last-Event-ID header, or from
+        ?last_event_id= when opening a new connection. Answers 503 with
+        Retry-After when this process already serves
+        NOTIFICATION_STREAM_MAX_CONNECTIONS streams; clients then keep
+        polling until the retry.
+        """
+        since = parse_event_id(
+            request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        )
+        if not broker.open_stream():
+            return Response(
+                {'error': 'Too many open streams, retry later'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(RETRY_AFTER_SECONDS)},
+            )
+        response = StreamingHttpResponse(
+            EventStream(request.user, since),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @action(detail=False, methods=['post'])
+    def stream_ticket(self, request):
+        """
+        Single-use ticket for opening the stream from EventSource
+        POST /api/notifications/stream_ticket/
+        """
         return Response({
-            'unread_count': count
+            'ticket': issue_ticket(request.user),
+            'expires_in': TICKET_SECONDS
         })
     
     @action(detail=False, methods=['get'])
@@ -254,6 +339,7 @@ class NotificationViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         )
         
         count = read_notifications.count()
+        # Only read notifications go, so the cached unread counter is unaffected
         read_notifications.delete()
         
         return Response({
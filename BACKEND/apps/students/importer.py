@@ -0,0 +1,394 @@
+"""
+Bulk student import from CSV/XLSX rosters
+
+The roster is read row by row and processed in chunks of
+STUDENT_IMPORT_CHUNK_SIZE rows. Each chunk is validated in memory:
+registration-number format, e-mail, and duplicates within the file. School,
+department and course codes are resolved from maps loaded once per import.
+Clashes with existing accounts are found with three IN queries per chunk.
+Valid rows are then written with two bulk INSERTs (users, then students) in
+one transaction. Passwords given in the roster are hashed in a thread pool;
+hashlib's PBKDF2 releases the GIL, so the hashes are computed in parallel.
+
+Columns (header names are case-insensitive):
+
+    registration_number, email, full_name, graduation_year   required
+    admission_number, course_code, password, eligibility_status, faculty, program
+
+registration_number follows SCHOOL/DEPT/NNNN/YYYY; SCHOOL and DEPT must be
+known academic codes. Rows without a password get the import's default
+password, or an unusable password when none is given.
+
+Rows that fail validation are skipped and reported with their line number.
+They never abort the rest of the import.
+"""
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from apps.academics.models import AcademicDepartment, Course, School
+from apps.students.models import REGISTRATION_NUMBER_RE, Student
+from apps.users.models import User
+
+
+IMPORT_CHUNK_SIZE = getattr(settings, 'STUDENT_IMPORT_CHUNK_SIZE', 500)
+IMPORT_HASH_WORKERS = getattr(settings, 'STUDENT_IMPORT_HASH_WORKERS', 4)
+
+REQUIRED_COLUMNS = ('registration_number', 'email', 'full_name', 'graduation_year')
+OPTIONAL_COLUMNS = (
+    'admission_number', 'course_code', 'password', 'eligibility_status', 'faculty', 'program',
+)
+COLUMN_ALIASES = {
+    'reg_no': 'registration_number',
+    'registration_no': 'registration_number',
+    'name': 'full_name',
+    'email_address': 'email',
+    'course': 'course_code',
+}
+ELIGIBILITY_STATUSES = {value for value, _ in Student.ELIGIBILITY_STATUS_CHOICES}
+# Same bounds as CohortOpenSerializer.graduation_year
+GRADUATION_YEAR_RANGE = (1900, 2100)
+
+
+class RosterError(Exception):
+    """The roster as a whole cannot be read (bad format or missing columns)"""
+
+
+def _column(name):
+    name = str(name or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return COLUMN_ALIASES.get(name, name)
+
+
+def _check_header(header):
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise RosterError(f'Missing required column(s): {", ".join(missing)}')
+
+
+def read_csv(fileobj):
+    """Yield (line_number, row) from a CSV file opened in binary or text mode"""
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    try:
+        header = [_column(name) for name in next(reader)]
+    except StopIteration:
+        raise RosterError('The roster is empty')
+    except UnicodeDecodeError:
+        raise RosterError('CSV rosters must be UTF-8 encoded')
+    _check_header(header)
+    try:
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield reader.line_num, dict(zip(header, values))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise RosterError(f'Could not read the CSV roster: {e}')
+
+
+def read_xlsx(fileobj, sheet=None):
+    """Yield (row_number, row) from an XLSX workbook (needs openpyxl)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RosterError('XLSX rosters need the openpyxl package; upload a CSV instead')
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise RosterError(f'Could not open the workbook: {e}')
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+    except KeyError:
+        raise RosterError(f'No worksheet named "{sheet}"')
+    try:
+        rows = worksheet.iter_rows(values_only=True)
+        try:
+            header = [_column(name) for name in next(rows)]
+        except StopIteration:
+            raise RosterError('The roster is empty')
+        _check_header(header)
+        for number, values in enumerate(rows, start=2):
+            values = ['' if value is None else str(value) for value in values]
+            if any(value.strip() for value in values):
+                yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_roster(fileobj, filename, sheet=None):
+    """Pick the reader from the file extension"""
+    if str(filename).lower().endswith(('.xlsx', '.xlsm')):
+        return read_xlsx(fileobj, sheet=sheet)
+    if str(filename).lower().endswith(('.csv', '.txt')):
+        return read_csv(fileobj)
+    raise RosterError('Unsupported roster format; use .csv or .xlsx')
+
+
+class AcademicCodes:
+    """School, department and course lookups by code, loaded once"""
+
+    def __init__(self):
+        self.schools = {school.code.upper(): school for school in School.objects.all()}
+        self.departments = {
+            (department.school.code.upper(), department.code.upper()): department
+            for department in AcademicDepartment.objects.select_related('school')
+        }
+        self.courses = {
+            (course.department_id, course.code.upper()): course
+            for course in Course.objects.all()
+        }
+
+
+class ImportReport:
+    """Outcome of an import, with one entry per rejected row"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.errors = []
+
+    def reject(self, line, row, messages):
+        self.errors.append({
+            'row': line,
+            'registration_number': row.get('registration_number', ''),
+            'errors': list(messages),
+        })
+
+    @property
+    def valid(self):
+        return self.rows - len(self.errors)
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'valid': self.valid,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+    def write_errors_csv(self, fileobj):
+        writer = csv.writer(fileobj)
+        writer.writerow(['row', 'registration_number', 'errors'])
+        for error in self.errors:
+            writer.writerow([error['row'], error['registration_number'], '; '.join(error['errors'])])
+
+
+class StudentImporter:
+    """
+    Validates and inserts roster rows in chunks
+
+    Usage:
+        report = StudentImporter(default_password='...').run(read_roster(f, name))
+    """
+
+    def __init__(self, chunk_size=None, hash_workers=None, default_password=None, dry_run=False):
+        self.chunk_size = max(1, chunk_size or IMPORT_CHUNK_SIZE)
+        self.hash_workers = max(1, hash_workers or IMPORT_HASH_WORKERS)
+        self.dry_run = dry_run
+        self.default_password = default_password
+        self.codes = AcademicCodes()
+        self._seen = {'registration_number': set(), 'email': set(), 'admission_number': set()}
+
+    def run(self, rows):
+        report = ImportReport(dry_run=self.dry_run)
+        # The default password is shared, so one hash serves every row using it
+        self._default_hash = make_password(self.default_password) if self.default_password else None
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as pool:
+            self._pool = pool
+            chunk = []
+            for line, row in rows:
+                report.rows += 1
+                chunk.append((line, row))
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk, report)
+                    chunk = []
+            if chunk:
+                self._process_chunk(chunk, report)
+        return report
+
+    def _process_chunk(self, chunk, report):
+        candidates = []
+        for line, row in chunk:
+            cleaned, messages = self._clean(row)
+            if messages:
+                report.reject(line, row, messages)
+            else:
+                candidates.append((line, row, cleaned))
+        candidates = self._exclude_existing(candidates, report)
+        if not candidates or self.dry_run:
+            return
+
+        passwords = [cleaned['password'] for _, _, cleaned in candidates]
+        hashes = list(self._pool.map(self._hash, passwords))
+        pairs = [
+            self._build(cleaned, password_hash)
+            for (_, _, cleaned), password_hash in zip(candidates, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                self._insert(pairs)
+            report.created += len(pairs)
+        except IntegrityError:
+            # Someone else created a clashing account meanwhile: retry row by
+            # row so only the offending rows are rejected
+            for (line, row, _), pair in zip(candidates, pairs):
+                try:
+                    with transaction.atomic():
+                        self._insert([pair])
+                    report.created += 1
+                except IntegrityError:
+                    report.reject(line, row, ['A student or user with these details already exists'])
+
+    def _hash(self, password):
+        if password:
+            return make_password(password)
+        return self._default_hash or make_password(None)
+
+    def _clean(self, row):
+        """Validate one row in memory; returns (cleaned, error messages)"""
+        messages = []
+        value = {key: (row.get(key) or '').strip() for key in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+        for column in REQUIRED_COLUMNS:
+            if not value[column]:
+                messages.append(f'{column} is required')
+        if messages:
+            return None, messages
+
+        registration_number = value['registration_number'].upper()
+        match = REGISTRATION_NUMBER_RE.match(registration_number)
+        school = department = course = None
+        if not match:
+            messages.append('registration_number must follow SCHOOL/DEPT/NNNN/YYYY (e.g. SCE/CS/0001/2024)')
+        else:
+            school_code, department_code = match.group(1), match.group(2)
+            school = self.codes.schools.get(school_code)
+            department = self.codes.departments.get((school_code, department_code))
+            if school is None:
+                messages.append(f'Unknown school code "{school_code}"')
+            elif department is None:
+                messages.append(f'Unknown department code "{department_code}" in school {school_code}')
+            elif value['course_code']:
+                course = self.codes.courses.get((department.id, value['course_code'].upper()))
+                if course is None:
+                    messages.append(f'Unknown course code "{value["course_code"]}" in department {department_code}')
+
+        email = User.objects.normalize_email(value['email'])
+        try:
+            validate_email(email)
+        except ValidationError:
+            messages.append(f'Invalid email "{value["email"]}"')
+
+        try:
+            graduation_year = int(float(value['graduation_year']))
+        except (ValueError, OverflowError):
+            graduation_year = None
+            messages.append('graduation_year must be a year')
+        else:
+            low, high = GRADUATION_YEAR_RANGE
+            if not low <= graduation_year <= high:
+                messages.append(f'graduation_year must be between {low} and {high}')
+
+        eligibility_status = value['eligibility_status'].lower() or 'pending'
+        if eligibility_status not in ELIGIBILITY_STATUSES:
+            messages.append(f'eligibility_status must be one of {", ".join(sorted(ELIGIBILITY_STATUSES))}')
+
+        admission_number = value['admission_number'] or registration_number
+        for column, key in (
+            ('registration_number', registration_number),
+            ('email', email.lower()),
+            ('admission_number', admission_number),
+        ):
+            if key in self._seen[column]:
+                messages.append(f'Duplicate {column} in the roster')
+            else:
+                self._seen[column].add(key)
+
+        if messages:
+            return None, messages
+        return {
+            'registration_number': registration_number,
+            'admission_year': int(match.group(4)),
+            'email': email,
+            'full_name': value['full_name'],
+            'admission_number': admission_number,
+            'graduation_year': graduation_year,
+            'eligibility_status': eligibility_status,
+            'password': value['password'],
+            'school': school,
+            'department': department,
+            'course': course,
+            'faculty': value['faculty'] or school.name,
+            'program': value['program'] or (course.name if course else department.name),
+        }, []
+
+    def _exclude_existing(self, candidates, report):
+        """Reject rows clashing with existing accounts, three queries per chunk"""
+        if not candidates:
+            return candidates
+        existing_registrations = set(Student.objects.filter(
+            registration_number__in=[cleaned['registration_number'] for _, _, cleaned in candidates]
+        ).values_list('registration_number', flat=True))
+        existing_emails = {email.lower() for email in User.objects.filter(
+            email__in=[cleaned['email'] for _, _, cleaned in candidates]
+        ).values_list('email', flat=True)}
+        existing_admissions = set(User.objects.filter(
+            admission_number__in=[cleaned['admission_number'] for _, _, cleaned in candidates]
+        ).values_list('admission_number', flat=True))
+
+        kept = []
+        for line, row, cleaned in candidates:
+            messages = []
+            if cleaned['registration_number'] in existing_registrations:
+                messages.append('A student with this registration_number already exists')
+            if cleaned['email'].lower() in existing_emails:
+                messages.append('A user with this email already exists')
+            if cleaned['admission_number'] in existing_admissions:
+                messages.append('A user with this admission_number already exists')
+            if messages:
+                report.reject(line, row, messages)
+            else:
+                kept.append((line, row, cleaned))
+        return kept
+
+    def _build(self, cleaned, password_hash):
+        user = User(
+            username=cleaned['email'],
+            email=cleaned['email'],
+            full_name=cleaned['full_name'],
+            admission_number=cleaned['admission_number'],
+            role='student',
+            password=password_hash,
+        )
+        student = Student(
+            user=user,
+            registration_number=cleaned['registration_number'],
+            admission_year=cleaned['admission_year'],
+            school=cleaned['school'],
+            department=cleaned['department'],
+            course=cleaned['course'],
+            faculty=cleaned['faculty'],
+            program=cleaned['program'],
+            graduation_year=cleaned['graduation_year'],
+            eligibility_status=cleaned['eligibility_status'],
+        )
+        return user, student
+
+    def _insert(self, pairs):
+        from apps.analytics.rollups import schedule_refresh_for
+
+        User.objects.bulk_create([user for user, _ in pairs], batch_size=len(pairs))
+        students = Student.objects.bulk_create(
+            [student for _, student in pairs], batch_size=len(pairs)
+        )
+        # bulk_create bypasses the rollup signal handlers
+        schedule_refresh_for('students', [student.pk for student in students])
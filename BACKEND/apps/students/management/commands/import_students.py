@@ -0,0 +1,91 @@
+"""
+Django management command to import a student roster (CSV or XLSX).
+Usage: python manage.py import_students roster.csv [--dry-run] [--chunk-size 500]
+       [--workers 4] [--default-password PASSWORD] [--sheet NAME] [--errors-out errors.csv]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.students.importer import RosterError, StudentImporter, read_roster
+
+
+class Command(BaseCommand):
+    help = 'Create student accounts in bulk from a CSV/XLSX roster and report rejected rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Roster file (.csv or .xlsx)')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the roster without creating anything',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Rows validated and inserted per transaction (default: STUDENT_IMPORT_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Threads hashing roster passwords (default: STUDENT_IMPORT_HASH_WORKERS)',
+        )
+        parser.add_argument(
+            '--default-password',
+            default=None,
+            help='Password for rows without one (default: unusable password)',
+        )
+        parser.add_argument(
+            '--sheet',
+            default=None,
+            help='Worksheet to read from an XLSX roster (default: the active sheet)',
+        )
+        parser.add_argument(
+            '--errors-out',
+            default=None,
+            help='Write rejected rows to this CSV file',
+        )
+
+    def handle(self, *args, **options):
+        """Stream the roster through the importer and print a summary."""
+        importer = StudentImporter(
+            chunk_size=options['chunk_size'],
+            hash_workers=options['workers'],
+            default_password=options['default_password'],
+            dry_run=options['dry_run'],
+        )
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as roster:
+                report = importer.run(read_roster(roster, options['path'], sheet=options['sheet']))
+        except OSError as e:
+            raise CommandError(f'Could not open {options["path"]}: {e}')
+        except RosterError as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'⊘ Dry run: {report.valid} of {report.rows} row(s) are valid, nothing was created'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ Imported {report.created} of {report.rows} student(s) in {elapsed:.1f}s'
+            ))
+
+        if report.errors:
+            self.stdout.write(self.style.ERROR(f'✗ {len(report.errors)} row(s) rejected'))
+            if options['errors_out']:
+                with open(options['errors_out'], 'w', newline='', encoding='utf-8') as out:
+                    report.write_errors_csv(out)
+                self.stdout.write(f'  Error report written to {options["errors_out"]}')
+            else:
+                for error in report.errors[:20]:
+                    self.stdout.write(
+                        f"  row {error['row']} ({error['registration_number'] or '-'}): "
+                        f"{'; '.join(error['errors'])}"
+                    )
+                if len(report.errors) > 20:
+                    self.stdout.write(f'  ... and {len(report.errors) - 20} more (use --errors-out)')
@@ -6,10 +6,13 @@ from apps.users.models import User
 from apps.academics.models import School, AcademicDepartment, Course
 
 
+# SCHOOL/DEPT/NNNN/YYYY, compiled once for the validator, parsing and imports
+REGISTRATION_NUMBER_RE = re.compile(r'^([A-Z]{2,10})/([A-Z]{2,10})/(\d{4})/(\d{4})$')
+
+
 def validate_registration_number(value):
     """Validate registration number format: SCHOOL/DEPT/NNNN/YYYY"""
-    pattern = r'^[A-Z]{2,10}/[A-Z]{2,10}/\d{4}/\d{4}$'
-    if not re.match(pattern, value):
+    if not REGISTRATION_NUMBER_RE.match(value):
         raise ValidationError(
             f"Registration number must follow format SCHOOL/DEPT/NNNN/YYYY (e.g., SCE/CS/0001/2024)"
         )
@@ -102,8 +105,7 @@ class Student(models.Model):
     
     def parse_registration_number(self):
         """Parse registration number and return components"""
-        pattern = r'^([A-Z]{2,10})/([A-Z]{2,10})/(\d{4})/(\d{4})$'
-        match = re.match(pattern, self.registration_number)
+        match = REGISTRATION_NUMBER_RE.match(self.registration_number)
         if match:
             return {
                 'school_code': match.group(1),
@@ -3,10 +3,13 @@ Views for Student management
 """
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
+from apps.audit_logs.models import AuditLog
+from apps.students.importer import RosterError, StudentImporter, read_roster
 from apps.students.models import Student
 from apps.students.serializers import StudentSerializer, StudentCreateSerializer
 from apps.users.permissions import IsAdmin, IsStudentOwnerOrAdmin
@@ -63,7 +66,7 @@ class StudentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         """
         Set different permissions based on action
         """
-        if self.action in ['create', 'destroy']:
+        if self.action in ['create', 'destroy', 'import_roster']:
             # Only admins can create or delete students
             return [IsAuthenticated(), IsAdmin()]
         elif self.action in ['update', 'partial_update']:
@@ -164,3 +167,54 @@ class StudentViewSet(AuditViewSetMixin, viewsets.ModelViewSet):
         
         serializer = self.get_serializer(eligible_students, many=True)
         return Response(serializer.data)
+    
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_roster(self, request):
+        """
+        Create students in bulk from an uploaded CSV/XLSX roster
+        POST /api/students/import/
+        
+        Form fields: file (required), dry_run, default_password, sheet.
+        Rows that fail validation are listed under "errors" with their line
+        number; valid rows are created. See apps/students/importer.py for
+        the columns.
+        """
+        roster = request.FILES.get('file')
+        if roster is None:
+            return Response(
+                {'error': 'Upload the roster as "file"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dry_run = str(request.data.get('dry_run', '')).lower() in ['1', 'true', 'yes']
+        importer = StudentImporter(
+            default_password=request.data.get('default_password') or None,
+            dry_run=dry_run,
+        )
+        try:
+            report = importer.run(
+                read_roster(roster, roster.name, sheet=request.data.get('sheet') or None)
+            )
+        except RosterError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if report.created:
+            AuditLog.log_action(
+                actor=request.user,
+                action='create',
+                entity='Student',
+                entity_id='-',
+                description=f'Imported {report.created} student(s) from {roster.name}',
+                changes={'rows': report.rows, 'created': report.created, 'failed': len(report.errors)},
+                ip_address=request.META.get('REMOTE_ADDR'),
+            )
+        
+        return Response(
+            report.as_dict(),
+            status=status.HTTP_201_CREATED if report.created else status.HTTP_200_OK
+        )
@@ -0,0 +1,25 @@
+"""Department approval queue, bulk approvals and statistics"""
+
+BULK_SIZE = 5
+
+
+def bench_approval_pending(bench, api, dataset):
+    client = api(dataset.staff)
+    bench('approval_pending', lambda i: client.get('/api/approvals/pending/'))
+
+
+def bench_approval_bulk_approve(bench, api, dataset):
+    client = api(dataset.staff)
+
+    def approve(i):
+        # Fresh pending approvals every round; the test transaction is rolled back afterwards
+        ids = dataset.pending_approval_ids[i * BULK_SIZE:(i + 1) * BULK_SIZE]
+        assert len(ids) == BULK_SIZE, 'Not enough pending approvals in the dataset; raise bench_students'
+        return client.post('/api/approvals/bulk_approve/', {'approval_ids': ids, 'action': 'approve'}, format='json')
+
+    bench('approval_bulk_approve', approve)
+
+
+def bench_approval_statistics(bench, api, dataset):
+    client = api(dataset.staff)
+    bench('approval_statistics', lambda i: client.get('/api/approvals/statistics/'))
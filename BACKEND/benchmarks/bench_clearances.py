@@ -0,0 +1,19 @@
+"""Clearance request list, detail and approval progress"""
+
+
+def bench_clearance_list(bench, api, dataset):
+    client = api(dataset.admin)
+    bench('clearance_list', lambda i: client.get('/api/clearances/'))
+
+
+def bench_clearance_detail(bench, api, dataset):
+    client = api(dataset.student)
+    bench('clearance_detail', lambda i: client.get(f'/api/clearances/{dataset.clearance_id}/'))
+
+
+def bench_clearance_progress(bench, api, dataset):
+    client = api(dataset.student)
+    bench(
+        'clearance_progress',
+        lambda i: client.get(f'/api/clearances/{dataset.clearance_id}/approval_progress/'),
+    )
@@ -0,0 +1,29 @@
+"""Notification badge and M-PESA callbacks"""
+from rest_framework.test import APIClient
+
+
+def bench_notification_unread_count(bench, api, dataset):
+    client = api(dataset.student)
+    bench('notification_unread_count', lambda i: client.get('/api/notifications/unread_count/'))
+
+
+def bench_mpesa_callback(bench, dataset):
+    client = APIClient()
+
+    def callback(i):
+        checkout_request_id = dataset.unpaid_checkout_ids[i]
+        body = {
+            'MerchantRequestID': '29115-34620561-1',
+            'CheckoutRequestID': checkout_request_id,
+            'ResultCode': 0,
+            'ResultDesc': 'The service request is processed successfully.',
+            'CallbackMetadata': {'Item': [
+                {'Name': 'Amount', 'Value': 10000},
+                {'Name': 'MpesaReceiptNumber', 'Value': f'BEN{i:07d}'},
+                {'Name': 'TransactionDate', 'Value': 20251001120000},
+                {'Name': 'PhoneNumber', 'Value': 254712345678},
+            ]},
+        }
+        return client.post('/api/finance/mpesa_callback/', {'Body': {'stkCallback': body}}, format='json')
+
+    bench('mpesa_callback', callback)
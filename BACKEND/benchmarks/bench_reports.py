@@ -0,0 +1,13 @@
+"""Analytics reports and the audit log list"""
+import pytest
+
+
+@pytest.mark.parametrize('report', ['clearance-completion', 'department-bottlenecks', 'financial-summary', 'dashboard'])
+def bench_analytics(bench, api, dataset, report):
+    client = api(dataset.admin)
+    bench(f"analytics_{report.replace('-', '_')}", lambda i: client.get(f'/api/analytics/{report}/'))
+
+
+def bench_audit_log_list(bench, api, dataset):
+    client = api(dataset.admin)
+    bench('audit_log_list', lambda i: client.get('/api/audit-logs/'))
@@ -0,0 +1,231 @@
+"""
+Endpoint benchmarks: query count, latency and peak memory against a baseline
+
+The suite runs in-process with the Django test client against a synthetic
+dataset generated once per session in the test database (sizes and seed in
+pytest.ini). Each bench_* function measures one hot endpoint (harness.py) and
+fails when its query count exceeds baseline.json beyond the pytest.ini
+tolerance. Latency and peak memory beyond their tolerances are reported as
+warnings, and only fail the benchmark under --strict-latency.
+
+Usage (from BACKEND/):
+    DB_ENGINE=sqlite pytest benchmarks                    # compare with the baseline
+    DB_ENGINE=sqlite pytest benchmarks --update-baseline  # record new baseline numbers
+    DB_ENGINE=sqlite pytest benchmarks -k approvals       # a subset
+    DB_ENGINE=sqlite pytest benchmarks --strict-latency   # latency/memory fail too
+
+Latency baselines only mean something on the machine that recorded them;
+re-record them (--update-baseline) when moving the suite to new CI hardware.
+CI (.github/workflows/benchmarks.yml) gates query counts on every run and
+runs --strict-latency on the self-hosted runner that records the baseline.
+"""
+import warnings
+from datetime import datetime, time
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.test import APIClient
+
+from harness import Tolerances, load_baseline, measure, regressions, write_baseline
+
+
+RESULTS = pytest.StashKey[dict]()
+
+INI_OPTIONS = [
+    ('bench_students', 'Students in the synthetic dataset', '2000'),
+    ('bench_audit_logs', 'Audit log rows in the synthetic dataset', '20000'),
+    ('bench_seed', 'Random seed of the synthetic dataset', '42'),
+    ('bench_end_date', 'End date of the synthetic history (YYYY-MM-DD)', '2025-10-01'),
+    ('bench_rounds', 'Timed requests per benchmark', '15'),
+    ('bench_query_tolerance', 'Extra queries allowed over the baseline', '0'),
+    ('bench_latency_tolerance', 'Allowed latency increase as a fraction of the baseline', '1.0'),
+    ('bench_latency_floor_ms', 'Latency increases below this many ms are never reported', '10'),
+    ('bench_memory_tolerance', 'Allowed peak memory increase as a fraction of the baseline', '0.5'),
+    ('bench_memory_floor_kb', 'Peak memory increases below this many KB are never reported', '256'),
+]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--update-baseline',
+        action='store_true',
+        help='Write the measured numbers to baseline.json instead of comparing with it',
+    )
+    parser.addoption(
+        '--strict-latency',
+        action='store_true',
+        help='Fail on latency and peak memory regressions instead of only reporting them',
+    )
+    for name, help_text, default in INI_OPTIONS:
+        parser.addini(name, help_text, default=default)
+
+
+def pytest_configure(config):
+    config.stash[RESULTS] = {}
+
+
+def _dataset_options(config):
+    return {
+        'students': int(config.getini('bench_students')),
+        'audit_logs': int(config.getini('bench_audit_logs')),
+        'seed': int(config.getini('bench_seed')),
+        'end_date': config.getini('bench_end_date'),
+    }
+
+
+@pytest.fixture(scope='session', autouse=True)
+def quiet_profiler():
+    """Keep the sampling profiler out of the measurements"""
+    from apps.monitoring import profiler
+
+    with mock.patch.object(profiler, 'SAMPLE_RATE', 0.0), mock.patch.object(profiler, 'BUDGET_ACTION', 'log'):
+        yield
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker, pytestconfig):
+    """Generate the synthetic dataset once in the test database"""
+    from apps.analytics.synthetic import SyntheticDataset
+
+    options = _dataset_options(pytestconfig)
+    end = timezone.make_aware(datetime.combine(parse_date(options['end_date']), time.min))
+    with django_db_blocker.unblock():
+        call_command('seed_departments', stdout=StringIO())
+        SyntheticDataset(
+            students=options['students'],
+            audit_logs=options['audit_logs'],
+            seed=options['seed'],
+            end=end,
+            batch_size=2000,
+        ).generate()
+
+
+class Dataset:
+    """Rows of the synthetic dataset the benchmarks act on"""
+
+    def __init__(self):
+        from apps.approvals.models import ClearanceApproval
+        from apps.clearances.models import ClearanceRequest
+        from apps.finance.models import Payment
+        from apps.users.models import User
+
+        self.admin = User.objects.filter(role='admin', email__startswith='admin').order_by('email').first()
+
+        clearance = (
+            ClearanceRequest.objects.filter(status='in_progress')
+            .select_related('student__user').order_by('-created_at', 'pk').first()
+        )
+        self.clearance_id = str(clearance.pk)
+        self.student = clearance.student.user
+
+        # The department with the longest queue and one of its staff
+        pending = ClearanceApproval.objects.filter(
+            status='pending', clearance_request__status='in_progress'
+        )
+        busiest = (
+            pending.order_by().values('department_id').annotate(total=Count('pk'))
+            .order_by('-total', 'department_id').first()['department_id']
+        )
+        self.staff = User.objects.filter(role='department_staff', department_id=busiest).order_by('email').first()
+        self.pending_approval_ids = [
+            str(pk) for pk in pending.filter(department_id=busiest).order_by('pk').values_list('pk', flat=True)
+        ]
+        self.unpaid_checkout_ids = list(
+            Payment.objects.filter(payment_method='mpesa', is_verified=False)
+            .order_by('pk').values_list('checkout_request_id', flat=True)
+        )
+
+
+@pytest.fixture(scope='session')
+def dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return Dataset()
+
+
+@pytest.fixture
+def api():
+    """APIClient authenticated as the given user"""
+    def client_for(user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+    return client_for
+
+
+@pytest.fixture
+def bench(db, pytestconfig):
+    """bench(name, request, expected_status=200): measure and compare with the baseline"""
+    update = pytestconfig.getoption('update_baseline')
+    strict = pytestconfig.getoption('strict_latency')
+    rounds = int(pytestconfig.getini('bench_rounds'))
+    tolerances = Tolerances(
+        queries=int(pytestconfig.getini('bench_query_tolerance')),
+        latency=float(pytestconfig.getini('bench_latency_tolerance')),
+        latency_floor_ms=float(pytestconfig.getini('bench_latency_floor_ms')),
+        memory=float(pytestconfig.getini('bench_memory_tolerance')),
+        memory_floor_kb=float(pytestconfig.getini('bench_memory_floor_kb')),
+    )
+    baseline = load_baseline()
+    comparable = baseline.get('dataset') == _dataset_options(pytestconfig)
+
+    def run(name, request, expected_status=200):
+        measurement = measure(request, rounds, expected_status)
+        pytestconfig.stash[RESULTS][name] = measurement
+        if update:
+            return measurement
+        if not comparable:
+            warnings.warn('baseline.json was recorded with a different dataset; not comparing')
+            return measurement
+        recorded = baseline.get(connection.vendor, {}).get(name)
+        if recorded is None:
+            warnings.warn(f'No {connection.vendor} baseline for {name}; run with --update-baseline')
+            return measurement
+        queries, resources = regressions(measurement, recorded, tolerances)
+        if queries or (strict and resources):
+            pytest.fail(f'{name} regressed: ' + '; '.join(queries + resources), pytrace=False)
+        if resources:
+            warnings.warn(f'{name} slower than baseline: ' + '; '.join(resources))
+        return measurement
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash[RESULTS]
+    if not results:
+        return
+    recorded = load_baseline().get(connection.vendor, {})
+    terminalreporter.section(f'benchmarks ({connection.vendor})')
+    terminalreporter.write_line(
+        f"{'benchmark':<32}{'queries':>9}{'median ms':>11}{'p95 ms':>9}{'peak KB':>10}  baseline q/median/p95/KB"
+    )
+    for name, m in sorted(results.items()):
+        base = recorded.get(name)
+        compared = (
+            f"{base['queries']}/{base['median_ms']}/{base['p95_ms']}/{base['peak_kb']}" if base else '-'
+        )
+        terminalreporter.write_line(
+            f'{name:<32}{m.queries:>9}{m.median_ms:>11}{m.p95_ms:>9}{m.peak_kb:>10}  {compared}'
+        )
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    results = config.stash[RESULTS]
+    if not config.getoption('update_baseline') or not results:
+        return
+    baseline = load_baseline()
+    if baseline.get('dataset') != _dataset_options(config):
+        # Numbers for another dataset are not comparable with these
+        baseline = {}
+    baseline['dataset'] = _dataset_options(config)
+    vendor = baseline.setdefault(connection.vendor, {})
+    for name, measurement in results.items():
+        vendor[name] = measurement.as_dict()
+    write_baseline(baseline)
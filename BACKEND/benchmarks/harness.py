@@ -0,0 +1,140 @@
+"""
+Measuring one endpoint and comparing it with the committed baseline
+
+measure() makes one warm-up request, then:
+
+- one request under a connection.execute_wrapper() for the query count
+- `rounds` timed requests for the median and p95 latency
+- one request under tracemalloc for the peak Python memory
+
+Each request gets its own round index, so benchmarks that change data (bulk
+approvals, M-PESA callbacks) can use fresh rows every time.
+
+baseline.json holds one entry per database vendor, because query plans and
+timings differ between SQLite, MySQL and PostgreSQL:
+
+    {"dataset": {...}, "sqlite": {"clearance_list": {"queries": 5, "median_ms": 12.3, ...}}}
+"""
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from django.db import connection
+
+from apps.monitoring.profiler import RequestProfile
+
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+
+@dataclass
+class Measurement:
+    queries: int
+    median_ms: float
+    p95_ms: float
+    peak_kb: float
+
+    def as_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class Tolerances:
+    queries: int = 0
+    latency: float = 1.0
+    latency_floor_ms: float = 10
+    memory: float = 0.5
+    memory_floor_kb: float = 256
+
+
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[max(0, round(0.95 * len(ordered)) - 1)]
+
+
+def measure(request, rounds, expected_status=200):
+    """
+    Measure a request function
+
+    Args:
+        request: Callable(round_index) returning a response
+        rounds: Number of timed requests
+        expected_status: Status code every response must have
+
+    Returns:
+        Measurement
+    """
+    index = iter(range(rounds + 3))
+
+    def call():
+        response = request(next(index))
+        assert response.status_code == expected_status, (
+            f'Expected {expected_status}, got {response.status_code}: {getattr(response, "data", response.content)}'
+        )
+        return response
+
+    call()
+
+    # Counted with an execute_wrapper: connection.queries stops growing once DEBUG logging is full
+    profile = RequestProfile()
+    with connection.execute_wrapper(profile):
+        call()
+
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        queries=profile.queries,
+        median_ms=round(statistics.median(durations), 2),
+        p95_ms=round(_p95(durations), 2),
+        peak_kb=round(peak / 1024, 1),
+    )
+
+
+def regressions(current, baseline, tolerances):
+    """
+    Metrics of `current` that regressed beyond tolerance
+
+    Returns:
+        tuple: (query regressions, latency and memory regressions) as lists of
+               descriptions. Query counts are deterministic; timings and peak
+               memory depend on the machine and its load.
+    """
+    queries = []
+    if current.queries > baseline['queries'] + tolerances.queries:
+        queries.append(f"queries {current.queries} > baseline {baseline['queries']}")
+    resources = []
+    for metric in ('median_ms', 'p95_ms'):
+        value, base = getattr(current, metric), baseline[metric]
+        if value > base * (1 + tolerances.latency) and value - base > tolerances.latency_floor_ms:
+            resources.append(f'{metric} {value} > baseline {base} (+{tolerances.latency:.0%})')
+    value, base = current.peak_kb, baseline['peak_kb']
+    if value > base * (1 + tolerances.memory) and value - base > tolerances.memory_floor_kb:
+        resources.append(f'peak_kb {value} > baseline {base} (+{tolerances.memory:.0%})')
+    return queries, resources
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_baseline(baseline, path=BASELINE_PATH):
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -1 +1,9 @@
 # Django Configuration Package
+
+# Load the Celery app when Celery is installed so shared_task binds to it
+try:
+    from .celery import app as celery_app
+except ImportError:  # pragma: no cover - Celery is optional for DB-only installs
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -0,0 +1,37 @@
+"""
+Cache backend helpers
+
+The department registry version, unread notification counters and request
+profiles are shared between workers through the default cache. That only
+works with a backend every worker talks to (Redis, via REDIS_URL); a
+local-memory cache gives each process its own copy.
+"""
+from django.conf import settings
+from django.core import checks
+
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """Whether every worker process sees the same cache entries"""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when a production configuration falls back to a per-process cache"""
+    if settings.DEBUG or cache_is_shared():
+        return []
+    return [
+        checks.Warning(
+            'The default cache is process-local. Department changes, unread counters, '
+            'request profiles and used stream tickets will not be shared between workers.',
+            hint='Set REDIS_URL so CACHES uses Redis.',
+            obj='CACHES',
+            id='config.W001',
+        )
+    ]
@@ -0,0 +1,15 @@
+"""
+Celery application for the clearance system
+
+Start a worker with:  celery -A config worker -l info
+and the scheduler with: celery -A config beat -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
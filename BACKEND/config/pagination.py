@@ -0,0 +1,172 @@
+"""
+Pagination classes
+
+KeysetPagination pages on (created_at, id) in descending order. Each page is a
+"WHERE (created_at, id) < (last seen) ORDER BY created_at DESC, id DESC LIMIT n"
+range scan on a composite index, so deep pages cost the same as the first one
+and no COUNT(*) is run.
+
+KeysetOrPageNumberPagination keeps the default page-number behaviour and
+switches to keyset pagination when the client opts in with ?pagination=keyset
+(or follows a next/previous link that carries a ?cursor=).
+"""
+import base64
+import json
+from collections import OrderedDict
+from uuid import UUID
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on (created_at, id), newest first
+
+    The ordering is fixed so that it matches the composite indexes; any
+    ?ordering= parameter is ignored while paginating this way.
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    timestamp_field = 'created_at'
+    tiebreak_field = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        ts, pk = self.timestamp_field, self.tiebreak_field
+        reverse = cursor is not None and cursor['direction'] == 'previous'
+        if reverse:
+            queryset = queryset.filter(
+                Q(**{f'{ts}__gt': cursor['created_at']})
+                | Q(**{ts: cursor['created_at'], f'{pk}__gt': cursor['id']})
+            ).order_by(ts, pk)
+        else:
+            if cursor is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{ts}__lt': cursor['created_at']})
+                    | Q(**{ts: cursor['created_at'], f'{pk}__lt': cursor['id']})
+                )
+            queryset = queryset.order_by(f'-{ts}', f'-{pk}')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            created_at = parse_datetime(data['t'])
+            direction = data.get('d', 'next')
+            if created_at is None or direction not in ('next', 'previous'):
+                raise ValueError
+            return {'created_at': created_at, 'id': self._parse_id(data['i']), 'direction': direction}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _parse_id(self, value):
+        if isinstance(value, int):
+            return value
+        return UUID(value)
+
+    def encode_cursor(self, row, direction):
+        data = {
+            't': getattr(row, self.timestamp_field).isoformat(),
+            'i': self._serialize_id(getattr(row, self.tiebreak_field)),
+            'd': direction,
+        }
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def _serialize_id(self, value):
+        return value if isinstance(value, int) else str(value)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], 'next')
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], 'previous')
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetOrPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; keyset pagination on request
+
+    GET /api/.../?pagination=keyset[&page_size=50] returns the first keyset
+    page; its next/previous links carry a ?cursor= for the following pages.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'keyset'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -2,6 +2,7 @@
 Django settings for Machakos Clearance System
 """
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -24,6 +25,9 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-change-me-in-production')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
+# Running under manage.py test
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 # Application definition
@@ -54,9 +58,11 @@ INSTALLED_APPS = [
     'apps.academics',
     'apps.gown_issuance',
     'apps.analytics',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -143,6 +149,33 @@ AUDIT_LOG_SENSITIVE_KEYS = [
     'password', 'token', 'authorization', 'secret', 'pass', 'pwd'
 ]
 AUDIT_LOG_MAX_BODY_LEN = 2048
+
+# Buffered audit writer (apps/audit_logs/buffer.py); synchronous writes in DEBUG
+AUDIT_LOG_BUFFERED = os.getenv('AUDIT_LOG_BUFFERED', 'False' if DEBUG else 'True') == 'True'
+AUDIT_LOG_BUFFER_MAX_SIZE = int(os.getenv('AUDIT_LOG_BUFFER_MAX_SIZE', '10000'))
+AUDIT_LOG_BUFFER_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BUFFER_BATCH_SIZE', '200'))
+AUDIT_LOG_BUFFER_FLUSH_INTERVAL = float(os.getenv('AUDIT_LOG_BUFFER_FLUSH_INTERVAL', '1.0'))
+AUDIT_LOG_BUFFER_BLOCK_TIMEOUT = float(os.getenv('AUDIT_LOG_BUFFER_BLOCK_TIMEOUT', '0.5'))
+AUDIT_LOG_BUFFER_OVERFLOW = os.getenv('AUDIT_LOG_BUFFER_OVERFLOW', 'drop_reads')
+
+# Audit route policy (apps/audit_logs/policy.py): first matching rule wins.
+# Mutations and AUDIT_LOG_ALWAYS_FULL paths are always captured in full.
+AUDIT_LOG_DEFAULT_MODE = 'full'
+AUDIT_LOG_ALWAYS_FULL = [r'^/api/approvals/']
+AUDIT_LOG_POLICY = [
+    {'pattern': r'^/api/notifications/stream/$', 'methods': ['GET'], 'mode': 'skip'},
+    {'pattern': r'^/api/notifications/unread_count/$', 'methods': ['GET'], 'mode': 'sample', 'rate': 0.01},
+    {'pattern': r'^/api/notifications/', 'methods': ['GET'], 'mode': 'metadata'},
+    {'pattern': r'^/api/analytics/', 'methods': ['GET'], 'mode': 'metadata'},
+    {'pattern': r'^/api/audit-logs/', 'methods': ['GET'], 'mode': 'metadata'},
+    {'pattern': r'^/api/monitoring/', 'methods': ['GET'], 'mode': 'metadata'},
+    {'pattern': r'^/api/', 'methods': ['HEAD', 'OPTIONS'], 'mode': 'skip'},
+]
+
+# Audit log retention (manage.py archive_audit_logs)
+AUDIT_LOG_RETENTION_DAYS = int(os.getenv('AUDIT_LOG_RETENTION_DAYS', '365'))
+AUDIT_LOG_ARCHIVE_DIR = os.getenv('AUDIT_LOG_ARCHIVE_DIR', str(BASE_DIR / 'archives' / 'audit_logs'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model
@@ -233,15 +266,100 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Nairobi'
+CELERY_BEAT_SCHEDULE = {
+    'drain-notification-outbox': {
+        'task': 'apps.notifications.tasks.drain_notification_outbox',
+        'schedule': float(os.getenv('NOTIFICATION_OUTBOX_POLL_SECONDS', '30')),
+    },
+    'process-mpesa-callbacks': {
+        'task': 'apps.finance.tasks.process_mpesa_callbacks',
+        'schedule': float(os.getenv('MPESA_CALLBACK_POLL_SECONDS', '10')),
+    },
+}
 
-# Caching - Use in-memory cache for development (switch to Redis in production)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+# Notification email outbox (drained by Celery or `manage.py process_notification_outbox`)
+NOTIFICATION_OUTBOX_USE_CELERY = os.getenv('NOTIFICATION_OUTBOX_USE_CELERY', 'False') == 'True'
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv('NOTIFICATION_OUTBOX_BATCH_SIZE', '50'))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_OUTBOX_MAX_ATTEMPTS', '6'))
+NOTIFICATION_OUTBOX_BACKOFF_SECONDS = int(os.getenv('NOTIFICATION_OUTBOX_BACKOFF_SECONDS', '30'))
+NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS = int(os.getenv('NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+NOTIFICATION_OUTBOX_CLAIM_TIMEOUT_SECONDS = int(os.getenv('NOTIFICATION_OUTBOX_CLAIM_TIMEOUT_SECONDS', '300'))
+
+# Cached per-user unread notification counters (seconds before a rebuild from the DB).
+# The long timeout needs a shared cache; with a per-process cache the local one applies.
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = int(os.getenv('NOTIFICATION_UNREAD_CACHE_TIMEOUT', '300'))
+NOTIFICATION_UNREAD_LOCAL_CACHE_TIMEOUT = int(os.getenv('NOTIFICATION_UNREAD_LOCAL_CACHE_TIMEOUT', '5'))
+
+# Rows per INSERT when fanning notifications out to many recipients
+NOTIFICATION_BULK_BATCH_SIZE = int(os.getenv('NOTIFICATION_BULK_BATCH_SIZE', '500'))
+
+# Students per transaction when opening a cohort's clearance requests
+CLEARANCE_OPEN_BATCH_SIZE = int(os.getenv('CLEARANCE_OPEN_BATCH_SIZE', '500'))
+
+# Department approval work queue (POST /api/approvals/claim/, renew/, release/)
+APPROVAL_LEASE_SECONDS = int(os.getenv('APPROVAL_LEASE_SECONDS', '600'))
+APPROVAL_CLAIM_MAX = int(os.getenv('APPROVAL_CLAIM_MAX', '50'))
+
+# Seconds between checks of the shared department registry version (see apps/departments/registry.py)
+DEPARTMENT_REGISTRY_CHECK_SECONDS = float(os.getenv('DEPARTMENT_REGISTRY_CHECK_SECONDS', '2'))
+# Snapshots are reloaded after this long even if no version change reached the worker
+DEPARTMENT_REGISTRY_MAX_AGE_SECONDS = float(os.getenv('DEPARTMENT_REGISTRY_MAX_AGE_SECONDS', '60'))
+
+# Bulk student imports (manage.py import_students / POST /api/students/import/)
+STUDENT_IMPORT_CHUNK_SIZE = int(os.getenv('STUDENT_IMPORT_CHUNK_SIZE', '500'))
+STUDENT_IMPORT_HASH_WORKERS = int(os.getenv('STUDENT_IMPORT_HASH_WORKERS', '4'))
+
+# Live event stream (GET /api/notifications/stream/). Each open stream holds a
+# worker thread, so serve it from its own gunicorn process with threaded
+# workers (-k gthread) and size MAX_CONNECTIONS to that process's --threads.
+# One shared poller per process picks up changes made by other processes every
+# POLL_SECONDS; with it off, every stream polls on its own.
+NOTIFICATION_STREAM_POLL_SECONDS = float(os.getenv('NOTIFICATION_STREAM_POLL_SECONDS', '5'))
+NOTIFICATION_STREAM_SHARED_POLLER = os.getenv('NOTIFICATION_STREAM_SHARED_POLLER', 'False' if TESTING else 'True') == 'True'
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = float(os.getenv('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', '15'))
+NOTIFICATION_STREAM_MAX_SECONDS = float(os.getenv('NOTIFICATION_STREAM_MAX_SECONDS', '300'))
+NOTIFICATION_STREAM_RETRY_MS = int(os.getenv('NOTIFICATION_STREAM_RETRY_MS', '3000'))
+# Open streams per process; keep below the worker's thread count (503 beyond it)
+NOTIFICATION_STREAM_MAX_CONNECTIONS = int(os.getenv('NOTIFICATION_STREAM_MAX_CONNECTIONS', '6'))
+NOTIFICATION_STREAM_RETRY_AFTER_SECONDS = int(os.getenv('NOTIFICATION_STREAM_RETRY_AFTER_SECONDS', '30'))
+# Lifetime of the single-use tickets from POST /api/notifications/stream_ticket/
+NOTIFICATION_STREAM_TICKET_SECONDS = int(os.getenv('NOTIFICATION_STREAM_TICKET_SECONDS', '60'))
+
+# Request profiling (apps/monitoring): a PROFILING_SAMPLE_RATE fraction of
+# requests is measured; GET /api/monitoring/profiles/ reports rolling
+# percentiles per route. Budgets are checked on profiled requests and raise
+# under manage.py test, where every request is profiled.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.05'))
+PROFILING_WINDOW_SIZE = int(os.getenv('PROFILING_WINDOW_SIZE', '200'))
+PROFILING_WINDOW_SECONDS = int(os.getenv('PROFILING_WINDOW_SECONDS', '900'))
+PROFILING_PUBLISH_SECONDS = int(os.getenv('PROFILING_PUBLISH_SECONDS', '30'))
+PROFILING_BUDGET_ACTION = os.getenv('PROFILING_BUDGET_ACTION', 'raise' if TESTING else 'log')
+PROFILING_BUDGETS = {
+    'GET clearances:clearance-list': {'queries': 10},
+    'GET clearances:clearance-detail': {'queries': 10},
+    'GET students:student-list': {'queries': 30},
+    'GET finance:payment-list': {'queries': 30},
+    'GET approvals:approval-list': {'queries': 30},
+    '*': {'queries': 50},
 }
 
+# Caching - Redis when REDIS_URL is set; the in-memory fallback is per process
+# and only suits a single development server (see config/cache.py)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+
 # File Upload
 MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', '5242880'))
 DATA_UPLOAD_MAX_MEMORY_SIZE = MAX_UPLOAD_SIZE
@@ -309,12 +427,29 @@ MPESA_SHORTCODE = os.getenv('MPESA_SHORTCODE', '174379')  # Paybill or Till numb
 MPESA_PASSKEY = os.getenv('MPESA_PASSKEY', '')  # Lipa Na M-PESA Online Passkey
 MPESA_CALLBACK_URL = os.getenv('MPESA_CALLBACK_URL', 'https://yourdomain.com/api/finance/mpesa_callback/')
 
-# M-PESA API URLs
-if MPESA_ENVIRONMENT == 'sandbox':
+# M-PESA API URLs (MPESA_API_URL overrides, e.g. to point at apps.finance.fake_daraja)
+if os.getenv('MPESA_API_URL'):
+    MPESA_API_URL = os.getenv('MPESA_API_URL')
+elif MPESA_ENVIRONMENT == 'sandbox':
     MPESA_API_URL = 'https://sandbox.safaricom.co.ke'
 else:
     MPESA_API_URL = 'https://api.safaricom.co.ke'
 
+# M-PESA client: HTTP timeouts (seconds), connection pool size, and how long
+# before expiry a cached access token is renewed
+MPESA_CONNECT_TIMEOUT = float(os.getenv('MPESA_CONNECT_TIMEOUT', '3.05'))
+MPESA_READ_TIMEOUT = float(os.getenv('MPESA_READ_TIMEOUT', '15'))
+MPESA_POOL_SIZE = int(os.getenv('MPESA_POOL_SIZE', '10'))
+MPESA_TOKEN_EXPIRY_MARGIN = int(os.getenv('MPESA_TOKEN_EXPIRY_MARGIN', '60'))
+
+# M-PESA callback inbox (drained by Celery or `manage.py process_mpesa_callbacks`)
+MPESA_CALLBACK_USE_CELERY = os.getenv('MPESA_CALLBACK_USE_CELERY', 'False') == 'True'
+MPESA_CALLBACK_BATCH_SIZE = int(os.getenv('MPESA_CALLBACK_BATCH_SIZE', '50'))
+MPESA_CALLBACK_MAX_ATTEMPTS = int(os.getenv('MPESA_CALLBACK_MAX_ATTEMPTS', '8'))
+MPESA_CALLBACK_BACKOFF_SECONDS = int(os.getenv('MPESA_CALLBACK_BACKOFF_SECONDS', '15'))
+MPESA_CALLBACK_MAX_BACKOFF_SECONDS = int(os.getenv('MPESA_CALLBACK_MAX_BACKOFF_SECONDS', '1800'))
+MPESA_CALLBACK_CLAIM_TIMEOUT_SECONDS = int(os.getenv('MPESA_CALLBACK_CLAIM_TIMEOUT_SECONDS', '300'))
+
 # Security Settings (for production)
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
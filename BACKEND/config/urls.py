@@ -36,6 +36,7 @@ urlpatterns = [
     path('api/gown-issuances/', include('apps.gown_issuance.urls')),
     path('api/analytics/', include('apps.analytics.urls')),
     path('api/academics/', include('apps.academics.urls')),
+    path('api/monitoring/', include('apps.monitoring.urls')),
 ]
 
 # Serve media files in development
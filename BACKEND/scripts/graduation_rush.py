@@ -0,0 +1,568 @@
+#!/usr/bin/env python
+"""
+Graduation-rush load test: replay the week-before-graduation workload against a running server
+
+Virtual users arrive as a Poisson process (--rate sessions per second) for
+--duration seconds. Each session is one of (--mix, relative weights):
+
+    student  log in, list own clearances, open one if there is none, check progress
+             and the notification badge, pay through STK push, read notifications
+    staff    log in, claim approvals from the department work queue (or, with
+             --staff-mode pending, pick from the shared pending list), bulk-approve
+             them, read the department statistics
+    admin    log in, open the analytics dashboard and bottleneck report
+
+Safaricom's side of a payment is simulated: a few seconds after each accepted
+STK push (the customer entering their PIN) the script posts the M-PESA
+callback to /api/finance/mpesa_callback/.
+
+Accounts come from the server's database (run generate_synthetic_data first);
+all of them must share --password. Afterwards the script reports throughput,
+latency percentiles and error rates per endpoint, and database lock waits
+sampled from the server's database. If the server profiles requests, its
+busiest routes from /api/monitoring/profiles/ are reported as well.
+
+Usage:
+    python manage.py generate_synthetic_data --students 50000 --years 4
+    python -m apps.finance.fake_daraja --port 8089 &
+    MPESA_API_URL=http://127.0.0.1:8089 MPESA_CONSUMER_KEY=load MPESA_CONSUMER_SECRET=test \\
+        EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend PROFILING_SAMPLE_RATE=0.2 \\
+        gunicorn config.wsgi -w 4 -k gthread --threads 8
+    python scripts/graduation_rush.py --base-url http://127.0.0.1:8000 --rate 15 --duration 300 \\
+        --mix student=85,staff=13,admin=2 --json rush.json
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+import requests
+
+# Setup Django (accounts and lock statistics are read from the server's database)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from apps.students.models import Student  # noqa: E402
+from apps.users.models import User  # noqa: E402
+
+
+SCENARIOS = ('student', 'staff', 'admin')
+
+# Path segments that identify one row; collapsed so results group per endpoint
+_ID_SEGMENT = re.compile(r'/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/')
+
+
+def parse_mix(value):
+    """'student=85,staff=13,admin=2' -> {'student': 85.0, ...}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario "{name}" (choose from {", ".join(SCENARIOS)})')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'Invalid weight for {name}: "{weight}"')
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('The user mix needs at least one positive weight')
+    return mix
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class Stats:
+    """Thread-safe per-endpoint latency, status and error counts"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.counters = Counter()
+
+    def record(self, endpoint, status, seconds):
+        with self.lock:
+            self.latencies[endpoint].append(seconds * 1000)
+            self.statuses[endpoint][status] += 1
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def report(self, elapsed):
+        rows = []
+        with self.lock:
+            for endpoint in sorted(self.latencies):
+                ordered = sorted(self.latencies[endpoint])
+                statuses = self.statuses[endpoint]
+                total = sum(statuses.values())
+                server_errors = sum(n for status, n in statuses.items() if status == 'error' or status >= 500)
+                client_errors = sum(n for status, n in statuses.items() if status != 'error' and 400 <= status < 500)
+                rows.append({
+                    'endpoint': endpoint,
+                    'requests': total,
+                    'rps': round(total / elapsed, 2),
+                    'p50_ms': round(percentile(ordered, 0.5), 1),
+                    'p95_ms': round(percentile(ordered, 0.95), 1),
+                    'p99_ms': round(percentile(ordered, 0.99), 1),
+                    'max_ms': round(ordered[-1], 1),
+                    'error_rate': round(server_errors / total, 4),
+                    'client_error_rate': round(client_errors / total, 4),
+                    'statuses': {str(status): n for status, n in sorted(statuses.items(), key=str)},
+                })
+            counters = dict(self.counters)
+        return rows, counters
+
+
+class LockMonitor:
+    """
+    Database lock waits while the load runs
+
+    Samples the number of sessions waiting on a lock every `interval` seconds
+    and takes the backend's cumulative lock counters before and after.
+    SQLite has no lock statistics; its lock timeouts surface as 500s instead.
+    """
+
+    WAITING_SQL = {
+        'postgresql': "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'",
+        'mysql': "SELECT COUNT(*) FROM information_schema.innodb_trx WHERE trx_state = 'LOCK WAIT'",
+    }
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.vendor = connection.vendor
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._before = {}
+
+    def _counters(self):
+        with connection.cursor() as cursor:
+            if self.vendor == 'mysql':
+                cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%%'")
+                return {name: int(value) for name, value in cursor.fetchall()}
+            if self.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT deadlocks, blk_read_time FROM pg_stat_database WHERE datname = current_database()'
+                )
+                deadlocks, _ = cursor.fetchone()
+                return {'deadlocks': int(deadlocks)}
+        return {}
+
+    def _sample(self):
+        sql = self.WAITING_SQL[self.vendor]
+        try:
+            while not self._stop.wait(self.interval):
+                with connection.cursor() as cursor:
+                    cursor.execute(sql)
+                    self.samples.append(cursor.fetchone()[0])
+        finally:
+            connection.close()
+
+    def start(self):
+        self._before = self._counters()
+        if self.vendor in self.WAITING_SQL:
+            self._thread = threading.Thread(target=self._sample, name='lock-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        after = self._counters()
+        report = {'vendor': self.vendor}
+        if self.vendor == 'sqlite':
+            report['note'] = 'SQLite keeps no lock statistics; "database is locked" shows up as 500s'
+            return report
+        report['counters'] = {name: after[name] - self._before.get(name, 0) for name in after}
+        if self.vendor == 'mysql':
+            # Innodb_row_lock_time_max and _avg are not cumulative
+            for name in ('Innodb_row_lock_time_max', 'Innodb_row_lock_time_avg', 'Innodb_row_lock_current_waits'):
+                if name in after:
+                    report['counters'][name] = after[name]
+        if self.samples:
+            report['waiting_sessions'] = {
+                'max': max(self.samples),
+                'mean': round(sum(self.samples) / len(self.samples), 2),
+                'samples': len(self.samples),
+            }
+        return report
+
+
+class Accounts:
+    """Accounts the virtual users log in as, read from the database"""
+
+    def __init__(self, graduation_year, rng):
+        students = list(
+            Student.objects.filter(graduation_year=graduation_year, eligibility_status='eligible', user__is_active=True)
+            .order_by('pk').values_list('pk', 'user__email')
+        )
+        rng.shuffle(students)
+        self.students = queue.SimpleQueue()
+        for student in students:
+            self.students.put(student)
+        self.student_pool = students
+
+        self.staff = list(
+            User.objects.filter(role='department_staff', department__isnull=False, is_active=True)
+            .order_by('email').values_list('email', flat=True)
+        )
+        self.admins = list(
+            User.objects.filter(role='admin', is_active=True).order_by('email').values_list('email', flat=True)
+        )
+        self.rng = rng
+        self.lock = threading.Lock()
+
+    def student(self):
+        """A student who has not been used yet; reuses students once all have been"""
+        try:
+            return self.students.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                return self.rng.choice(self.student_pool)
+
+    def pick(self, pool):
+        with self.lock:
+            return self.rng.choice(pool)
+
+
+class Rush:
+    def __init__(self, args):
+        self.args = args
+        self.base_url = args.base_url.rstrip('/')
+        self.rng = random.Random(args.seed)
+        self.rng_lock = threading.Lock()
+        self.stats = Stats()
+        self.accounts = Accounts(args.graduation_year, self.rng)
+        self.callbacks = ThreadPoolExecutor(max_workers=8, thread_name_prefix='mpesa-callback')
+        self.pending_callbacks = []
+
+    # Helpers
+
+    def _think(self):
+        if self.args.think_time > 0:
+            with self.rng_lock:
+                pause = self.rng.expovariate(1 / self.args.think_time)
+            time.sleep(min(pause, self.args.think_time * 5))
+
+    def _request(self, session, method, path, endpoint=None, **kwargs):
+        endpoint = endpoint or f'{method} {_ID_SEGMENT.sub("/{id}/", path)}'
+        started = time.perf_counter()
+        try:
+            response = session.request(method, self.base_url + path, timeout=self.args.timeout, **kwargs)
+        except requests.RequestException:
+            self.stats.record(endpoint, 'error', time.perf_counter() - started)
+            return None
+        self.stats.record(endpoint, response.status_code, time.perf_counter() - started)
+        return response
+
+    def _login(self, email):
+        session = requests.Session()
+        response = self._request(
+            session, 'POST', '/api/auth/login/', json={'email': email, 'password': self.args.password}
+        )
+        if response is None or response.status_code != 200:
+            self.stats.count('failed_logins')
+            return None
+        session.headers['Authorization'] = f"Bearer {response.json()['tokens']['access']}"
+        return session
+
+    # Scenarios
+
+    def student(self):
+        student_id, email = self.accounts.student()
+        session = self._login(email)
+        if session is None:
+            return
+        self._think()
+
+        response = self._request(session, 'GET', '/api/clearances/my_clearances/')
+        clearances = response.json() if response is not None and response.status_code == 200 else []
+        open_requests = [c for c in clearances if c.get('status') != 'rejected']
+        if open_requests:
+            clearance_id = open_requests[0]['id']
+        else:
+            self._think()
+            response = self._request(session, 'POST', '/api/clearances/', json={'student_id': str(student_id)})
+            if response is None or response.status_code != 201:
+                return
+            clearance_id = response.json().get('id')
+            self.stats.count('clearances_opened')
+        self._think()
+
+        if clearance_id:
+            self._request(session, 'GET', f'/api/clearances/{clearance_id}/approval_progress/')
+        self._request(session, 'GET', '/api/notifications/unread_count/')
+        self._think()
+
+        with self.rng_lock:
+            phone_number = f'2547{self.rng.randrange(10 ** 8):08d}'
+        response = self._request(
+            session, 'POST', '/api/finance/payments/mpesa_stk_push/',
+            json={'phone_number': phone_number, 'amount': 10000},
+        )
+        if response is not None and response.status_code == 200:
+            self.stats.count('stk_pushes')
+            self._schedule_callback(response.json())
+        elif response is not None and response.status_code == 400:
+            self.stats.count('already_paid_or_rejected_stk_pushes')
+        self._think()
+
+        self._request(session, 'GET', '/api/notifications/')
+
+    def staff(self):
+        session = self._login(self.accounts.pick(self.accounts.staff))
+        if session is None:
+            return
+        self._think()
+
+        if self.args.staff_mode == 'claim':
+            # Work queue: each approver leases rows nobody else is working on
+            response = self._request(
+                session, 'POST', '/api/approvals/claim/', json={'count': self.args.bulk_size}
+            )
+            if response is None or response.status_code != 200:
+                return
+            chosen = [lease['approval']['id'] for lease in response.json().get('leases', [])]
+        else:
+            # Colleagues in the same department pull the same list and may pick the same rows
+            response = self._request(session, 'GET', '/api/approvals/pending/')
+            if response is None or response.status_code != 200:
+                return
+            pending = [approval['id'] for approval in response.json().get('approvals', [])]
+            with self.rng_lock:
+                chosen = self.rng.sample(pending, min(self.args.bulk_size, len(pending)))
+        self._think()
+
+        if chosen:
+            response = self._request(
+                session, 'POST', '/api/approvals/bulk_approve/',
+                json={'approval_ids': chosen, 'action': 'approve', 'notes': 'Cleared during graduation rush'},
+            )
+            if response is not None and response.status_code == 200:
+                result = response.json()
+                self.stats.count('approvals_approved', result.get('success_count', 0))
+                self.stats.count('approvals_lost_to_colleagues', result.get('failed_count', 0))
+        self._think()
+
+        self._request(session, 'GET', '/api/approvals/statistics/')
+
+    def admin(self):
+        session = self._login(self.accounts.pick(self.accounts.admins))
+        if session is None:
+            return
+        self._think()
+        self._request(session, 'GET', '/api/analytics/dashboard/')
+        self._think()
+        self._request(session, 'GET', '/api/analytics/department-bottlenecks/')
+
+    # Simulated Safaricom callbacks
+
+    def _schedule_callback(self, stk_response):
+        checkout_request_id = stk_response.get('checkout_request_id')
+        if not checkout_request_id:
+            return
+        with self.rng_lock:
+            delay = self.rng.uniform(*self.args.callback_delay)
+            cancelled = self.rng.random() < self.args.cancel_rate
+            receipt = ''.join(self.rng.choices('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789', k=10))
+        self.pending_callbacks.append(self.callbacks.submit(
+            self._callback, checkout_request_id, stk_response.get('merchant_request_id') or '', delay,
+            cancelled, receipt,
+        ))
+
+    def _callback(self, checkout_request_id, merchant_request_id, delay, cancelled, receipt):
+        time.sleep(delay)
+        body = {
+            'MerchantRequestID': merchant_request_id,
+            'CheckoutRequestID': checkout_request_id,
+            'ResultCode': 1032 if cancelled else 0,
+            'ResultDesc': 'Request cancelled by user' if cancelled else 'The service request is processed successfully.',
+        }
+        if not cancelled:
+            body['CallbackMetadata'] = {'Item': [
+                {'Name': 'Amount', 'Value': 10000},
+                {'Name': 'MpesaReceiptNumber', 'Value': receipt},
+                {'Name': 'TransactionDate', 'Value': int(time.strftime('%Y%m%d%H%M%S'))},
+                {'Name': 'PhoneNumber', 'Value': 254712345678},
+            ]}
+        with requests.Session() as session:
+            self._request(session, 'POST', '/api/finance/mpesa_callback/', json={'Body': {'stkCallback': body}})
+
+    # Driver
+
+    def _session(self, scenario):
+        try:
+            getattr(self, scenario)()
+            self.stats.count(f'{scenario}_sessions')
+        except Exception as exc:
+            self.stats.count('crashed_sessions')
+            print(f'  ✗ {scenario} session failed: {exc!r}', file=sys.stderr)
+
+    def run(self):
+        args = self.args
+        mix = {name: weight for name, weight in args.mix.items() if weight > 0}
+        if 'student' in mix and not self.accounts.student_pool:
+            raise SystemExit(f'✗ No eligible students graduating in {args.graduation_year}')
+        if 'staff' in mix and not self.accounts.staff:
+            raise SystemExit('✗ No department staff accounts found')
+        if 'admin' in mix and not self.accounts.admins:
+            raise SystemExit('✗ No admin accounts found')
+        scenarios, weights = list(mix), list(mix.values())
+
+        slots = threading.BoundedSemaphore(args.concurrency)
+        lock_monitor = LockMonitor()
+        lock_monitor.start()
+        print(f'Running {args.duration}s at {args.rate} session(s)/s against {self.base_url} ...')
+
+        started = time.monotonic()
+        next_arrival = started
+        with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix='virtual-user') as users:
+            while True:
+                with self.rng_lock:
+                    next_arrival += self.rng.expovariate(args.rate)
+                    scenario = self.rng.choices(scenarios, weights)[0]
+                if next_arrival - started >= args.duration:
+                    break
+                time.sleep(max(0.0, next_arrival - time.monotonic()))
+                if not slots.acquire(blocking=False):
+                    # Open-loop arrivals: a session that finds every slot busy is lost, as a real user would give up
+                    self.stats.count('dropped_sessions')
+                    continue
+                future = users.submit(self._session, scenario)
+                future.add_done_callback(lambda _: slots.release())
+        for future in list(self.pending_callbacks):
+            future.result()
+        self.callbacks.shutdown()
+        elapsed = time.monotonic() - started
+        return elapsed, lock_monitor.stop()
+
+    def server_profiles(self):
+        """Slowest routes according to the server's own profiler, if it has samples"""
+        if not self.accounts.admins:
+            return []
+        session = self._login(self.accounts.admins[0])
+        if session is None:
+            return []
+        try:
+            response = session.get(self.base_url + '/api/monitoring/profiles/', timeout=self.args.timeout)
+        except requests.RequestException:
+            return []
+        if response.status_code != 200:
+            return []
+        return response.json().get('routes', [])[:10]
+
+
+def print_report(elapsed, rows, counters, locks, profiles):
+    total = sum(row['requests'] for row in rows)
+    print('\n' + '=' * 110)
+    print(f'GRADUATION RUSH: {total} request(s) in {elapsed:.1f}s = {total / elapsed:.1f} req/s')
+    print('=' * 110)
+    print(f"{'endpoint':<52}{'reqs':>7}{'rps':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>9}{'5xx':>8}{'4xx':>8}")
+    for row in rows:
+        print(
+            f"{row['endpoint']:<52}{row['requests']:>7}{row['rps']:>8}{row['p50_ms']:>8}{row['p95_ms']:>8}"
+            f"{row['p99_ms']:>8}{row['max_ms']:>9}{row['error_rate']:>8.1%}{row['client_error_rate']:>8.1%}"
+        )
+    print('\nSessions and outcomes:')
+    for name, value in sorted(counters.items()):
+        print(f'  {name}: {value}')
+
+    print(f"\nDatabase lock waits ({locks['vendor']}):")
+    if 'note' in locks:
+        print(f"  {locks['note']}")
+    for name, value in locks.get('counters', {}).items():
+        print(f'  {name}: {value}')
+    if 'waiting_sessions' in locks:
+        waiting = locks['waiting_sessions']
+        print(f"  sessions waiting on a lock: max {waiting['max']}, mean {waiting['mean']} ({waiting['samples']} samples)")
+
+    if profiles:
+        print('\nServer profiles (p95, from /api/monitoring/profiles/):')
+        for route in profiles:
+            print(
+                f"  {route['method']:<6} {route['route']:<48} wall {route['wall_ms']['p95']:>8} ms  "
+                f"db {route['db_ms']['p95']:>8} ms  queries {route['queries']['p95']:>4}"
+            )
+
+    errors = sum(row['error_rate'] * row['requests'] for row in rows)
+    if errors:
+        print(f'\n⊘ {int(errors)} request(s) failed with a server error or no response')
+    else:
+        print('\n✓ No server errors')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a graduation-week workload against a running server')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server under test')
+    parser.add_argument('--duration', type=float, default=120, help='Seconds of arrivals (default: 120)')
+    parser.add_argument('--rate', type=float, default=10, help='New sessions per second (default: 10)')
+    parser.add_argument(
+        '--mix', type=parse_mix, default=parse_mix('student=85,staff=13,admin=2'),
+        help='Relative weights of the scenarios (default: student=85,staff=13,admin=2)',
+    )
+    parser.add_argument('--concurrency', type=int, default=200, help='Most sessions in flight at once (default: 200)')
+    parser.add_argument('--think-time', type=float, default=1.0, help='Mean seconds between steps (default: 1.0)')
+    parser.add_argument('--bulk-size', type=int, default=20, help='Approvals per bulk approve (default: 20)')
+    parser.add_argument(
+        '--staff-mode', choices=['claim', 'pending'], default='claim',
+        help='How staff pick approvals: lease them from the work queue, or race over the pending list (default: claim)',
+    )
+    parser.add_argument(
+        '--callback-delay', type=float, nargs=2, default=(5.0, 20.0), metavar=('MIN', 'MAX'),
+        help='Seconds between an STK push and its M-PESA callback (default: 5 20)',
+    )
+    parser.add_argument('--cancel-rate', type=float, default=0.1, help='Share of STK pushes the customer cancels')
+    parser.add_argument('--graduation-year', type=int, default=None, help='Cohort the students come from (default: latest)')
+    parser.add_argument('--password', default='synthetic123', help='Password of every account used')
+    parser.add_argument('--timeout', type=float, default=30, help='HTTP timeout in seconds')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for arrivals and choices')
+    parser.add_argument('--json', default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.graduation_year is None:
+        latest = Student.objects.order_by('-graduation_year').values_list('graduation_year', flat=True).first()
+        if latest is None:
+            raise SystemExit('✗ No students found; run `python manage.py generate_synthetic_data` first')
+        args.graduation_year = latest
+
+    rush = Rush(args)
+    elapsed, locks = rush.run()
+    rows, counters = rush.stats.report(elapsed)
+    profiles = rush.server_profiles()
+    print_report(elapsed, rows, counters, locks, profiles)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'elapsed_seconds': round(elapsed, 2),
+                'settings': {
+                    'rate': args.rate, 'duration': args.duration, 'mix': args.mix,
+                    'concurrency': args.concurrency, 'think_time': args.think_time, 'seed': args.seed,
+                    'staff_mode': args.staff_mode,
+                },
+                'endpoints': rows,
+                'counters': counters,
+                'locks': locks,
+                'server_profiles': profiles,
+            }, f, indent=2)
+        print(f'Results written to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
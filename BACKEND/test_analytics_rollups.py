@@ -0,0 +1,174 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.academics.models import School
+from apps.analytics import rollups
+from apps.analytics.models import ApprovalDailyRollup, ClearanceDailyRollup, RollupRefreshLock
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.finance.models import Payment
+from apps.users.models import User
+from testutils import TEST_SETTINGS, create_admin, create_clearance, create_departments, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = create_admin()
+        self.client.force_authenticate(user=self.admin)
+        self.school = School.objects.create(name='School of Engineering', code='SCE')
+        self.departments = create_departments(2)
+        self.student_count = 0
+
+    def _make_clearance(self, graduation_year=2025, paid=True):
+        self.student_count += 1
+        n = self.student_count
+        student = create_student(n, graduation_year=graduation_year, school=self.school)
+        if paid:
+            Payment.objects.create(
+                student=student,
+                amount=5500,
+                payment_method='mpesa',
+                transaction_id=f'TX{n:06d}',
+                payment_date=timezone.now(),
+                is_verified=True,
+            )
+        return create_clearance(student, self.departments)
+
+    def test_signals_keep_rollups_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            clearance = self._make_clearance()
+            self._make_clearance(graduation_year=2026, paid=False)
+
+        res = self.client.get('/api/analytics/dashboard/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['students']['total'], 2)
+        self.assertEqual(res.data['clearances']['pending'], 2)
+        self.assertEqual(res.data['clearances']['total'], 2)
+        self.assertEqual(res.data['approvals']['pending'], 4)
+        self.assertEqual(res.data['finance']['total_payments'], 1)
+        self.assertEqual(res.data['recent_activity']['clearances_last_7_days'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for approval in clearance.approvals.all():
+                approval.approve(self.admin)
+            clearance.status = 'completed'
+            clearance.completion_date = timezone.now()
+            clearance.save()
+
+        res = self.client.get('/api/analytics/clearance-completion/', {'graduation_year': 2025})
+        self.assertEqual(res.data['summary']['total_clearances'], 1)
+        self.assertEqual(res.data['summary']['completed'], 1)
+        self.assertEqual(res.data['summary']['completion_rate'], 100.0)
+        self.assertEqual(res.data['by_school'][0]['student__school__code'], 'SCE')
+
+        res = self.client.get('/api/analytics/department-bottlenecks/')
+        self.assertEqual(res.status_code, 200)
+        for department in res.data['departments']:
+            self.assertEqual(department['approved'], 1)
+            self.assertEqual(department['pending'], 1)
+
+        res = self.client.get('/api/analytics/financial-summary/')
+        summary = res.data['summary']
+        self.assertEqual(summary['total_students'], 2)
+        self.assertEqual(summary['students_with_payments'], 1)
+        self.assertEqual(summary['total_amount_paid'], 5500.0)
+        self.assertEqual(res.data['by_graduation_year'][0]['student__graduation_year'], 2025)
+
+    def test_approve_moves_one_row_between_buckets(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            clearances = [self._make_clearance() for _ in range(3)]
+        RollupRefreshLock.objects.all().delete()
+        approval = clearances[0].approvals.get(department=self.departments[0])
+
+        with mock.patch.object(rollups.RollupSpec, 'refresh') as refresh, \
+                self.captureOnCommitCallbacks(execute=True):
+            approval.approve(self.admin)
+        refresh.assert_not_called()
+        self.assertFalse(RollupRefreshLock.objects.exists())
+
+        counts = dict(
+            ApprovalDailyRollup.objects.filter(department=self.departments[0]).values_list('status', 'count')
+        )
+        self.assertEqual(counts, {'pending': 2, 'approved': 1})
+        self.assertEqual(
+            ApprovalDailyRollup.objects.get(department=self.departments[0], status='approved').processing_time_count, 1
+        )
+
+    def test_bulk_approve_refreshes_rollups(self):
+        staff = User.objects.create_user(
+            username='staff@mksu.ac.ke',
+            email='staff@mksu.ac.ke',
+            password='staff123456',
+            full_name='Staff',
+            role='department_staff',
+            department=self.departments[0],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            clearances = [self._make_clearance() for _ in range(3)]
+        ids = [
+            str(i) for i in ClearanceApproval.objects.filter(
+                clearance_request__in=clearances, department=self.departments[0]
+            ).values_list('id', flat=True)
+        ]
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post('/api/approvals/bulk_approve/', {'approval_ids': ids, 'action': 'approve'}, format='json')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        self.assertEqual(
+            sum(ApprovalDailyRollup.objects.filter(status='approved').values_list('count', flat=True)), 3
+        )
+        self.assertEqual(
+            sum(ClearanceDailyRollup.objects.filter(status='in_progress').values_list('count', flat=True)), 3
+        )
+
+    def test_dashboard_query_count_is_independent_of_history(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._make_clearance()
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/analytics/dashboard/')
+        with self.captureOnCommitCallbacks(execute=True):
+            for year in (2022, 2023, 2024):
+                self._make_clearance(graduation_year=year)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get('/api/analytics/dashboard/')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_rebuild_command_restores_rollups(self):
+        self._make_clearance()
+        ClearanceDailyRollup.objects.all().delete()
+        ApprovalDailyRollup.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_analytics_rollups', stdout=out)
+        self.assertIn('clearances: 1 rollup rows written', out.getvalue())
+        self.assertEqual(ClearanceDailyRollup.objects.get().count, 1)
+        self.assertEqual(sum(ApprovalDailyRollup.objects.values_list('count', flat=True)), 2)
+
+    def test_refreshing_a_day_again_replaces_its_rows(self):
+        clearance = self._make_clearance()
+        day = rollups.day_of(clearance)
+        for _ in range(2):
+            self.assertEqual(rollups.refresh_days('clearances', [day]), 1)
+        self.assertEqual(ClearanceDailyRollup.objects.get().count, 1)
+        self.assertEqual(RollupRefreshLock.objects.filter(rollup='clearances', day=day).count(), 1)
+
+    def test_failed_refresh_after_commit_is_logged_not_raised(self):
+        with mock.patch.object(rollups.SPECS['approvals'], 'refresh', side_effect=RuntimeError('boom')), \
+                self.assertLogs('apps.analytics.rollups', 'ERROR') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            self._make_clearance()
+            ClearanceDailyRollup.objects.all().delete()
+            rollups.schedule_refresh_for('approvals', ClearanceApproval.objects.values_list('pk', flat=True))
+            rollups.schedule_refresh_for('clearances', [ClearanceRequest.objects.get().pk])
+        self.assertIn('Could not refresh the approvals rollup', logs.output[0])
+        # The other rollups were still refreshed
+        self.assertEqual(ClearanceDailyRollup.objects.get().count, 1)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.approvals import queue
+from apps.approvals.models import ApprovalLease
+from apps.departments.models import Department
+from apps.users.models import User
+from testutils import TEST_SETTINGS, create_admin, create_clearance, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class ApprovalQueueTests(TestCase):
+    def setUp(self):
+        self.library = Department.objects.create(
+            name='Library', code='LIB', department_type='library', head_email='lib@mksu.ac.ke', approval_order=1
+        )
+        self.alice, self.bob = [
+            User.objects.create_user(
+                username=f'{name}@mksu.ac.ke',
+                email=f'{name}@mksu.ac.ke',
+                password='staff123456',
+                full_name=name.title(),
+                role='department_staff',
+                department=self.library,
+            )
+            for name in ('alice', 'bob')
+        ]
+        for n in range(5):
+            create_clearance(create_student(n), [self.library], status='in_progress')
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def _claim(self, user, count):
+        res = self._client(user).post('/api/approvals/claim/', {'count': count}, format='json')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        return [lease['approval']['id'] for lease in res.data['leases']]
+
+    def test_concurrent_approvers_get_disjoint_work(self):
+        alice = self._claim(self.alice, 3)
+        bob = self._claim(self.bob, 3)
+        self.assertEqual(len(alice), 3)
+        self.assertEqual(len(bob), 2)
+        self.assertFalse(set(alice) & set(bob))
+
+        # Claiming again tops up to the count instead of taking more
+        self.assertEqual(self._claim(self.alice, 3), alice)
+        self.assertEqual(self._claim(self.alice, 1), alice)
+
+        # Acting on a colleague's lease is a conflict; the holder can act
+        res = self._client(self.bob).post(f'/api/approvals/{alice[0]}/approve/', {}, format='json')
+        self.assertEqual(res.status_code, 409)
+        res = self._client(self.bob).post(
+            '/api/approvals/bulk_approve/', {'approval_ids': [alice[1], bob[0]], 'action': 'approve'}, format='json'
+        )
+        self.assertEqual(res.data['success_count'], 1)
+        self.assertEqual(res.data['errors'], [{'approval_id': alice[1], 'error': 'Claimed by another approver'}])
+
+        res = self._client(self.alice).post(f'/api/approvals/{alice[0]}/approve/', {}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(ApprovalLease.objects.filter(approval_id__in=[alice[0], bob[0]]).exists())
+        self.assertEqual(len(self._claim(self.alice, 3)), 2)
+
+    def test_expired_leases_are_taken_over_and_cannot_be_renewed(self):
+        alice = self._claim(self.alice, 5)
+        self.assertEqual(self._claim(self.bob, 2), [])
+
+        ApprovalLease.objects.filter(approval_id__in=alice[:2]).update(expires_at=timezone.now() - timedelta(seconds=1))
+        bob = self._claim(self.bob, 2)
+        self.assertEqual(bob, alice[:2])
+        self.assertEqual(ApprovalLease.objects.filter(holder=self.bob).count(), 2)
+
+        res = self._client(self.alice).post('/api/approvals/renew/', {'approval_ids': alice[1:3]}, format='json')
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.data['approval_ids'], [alice[1]])
+
+        with mock.patch.object(queue, 'APPROVAL_LEASE_SECONDS', 3600):
+            res = self._client(self.alice).post('/api/approvals/renew/', {}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['renewed_count'], 3)
+        remaining = ApprovalLease.objects.get(approval_id=alice[4]).expires_at - timezone.now()
+        self.assertGreater(remaining, timedelta(minutes=59))
+
+    def test_release_returns_work_to_the_queue(self):
+        alice = self._claim(self.alice, 5)
+        res = self._client(self.alice).post('/api/approvals/release/', {'approval_ids': alice[:2]}, format='json')
+        self.assertEqual(res.data['released_count'], 2)
+        # Releasing someone else's lease does nothing
+        res = self._client(self.bob).post('/api/approvals/release/', {'approval_ids': alice[2:]}, format='json')
+        self.assertEqual(res.data['released_count'], 0)
+        self.assertEqual(self._claim(self.bob, 5), alice[:2])
+
+        res = self._client(self.alice).post('/api/approvals/release/', {}, format='json')
+        self.assertEqual(res.data['released_count'], 3)
+        self.assertEqual(len(self._claim(self.bob, 5)), 5)
+
+        self.assertEqual(self._client(create_admin()).post('/api/approvals/claim/', {}, format='json').status_code, 403)
@@ -0,0 +1,79 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.audit_logs.models import AuditLog
+from testutils import TEST_SETTINGS, create_admin
+
+
+def _log(created_at, action='other', entity='/api/health/'):
+    entry = AuditLog.objects.create(action=action, entity=entity, entity_id='200', changes={'n': 1})
+    AuditLog.objects.filter(pk=entry.pk).update(created_at=created_at)
+    return entry
+
+
+@override_settings(
+    **TEST_SETTINGS,
+    AUDIT_LOG_BUFFERED=False,
+    AUDIT_LOG_POLICY=[],
+)
+class AuditLogArchiveTests(TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def test_archives_old_months_with_manifest_and_checksum(self):
+        old = [_log(datetime(2024, 1, day, 12, tzinfo=dt_timezone.utc)) for day in (3, 4, 5)]
+        _log(datetime(2024, 2, 10, tzinfo=dt_timezone.utc))
+        recent = _log(timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('archive_audit_logs', '--older-than-days', '30', '--output-dir', self.output_dir, stdout=out)
+        self.assertIn('Archived 3 rows from 2024-01', out.getvalue())
+        self.assertEqual(list(AuditLog.objects.values_list('id', flat=True)), [recent.id])
+
+        with open(os.path.join(self.output_dir, 'manifest.json')) as fh:
+            manifest = json.load(fh)
+        january = next(a for a in manifest['archives'] if a['month'] == '2024-01')
+        self.assertEqual(january['rows'], 3)
+
+        path = os.path.join(self.output_dir, january['file'])
+        with open(path, 'rb') as fh:
+            self.assertEqual(hashlib.sha256(fh.read()).hexdigest(), january['sha256'])
+        with gzip.open(path, 'rt') as fh:
+            rows = [json.loads(line) for line in fh]
+        self.assertEqual([r['id'] for r in rows], [str(e.id) for e in old])
+        self.assertEqual(rows[0]['changes'], {'n': 1})
+
+    def test_dry_run_keeps_rows(self):
+        _log(datetime(2024, 1, 3, tzinfo=dt_timezone.utc))
+        out = StringIO()
+        call_command('archive_audit_logs', '--dry-run', '--output-dir', self.output_dir, stdout=out)
+        self.assertIn('Would archive 2024-01', out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'manifest.json')))
+
+    def test_read_api_filters_by_date_window_and_groups_statistics(self):
+        admin = create_admin()
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        _log(datetime(2024, 1, 3, 10, tzinfo=dt_timezone.utc), action='create')
+        _log(datetime(2024, 1, 4, 10, tzinfo=dt_timezone.utc), action='update')
+        _log(datetime(2024, 2, 1, 10, tzinfo=dt_timezone.utc), action='update')
+
+        res = client.get('/api/audit-logs/statistics/', {'date_start': '2024-01-01', 'date_end': '2024-01-31'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['total_logs'], 2)
+        self.assertEqual(res.data['by_action']['create'], 1)
+        self.assertEqual(res.data['by_action']['update'], 1)
+        self.assertEqual(res.data['by_action']['delete'], 0)
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.audit_logs.buffer import AuditLogBuffer
+from apps.audit_logs.models import AuditLog
+from testutils import TEST_SETTINGS, create_admin
+
+
+def _entry(n):
+    return AuditLog(action='other', entity='/api/health/', entity_id=str(n), description='GET /api/health/')
+
+
+@override_settings(**TEST_SETTINGS)
+class AuditLogBufferTests(TestCase):
+    def test_entries_are_written_in_batches_on_flush(self):
+        buffer = AuditLogBuffer(max_size=100, batch_size=4, background=False)
+        for n in range(10):
+            self.assertTrue(buffer.submit(_entry(n), 'GET'))
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+        with self.assertNumQueries(3):
+            buffer.flush()
+        self.assertEqual(AuditLog.objects.count(), 10)
+        self.assertEqual(buffer.pending(), 0)
+
+    def test_overflow_drops_reads_first_and_never_loses_mutations(self):
+        buffer = AuditLogBuffer(max_size=10, block_timeout=0.01, background=False)
+        for n in range(9):
+            buffer.submit(_entry(n), 'POST')
+        # Reads are dropped once the queue is 90% full
+        self.assertFalse(buffer.submit(_entry(100), 'GET'))
+        self.assertEqual(buffer.dropped, 1)
+
+        # Mutations fill the queue, then fall back to a synchronous write
+        self.assertTrue(buffer.submit(_entry(9), 'POST'))
+        self.assertTrue(buffer.submit(_entry(10), 'DELETE'))
+        self.assertEqual(AuditLog.objects.count(), 1)
+        buffer.flush()
+        self.assertEqual(AuditLog.objects.count(), 11)
+
+    def test_drop_policy_discards_everything_when_full(self):
+        buffer = AuditLogBuffer(max_size=2, overflow='drop', background=False)
+        buffer.submit(_entry(1), 'POST')
+        buffer.submit(_entry(2), 'POST')
+        self.assertFalse(buffer.submit(_entry(3), 'POST'))
+        self.assertEqual(buffer.dropped, 1)
+
+    @override_settings(AUDIT_LOG_BUFFERED=True)
+    def test_middleware_submits_to_buffer(self):
+        admin = create_admin()
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        buffer = AuditLogBuffer(background=False)
+        with mock.patch('apps.audit_logs.middleware.get_audit_buffer', return_value=buffer):
+            res = client.get('/api/health/')
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(AuditLog.objects.filter(entity='/api/health/').exists())
+        buffer.flush()
+        self.assertEqual(AuditLog.objects.get(entity='/api/health/').actor, admin)
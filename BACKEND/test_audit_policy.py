@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.audit_logs.models import AuditLog
+from apps.audit_logs.policy import AuditPolicy
+from testutils import TEST_SETTINGS, create_admin
+
+
+class AuditPolicyTests(SimpleTestCase):
+    def setUp(self):
+        self.policy = AuditPolicy(rules=[
+            {'pattern': r'^/api/notifications/unread_count/$', 'methods': ['GET'], 'mode': 'sample', 'rate': 0.1},
+            {'pattern': r'^/api/notifications/', 'methods': ['GET'], 'mode': 'metadata'},
+            {'pattern': r'^/api/(analytics|approvals)/', 'mode': 'skip'},
+        ])
+
+    def test_first_matching_rule_wins(self):
+        self.assertEqual(self.policy.resolve('GET', '/api/notifications/unread_count/'), ('sample', 0.1))
+        self.assertEqual(self.policy.resolve('GET', '/api/notifications/'), ('metadata', 1.0))
+        self.assertEqual(self.policy.resolve('GET', '/api/analytics/dashboard/'), ('skip', 1.0))
+        self.assertEqual(self.policy.resolve('GET', '/api/health/'), ('full', 1.0))
+
+    def test_mutations_and_approvals_are_always_full(self):
+        self.assertEqual(self.policy.resolve('POST', '/api/analytics/dashboard/').mode, 'full')
+        self.assertEqual(self.policy.resolve('delete', '/api/notifications/1/').mode, 'full')
+        self.assertEqual(self.policy.resolve('GET', '/api/approvals/').mode, 'full')
+
+    def test_invalid_rules_are_rejected(self):
+        with self.assertRaises(ValueError):
+            AuditPolicy(rules=[{'pattern': r'^/api/', 'mode': 'sometimes'}])
+        with self.assertRaises(ValueError):
+            AuditPolicy(rules=[{'pattern': r'^/api/', 'mode': 'sample', 'rate': 2}])
+
+
+@override_settings(
+    **TEST_SETTINGS,
+    AUDIT_LOG_BUFFERED=False,
+    AUDIT_LOG_POLICY=[
+        {'pattern': r'^/api/notifications/unread_count/$', 'methods': ['GET'], 'mode': 'skip'},
+        {'pattern': r'^/api/notifications/', 'methods': ['GET'], 'mode': 'metadata'},
+    ],
+)
+class AuditPolicyMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = create_admin()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_skipped_route_is_not_logged(self):
+        res = self.client.get('/api/notifications/unread_count/')
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(AuditLog.objects.filter(entity='/api/notifications/unread_count/').exists())
+
+    def test_metadata_mode_omits_bodies_and_headers(self):
+        self.client.get('/api/notifications/')
+        entry = AuditLog.objects.get(entity='/api/notifications/')
+        self.assertIsNone(entry.changes['response']['body'])
+        self.assertIsNone(entry.changes['request']['headers'])
+        self.assertEqual(entry.changes['meta']['audit_mode'], 'metadata')
+
+    def test_full_mode_masks_credentials_in_headers(self):
+        self.client.get('/api/health/', HTTP_AUTHORIZATION='Bearer secret-token', HTTP_COOKIE='sessionid=abc')
+        headers = AuditLog.objects.get(entity='/api/health/').changes['request']['headers']
+        self.assertEqual(headers['HTTP_AUTHORIZATION'], '***')
+        self.assertEqual(headers['HTTP_COOKIE'], '***')
@@ -0,0 +1,135 @@
+"""
+Bulk approval engine tests, including a query-count benchmark
+
+The benchmark approves batches of growing size and checks that the number of
+SQL queries issued by POST /api/approvals/bulk_approve/ stays flat.
+"""
+import time
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.approvals.models import ClearanceApproval
+from apps.audit_logs.models import AuditLog
+from apps.clearances.models import ClearanceRequest
+from apps.departments.models import Department
+from apps.notifications.models import Notification
+from apps.users.models import User
+from testutils import TEST_SETTINGS, create_clearance, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class BulkApproveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.library = Department.objects.create(
+            name='Library', code='LIB', department_type='library', head_email='lib@mksu.ac.ke', approval_order=1
+        )
+        self.finance = Department.objects.create(
+            name='Finance', code='FIN', department_type='finance', head_email='fin@mksu.ac.ke', approval_order=2
+        )
+        self.staff = User.objects.create_user(
+            username='librarian@mksu.ac.ke',
+            email='librarian@mksu.ac.ke',
+            password='staff123456',
+            full_name='Librarian',
+            role='department_staff',
+            department=self.library,
+        )
+        self.client.force_authenticate(user=self.staff)
+        self.next_student = 0
+
+    def _make_clearances(self, count):
+        """Create clearance requests with one pending approval per department"""
+        clearances = []
+        for _ in range(count):
+            self.next_student += 1
+            student = create_student(self.next_student)
+            clearances.append(create_clearance(student, (self.library, self.finance), status='submitted'))
+        return clearances
+
+    def _library_ids(self, clearances):
+        return [
+            str(approval_id) for approval_id in ClearanceApproval.objects.filter(
+                clearance_request__in=clearances, department=self.library
+            ).values_list('id', flat=True)
+        ]
+
+    def _bulk(self, ids, action='approve', **extra):
+        return self.client.post('/api/approvals/bulk_approve/', {
+            'approval_ids': ids,
+            'action': action,
+            **extra,
+        }, format='json')
+
+    def test_bulk_approve_updates_requests_and_reports_per_id(self):
+        clearances = self._make_clearances(3)
+        ids = self._library_ids(clearances)
+        # One approval is already processed before the batch runs
+        ClearanceApproval.objects.get(id=ids[0]).approve(self.staff)
+
+        res = self._bulk(ids, notes='Books returned')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        self.assertEqual(res.data['success_count'], 2)
+        self.assertEqual(res.data['failed_count'], 1)
+        self.assertEqual([r['approval_id'] for r in res.data['results']], ids)
+        self.assertFalse(res.data['results'][0]['success'])
+
+        for clearance in clearances:
+            clearance.refresh_from_db()
+            self.assertEqual(clearance.approved_count, 1)
+            self.assertEqual(clearance.pending_count, 1)
+        self.assertEqual(AuditLog.objects.filter(entity='ClearanceApproval', action='approve').count(), 2)
+        self.assertEqual(Notification.objects.filter(notification_type='approval_pending').count(), 2)
+
+    def test_bulk_approve_completes_requests_without_pending_approvals(self):
+        clearance = self._make_clearances(1)[0]
+        ClearanceApproval.objects.get(clearance_request=clearance, department=self.finance).approve(self.staff)
+
+        res = self._bulk(self._library_ids([clearance]))
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        clearance.refresh_from_db()
+        self.assertEqual(clearance.status, 'completed')
+        self.assertIsNotNone(clearance.completion_date)
+        self.assertEqual(clearance.get_completion_percentage(), 100)
+        self.assertTrue(Notification.objects.filter(notification_type='clearance_approved').exists())
+
+    def test_bulk_reject_rejects_parent_requests(self):
+        clearances = self._make_clearances(2)
+        res = self._bulk(self._library_ids(clearances), action='reject', rejection_reason='Unreturned books')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        self.assertEqual(
+            ClearanceRequest.objects.filter(id__in=[c.id for c in clearances], status='rejected').count(), 2
+        )
+
+    def test_staff_cannot_bulk_approve_other_departments(self):
+        clearances = self._make_clearances(1)
+        finance_ids = [
+            str(approval_id) for approval_id in ClearanceApproval.objects.filter(
+                clearance_request__in=clearances, department=self.finance
+            ).values_list('id', flat=True)
+        ]
+        res = self._bulk(finance_ids)
+        self.assertEqual(res.status_code, 400)
+
+    def test_benchmark_query_count_is_flat_as_batch_grows(self):
+        measurements = []
+        for size in (5, 20, 60):
+            ids = self._library_ids(self._make_clearances(size))
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                res = self._bulk(ids)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            self.assertEqual(res.status_code, 200, msg=res.content)
+            self.assertEqual(res.data['success_count'], size)
+            measurements.append((size, len(ctx.captured_queries), elapsed_ms))
+
+        query_counts = {queries for _, queries, _ in measurements}
+        self.assertEqual(
+            len(query_counts), 1,
+            msg='Query count grew with batch size: ' + ', '.join(
+                f'{size} approvals → {queries} queries ({ms:.1f} ms)' for size, queries, ms in measurements
+            )
+        )
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.clearances.models import ClearanceRequest
+from testutils import TEST_SETTINGS, create_admin, create_clearance, create_departments, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class ClearanceCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = create_admin()
+        self.departments = create_departments(3)
+        self.client.force_authenticate(user=self.admin)
+
+    def _make_clearance(self, n):
+        return create_clearance(create_student(n), self.departments)
+
+    def test_counters_follow_approval_changes(self):
+        clearance = self._make_clearance(1)
+        clearance.refresh_from_db()
+        self.assertEqual(clearance.get_approval_summary(), {
+            'total': 3, 'approved': 0, 'rejected': 0, 'pending': 3,
+        })
+
+        approval = clearance.approvals.first()
+        res = self.client.post(f'/api/approvals/{approval.id}/approve/', {'notes': 'ok'}, format='json')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+
+        clearance.refresh_from_db()
+        self.assertEqual(clearance.approved_count, 1)
+        self.assertEqual(clearance.pending_count, 2)
+        self.assertEqual(clearance.get_completion_percentage(), 33)
+        self.assertEqual(clearance.status, 'in_progress')
+
+        # A stale in-memory copy must not overwrite the counters
+        stale = ClearanceRequest.objects.get(pk=clearance.pk)
+        other = clearance.approvals.filter(status='pending').first()
+        other.reject(self.admin, 'Outstanding books')
+        stale.rejection_reason = 'Outstanding books'
+        stale.save()
+        clearance.refresh_from_db()
+        self.assertEqual(clearance.rejected_count, 1)
+        self.assertEqual(clearance.pending_count, 1)
+
+    def test_list_reads_counters_without_extra_queries(self):
+        self._make_clearance(1)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get('/api/clearances/').status_code, 200)
+        for n in range(2, 7):
+            self._make_clearance(n)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.get('/api/clearances/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data['results']), 6)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        clearance = self._make_clearance(1)
+        ClearanceRequest.objects.filter(pk=clearance.pk).update(pending_count=0, approved_count=3)
+
+        out = StringIO()
+        call_command('rebuild_approval_counters', '--dry-run', stdout=out)
+        self.assertIn('1 drifted', out.getvalue())
+        clearance.refresh_from_db()
+        self.assertEqual(clearance.approved_count, 3)
+
+        out = StringIO()
+        call_command('rebuild_approval_counters', stdout=out)
+        self.assertIn('1 drifted and rebuilt', out.getvalue())
+        clearance.refresh_from_db()
+        self.assertEqual(clearance.approved_count, 0)
+        self.assertEqual(clearance.pending_count, 3)
@@ -0,0 +1,112 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.bulk import eligible_cohort, open_cohort_clearances
+from apps.clearances.models import ClearanceRequest
+from apps.students.models import Student
+from testutils import TEST_SETTINGS, create_admin, create_departments, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class OpenClearanceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.departments = create_departments(3)
+        self.student_count = 0
+
+    def _add_departments(self, count):
+        self.departments += create_departments(count, start=len(self.departments))
+
+    def _student(self, eligibility_status='eligible', graduation_year=2025):
+        self.student_count += 1
+        return create_student(
+            self.student_count, graduation_year=graduation_year, eligibility_status=eligibility_status
+        )
+
+    def _create(self, student):
+        self.client.force_authenticate(user=student.user)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post('/api/clearances/', {'student_id': str(student.id)}, format='json')
+        self.assertEqual(res.status_code, 201, msg=res.content)
+        return ClearanceRequest.objects.get(student=student), len(ctx.captured_queries)
+
+    def test_create_inserts_all_approvals_at_once(self):
+        self._create(self._student())  # loads the department registry
+        clearance, small = self._create(self._student())
+        self.assertEqual(clearance.approvals.count(), 3)
+        self.assertEqual(clearance.get_approval_summary(), {'total': 3, 'approved': 0, 'rejected': 0, 'pending': 3})
+
+        self._add_departments(7)
+        self._create(self._student())  # loads the department registry again
+        clearance, large = self._create(self._student())
+        self.assertEqual(clearance.approvals.count(), 10)
+        self.assertEqual(clearance.pending_count, 10)
+        self.assertEqual(small, large)
+
+    def test_create_is_atomic(self):
+        student = self._student()
+        self.client.force_authenticate(user=student.user)
+        with mock.patch.object(ClearanceApproval.objects, 'bulk_create', side_effect=IntegrityError('boom')):
+            with self.assertRaises(IntegrityError):
+                self.client.post('/api/clearances/', {'student_id': str(student.id)}, format='json')
+        self.assertFalse(ClearanceRequest.objects.filter(student=student).exists())
+
+    def test_cohort_is_opened_in_batches(self):
+        students = [self._student() for _ in range(7)]
+        self._student(eligibility_status='ineligible')
+        self._student(graduation_year=2026)
+        ClearanceRequest.objects.create(student=students[0], status='in_progress')
+        rejected = ClearanceRequest.objects.create(student=students[1], status='rejected')
+
+        progress = []
+        with CaptureQueriesContext(connection) as ctx:
+            stats = open_cohort_clearances(
+                eligible_cohort(2025), batch_size=3, progress=lambda *args: progress.append(args)
+            )
+        self.assertEqual(stats, {'students': 7, 'opened': 6, 'skipped': 1, 'approvals': 18})
+        self.assertEqual([(processed, total) for processed, total, _ in progress], [(3, 7), (6, 7), (7, 7)])
+        self.assertEqual(progress[-1][2], 6)
+        # Per batch: lock, open check, request INSERT, approval INSERT, plus savepoints
+        # and rollup bookkeeping; never one statement per student or approval
+        self.assertLess(len(ctx.captured_queries), 3 * 10)
+
+        opened = ClearanceRequest.objects.filter(student__in=students, status='pending')
+        self.assertEqual(opened.count(), 6)
+        for clearance in opened:
+            self.assertEqual(clearance.approvals.count(), 3)
+            self.assertEqual(clearance.pending_count, 3)
+        self.assertTrue(ClearanceRequest.objects.filter(pk=rejected.pk).exists())
+
+        again = open_cohort_clearances(eligible_cohort(2025))
+        self.assertEqual((again['opened'], again['skipped']), (0, 7))
+
+    def test_command_and_api(self):
+        for _ in range(4):
+            self._student()
+        out = StringIO()
+        call_command('open_cohort_clearances', '--graduation-year', '2025', '--dry-run', stdout=out)
+        self.assertIn('4 of 4 student(s) would get a clearance request', out.getvalue())
+        self.assertFalse(ClearanceRequest.objects.exists())
+
+        out = StringIO()
+        call_command('open_cohort_clearances', '--graduation-year', '2025', '--batch-size', '2', stdout=out)
+        self.assertIn('2/4 student(s) processed', out.getvalue())
+        self.assertIn('Opened 4 clearance request(s) with 12 approval(s)', out.getvalue())
+
+        self._student()
+        admin = create_admin()
+        self.client.force_authenticate(user=admin)
+        res = self.client.post('/api/clearances/open_cohort/', {'graduation_year': 2025}, format='json')
+        self.assertEqual(res.status_code, 201, msg=res.content)
+        self.assertEqual((res.data['opened'], res.data['skipped']), (1, 4))
+
+        self.client.force_authenticate(user=Student.objects.first().user)
+        res = self.client.post('/api/clearances/open_cohort/', {'graduation_year': 2025}, format='json')
+        self.assertEqual(res.status_code, 403)
@@ -0,0 +1,131 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.clearances.serializers import ClearanceRequestSerializer
+from apps.departments.models import Department
+from apps.finance.models import Payment
+from apps.students.models import Student
+from apps.users.models import User
+from testutils import TEST_SETTINGS, create_admin
+
+
+@override_settings(**TEST_SETTINGS)
+class ClearanceSerializerQueryTests(TestCase):
+    STUDENTS = 6
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = create_admin()
+        self.departments = [
+            Department.objects.create(
+                name=kind.title(), code=kind.upper(), department_type=kind,
+                head_email=f'{kind}@mksu.ac.ke', approval_order=i,
+            )
+            for i, kind in enumerate(['finance', 'library', 'hostel'])
+        ]
+        self.approver = User.objects.create_user(
+            username='finance@mksu.ac.ke',
+            email='finance@mksu.ac.ke',
+            password='staff123456',
+            full_name='Finance Officer',
+            role='department_staff',
+            department=self.departments[0],
+        )
+        self.clearances = []
+        for i in range(self.STUDENTS):
+            user = User.objects.create_user(
+                username=f'student{i}@mksu.ac.ke',
+                email=f'student{i}@mksu.ac.ke',
+                password='student123456',
+                full_name=f'Student {i}',
+                role='student',
+                department=self.departments[1],
+            )
+            student = Student.objects.create(
+                user=user,
+                registration_number=f'SCE/CS/{i:04d}/2021',
+                faculty='SCE',
+                program='Computer Science',
+                graduation_year=2025,
+                eligibility_status='eligible',
+            )
+            # Every other student has paid
+            if i % 2 == 0:
+                Payment.objects.create(
+                    student=student, amount=10000, payment_method='bank', transaction_id=f'TX{i}',
+                    is_verified=True, verified_by=self.approver, verification_date=timezone.now(),
+                )
+            clearance = ClearanceRequest.objects.create(student=student, status='in_progress')
+            # The first department approved, the rest still pending
+            for department in reversed(self.departments):
+                approval = ClearanceApproval.objects.create(clearance_request=clearance, department=department)
+                if department == self.departments[0]:
+                    approval.status = 'approved'
+                    approval.approved_by = self.approver
+                    approval.approval_date = timezone.now()
+                    approval.save()
+            clearance.refresh_counters()
+            self.clearances.append(clearance)
+
+    def _queries(self, request):
+        with CaptureQueriesContext(connection) as ctx:
+            response = request()
+        return response, len(ctx.captured_queries)
+
+    def test_detail_has_a_fixed_query_count(self):
+        self.client.force_authenticate(user=self.admin)
+        paid, unpaid = self.clearances[0], self.clearances[1]
+
+        # Request, approvals with department and approver, and the audit log row
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/clearances/{paid.pk}/')
+        self.assertEqual(response.status_code, 200, msg=response.content)
+        data = response.data
+        self.assertEqual(data['current_department']['code'], 'LIBRARY')
+        self.assertEqual(data['payment_info']['verified_by'], 'Finance Officer')
+        self.assertEqual(data['student']['user']['department_code'], 'LIBRARY')
+        self.assertEqual([approval['department_code'] for approval in data['approvals']], ['FINANCE', 'LIBRARY', 'HOSTEL'])
+        self.assertEqual(data['approvals'][0]['approved_by'], 'Finance Officer')
+        self.assertEqual(data['completion_percentage'], 33)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/clearances/{unpaid.pk}/')
+        self.assertIsNone(response.data['payment_info'])
+
+        # A student reads their own request with the same plan
+        self.client.force_authenticate(user=unpaid.student.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/clearances/{unpaid.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/clearances/{paid.pk}/').status_code, 404)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        self.client.force_authenticate(user=self.admin)
+        counts = []
+        for page_size in (1, 3, self.STUDENTS):
+            response, queries = self._queries(lambda: self.client.get(
+                '/api/clearances/', {'pagination': 'keyset', 'page_size': page_size}
+            ))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+            counts.append(queries)
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_full_serializer_query_count_does_not_depend_on_rows(self):
+        counts = []
+        for rows in (1, self.STUDENTS):
+            queryset = ClearanceRequestSerializer.setup_eager_loading(ClearanceRequest.objects.order_by('created_at'))
+            _, queries = self._queries(lambda: ClearanceRequestSerializer(queryset[:rows], many=True).data)
+            counts.append(queries)
+        self.assertEqual(counts, [2, 2])
+
+        data = ClearanceRequestSerializer(
+            ClearanceRequestSerializer.setup_eager_loading(ClearanceRequest.objects.order_by('created_at')), many=True
+        ).data
+        self.assertEqual([row['payment_status']['has_paid'] for row in data], [True, False] * (self.STUDENTS // 2))
+        self.assertEqual(data[0]['approval_summary'], {'total': 3, 'approved': 1, 'rejected': 0, 'pending': 2})
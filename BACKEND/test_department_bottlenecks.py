@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.analytics import rollups
+from apps.approvals.models import ClearanceApproval
+from testutils import TEST_SETTINGS, create_admin, create_clearance, create_departments, create_student
+
+
+URL = '/api/analytics/department-bottlenecks/'
+
+
+@override_settings(**TEST_SETTINGS)
+class DepartmentBottlenecksTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = create_admin()
+        self.client.force_authenticate(user=self.admin)
+        self.departments = []
+        self.student_count = 0
+
+    def _add_departments(self, count):
+        self.departments += create_departments(count, start=len(self.departments))
+
+    def _make_clearance(self):
+        self.student_count += 1
+        clearance = create_clearance(create_student(self.student_count), self.departments)
+        return {approval.department_id: approval for approval in clearance.approvals.all()}
+
+    def _report_queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(URL, params or {})
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        reads = [q for q in ctx.captured_queries if '"departments"' in q['sql']]
+        return res, len(ctx.captured_queries), len(reads)
+
+    def test_report_is_one_query_regardless_of_departments(self):
+        self._add_departments(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._make_clearance()
+        _, small_total, small_reads = self._report_queries()
+        _, small_live_total, small_live_reads = self._report_queries({'as_of': timezone.now().isoformat()})
+
+        self._add_departments(10)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self._make_clearance()
+        res, large_total, large_reads = self._report_queries()
+        _, large_live_total, large_live_reads = self._report_queries({'as_of': timezone.now().isoformat()})
+
+        self.assertEqual(res.data['total_departments'], 12)
+        # Departments come from the registry, loaded once after they change
+        self.assertEqual((small_reads, large_reads), (1, 1))
+        self.assertEqual((small_live_reads, large_live_reads), (0, 0))
+        self.assertEqual(small_total, large_total)
+        self.assertEqual(small_live_total, large_live_total)
+
+    def test_rollup_report_counts_and_overdue(self):
+        self._add_departments(2)
+        first, second = self.departments
+        with self.captureOnCommitCallbacks(execute=True):
+            old = self._make_clearance()
+            ClearanceApproval.objects.filter(pk=old[first.pk].pk).update(
+                created_at=timezone.now() - timedelta(days=10)
+            )
+            # QuerySet.update() bypasses the signals, so recompute both days
+            rollups.refresh_days('approvals', [timezone.localdate(), timezone.localdate() - timedelta(days=10)])
+            recent = self._make_clearance()
+            recent[second.pk].approve(self.admin)
+
+        res = self.client.get(URL)
+        rows = {row['department_code']: row for row in res.data['departments']}
+        self.assertEqual(res.data['departments'][0]['department_code'], first.code)
+        self.assertEqual(rows[first.code]['total_approvals'], 2)
+        self.assertEqual(rows[first.code]['pending'], 2)
+        self.assertEqual(rows[first.code]['overdue_pending'], 1)
+        self.assertEqual(rows[second.code]['approved'], 1)
+        self.assertEqual(rows[second.code]['approval_rate'], 50.0)
+        self.assertIsNotNone(rows[second.code]['average_processing_days'])
+        self.assertIsNone(res.data['as_of'])
+
+    def test_as_of_reports_historical_state(self):
+        self._add_departments(1)
+        department = self.departments[0]
+        now = timezone.now()
+        approvals = [self._make_clearance()[department.pk] for _ in range(3)]
+        ClearanceApproval.objects.filter(pk=approvals[0].pk).update(
+            created_at=now - timedelta(days=20), status='approved', approval_date=now - timedelta(days=18)
+        )
+        # Approved after the as_of moment: still pending then
+        ClearanceApproval.objects.filter(pk=approvals[1].pk).update(
+            created_at=now - timedelta(days=20), status='approved', approval_date=now - timedelta(days=1)
+        )
+        # Created after the as_of moment: not counted at all
+        ClearanceApproval.objects.filter(pk=approvals[2].pk).update(created_at=now - timedelta(days=2))
+
+        res = self.client.get(URL, {'as_of': (now - timedelta(days=5)).date().isoformat()})
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        row = res.data['departments'][0]
+        self.assertEqual(row['total_approvals'], 2)
+        self.assertEqual(row['approved'], 1)
+        self.assertEqual(row['pending'], 1)
+        self.assertEqual(row['overdue_pending'], 1)
+        self.assertEqual(row['average_processing_days'], 2.0)
+
+    def test_invalid_as_of_is_rejected(self):
+        res = self.client.get(URL, {'as_of': 'yesterday'})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('error', res.data)
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.departments import registry
+from apps.departments.models import Department
+from apps.departments.registry import (
+    DepartmentRegistry,
+    active_departments,
+    get_department,
+    invalidate_departments,
+)
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+from config.cache import check_shared_cache
+
+
+@override_settings(**TEST_SETTINGS)
+class DepartmentRegistryTests(TestCase):
+    def setUp(self):
+        self.finance = Department.objects.create(
+            name='Finance', code='FIN', department_type='finance', head_email='fin@mksu.ac.ke', approval_order=2
+        )
+        self.library = Department.objects.create(
+            name='Library', code='LIB', department_type='library', head_email='lib@mksu.ac.ke', approval_order=1
+        )
+        Department.objects.create(
+            name='Workshop', code='WRK', department_type='workshop', head_email='wrk@mksu.ac.ke',
+            approval_order=3, is_active=False
+        )
+
+    def test_reads_are_served_without_queries(self):
+        self.assertEqual([d.code for d in active_departments()], ['LIB', 'FIN'])
+        with self.assertNumQueries(0):
+            self.assertEqual([d.code for d in active_departments()], ['LIB', 'FIN'])
+            self.assertEqual(get_department('FIN').name, 'Finance')
+            self.assertEqual(get_department(self.library.id).code, 'LIB')
+            self.assertEqual(get_department(str(self.library.id)).code, 'LIB')
+            self.assertIsNone(get_department('WRK'))
+            self.assertIsNone(get_department('nope'))
+
+    def test_saves_and_deletes_invalidate_the_registry(self):
+        active_departments()
+        self.finance.approval_order = 0
+        self.finance.save()
+        self.assertEqual([d.code for d in active_departments()], ['FIN', 'LIB'])
+
+        self.library.is_active = False
+        self.library.save()
+        self.assertEqual([d.code for d in active_departments()], ['FIN'])
+
+        self.finance.delete()
+        self.assertEqual(active_departments(), ())
+
+    def test_other_workers_reload_after_the_version_changes(self):
+        other = DepartmentRegistry()
+        with mock.patch.object(registry, 'CHECK_SECONDS', 0):
+            self.assertEqual(len(other.snapshot().records), 2)
+            with self.assertNumQueries(0):
+                other.snapshot()
+
+            # Bulk updates bypass the signals and invalidate explicitly
+            with self.captureOnCommitCallbacks(execute=True):
+                Department.objects.filter(pk=self.finance.pk).update(name='Finance Office')
+                invalidate_departments()
+            self.assertEqual(other.snapshot().by_code['FIN'].name, 'Finance Office')
+
+    def test_snapshots_expire_when_no_version_change_arrives(self):
+        other = DepartmentRegistry()
+        self.assertEqual(other.snapshot().by_code['FIN'].name, 'Finance')
+        # A bump another worker made in its own process-local cache never arrives here
+        Department.objects.filter(pk=self.finance.pk).update(name='Finance Office')
+        with mock.patch.object(registry, 'CHECK_SECONDS', 0):
+            self.assertEqual(other.snapshot().by_code['FIN'].name, 'Finance')
+            with mock.patch.object(registry, 'MAX_AGE_SECONDS', 0):
+                self.assertEqual(other.snapshot().by_code['FIN'].name, 'Finance Office')
+
+    def test_process_local_cache_is_flagged_outside_debug(self):
+        with override_settings(DEBUG=False):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['config.W001'])
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_shared_cache(None), [])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}}
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_approval_workflow_reads_the_registry(self):
+        client = APIClient()
+        user = User.objects.create_user(
+            username='student@mksu.ac.ke', email='student@mksu.ac.ke', password='student123456',
+            full_name='Student', role='student'
+        )
+        client.force_authenticate(user=user)
+        active_departments()
+        res = client.get('/api/departments/approval_workflow/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['total_steps'], 2)
+        self.assertEqual(res.data['workflow'][0]['code'], 'LIB')
+        self.assertEqual(res.data['workflow'][0]['contact'], 'lib@mksu.ac.ke')
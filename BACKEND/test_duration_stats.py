@@ -0,0 +1,73 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.analytics.durations import duration_stats
+from apps.approvals.models import ClearanceApproval
+from apps.departments.models import Department
+from testutils import TEST_SETTINGS, create_admin, create_clearance, create_departments, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class DurationStatsTests(TestCase):
+    HOURS = [1, 2, 3, 4, 10, 30, 200]
+
+    def setUp(self):
+        self.admin = create_admin()
+        departments = create_departments(len(self.HOURS))
+        clearance = create_clearance(create_student(1), departments, status='in_progress')
+        now = timezone.now()
+        for department, hours in zip(departments, self.HOURS):
+            ClearanceApproval.objects.filter(clearance_request=clearance, department=department).update(
+                status='approved', created_at=now - timedelta(hours=hours), approval_date=now
+            )
+        # A pending approval has no approval_date and is ignored
+        department = Department.objects.create(
+            name='Pending', code='PD', department_type='other', head_email='p@mksu.ac.ke', approval_order=99,
+        )
+        ClearanceApproval.objects.create(clearance_request=clearance, department=department)
+
+    def _check(self, stats):
+        self.assertEqual(stats['count'], 7)
+        self.assertAlmostEqual(stats['average'] / timedelta(hours=1), sum(self.HOURS) / 7, places=3)
+        self.assertAlmostEqual(stats['percentiles'][0.5] / timedelta(hours=1), 4, places=3)
+        # PERCENTILE_CONT: position 0.9 * 6 = 5.4 -> 30 + 0.4 * (200 - 30)
+        self.assertAlmostEqual(stats['percentiles'][0.9] / timedelta(hours=1), 98, places=3)
+        histogram = dict(stats['histogram'])
+        self.assertEqual(histogram[timedelta(hours=1)], 1)
+        self.assertEqual(histogram[timedelta(hours=6)], 3)
+        self.assertEqual(histogram[timedelta(days=1)], 1)
+        self.assertEqual(histogram[timedelta(days=3)], 1)
+        self.assertEqual(histogram[timedelta(days=14)], 1)
+
+    def test_database_side_stats(self):
+        with self.assertNumQueries(4):
+            stats = duration_stats(ClearanceApproval.objects.all(), 'approval_date', 'created_at')
+        self._check(stats)
+
+    def test_streamed_fallback_matches(self):
+        with mock.patch.object(connection.features, 'supports_temporal_subtraction', False):
+            with self.assertNumQueries(1):
+                stats = duration_stats(ClearanceApproval.objects.all(), 'approval_date', 'created_at')
+        self._check(stats)
+
+    def test_empty_queryset(self):
+        stats = duration_stats(ClearanceApproval.objects.none(), 'approval_date', 'created_at')
+        self.assertEqual(stats['count'], 0)
+        self.assertIsNone(stats['average'])
+        self.assertIsNone(stats['percentiles'][0.5])
+
+    def test_approval_statistics_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        res = client.get('/api/approvals/statistics/')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        self.assertEqual(res.data['approved_count'], 7)
+        self.assertEqual(res.data['pending_count'], 1)
+        self.assertAlmostEqual(res.data['average_approval_time_hours'], round(sum(self.HOURS) / 7, 2))
+        self.assertEqual(res.data['approval_time_hours']['median'], 4.0)
+        self.assertEqual(res.data['approval_time_hours']['histogram'][0], {'upper_bound': 1.0, 'count': 1})
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.audit_logs.models import AuditLog
+from apps.notifications.models import Notification
+from apps.users.models import User
+from testutils import TEST_SETTINGS, create_admin
+
+
+@override_settings(**TEST_SETTINGS)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='student@mksu.ac.ke',
+            email='student@mksu.ac.ke',
+            password='student123456',
+            full_name='Student',
+            role='student'
+        )
+        self.client.force_authenticate(user=self.user)
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=self.user,
+                notification_type='general',
+                title=f'Notice {i}',
+                message='Hello',
+            )
+            for i in range(23)
+        ])
+        # Several rows share a timestamp so the id tiebreak matters
+        base = timezone.now()
+        for i, pk in enumerate(Notification.objects.values_list('pk', flat=True)):
+            Notification.objects.filter(pk=pk).update(created_at=base - timedelta(minutes=i // 4))
+        self.expected = list(
+            Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def _walk(self, url, params=None):
+        pages, queries = [], []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, 200, msg=res.content)
+            pages.append(res.data)
+            if not res.data['next']:
+                return pages, queries
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(res.data['next'])
+            queries.append(len(ctx.captured_queries))
+
+    def test_pages_forward_without_gaps_or_counts(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/notifications/', {'pagination': 'keyset', 'page_size': 5})
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+        pages, queries = self._walk('/api/notifications/', {'pagination': 'keyset', 'page_size': 5})
+        ids = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(ids, [str(pk) for pk in self.expected])
+        self.assertEqual([len(page['results']) for page in pages], [5, 5, 5, 5, 3])
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+        # Deep pages cost the same number of queries as the second one
+        self.assertEqual(len(set(queries)), 1)
+
+    def test_previous_links_walk_back(self):
+        pages, _ = self._walk('/api/notifications/', {'pagination': 'keyset', 'page_size': 5})
+        res = self.client.get(pages[-1]['previous'])
+        self.assertEqual([row['id'] for row in res.data['results']], [row['id'] for row in pages[-2]['results']])
+        res = self.client.get(pages[1]['previous'])
+        self.assertEqual([row['id'] for row in res.data['results']], [row['id'] for row in pages[0]['results']])
+        self.assertIsNone(res.data['previous'])
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        res = self.client.get('/api/notifications/', {'pagination': 'keyset', 'page_size': 5})
+        Notification.objects.create(recipient=self.user, notification_type='general', title='New', message='Hi')
+        res = self.client.get(res.data['next'])
+        self.assertEqual([row['id'] for row in res.data['results']], [str(pk) for pk in self.expected[5:10]])
+
+    def test_page_number_pagination_is_still_the_default(self):
+        res = self.client.get('/api/notifications/')
+        self.assertEqual(res.data['count'], 23)
+        self.assertEqual(len(res.data['results']), 20)
+
+    def test_invalid_cursor_is_rejected(self):
+        res = self.client.get('/api/notifications/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(res.status_code, 404)
+
+    def test_audit_logs_support_keyset_pagination(self):
+        admin = create_admin()
+        AuditLog.objects.bulk_create([
+            AuditLog(actor=admin, action='other', entity='Test', description=f'Entry {i}')
+            for i in range(12)
+        ])
+        self.client.force_authenticate(user=admin)
+        with self.settings(AUDIT_LOG_BUFFERED=False, AUDIT_LOG_POLICY=[{'pattern': r'^/api/audit-logs/', 'methods': ['GET'], 'mode': 'skip'}]):
+            pages, _ = self._walk('/api/audit-logs/', {'pagination': 'keyset', 'page_size': 5})
+        self.assertEqual(sum(len(page['results']) for page in pages), 12)
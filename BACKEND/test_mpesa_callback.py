@@ -0,0 +1,116 @@
+import importlib
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.finance.inbox import drain_inbox
+from apps.finance.models import Payment
+from apps.finance.mpesa import normalize_msisdn
+from apps.students.models import Student
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+CALLBACK_URL = '/api/finance/mpesa_callback/'
+
+
+def stk_callback(checkout_request_id, phone=254712345678, result_code=0, receipt='QKX1234ABC'):
+    body = {
+        'MerchantRequestID': '29115-34620561-1',
+        'CheckoutRequestID': checkout_request_id,
+        'ResultCode': result_code,
+        'ResultDesc': 'The service request is processed successfully.',
+    }
+    if result_code == 0:
+        body['CallbackMetadata'] = {'Item': [
+            {'Name': 'Amount', 'Value': 10000},
+            {'Name': 'MpesaReceiptNumber', 'Value': receipt},
+            {'Name': 'TransactionDate', 'Value': 20251216194916},
+            {'Name': 'PhoneNumber', 'Value': phone},
+        ]}
+    return {'Body': {'stkCallback': body}}
+
+
+@override_settings(**TEST_SETTINGS)
+class MpesaCallbackLookupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student_count = 0
+
+    def _payment(self, phone='0712345678', checkout_request_id=None):
+        self.student_count += 1
+        n = self.student_count
+        user = User.objects.create_user(
+            username=f'student{n}@mksu.ac.ke',
+            email=f'student{n}@mksu.ac.ke',
+            password='student123456',
+            full_name=f'Student {n}',
+            role='student'
+        )
+        student = Student.objects.create(
+            user=user,
+            registration_number=f'SCE/CS/{n:04d}/2021',
+            faculty='SCE',
+            program='Computer Science',
+            graduation_year=2025,
+        )
+        return Payment.objects.create(
+            student=student,
+            amount=10000,
+            payment_method='mpesa',
+            phone_number=phone,
+            checkout_request_id=checkout_request_id,
+        )
+
+    def test_normalize_msisdn(self):
+        for value in ('0712345678', '+254 712 345 678', '254712345678', 254712345678, '712-345-678'):
+            self.assertEqual(normalize_msisdn(value), '+254712345678')
+        for value in ('', None, '12345', '447712345678'):
+            self.assertEqual(normalize_msisdn(value), '')
+
+    def test_callback_matches_checkout_request_id_exactly(self):
+        # Same phone (e.g. a parent paying for two students)
+        first = self._payment(checkout_request_id='ws_CO_1')
+        second = self._payment(checkout_request_id='ws_CO_2')
+
+        res = self.client.post(CALLBACK_URL, stk_callback('ws_CO_2'), format='json')
+        self.assertEqual(res.data['ResultCode'], 0)
+        with CaptureQueriesContext(connection) as ctx:
+            drain_inbox()
+        self.assertFalse(any(' LIKE ' in q['sql'] for q in ctx.captured_queries))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertFalse(first.is_verified)
+        self.assertTrue(second.is_verified)
+        self.assertEqual(second.transaction_id, 'QKX1234ABC')
+
+    def test_callback_falls_back_to_normalized_phone_for_older_payments(self):
+        payment = self._payment(phone='+254 712 345 678')
+        other = self._payment(phone='0799999999')
+        self.assertEqual(payment.phone_e164, '+254712345678')
+
+        self.client.post(CALLBACK_URL, stk_callback('ws_CO_unknown'), format='json')
+        drain_inbox()
+        payment.refresh_from_db()
+        other.refresh_from_db()
+        self.assertTrue(payment.is_verified)
+        self.assertFalse(other.is_verified)
+
+    def test_phone_fallback_ignores_payments_with_a_checkout_request_id(self):
+        payment = self._payment(checkout_request_id='ws_CO_1')
+        self.client.post(CALLBACK_URL, stk_callback('ws_CO_other'), format='json')
+        drain_inbox()
+        payment.refresh_from_db()
+        self.assertFalse(payment.is_verified)
+
+    def test_backfill_normalizes_existing_phone_numbers(self):
+        payment = self._payment(phone='0712 345 678')
+        Payment.objects.update(phone_e164='')
+        migration = importlib.import_module('apps.finance.migrations.0005_payment_mpesa_lookup_keys')
+        migration.backfill_phone_e164(apps, None)
+        payment.refresh_from_db()
+        self.assertEqual(payment.phone_e164, '+254712345678')
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.finance.fake_daraja import FakeDaraja
+from apps.finance.models import Payment
+from apps.finance.mpesa import MpesaClient, MpesaError, get_mpesa_client
+from apps.students.models import Student
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class MpesaClientTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.daraja = FakeDaraja(consumer_key='key', consumer_secret='secret').start()
+        self.addCleanup(self.daraja.stop)
+
+    def _client(self, **kwargs):
+        options = dict(
+            api_url=self.daraja.url,
+            consumer_key='key',
+            consumer_secret='secret',
+            shortcode='174379',
+            passkey='passkey',
+            callback_url='https://example.com/api/finance/mpesa_callback/',
+        )
+        options.update(kwargs)
+        client = MpesaClient(**options)
+        self.addCleanup(client.close)
+        return client
+
+    def _push(self, client):
+        return client.stk_push('254712345678', 100, 'SCE/CS/0001/2021', 'Graduation Clearance')
+
+    def test_token_and_connection_are_reused(self):
+        client = self._client()
+        for _ in range(5):
+            self.assertEqual(self._push(client)['ResponseCode'], '0')
+        self.assertEqual(self.daraja.token_requests, 1)
+        self.assertEqual(len(self.daraja.stk_requests), 5)
+        self.assertEqual(self.daraja.connections, 1)
+
+    def test_token_is_shared_through_the_cache(self):
+        self._push(self._client())
+        # A client in another worker process starts with an empty memory cache
+        self._push(self._client())
+        self.assertEqual(self.daraja.token_requests, 1)
+
+    def test_token_is_renewed_before_expiry(self):
+        self.daraja.token_ttl = 30
+        client = self._client(token_margin=60)
+        self._push(client)
+        self._push(client)
+        self.assertEqual(self.daraja.token_requests, 2)
+
+    def test_rejected_token_is_refetched_once(self):
+        client = self._client()
+        self._push(client)
+        self.daraja.revoke_tokens()
+        self._push(client)
+        self.assertEqual(self.daraja.token_requests, 2)
+        self.assertEqual(len(self.daraja.stk_requests), 2)
+
+    def test_slow_daraja_times_out(self):
+        client = self._client(read_timeout=0.1)
+        client.access_token()
+        self.daraja.latency = 0.5
+        with self.assertRaises(MpesaError):
+            self._push(client)
+
+    def test_stk_push_endpoint_uses_client(self):
+        user = User.objects.create_user(
+            username='student@mksu.ac.ke',
+            email='student@mksu.ac.ke',
+            password='student123456',
+            full_name='Student',
+            role='student'
+        )
+        Student.objects.create(
+            user=user,
+            registration_number='SCE/CS/0001/2021',
+            faculty='SCE',
+            program='Computer Science',
+            graduation_year=2025,
+        )
+        api = APIClient()
+        api.force_authenticate(user=user)
+        with self.settings(MPESA_API_URL=self.daraja.url, MPESA_CONSUMER_KEY='key', MPESA_CONSUMER_SECRET='secret'):
+            self.addCleanup(get_mpesa_client().close)
+            for _ in range(2):
+                res = api.post(
+                    '/api/finance/payments/mpesa_stk_push/',
+                    {'phone_number': '0712345678', 'amount': '10000'},
+                    format='json'
+                )
+                self.assertEqual(res.status_code, 200, msg=res.content)
+            self.daraja.fail_stk_push = True
+            res = api.post(
+                '/api/finance/payments/mpesa_stk_push/',
+                {'phone_number': '0712345678', 'amount': '10000'},
+                format='json'
+            )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data['details'], 'Unable to lock subscriber')
+        self.assertEqual(self.daraja.token_requests, 1)
+        payment = Payment.objects.get()
+        self.assertEqual(payment.phone_e164, '+254712345678')
+        self.assertTrue(payment.checkout_request_id.startswith('ws_CO_'))
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.finance import inbox
+from apps.finance.models import MpesaCallback, Payment
+from apps.notifications.models import Notification
+from apps.students.models import Student
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+from test_mpesa_callback import CALLBACK_URL, stk_callback
+
+
+@override_settings(**TEST_SETTINGS)
+class MpesaCallbackInboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(
+            username='student@mksu.ac.ke',
+            email='student@mksu.ac.ke',
+            password='student123456',
+            full_name='Student',
+            role='student'
+        )
+        self.student = Student.objects.create(
+            user=user,
+            registration_number='SCE/CS/0001/2021',
+            faculty='SCE',
+            program='Computer Science',
+            graduation_year=2025,
+        )
+
+    def _payment(self, checkout_request_id='ws_CO_1'):
+        return Payment.objects.create(
+            student=self.student,
+            amount=10000,
+            payment_method='mpesa',
+            phone_number='0712345678',
+            checkout_request_id=checkout_request_id,
+        )
+
+    def _make_due(self):
+        MpesaCallback.objects.filter(status='pending').update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+    def test_callback_is_stored_and_acknowledged_without_touching_payments(self):
+        self._payment()
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(CALLBACK_URL, stk_callback('ws_CO_1'), format='json')
+        self.assertEqual(res.data, {'ResultCode': 0, 'ResultDesc': 'Success'})
+        self.assertFalse(any('"payments"' in q['sql'] for q in ctx.captured_queries))
+
+        entry = MpesaCallback.objects.get()
+        self.assertEqual(entry.status, 'pending')
+        self.assertEqual(entry.result_code, 0)
+        self.assertEqual(entry.payload, stk_callback('ws_CO_1'))
+        self.assertFalse(Payment.objects.get().is_verified)
+
+    def test_duplicate_callbacks_are_processed_once(self):
+        payment = self._payment()
+        for _ in range(3):
+            res = self.client.post(CALLBACK_URL, stk_callback('ws_CO_1'), format='json')
+            self.assertEqual(res.data['ResultCode'], 0)
+        self.assertEqual(MpesaCallback.objects.count(), 1)
+
+        self.assertEqual(inbox.drain_inbox(), {'processed': 1, 'retried': 0, 'failed': 0})
+        payment.refresh_from_db()
+        self.assertTrue(payment.is_verified)
+        self.assertEqual(MpesaCallback.objects.get().payment, payment)
+        self.assertEqual(Notification.objects.filter(notification_type='payment_verified').count(), 1)
+
+    def test_callback_arriving_before_the_payment_is_retried(self):
+        self.client.post(CALLBACK_URL, stk_callback('ws_CO_1'), format='json')
+        self.assertEqual(inbox.drain_inbox(), {'processed': 0, 'retried': 1, 'failed': 0})
+        entry = MpesaCallback.objects.get()
+        self.assertGreater(entry.next_attempt_at, timezone.now())
+        self.assertIn('No pending M-PESA payment', entry.last_error)
+
+        payment = self._payment()
+        self._make_due()
+        self.assertEqual(inbox.drain_inbox()['processed'], 1)
+        payment.refresh_from_db()
+        self.assertTrue(payment.is_verified)
+
+    def test_failed_payment_result_notifies_student(self):
+        payment = self._payment()
+        self.client.post(CALLBACK_URL, stk_callback('ws_CO_1', result_code=1032), format='json')
+        inbox.drain_inbox()
+        payment.refresh_from_db()
+        self.assertFalse(payment.is_verified)
+        self.assertTrue(Notification.objects.filter(title='Payment Failed').exists())
+        self.assertEqual(MpesaCallback.objects.get().status, 'processed')
+
+    def test_exhausted_callbacks_fail_and_can_be_replayed(self):
+        self.client.post(CALLBACK_URL, stk_callback('ws_CO_1'), format='json')
+        for _ in range(inbox.CALLBACK_MAX_ATTEMPTS):
+            self._make_due()
+            inbox.drain_inbox()
+        self.assertEqual(MpesaCallback.objects.get().status, 'failed')
+
+        payment = self._payment()
+        out = StringIO()
+        call_command('process_mpesa_callbacks', '--once', '--replay', 'ws_CO_1', stdout=out)
+        self.assertIn('Requeued 1 failed callback(s)', out.getvalue())
+        self.assertIn('Processed 1 callback(s)', out.getvalue())
+        payment.refresh_from_db()
+        self.assertTrue(payment.is_verified)
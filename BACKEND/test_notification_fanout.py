@@ -0,0 +1,84 @@
+"""
+Regression test: submitting a clearance fans notifications out with a
+constant number of queries, however many staff members need notifying.
+"""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.departments.registry import active_departments
+from apps.finance.models import Payment
+from apps.notifications.models import EmailOutbox, Notification
+from apps.users.models import User
+from testutils import TEST_SETTINGS, create_admin, create_clearance, create_departments, create_student
+
+
+@override_settings(**TEST_SETTINGS)
+class SubmitFanOutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.departments = create_departments(3)
+        # Load the department registry up front, as a running server would have
+        active_departments()
+        create_admin(username='admin@mksu.ac.ke')
+        self.staff_count = 0
+        self.student_count = 0
+
+    def _add_staff(self, per_department):
+        for department in self.departments:
+            for _ in range(per_department):
+                self.staff_count += 1
+                User.objects.create_user(
+                    username=f'staff{self.staff_count}@mksu.ac.ke',
+                    email=f'staff{self.staff_count}@mksu.ac.ke',
+                    password='staff123456',
+                    full_name=f'Staff {self.staff_count}',
+                    role='department_staff',
+                    department=department,
+                )
+
+    def _draft_clearance(self):
+        self.student_count += 1
+        n = self.student_count
+        student = create_student(n)
+        Payment.objects.create(
+            student=student,
+            amount=5500,
+            payment_method='mpesa',
+            transaction_id=f'TX{n:06d}',
+            payment_date=timezone.now(),
+            is_verified=True,
+        )
+        return create_clearance(student, self.departments, status='draft')
+
+    def _submit(self, clearance):
+        self.client.force_authenticate(user=clearance.student.user)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(f'/api/clearances/{clearance.id}/submit/', {'confirm': True}, format='json')
+        self.assertEqual(res.status_code, 200, msg=res.content)
+        return len(ctx.captured_queries)
+
+    def test_submit_query_count_does_not_grow_with_staff(self):
+        self._add_staff(1)
+        # The first submit of the day creates its rollup buckets; later ones only update them
+        self._submit(self._draft_clearance())
+        first = self._draft_clearance()
+        small = self._submit(first)
+        self.assertEqual(Notification.objects.filter(clearance=first).count(), 1 + 1 + 3)
+
+        self._add_staff(5)
+        second = self._draft_clearance()
+        large = self._submit(second)
+        self.assertEqual(Notification.objects.filter(clearance=second).count(), 1 + 1 + 18)
+
+        self.assertEqual(small, large)
+        # Only the student is emailed
+        self.assertEqual(EmailOutbox.objects.filter(notification__clearance=second).count(), 1)
+        self.assertEqual(
+            Notification.objects.filter(
+                clearance=second, notification_type='approval_pending', approval__isnull=False
+            ).count(),
+            18
+        )
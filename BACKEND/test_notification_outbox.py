@@ -0,0 +1,120 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications import outbox
+from apps.notifications.models import EmailOutbox, Notification
+from apps.notifications.utils import create_notification
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+@override_settings(
+    **TEST_SETTINGS,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            username='student@mksu.ac.ke',
+            email='student@mksu.ac.ke',
+            password='student123456',
+            full_name='Student User',
+            role='student'
+        )
+
+    def _notify(self):
+        return create_notification(
+            recipient=self.student,
+            notification_type='general',
+            title='Test Notice',
+            message='Hello world',
+        )
+
+    def test_create_notification_queues_email_without_sending(self):
+        notification = self._notify()
+        self.assertEqual(len(mail.outbox), 0)
+        entry = EmailOutbox.objects.get(notification=notification)
+        self.assertEqual(entry.status, 'pending')
+
+        stats = outbox.drain_outbox()
+        self.assertEqual(stats, {'sent': 1, 'retried': 0, 'dead': 0, 'lost': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'sent')
+        self.assertTrue(Notification.objects.get(pk=notification.pk).sent_via_email)
+
+    def test_outbox_row_rolls_back_with_notification(self):
+        from django.db import transaction
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self._notify()
+                raise RuntimeError('request failed')
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_failures_back_off_then_dead_letter(self):
+        self._notify()
+        with mock.patch('apps.notifications.utils.send_mail', side_effect=OSError('SMTP down')):
+            stats = outbox.drain_outbox()
+            self.assertEqual(stats['retried'], 1)
+            entry = EmailOutbox.objects.get()
+            self.assertEqual(entry.attempts, 1)
+            self.assertGreater(entry.next_attempt_at, timezone.now())
+            self.assertIn('SMTP down', entry.last_error)
+
+            # Not due yet, so nothing is claimed
+            self.assertEqual(outbox.drain_outbox(), {'sent': 0, 'retried': 0, 'dead': 0, 'lost': 0})
+
+            for _ in range(outbox.OUTBOX_MAX_ATTEMPTS - 1):
+                EmailOutbox.objects.update(next_attempt_at=timezone.now())
+                outbox.drain_outbox()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'dead')
+        self.assertEqual(entry.attempts, outbox.OUTBOX_MAX_ATTEMPTS)
+
+        out = StringIO()
+        call_command('process_notification_outbox', '--once', '--requeue-dead', stdout=out)
+        self.assertIn('Requeued 1', out.getvalue())
+        self.assertIn('Sent 1', out.getvalue())
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'sent')
+
+    def test_stale_claims_are_reclaimed(self):
+        self._notify()
+        self.assertEqual(len(outbox.claim_batch()), 1)
+        # A second worker cannot claim the same entry
+        self.assertEqual(outbox.claim_batch(), [])
+
+        EmailOutbox.objects.update(
+            claimed_at=timezone.now() - timedelta(seconds=outbox.OUTBOX_CLAIM_TIMEOUT_SECONDS + 1)
+        )
+        self.assertEqual(len(outbox.claim_batch()), 1)
+
+    def test_reclaimed_entry_keeps_the_new_claimants_state(self):
+        self._notify()
+        [first] = outbox.claim_batch()
+        reclaimed = []
+
+        def slow_send(notification, raise_errors=False):
+            # The claim times out while this worker is still sending
+            EmailOutbox.objects.update(
+                claimed_at=timezone.now() - timedelta(seconds=outbox.OUTBOX_CLAIM_TIMEOUT_SECONDS + 1)
+            )
+            reclaimed.extend(outbox.claim_batch())
+            return True
+
+        with mock.patch('apps.notifications.utils.send_email_notification', slow_send):
+            self.assertEqual(outbox.deliver(first), 'lost')
+        [second] = reclaimed
+        entry = EmailOutbox.objects.get()
+        self.assertEqual((entry.status, entry.claim_token, entry.attempts), ('sending', second.claim_token, 0))
+        self.assertFalse(Notification.objects.get().sent_via_email)
+
+        self.assertEqual(outbox.deliver(second), 'sent')
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('sent', 1))
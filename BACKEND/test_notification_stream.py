@@ -0,0 +1,227 @@
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.approvals.bulk import bulk_process_approvals
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.departments.models import Department
+from apps.notifications import events, tickets
+from apps.notifications.utils import create_notification
+from apps.students.models import Student
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+URL = '/api/notifications/stream/'
+
+
+def parse_sse(chunks):
+    """(event, id, data) for every event in the given chunks"""
+    parsed = []
+    for block in b''.join(chunks).decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields['event'], fields['id'], json.loads(fields['data'])))
+    return parsed
+
+
+@override_settings(**TEST_SETTINGS)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.department = Department.objects.create(
+            name='Library', code='LIB', department_type='library', head_email='lib@mksu.ac.ke', approval_order=1
+        )
+        self.user = User.objects.create_user(
+            username='student@mksu.ac.ke',
+            email='student@mksu.ac.ke',
+            password='student123456',
+            full_name='Student',
+            role='student'
+        )
+        self.staff = User.objects.create_user(
+            username='librarian@mksu.ac.ke',
+            email='librarian@mksu.ac.ke',
+            password='staff123456',
+            full_name='Librarian',
+            role='department_staff',
+            department=self.department,
+        )
+        student = Student.objects.create(
+            user=self.user,
+            registration_number='SCE/CS/0001/2021',
+            faculty='SCE',
+            program='Computer Science',
+            graduation_year=2025,
+        )
+        self.clearance = ClearanceRequest.objects.create(student=student, status='pending')
+        self.approval = ClearanceApproval.objects.create(
+            clearance_request=self.clearance, department=self.department
+        )
+
+    def _stream(self, user, **headers):
+        self.client.force_authenticate(user=user)
+        res = self.client.get(URL, HTTP_ACCEPT='text/event-stream', **headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        return res
+
+    def _notify(self, user, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(user, 'general', title, 'Hello', send_email=False)
+
+    def test_new_events_wake_the_stream_without_waiting_for_a_poll(self):
+        with mock.patch.object(events, 'POLL_SECONDS', 30), \
+                mock.patch.object(events, 'HEARTBEAT_SECONDS', 30):
+            res = self._stream(self.user)
+            body = iter(res.streaming_content)
+            self.assertTrue(next(body).startswith(b'retry: '))
+
+            self._notify(self.user, 'First')
+            [(event_type, _, data)] = parse_sse([next(body)])
+            self.assertEqual((event_type, data['title'], data['unread_count']), ('notification', 'First', 1))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.approval.approve(self.staff, notes='Books returned')
+            started = time.monotonic()
+            chunk = next(body)
+            self.assertLess(time.monotonic() - started, 5)
+            [(event_type, _, data)] = parse_sse([chunk])
+            self.assertEqual(event_type, 'approval')
+            self.assertEqual(data['status'], 'approved')
+            self.assertEqual(data['department_code'], 'LIB')
+            self.assertEqual(data['completion_percentage'], 100)
+            res.close()
+        self.assertFalse(events.broker.has_subscribers())
+
+    def test_reconnect_resumes_from_last_event_id(self):
+        since = timezone.now() - timedelta(seconds=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.approval.approve(self.staff)
+            self.clearance.status = 'completed'
+            self.clearance.save()
+        self._notify(self.user, 'Approved')
+        self._notify(self.staff, 'Not for the student')
+
+        with mock.patch.object(events, 'MAX_STREAM_SECONDS', 0):
+            res = self._stream(self.user, HTTP_LAST_EVENT_ID=events.format_event_id(since))
+            received = parse_sse(res.streaming_content)
+        self.assertEqual(
+            sorted(event_type for event_type, _, _ in received),
+            ['approval', 'clearance', 'notification'],
+        )
+        self.assertNotIn('Not for the student', [data.get('title') for _, _, data in received])
+        clearance = next(data for event_type, _, data in received if event_type == 'clearance')
+        self.assertEqual(clearance['status'], 'completed')
+
+        # Resuming from the last id sends nothing twice
+        last_id = received[-1][1]
+        with mock.patch.object(events, 'MAX_STREAM_SECONDS', 0):
+            res = self._stream(self.user, HTTP_LAST_EVENT_ID=last_id)
+            self.assertEqual(parse_sse(res.streaming_content), [])
+
+    def test_staff_only_receive_their_notifications(self):
+        since = timezone.now() - timedelta(seconds=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.approval.approve(self.staff)
+        self._notify(self.staff, 'Queue updated')
+        with mock.patch.object(events, 'MAX_STREAM_SECONDS', 0):
+            res = self._stream(self.staff, HTTP_LAST_EVENT_ID=events.format_event_id(since))
+            received = parse_sse(res.streaming_content)
+        self.assertEqual([(event_type, data['title']) for event_type, _, data in received], [('notification', 'Queue updated')])
+
+    def test_bulk_approvals_wake_the_student_stream(self):
+        subscription = events.broker.subscribe(self.user.id)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                bulk_process_approvals([self.approval.id], 'approve', self.staff)
+            self.assertTrue(subscription.wait(0))
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    def test_stream_ticket_opens_one_stream(self):
+        self.client.force_authenticate(user=self.user)
+        res = self.client.post('/api/notifications/stream_ticket/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['expires_in'], tickets.TICKET_SECONDS)
+        ticket = res.data['ticket']
+        self.client.force_authenticate(user=None)
+
+        with mock.patch.object(events, 'MAX_STREAM_SECONDS', 0):
+            res = self.client.get(URL, {'ticket': ticket}, HTTP_ACCEPT='text/event-stream')
+            self.assertEqual(res.status_code, 200)
+            b''.join(res.streaming_content)
+
+        # Single use, and never accepted as an access token
+        res = self.client.get(URL, {'ticket': ticket}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(res.status_code, 401)
+        res = self.client.get('/api/notifications/', HTTP_AUTHORIZATION=f'Bearer {ticket}')
+        self.assertEqual(res.status_code, 401)
+        res = self.client.get(URL, {'ticket': 'bogus'}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(res.status_code, 401)
+        res = self.client.get(URL, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(res.status_code, 401)
+
+    def test_stream_ticket_expires(self):
+        ticket = tickets.issue_ticket(self.user)
+        with mock.patch.object(tickets, 'TICKET_SECONDS', -1):
+            res = self.client.get(URL, {'ticket': ticket}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(res.data['detail'], 'Stream ticket expired')
+
+    def test_access_token_query_parameter_is_not_accepted(self):
+        token = str(AccessToken.for_user(self.user))
+        res = self.client.get(URL, {'access_token': token}, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(res.status_code, 401)
+
+    def test_shared_poller_wakes_streams_of_changed_users(self):
+        poller = events.ChangePoller(events.broker)
+        poller.since = timezone.now()
+        student = events.broker.subscribe(self.user.id)
+        staff = events.broker.subscribe(self.staff.id)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.approval.approve(self.staff)
+            student.wait(0)
+            self.assertEqual(poller.poll(), {self.user.id})
+            self.assertTrue(student.wait(0))
+            self.assertFalse(staff.wait(0))
+
+            self._notify(self.staff, 'Queue updated')
+            with mock.patch.object(events, 'POLL_OVERLAP', timedelta(0)):
+                self.assertEqual(poller.poll(), {self.staff.id})
+        finally:
+            events.broker.unsubscribe(student)
+            events.broker.unsubscribe(staff)
+
+    def test_idle_stream_only_reads_the_feed_when_woken(self):
+        with mock.patch.object(events, 'SHARED_POLLER', True), \
+                mock.patch.object(events.poller, 'ensure_started') as ensure_started, \
+                mock.patch.object(events, 'HEARTBEAT_SECONDS', 0.05), \
+                mock.patch.object(events.EventFeed, 'poll', autospec=True, return_value=[]) as poll:
+            body = iter(events.stream_events(self.user, max_seconds=0.2))
+            chunks = list(body)
+        ensure_started.assert_called_once_with()
+        self.assertEqual(poll.call_count, 1)
+        self.assertIn(b': keep-alive\n\n', [chunk.encode() for chunk in chunks])
+
+    def test_streams_beyond_the_process_cap_are_refused(self):
+        with mock.patch.object(events, 'MAX_CONNECTIONS', 1):
+            first = self._stream(self.user)
+            self.client.force_authenticate(user=self.staff)
+            res = self.client.get(URL, HTTP_ACCEPT='text/event-stream')
+            self.assertEqual(res.status_code, 503)
+            self.assertEqual(res['Retry-After'], str(events.RETRY_AFTER_SECONDS))
+
+            # Closing a stream that never sent anything frees its slot
+            first.close()
+            second = self._stream(self.staff)
+            second.close()
+        self.assertFalse(events.broker.has_subscribers())
@@ -0,0 +1,113 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.monitoring import profiler
+from apps.monitoring.profiler import BudgetExceeded, Sample, route_stats
+from apps.notifications.models import Notification
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+@override_settings(**TEST_SETTINGS)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profiler.reset_profiles()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@mksu.ac.ke', password='admin123456', full_name='Admin', role='admin'
+        )
+        self.client.force_authenticate(user=self.admin)
+        for i in range(3):
+            Notification.objects.create(
+                recipient=self.admin, title=f'Notice {i}', message='Hello', notification_type='system'
+            )
+
+    def _stats(self, view):
+        return next(row for row in route_stats(all_workers=False) if row['view'] == view)
+
+    def test_requests_are_profiled_per_view(self):
+        for _ in range(2):
+            res = self.client.get('/api/notifications/')
+            self.assertEqual(res.status_code, 200)
+        row = self._stats('notifications-list')
+        self.assertEqual((row['method'], row['route'], row['count']), ('GET', '/api/notifications/', 2))
+        self.assertGreater(row['queries']['max'], 0)
+        self.assertGreater(row['db_ms']['max'], 0)
+        self.assertGreater(row['render_ms']['max'], 0)
+        self.assertGreaterEqual(row['wall_ms']['p50'], row['db_ms']['p50'])
+
+        # Unresolved paths are not recorded
+        self.client.get('/api/nowhere/')
+        self.assertEqual(len(route_stats(all_workers=False)), 1)
+
+    def test_budgets_raise_or_log(self):
+        budgets = {'GET notifications-list': {'queries': 0}}
+        with mock.patch.object(profiler, 'BUDGETS', budgets):
+            with self.assertRaisesMessage(BudgetExceeded, 'GET notifications-list (/api/notifications/)'):
+                self.client.get('/api/notifications/')
+
+            with mock.patch.object(profiler, 'BUDGET_ACTION', 'log'), \
+                    mock.patch.object(profiler, 'SAMPLE_RATE', 1.0):
+                with self.assertLogs('apps.monitoring.profiler', 'WARNING') as logs:
+                    res = self.client.get('/api/notifications/')
+            self.assertEqual(res.status_code, 200)
+            self.assertIn('exceeded its budget: queries=', logs.output[0])
+
+            row = self._stats('notifications-list')
+            self.assertEqual((row['count'], row['over_budget']), (2, 2))
+            self.assertEqual(row['budget'], {'queries': 0})
+
+    def test_unsampled_requests_are_not_measured(self):
+        with mock.patch.object(profiler, 'BUDGET_ACTION', 'log'), mock.patch.object(profiler, 'SAMPLE_RATE', 0.0):
+            self.client.get('/api/notifications/')
+        self.assertEqual(route_stats(all_workers=False), [])
+
+    def test_endpoint_merges_workers_and_is_admin_only(self):
+        now = time.time()
+        other = {
+            'GET notifications-list': {
+                'route': '/api/notifications/',
+                'samples': [tuple(Sample(now, ms, 1.0, 0.5, 3, False)) for ms in range(1, 101)],
+            },
+        }
+        stale = {
+            'GET health-check': {'route': '/api/health/', 'samples': [tuple(Sample(now - 3600, 1, 0, 0, 0, False))]},
+        }
+        cache.set(profiler.WORKER_KEY_PREFIX + 'other:1', other)
+        cache.set(profiler.WORKER_KEY_PREFIX + 'other:2', stale)
+        cache.set(profiler.WORKERS_KEY, ['other:1', 'other:2'])
+
+        res = self.client.get('/api/monitoring/profiles/', {'view': 'notifications-list'})
+        self.assertEqual(res.status_code, 200)
+        # A process-local cache only ever holds this worker's windows
+        self.assertEqual(res.data['scope'], 'local')
+        self.assertEqual(len(res.data['routes']), 1)
+        row = res.data['routes'][0]
+        self.assertEqual(row['count'], 100)
+        self.assertEqual(
+            row['wall_ms'],
+            {'p50': 50, 'p95': 95, 'p99': 99, 'max': 100}
+        )
+
+        with mock.patch('apps.monitoring.views.cache_is_shared', return_value=True):
+            self.assertEqual(self.client.get('/api/monitoring/profiles/').data['scope'], 'all_workers')
+            res = self.client.get('/api/monitoring/profiles/', {'local': 'true'})
+        self.assertEqual(res.data['scope'], 'local')
+        self.assertEqual(
+            [row['view'] for row in res.data['routes']],
+            ['request-profiles'],
+        )
+        self.assertEqual(self.client.get('/api/monitoring/profiles/', {'sort': 'nope'}).status_code, 400)
+
+        self.assertEqual(self.client.delete('/api/monitoring/profiles/').status_code, 204)
+        self.assertIsNone(cache.get(profiler.WORKERS_KEY))
+
+        student = User.objects.create_user(
+            username='s@mksu.ac.ke', email='s@mksu.ac.ke', password='x', full_name='S', role='student'
+        )
+        self.client.force_authenticate(user=student)
+        self.assertEqual(self.client.get('/api/monitoring/profiles/').status_code, 403)
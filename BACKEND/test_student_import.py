@@ -0,0 +1,151 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import authenticate
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.academics.models import AcademicDepartment, Course, School
+from apps.students.importer import StudentImporter, read_csv
+from apps.students.models import Student
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+HEADER = 'Registration Number,Email,Full Name,Graduation Year,Course Code,Password\n'
+
+
+def roster(count, start=1, year=2021):
+    return ''.join(
+        f'SCE/CS/{n:04d}/{year},student{n}@mksu.ac.ke,Student {n},2025,BSC-CS,\n'
+        for n in range(start, start + count)
+    )
+
+
+@override_settings(**TEST_SETTINGS)
+class StudentImportTests(TestCase):
+    def setUp(self):
+        self.school = School.objects.create(name='School of Computing', code='SCE')
+        self.department = AcademicDepartment.objects.create(
+            school=self.school, name='Computer Science', code='CS'
+        )
+        self.course = Course.objects.create(
+            department=self.department, code='BSC-CS', name='BSc Computer Science'
+        )
+
+    def _run(self, text, **kwargs):
+        return StudentImporter(**kwargs).run(read_csv(StringIO(text)))
+
+    def test_roster_is_imported_with_a_flat_number_of_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            report = self._run(HEADER + roster(10), chunk_size=100)
+        self.assertEqual((report.rows, report.created, report.errors), (10, 10, []))
+        with CaptureQueriesContext(connection) as large:
+            report = self._run(HEADER + roster(50, start=11), chunk_size=100)
+        self.assertEqual(report.created, 50)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+        student = Student.objects.select_related('user', 'school', 'department', 'course').get(
+            registration_number='SCE/CS/0042/2021'
+        )
+        self.assertEqual(student.admission_year, 2021)
+        self.assertEqual((student.school, student.department, student.course), (self.school, self.department, self.course))
+        self.assertEqual((student.faculty, student.program), ('School of Computing', 'BSc Computer Science'))
+        self.assertEqual(student.user.role, 'student')
+        self.assertEqual(student.user.admission_number, 'SCE/CS/0042/2021')
+        self.assertFalse(student.user.has_usable_password())
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        User.objects.create_user(
+            username='taken@mksu.ac.ke', email='taken@mksu.ac.ke', password='x', full_name='Taken'
+        )
+        text = HEADER + roster(2) + (
+            'SCE/CS/0001/2021,other@mksu.ac.ke,Duplicate,2025,,\n'
+            'bad-number,bad@mksu.ac.ke,Bad,2025,,\n'
+            'SBS/AC/0001/2021,sbs@mksu.ac.ke,Unknown School,2025,,\n'
+            'SCE/CS/0005/2021,taken@mksu.ac.ke,Taken,2025,,\n'
+            'SCE/CS/0006/2021,not-an-email,No Email,next year,NOPE,\n'
+            'SCE/CS/0007/2021,inf@mksu.ac.ke,Infinite,inf,,\n'
+            'SCE/CS/0008/2021,nan@mksu.ac.ke,Not A Number,nan,,\n'
+            'SCE/CS/0009/2021,far@mksu.ac.ke,Far Future,3025,,\n'
+            ',,,,,\n'
+        )
+        report = self._run(text, chunk_size=3)
+        self.assertEqual((report.rows, report.created), (10, 2))
+        errors = {error['row']: error['errors'] for error in report.errors}
+        self.assertEqual(sorted(errors), [4, 5, 6, 7, 8, 9, 10, 11])
+        self.assertEqual(errors[9], ['graduation_year must be a year'])
+        self.assertEqual(errors[10], ['graduation_year must be a year'])
+        self.assertEqual(errors[11], ['graduation_year must be between 1900 and 2100'])
+        self.assertIn('Duplicate registration_number in the roster', errors[4])
+        self.assertIn('registration_number must follow', errors[5][0])
+        self.assertEqual(errors[6], ['Unknown school code "SBS"'])
+        self.assertEqual(errors[7], ['A user with this email already exists'])
+        self.assertEqual(len(errors[8]), 3)
+        self.assertEqual(Student.objects.count(), 2)
+
+    def test_passwords_and_dry_run(self):
+        text = HEADER + 'SCE/CS/0001/2021,own@mksu.ac.ke,Own,2025,,own-pass-123\n' + roster(1, start=2)
+        report = self._run(text, dry_run=True, default_password='welcome-2025')
+        self.assertEqual((report.valid, report.created), (2, 0))
+        self.assertFalse(Student.objects.exists())
+
+        report = self._run(text, default_password='welcome-2025', hash_workers=2)
+        self.assertEqual(report.created, 2)
+        self.assertIsNotNone(authenticate(email='own@mksu.ac.ke', password='own-pass-123'))
+        self.assertIsNotNone(authenticate(email='student2@mksu.ac.ke', password='welcome-2025'))
+
+    def test_missing_columns_fail_the_whole_roster(self):
+        res = self._admin_client().post(
+            '/api/students/import/',
+            {'file': SimpleUploadedFile('roster.csv', b'email,full_name\nx@y.z,X\n', content_type='text/csv')},
+            format='multipart',
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('registration_number', res.data['error'])
+
+    def _admin_client(self):
+        client = APIClient()
+        admin = User.objects.create_user(
+            username='admin', email='admin@mksu.ac.ke', password='admin123456', full_name='Admin', role='admin'
+        )
+        client.force_authenticate(user=admin)
+        return client
+
+    def test_admin_api_imports_an_uploaded_roster(self):
+        client = self._admin_client()
+        upload = SimpleUploadedFile(
+            'roster.csv', (HEADER + roster(3) + 'bad,x@mksu.ac.ke,X,2025,,\n').encode(), content_type='text/csv'
+        )
+        res = client.post('/api/students/import/', {'file': upload}, format='multipart')
+        self.assertEqual(res.status_code, 201, res.data)
+        self.assertEqual((res.data['created'], res.data['failed']), (3, 1))
+        self.assertEqual(res.data['errors'][0]['row'], 5)
+
+        student = User.objects.create_user(
+            username='s@mksu.ac.ke', email='s@mksu.ac.ke', password='x', full_name='S', role='student'
+        )
+        client.force_authenticate(user=student)
+        upload = SimpleUploadedFile('roster.csv', (HEADER + roster(1, start=9)).encode())
+        res = client.post('/api/students/import/', {'file': upload}, format='multipart')
+        self.assertEqual(res.status_code, 403)
+
+    def test_management_command_writes_an_error_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'roster.csv')
+            errors_path = os.path.join(tmp, 'errors.csv')
+            with open(path, 'w') as f:
+                f.write(HEADER + roster(4) + 'bad,x@mksu.ac.ke,X,2025,,\n')
+            out = StringIO()
+            call_command('import_students', path, '--errors-out', errors_path, stdout=out)
+            self.assertIn('Imported 4 of 5 student(s)', out.getvalue())
+            with open(errors_path, newline='') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([row['row'] for row in rows], ['6'])
+        self.assertEqual(Student.objects.count(), 4)
@@ -0,0 +1,99 @@
+from datetime import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F, Q
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.analytics.models import ClearanceDailyRollup
+from apps.analytics.synthetic import SyntheticDataset, flush_synthetic_data, synthetic_users
+from apps.approvals.models import ClearanceApproval
+from apps.audit_logs.models import AuditLog
+from apps.clearances.models import ClearanceRequest
+from apps.departments.models import Department
+from apps.departments.registry import invalidate_departments
+from apps.students.models import Student
+from testutils import TEST_SETTINGS
+
+
+END = timezone.make_aware(datetime(2025, 10, 1))
+
+
+@override_settings(**TEST_SETTINGS)
+class SyntheticDataTests(TestCase):
+    def setUp(self):
+        for i, kind in enumerate(['finance', 'library', 'hostel']):
+            Department.objects.create(
+                name=kind.title(), code=kind.upper(), department_type=kind,
+                head_email=f'{kind}@mksu.ac.ke', approval_order=i,
+            )
+        invalidate_departments()
+
+    def _generate(self, **kwargs):
+        options = dict(students=120, years=3, audit_logs=300, seed=7, end=END, batch_size=50)
+        options.update(kwargs)
+        return SyntheticDataset(**options).generate()
+
+    def _fingerprint(self):
+        return list(
+            ClearanceRequest.objects.order_by('pk').values_list('pk', 'status', 'created_at', 'approved_count')
+        )
+
+    def test_dataset_is_consistent_and_back_dated(self):
+        counts = self._generate()
+        self.assertEqual(counts['students'], 120)
+        self.assertEqual(counts['audit_logs'], 300)
+        self.assertEqual(counts['approvals'], counts['clearance_requests'] * 3)
+
+        statuses = set(ClearanceRequest.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, {'pending', 'in_progress', 'completed', 'rejected'})
+
+        drift = ClearanceRequest.objects.annotate(
+            approved=Count('approvals', filter=Q(approvals__status='approved')),
+            rejected=Count('approvals', filter=Q(approvals__status='rejected')),
+            pending=Count('approvals', filter=Q(approvals__status='pending')),
+        ).exclude(approved_count=F('approved'), rejected_count=F('rejected'), pending_count=F('pending'))
+        self.assertFalse(drift.exists())
+        self.assertFalse(ClearanceRequest.objects.filter(status='completed', pending_count__gt=0).exists())
+        self.assertFalse(ClearanceApproval.objects.filter(status='approved', approval_date__isnull=True).exists())
+
+        self.assertFalse(AuditLog.objects.filter(created_at__gt=END).exists())
+        approval_logs = AuditLog.objects.filter(entity='ClearanceApproval')
+        self.assertTrue(approval_logs.exists())
+        self.assertLessEqual(
+            {log.changes['status']['new'] for log in approval_logs}, {'approved', 'rejected'}
+        )
+        self.assertEqual(len(set(Student.objects.dates('created_at', 'year'))), 3)
+        self.assertEqual(
+            sum(ClearanceDailyRollup.objects.values_list('count', flat=True)),
+            counts['clearance_requests'],
+        )
+
+    def test_same_seed_gives_the_same_rows(self):
+        self._generate()
+        first = self._fingerprint()
+        flush_synthetic_data()
+        self.assertFalse(synthetic_users().exists())
+        self.assertFalse(ClearanceRequest.objects.exists())
+
+        self._generate()
+        self.assertEqual(self._fingerprint(), first)
+        flush_synthetic_data()
+        self._generate(seed=8)
+        self.assertNotEqual(self._fingerprint(), first)
+
+    def test_command_refuses_to_mix_datasets(self):
+        out = StringIO()
+        args = ['--students', '20', '--audit-logs', '50', '--end-date', '2025-10-01']
+        call_command('generate_synthetic_data', *args, stdout=out)
+        self.assertIn('✓ Generated', out.getvalue())
+        with self.assertRaisesMessage(CommandError, '--flush'):
+            call_command('generate_synthetic_data', *args, stdout=StringIO())
+
+        out = StringIO()
+        call_command('generate_synthetic_data', *args, '--flush', stdout=out)
+        self.assertIn('⊘ Deleted', out.getvalue())
+        self.assertEqual(Student.objects.count(), 20)
+
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.notifications.counters import cache_timeout
+from apps.notifications.models import Notification
+from apps.notifications.utils import create_notification, fan_out_notifications
+from apps.notifications.views import NotificationViewSet
+from apps.users.models import User
+from testutils import TEST_SETTINGS
+
+
+URL = '/api/notifications/unread_count/'
+
+
+@override_settings(
+    **TEST_SETTINGS,
+    AUDIT_LOG_POLICY=[{'pattern': r'^/api/notifications/unread_count/$', 'methods': ['GET'], 'mode': 'skip'}],
+)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='student@mksu.ac.ke',
+            email='student@mksu.ac.ke',
+            password='student123456',
+            full_name='Student',
+            role='student'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _notify(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                create_notification(self.user, 'general', f'Notice {i}', 'Hello', send_email=False)
+
+    def _count(self):
+        res = self.client.get(URL)
+        self.assertEqual(res.status_code, 200)
+        return res.data['unread_count']
+
+    def test_counter_is_served_from_cache_after_first_read(self):
+        self._notify(2)
+        self.assertEqual(self._count(), 2)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self._count(), 2)
+        self.assertFalse(any('"notifications"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_counter_follows_every_change(self):
+        self._notify(3)
+        self.assertEqual(self._count(), 3)
+
+        self._notify()
+        self.assertEqual(self._count(), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fan_out_notifications([
+                Notification(recipient=self.user, notification_type='general', title='Bulk', message='Hi')
+                for _ in range(2)
+            ])
+        self.assertEqual(self._count(), 6)
+
+        first, second = Notification.objects.filter(recipient=self.user)[:2]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/notifications/{first.id}/mark_as_read/')
+            self.client.post(f'/api/notifications/{first.id}/mark_as_read/')
+        self.assertEqual(self._count(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/notifications/{first.id}/mark_as_unread/')
+        self.assertEqual(self._count(), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/notifications/{second.id}/')
+        self.assertEqual(self._count(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/notifications/mark_all_as_read/')
+        self.assertEqual(self._count(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete('/api/notifications/delete_all_read/')
+        self.assertEqual(self._count(), 0)
+        self.assertEqual(
+            self._count(),
+            Notification.objects.filter(recipient=self.user, is_read=False).count()
+        )
+
+    def test_rolled_back_notification_is_not_counted(self):
+        self.assertEqual(self._count(), 0)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    create_notification(self.user, 'general', 'Lost', 'Hello', send_email=False)
+                    raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self._count(), 0)
+
+    def test_failed_delete_keeps_the_counter(self):
+        self._notify(2)
+        self.assertEqual(self._count(), 2)
+        notification = Notification.objects.filter(recipient=self.user).first()
+        with mock.patch.object(NotificationViewSet, 'perform_destroy', side_effect=DatabaseError), \
+                self.captureOnCommitCallbacks(execute=True), \
+                self.assertRaises(DatabaseError):
+            self.client.delete(f'/api/notifications/{notification.id}/')
+        self.assertEqual(self._count(), 2)
+
+    def test_conditional_request_returns_304(self):
+        self._notify()
+        res = self.client.get(URL)
+        etag = res['ETag']
+        self.assertIn('no-cache', res['Cache-Control'])
+
+        res = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+        self.assertFalse(res.content)
+
+        self._notify()
+        res = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['unread_count'], 2)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_process_local_cache_keeps_counters_briefly(self):
+        self.assertEqual(cache_timeout(), 5)
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(cache_timeout(), 300)
@@ -0,0 +1,73 @@
+"""
+Settings and factories shared by the test modules in this directory
+
+    @override_settings(**TEST_SETTINGS)
+    class MyTests(TestCase):
+        def setUp(self):
+            self.admin = create_admin()
+            self.departments = create_departments(3)
+            clearance = create_clearance(create_student(1), self.departments)
+"""
+from apps.approvals.models import ClearanceApproval
+from apps.clearances.models import ClearanceRequest
+from apps.departments.models import Department
+from apps.students.models import Student
+from apps.users.models import User
+
+
+# Process-local cache and a fast password hasher for every test case
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+}
+
+
+def create_admin(username='admin', email='admin@mksu.ac.ke'):
+    return User.objects.create_user(
+        username=username,
+        email=email,
+        password='admin123456',
+        full_name='Admin User',
+        role='admin'
+    )
+
+
+def create_departments(count, start=0):
+    """Departments D<start> .. D<start + count - 1>, approved in that order"""
+    return [
+        Department.objects.create(
+            name=f'Department {i}',
+            code=f'D{i}',
+            department_type='other',
+            head_email=f'd{i}@mksu.ac.ke',
+            approval_order=i,
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def create_student(n, graduation_year=2025, **fields):
+    """Student number `n` (SCE/CS/<n>/2021) with their user account"""
+    user = User.objects.create_user(
+        username=f'student{n}@mksu.ac.ke',
+        email=f'student{n}@mksu.ac.ke',
+        password='student123456',
+        full_name=f'Student {n}',
+        role='student'
+    )
+    return Student.objects.create(
+        user=user,
+        registration_number=f'SCE/CS/{n:04d}/2021',
+        faculty='SCE',
+        program='Computer Science',
+        graduation_year=graduation_year,
+        **fields
+    )
+
+
+def create_clearance(student, departments, status='pending'):
+    """Clearance request with one pending approval per department"""
+    clearance = ClearanceRequest.objects.create(student=student, status=status)
+    for department in departments:
+        ClearanceApproval.objects.create(clearance_request=clearance, department=department)
+    return clearance